@@ -14,7 +14,10 @@ Environment variables:
 """
 
 import os
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from decimal import Decimal
@@ -186,8 +189,16 @@ def is_customer_email(email_address: str, subject: str = "", content: str = "")
     }
 
 # SQLAlchemy setup (only if DATABASE_URL is provided)
+# One pooled engine is shared by the chat tools and the inbound email workers.
+DB_POOL_SIZE = int(os.getenv("MIRAI_DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("MIRAI_DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT = int(os.getenv("MIRAI_DB_POOL_TIMEOUT", "10"))  # seconds to wait for a connection
+DB_POOL_RECYCLE = int(os.getenv("MIRAI_DB_POOL_RECYCLE", "1800"))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("MIRAI_DB_STATEMENT_TIMEOUT_MS", "5000"))
+
 _engine = None
 _Session = None
+_init_lock = threading.Lock()
 
 def _init_db():
     """Initialize database connection"""
@@ -196,22 +207,34 @@ def _init_db():
         print("[dashboard_bridge] MIRAI_DATABASE_URL not set - database features disabled")
         return False
 
-    try:
-        from sqlalchemy import create_engine
-        from sqlalchemy.orm import sessionmaker
-
-        db_url = MIRAI_DATABASE_URL
-        # Convert postgres:// to postgresql://
-        if db_url.startswith("postgres://"):
-            db_url = db_url.replace("postgres://", "postgresql://", 1)
-
-        _engine = create_engine(db_url, pool_pre_ping=True)
-        _Session = sessionmaker(bind=_engine)
-        print("[dashboard_bridge] Database connection initialized")
-        return True
-    except Exception as e:
-        print(f"[dashboard_bridge] Database init failed: {e}")
-        return False
+    with _init_lock:
+        if _Session is not None:
+            return True
+        try:
+            from sqlalchemy import create_engine
+            from sqlalchemy.orm import sessionmaker
+
+            db_url = MIRAI_DATABASE_URL
+            # Convert postgres:// to postgresql://
+            if db_url.startswith("postgres://"):
+                db_url = db_url.replace("postgres://", "postgresql://", 1)
+
+            _engine = create_engine(
+                db_url,
+                pool_pre_ping=True,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_timeout=DB_POOL_TIMEOUT,
+                pool_recycle=DB_POOL_RECYCLE,
+                # Bridge queries are read-only lookups: never let one hang a chat turn
+                connect_args={"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"},
+            )
+            _Session = sessionmaker(bind=_engine)
+            print(f"[dashboard_bridge] Database connection initialized (pool={DB_POOL_SIZE}+{DB_MAX_OVERFLOW})")
+            return True
+        except Exception as e:
+            print(f"[dashboard_bridge] Database init failed: {e}")
+            return False
 
 
 def get_db_session():
@@ -223,6 +246,13 @@ def get_db_session():
     return _Session()
 
 
+@lru_cache(maxsize=None)
+def _stmt(sql: str):
+    """Build each SQL statement once; SQLAlchemy then reuses its compiled form"""
+    from sqlalchemy import text
+    return text(sql)
+
+
 # ==================== PRODUCT QUERIES ====================
 
 def get_products(limit: int = 100) -> List[Dict[str, Any]]:
@@ -232,9 +262,7 @@ def get_products(limit: int = 100) -> List[Dict[str, Any]]:
         return []
 
     try:
-        from sqlalchemy import text
-
-        query = text("""
+        query = _stmt("""
             SELECT
                 p.id, p.title as product_title, p.status,
                 v.id as variant_id, v.variant_id as shopify_variant_id,
@@ -279,19 +307,25 @@ def search_products(query: str, limit: int = 10) -> List[Dict[str, Any]]:
         return []
 
     try:
-        from sqlalchemy import text
-
-        sql = text("""
+        # Each branch can use its own pg_trgm index (an OR across the join cannot)
+        sql = _stmt("""
+            WITH matches AS (
+                SELECT v.id FROM variants v
+                JOIN products p ON v.product_id = p.id
+                WHERE LOWER(p.title) LIKE LOWER(:query)
+                UNION
+                SELECT v.id FROM variants v
+                WHERE LOWER(v.sku) LIKE LOWER(:query)
+                   OR LOWER(v.title) LIKE LOWER(:query)
+            )
             SELECT
                 p.id, p.title as product_title,
                 v.id as variant_id, v.sku, v.title as variant_title,
                 v.price, v.compare_at_price
-            FROM products p
-            JOIN variants v ON v.product_id = p.id
+            FROM matches m
+            JOIN variants v ON v.id = m.id
+            JOIN products p ON v.product_id = p.id
             WHERE p.status = 'active'
-              AND (LOWER(p.title) LIKE LOWER(:query)
-                   OR LOWER(v.sku) LIKE LOWER(:query)
-                   OR LOWER(v.title) LIKE LOWER(:query))
             ORDER BY p.title
             LIMIT :limit
         """)
@@ -323,9 +357,7 @@ def get_product_by_sku(sku: str) -> Optional[Dict[str, Any]]:
         return None
 
     try:
-        from sqlalchemy import text
-
-        sql = text("""
+        sql = _stmt("""
             SELECT
                 p.title as product_title,
                 v.sku, v.title as variant_title,
@@ -364,9 +396,7 @@ def get_customer_orders(email: str, limit: int = 10) -> List[Dict[str, Any]]:
         return []
 
     try:
-        from sqlalchemy import text
-
-        sql = text("""
+        sql = _stmt("""
             SELECT
                 o.order_name, o.created_at, o.net, o.gross,
                 o.country, o.channel, o.is_returning
@@ -505,13 +535,11 @@ def get_order_by_name(order_name: str) -> Optional[Dict[str, Any]]:
         return None
 
     try:
-        from sqlalchemy import text
-
         # Normalize order name
         if not order_name.startswith("#"):
             order_name = f"#{order_name}"
 
-        sql = text("""
+        sql = _stmt("""
             SELECT
                 o.order_name, o.shopify_gid, o.created_at, o.processed_at,
                 o.gross, o.net, o.cogs, o.country,
@@ -555,9 +583,7 @@ def get_customer_conversation_history(customer_email: str, limit: int = 10) -> L
         return []
 
     try:
-        from sqlalchemy import text
-
-        sql = text("""
+        sql = _stmt("""
             SELECT
                 se.id as email_id,
                 se.subject,
@@ -613,9 +639,7 @@ def get_customer_tracking_info(customer_email: str) -> List[Dict[str, Any]]:
         return []
 
     try:
-        from sqlalchemy import text
-
-        sql = text("""
+        sql = _stmt("""
             SELECT
                 tracking_number, carrier, status, status_detail,
                 order_number, shipped_at, delivered_at, estimated_delivery,
@@ -847,6 +871,60 @@ Priority guide:
 
 # ==================== FULL EMAIL PROCESSING ====================
 
+# Classification runs on its own small pool so the LLM round trip overlaps
+# with the customer-context lookups and Emma draft generation.
+CLASSIFY_WORKERS = int(os.getenv("EMMA_CLASSIFY_WORKERS", "4"))
+_classify_pool: Optional[ThreadPoolExecutor] = None
+_classify_pool_lock = threading.Lock()
+
+
+def _get_classify_pool() -> ThreadPoolExecutor:
+    """Lazily create the shared classification pool"""
+    global _classify_pool
+    with _classify_pool_lock:
+        if _classify_pool is None:
+            _classify_pool = ThreadPoolExecutor(
+                max_workers=max(1, CLASSIFY_WORKERS),
+                thread_name_prefix="emma_classify"
+            )
+        return _classify_pool
+
+
+def push_emails_to_dashboard_batch(emails: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Push several incoming emails to the support queue in a single request.
+    The dashboard inserts the new SupportEmail rows in one transaction, in input order.
+
+    Each item takes the same keys as push_email_to_dashboard().
+    Returns one {"success": True, "id": email_id} or {"success": False, "error": "..."}
+    per input item, in the same order.
+    """
+    if not emails:
+        return []
+    if not MIRAI_DASHBOARD_URL:
+        return [{"success": False, "error": "MIRAI_DASHBOARD_URL not configured"} for _ in emails]
+
+    try:
+        url = f"{MIRAI_DASHBOARD_URL}/webhook/support-email/batch"
+        response = requests.post(url, json={"emails": emails}, headers=_api_headers(), timeout=60)
+
+        if response.ok:
+            results = response.json().get("results", [])
+            if len(results) == len(emails):
+                print(f"[dashboard_bridge] Batch of {len(emails)} emails pushed to dashboard")
+                return [{"success": True, "id": r.get("id")} for r in results]
+            print(f"[dashboard_bridge] Batch push returned {len(results)} results for {len(emails)} emails")
+        elif response.status_code not in (404, 405):
+            error = f"HTTP {response.status_code}: {response.text[:200]}"
+            print(f"[dashboard_bridge] Batch push failed: {error}")
+            return [{"success": False, "error": error} for _ in emails]
+    except Exception as e:
+        print(f"[dashboard_bridge] push_emails_batch error: {e}")
+
+    # Older dashboards have no batch endpoint - push one by one, preserving order
+    return [push_email_to_dashboard(**e) for e in emails]
+
+
 def process_incoming_email(
     thread_id: str,
     customer_email: str,
@@ -894,12 +972,37 @@ def process_incoming_email(
     if not push_result.get("success"):
         return {"success": False, "error": push_result.get("error")}
 
-    email_id = push_result.get("id")
+    return finish_incoming_email(
+        email_id=push_result.get("id"),
+        customer_email=customer_email,
+        subject=subject,
+        content=content,
+        customer_name=customer_name,
+        sender_type=sender_type,
+        is_customer=is_customer,
+        generate_draft=generate_draft
+    )
 
-    # Step 2: Classify (with sender type info)
-    classification = classify_email(content, subject)
-    classification['sender_type'] = sender_type
-    classification['is_customer'] = is_customer
+
+def finish_incoming_email(
+    email_id: Optional[int],
+    customer_email: str,
+    subject: str,
+    content: str,
+    customer_name: Optional[str] = None,
+    sender_type: str = "customer",
+    is_customer: bool = True,
+    generate_draft: bool = True
+) -> Dict[str, Any]:
+    """
+    Classify, draft and update an email that is already in the dashboard queue
+    (steps 3-5 of process_incoming_email). Classification runs concurrently
+    with the draft generation.
+
+    Returns: {"success": True, "email_id": id, "classification": {...}, "draft": "..."}
+    """
+    # Step 2: Classify (with sender type info) - in the background while Emma drafts
+    classify_future = _get_classify_pool().submit(classify_email, content, subject)
 
     # Step 3: Generate draft (using Emma) - ONLY for real customers
     ai_draft = None
@@ -1033,6 +1136,10 @@ def process_incoming_email(
                 traceback.print_exc()
                 ai_draft = None
 
+    classification = classify_future.result()
+    classification['sender_type'] = sender_type
+    classification['is_customer'] = is_customer
+
     # Step 4: Update dashboard with classification and draft
     if email_id:
         print(f"[dashboard_bridge] Updating email_id={email_id} with status={draft_status}, classification={classification.get('classification')}, sender_type={sender_type}, draft={len(ai_draft) if ai_draft else 0} chars")
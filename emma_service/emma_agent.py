@@ -3,8 +3,10 @@
 # budget-smart bundles (aims for 75–100% of budget), soft consultative opener,
 # Shopify Admin shipping + customer context, and persuasive copy.
 
-import os, re, csv, json, random, time
-from typing import List, Dict, Optional, Any, Tuple
+import os, re, csv, json, random, time, threading
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Any, Tuple, Set, Iterator
 from dotenv import load_dotenv
 from openai import OpenAI
 
@@ -23,15 +25,28 @@ except Exception:
         pass
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# Created on first use: importing this module must not need OPENAI_API_KEY,
+# touch the network/DB or read data files (see catalog(), _file_rules())
+_client: Optional[OpenAI] = None
+
+def _openai() -> OpenAI:
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Config
 # ──────────────────────────────────────────────────────────────────────────────
 EMMA_MODEL = os.getenv("EMMA_MODEL", "gpt-4o-mini")
 MAX_TOOL_HOPS = int(os.getenv("EMMA_MAX_TOOL_HOPS", "2"))
+TOOL_WORKERS = int(os.getenv("EMMA_TOOL_WORKERS", "6"))  # concurrent tool calls within one hop
 REQUEST_TIMEOUT = 7  # seconds
 DISABLE_LIVE_PRESENTMENT = os.getenv("DISABLE_LIVE_PRESENTMENT", "1") == "1"
+CATALOG_REFRESH_SECONDS = int(os.getenv("EMMA_CATALOG_REFRESH_SECONDS", "900"))
+PRESENTMENT_TTL = int(os.getenv("EMMA_PRESENTMENT_TTL_SECONDS", "1800"))
+PRESENTMENT_HOT_GEO_SECONDS = int(os.getenv("EMMA_PRESENTMENT_HOT_GEO_SECONDS", "21600"))  # keep a geo warm 6h after last use
 BUDGET_MIN_RATIO = float(os.getenv("BUDGET_MIN_RATIO", "0.75"))  # aim ≥ 75% of budget
 
 # Shopify Admin (used for shipping, promos, customer context)
@@ -49,8 +64,6 @@ WELCOME_CODE  = os.getenv("WELCOME_OFFER_CODE")
 # ──────────────────────────────────────────────────────────────────────────────
 # GEO & Currency
 # ──────────────────────────────────────────────────────────────────────────────
-CURRENT_GEO: Optional[str] = None
-
 GEO_DEFAULT_CURRENCY = {
     "US":"USD","CA":"CAD",
     "EU":"EUR","DE":"EUR","FR":"EUR","ES":"EUR","IT":"EUR","NL":"EUR","BE":"EUR",
@@ -62,10 +75,6 @@ GEO_DEFAULT_CURRENCY = {
 CURRENCY_SYMBOL = {"USD":"$","EUR":"€","GBP":"£","ILS":"₪","CAD":"$","AUD":"A$","NZD":"NZ$","JPY":"¥","KRW":"₩","SEK":"kr","DKK":"kr"}
 EU_COUNTRIES = {"AT","BE","BG","HR","CY","CZ","DK","EE","FI","FR","DE","GR","HU","IE","IT","LV","LT","LU","MT","NL","PL","PT","RO","SK","SI","ES","SE"}
 
-def set_geo(geo: Optional[str]):
-    global CURRENT_GEO
-    CURRENT_GEO = (geo or "").strip().upper() or None
-
 def currency_symbol(ccy: Optional[str]) -> str:
     return CURRENCY_SYMBOL.get((ccy or "").upper(), "$")
 
@@ -194,15 +203,22 @@ def _refresh_shipping_cache_if_needed():
         _SHIP_CACHE = _derive_geo_rules_from_zones(zones)
         _SHIP_CACHE_STAMP = now
 
-FILE_RULES = load_shipping_policy_file()
+_FILE_RULES: Optional[Dict[str, Dict[str, Any]]] = None
+
+def _file_rules() -> Dict[str, Dict[str, Any]]:
+    global _FILE_RULES
+    if _FILE_RULES is None:
+        _FILE_RULES = load_shipping_policy_file()
+    return _FILE_RULES
 
 def get_shipping_info(geo: Optional[str]) -> Optional[Dict[str, Any]]:
-    g = (geo or CURRENT_GEO or "").strip().upper()
+    g = (geo or "").strip().upper()
     if not g:
         return None
     # 1) JSON/env overrides
-    if g in FILE_RULES:
-        return FILE_RULES[g]
+    file_rules = _file_rules()
+    if g in file_rules:
+        return file_rules[g]
     # 2) Live Shopify Admin (cached)
     _refresh_shipping_cache_if_needed()
     if g in _SHIP_CACHE:
@@ -256,7 +272,13 @@ def load_presentment_prices(path: str = "presentment_prices.json") -> Dict[str,
         return { (k or "").strip().lower(): (v or {}) for k,v in raw.items() }
     except Exception:
         return {}
-PRESENTMENT = load_presentment_prices()
+_PRESENTMENT: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None
+
+def _presentment_file() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    global _PRESENTMENT
+    if _PRESENTMENT is None:
+        _PRESENTMENT = load_presentment_prices()
+    return _PRESENTMENT
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Catalog (Database-backed with CSV fallback)
@@ -355,7 +377,8 @@ def load_products(csv_path: str = "products_graphql.csv") -> List[Dict[str, Any]
     return csv_items
 
 
-PRODUCTS: List[Dict[str, Any]] = load_products()
+# Loaded by the first catalog() call, not at import (it queries the dashboard DB)
+PRODUCTS: Optional[List[Dict[str, Any]]] = None
 
 CATEGORY_KEYWORDS = {
     "eye":["eye cream","eye patch","eye stick","eye balm"],
@@ -380,16 +403,17 @@ def categorize_product(p: Dict[str, Any]) -> str:
 
 def find_by_handle_or_title(text: str) -> Optional[Dict[str, Any]]:
     if not text: return None
+    idx = catalog()
     m = re.search(r"/products/([^/\s]+)", text, re.I)
     if m:
-        h = _norm(m.group(1))
-        for p in PRODUCTS:
-            if _norm(p.get("Handle")) == h: return p
+        p = idx.by_handle.get(_norm(m.group(1)))
+        if p: return p
     t = _norm(text)
-    for p in PRODUCTS:
-        if p.get("_title_l") == t: return p
-    for p in PRODUCTS:
-        if t and t in p.get("_title_l",""): return p
+    p = idx.by_title.get(t)
+    if p: return p
+    if t:
+        for i in idx.text_candidates(t):
+            if t in idx.products[i].get("_title_l",""): return idx.products[i]
     return None
 
 def _handle_for(p: Dict[str, Any]) -> Optional[str]:
@@ -401,45 +425,116 @@ def _handle_for(p: Dict[str, Any]) -> Optional[str]:
 # ──────────────────────────────────────────────────────────────────────────────
 # Storefront presentment (optional live)
 # ──────────────────────────────────────────────────────────────────────────────
-def fetch_storefront_presentment_min_variant(handle: str, country: str) -> Optional[Tuple[float, str]]:
+# Per-(handle, country) live presentment cache. A miss warms the whole country
+# with one paginated Storefront query; hot countries are re-warmed in the background.
+_SF_PAGE_SIZE = 100
+_PRESENTMENT_CACHE: Dict[Tuple[str, str], Optional[Tuple[float, str]]] = {}
+_PRESENTMENT_STAMPS: Dict[str, float] = {}     # country -> last warm time
+_PRESENTMENT_HOT: Dict[str, float] = {}        # country -> last lookup time
+_presentment_locks: Dict[str, threading.Lock] = {}
+_presentment_lock = threading.Lock()
+_presentment_refresher: Optional[threading.Thread] = None
+
+def fetch_storefront_presentment_catalog(country: str) -> Optional[Dict[str, Tuple[float, str]]]:
+    """Cheapest variant price per product handle for one country, paging the whole catalog"""
     if DISABLE_LIVE_PRESENTMENT:
         return None
-    if not (requests and SF_DOMAIN and SF_TOKEN and handle and country): return None
+    if not (requests and SF_DOMAIN and SF_TOKEN and country): return None
+    url = f"https://{SF_DOMAIN}/api/{SF_VER}/graphql.json"
+    headers = {"X-Shopify-Storefront-Access-Token": SF_TOKEN, "Content-Type": "application/json"}
+    query = """
+    query CatalogMinVariantPrices($country: CountryCode!, $first: Int!, $after: String) @inContext(country: $country) {
+      products(first: $first, after: $after) {
+        pageInfo { hasNextPage endCursor }
+        nodes { handle variants(first: 50) { nodes { price { amount currencyCode } } } }
+      }
+    }
+    """
+    out: Dict[str, Tuple[float, str]] = {}
+    after = None
     try:
-        url = f"https://{SF_DOMAIN}/api/{SF_VER}/graphql.json"
-        headers = {"X-Shopify-Storefront-Access-Token": SF_TOKEN, "Content-Type": "application/json"}
-        query = """
-        query MinVariantPrice($handle: String!, $country: CountryCode!) @inContext(country: $country) {
-          product(handle: $handle) { variants(first: 50) { nodes { price { amount currencyCode } } } }
-        }
-        """
-        payload = {"query": query, "variables": {"handle": handle, "country": country}}
-        resp = requests.post(url, headers=headers, json=payload, timeout=REQUEST_TIMEOUT)
-        if resp.status_code != 200: return None
-        data = resp.json() or {}
-        nodes = (data.get("data", {}).get("product", {}) or {}).get("variants", {}).get("nodes", []) or []
-        prices = [ (float(n["price"]["amount"]), str(n["price"]["currencyCode"])) for n in nodes if n.get("price") ]
-        if not prices: return None
-        prices.sort(key=lambda x: x[0])
-        return prices[0]
+        while True:
+            payload = {"query": query, "variables": {"country": country, "first": _SF_PAGE_SIZE, "after": after}}
+            resp = requests.post(url, headers=headers, json=payload, timeout=REQUEST_TIMEOUT)
+            if resp.status_code != 200: return out or None
+            products = ((resp.json() or {}).get("data") or {}).get("products") or {}
+            for node in products.get("nodes") or []:
+                prices = [ (float(n["price"]["amount"]), str(n["price"]["currencyCode"]))
+                           for n in ((node.get("variants") or {}).get("nodes") or []) if n.get("price") ]
+                if node.get("handle") and prices:
+                    out[_norm(node["handle"])] = min(prices, key=lambda x: x[0])
+            page = products.get("pageInfo") or {}
+            if not page.get("hasNextPage"): return out
+            after = page.get("endCursor")
     except Exception:
-        return None
+        return out or None
+
+def warm_presentment(country: str) -> int:
+    """Refresh cached presentment prices for every product in one country"""
+    g = (country or "").strip().upper()
+    if not g: return 0
+    with _presentment_lock:
+        lock = _presentment_locks.setdefault(g, threading.Lock())
+    with lock:
+        prices = fetch_storefront_presentment_catalog(g)
+        if prices is None:
+            # Live pricing unavailable: remember the miss for one TTL, don't retry per product
+            _PRESENTMENT_STAMPS[g] = time.time()
+            return 0
+        for k in [k for k in _PRESENTMENT_CACHE if k[1] == g and k[0] not in prices]:
+            _PRESENTMENT_CACHE.pop(k, None)
+        for h, price in prices.items():
+            _PRESENTMENT_CACHE[(h, g)] = price
+        _PRESENTMENT_STAMPS[g] = time.time()
+        return len(prices)
+
+def _presentment_refresh_loop():
+    while True:
+        time.sleep(max(30, PRESENTMENT_TTL // 2))
+        now = time.time()
+        for g, used in list(_PRESENTMENT_HOT.items()):
+            if now - used > PRESENTMENT_HOT_GEO_SECONDS:
+                _PRESENTMENT_HOT.pop(g, None)
+                continue
+            try:
+                warm_presentment(g)
+            except Exception as e:
+                print(f"[emma_agent] Presentment refresh failed for {g}: {e}")
+
+def _ensure_presentment_refresher():
+    global _presentment_refresher
+    if _presentment_refresher is not None:
+        return
+    with _presentment_lock:
+        if _presentment_refresher is None:
+            _presentment_refresher = threading.Thread(target=_presentment_refresh_loop, name="emma_presentment_refresh", daemon=True)
+            _presentment_refresher.start()
+
+def cached_presentment(handle: str, country: str) -> Optional[Tuple[float, str]]:
+    """Live presentment price from the cache; a stale or cold country is warmed in one batch"""
+    if DISABLE_LIVE_PRESENTMENT or not (handle and country): return None
+    _PRESENTMENT_HOT[country] = time.time()
+    if time.time() - _PRESENTMENT_STAMPS.get(country, 0.0) >= PRESENTMENT_TTL:
+        warm_presentment(country)
+        _ensure_presentment_refresher()
+    return _PRESENTMENT_CACHE.get((handle, country))
 
 def presentment_for(p: Dict[str, Any], geo: Optional[str]) -> Optional[Tuple[float, str]]:
     if not p: return None
-    g = (geo or CURRENT_GEO or "").strip().upper()
+    g = (geo or "").strip().upper()
     handle = _handle_for(p)
     if not handle: return None
-    live = fetch_storefront_presentment_min_variant(handle, g)
+    live = cached_presentment(handle, g)
     if live: return live
-    if handle in PRESENTMENT and g in PRESENTMENT[handle]:
-        entry = PRESENTMENT[handle][g] or {}
+    exported = _presentment_file()
+    if handle in exported and g in exported[handle]:
+        entry = exported[handle][g] or {}
         amt, ccy = entry.get("amount"), entry.get("currency")
         if isinstance(amt, (int,float)) and ccy: return float(amt), str(ccy)
     return None
 
 def geo_price_for(p: Dict[str, Any], geo: Optional[str]) -> Tuple[float, str]:
-    g = (geo or CURRENT_GEO or "").strip().upper() or "US"
+    g = (geo or "").strip().upper() or "US"
     pr = presentment_for(p, g)
     if pr: return pr
     if isinstance(p.get("GeoPrices"), dict) and g in p["GeoPrices"]:
@@ -450,14 +545,135 @@ def geo_price_for(p: Dict[str, Any], geo: Optional[str]) -> Tuple[float, str]:
     return 0.0, GEO_DEFAULT_CURRENCY.get(g, "USD")
 
 def with_geo_price(p: Dict[str, Any], geo: Optional[str]) -> Dict[str, Any]:
-    out = dict(p)
     amt, ccy = geo_price_for(p, geo)
+    return _with_price(p, amt, ccy)
+
+def _with_price(p: Dict[str, Any], amt: float, ccy: str) -> Dict[str, Any]:
+    out = dict(p)
     out["Price"] = amt
     out["Currency"] = ccy
     out["CurrencySymbol"] = currency_symbol(ccy)
     out["Link"] = out.get("product_url")
     return out
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Catalog index (built once per catalog snapshot, refreshed on a timer)
+# ──────────────────────────────────────────────────────────────────────────────
+NATURAL_KEYWORDS = ["clean","vegan","fragrance-free","unscented","mineral","zinc","titanium"]
+
+def _trigrams(s: str) -> Set[str]:
+    return {s[i:i+3] for i in range(len(s) - 2)}
+
+class CatalogIndex:
+    """
+    Lookup structures over one immutable catalog snapshot:
+    - handle / exact-title hash maps
+    - precomputed category per product (+ category -> positions)
+    - trigram inverted index over title/tags/type for substring queries
+    - per-geo price arrays, sorted once, for range queries
+    Positions are indexes into `products`; candidate sets are always
+    verified against the original predicates, so results match a full scan.
+    """
+
+    def __init__(self, products: List[Dict[str, Any]]):
+        self.products = products
+        self.by_handle: Dict[str, Dict[str, Any]] = {}
+        self.by_title: Dict[str, Dict[str, Any]] = {}
+        self.categories: List[str] = []
+        self.by_category: Dict[str, List[int]] = {}
+        self.natural: Set[int] = set()
+        self._grams: Dict[str, Set[int]] = {}
+        self._prices: Dict[str, Tuple[Optional[float], Tuple[List[float], List[str], List[float], List[int]]]] = {}
+
+        for i, p in enumerate(products):
+            h = _norm(p.get("Handle"))
+            if h: self.by_handle.setdefault(h, p)
+            self.by_title.setdefault(p.get("_title_l"), p)
+            cat = categorize_product(p)
+            self.categories.append(cat)
+            self.by_category.setdefault(cat, []).append(i)
+            hay = " ".join([p.get("_title_l",""), p.get("_tags_l",""), p.get("_type_l","")])
+            if any(k in hay for k in NATURAL_KEYWORDS): self.natural.add(i)
+            for field in ("_title_l", "_tags_l", "_type_l"):
+                for g in _trigrams(p.get(field) or ""):
+                    self._grams.setdefault(g, set()).add(i)
+
+    def text_candidates(self, q: str) -> List[int]:
+        """Positions (in catalog order) whose title/tags/type may contain q"""
+        if len(q) < 3:
+            return list(range(len(self.products)))
+        out: Optional[Set[int]] = None
+        for g in sorted(_trigrams(q), key=lambda g: len(self._grams.get(g, ()))):
+            post = self._grams.get(g)
+            if not post: return []
+            out = set(post) if out is None else out & post
+            if not out: return []
+        return sorted(out or ())
+
+    def prices(self, geo: Optional[str]) -> Tuple[List[float], List[str], List[float], List[int]]:
+        """(amount per position, currency per position, sorted amounts, positions in price order)"""
+        g = (geo or "").strip().upper() or "US"
+        stamp, cached = self._prices.get(g, (None, None))
+        if cached is None or stamp != _PRESENTMENT_STAMPS.get(g):
+            priced = [geo_price_for(p, g) for p in self.products]
+            amounts = [a for a, _ in priced]
+            order = sorted(range(len(amounts)), key=amounts.__getitem__)
+            cached = (amounts, [c for _, c in priced], [amounts[i] for i in order], order)
+            # Rebuilt whenever live presentment prices for this geo are re-warmed
+            self._prices[g] = (_PRESENTMENT_STAMPS.get(g), cached)
+        return cached
+
+    def in_price_range(self, geo: Optional[str], lo: Optional[float], hi: Optional[float]) -> Set[int]:
+        _, _, sorted_amounts, order = self.prices(geo)
+        a = bisect_left(sorted_amounts, float(lo)) if lo is not None else 0
+        b = bisect_right(sorted_amounts, float(hi)) if hi is not None else len(order)
+        return set(order[a:b])
+
+_CATALOG: Optional[CatalogIndex] = None
+_catalog_lock = threading.Lock()
+_catalog_refresher: Optional[threading.Thread] = None
+
+def catalog() -> CatalogIndex:
+    """Current catalog index (built on first use, then refreshed in the background)"""
+    global PRODUCTS, _CATALOG
+    if _CATALOG is None or _CATALOG.products is not PRODUCTS:
+        with _catalog_lock:
+            if PRODUCTS is None:
+                PRODUCTS = load_products()
+            if _CATALOG is None or _CATALOG.products is not PRODUCTS:
+                _CATALOG = CatalogIndex(PRODUCTS)
+    _ensure_catalog_refresher()
+    return _CATALOG
+
+def refresh_catalog() -> int:
+    """Reload products from the dashboard DB (CSV fallback) and swap in a new index"""
+    global PRODUCTS, _CATALOG
+    items = load_products()
+    if not items:
+        return len(PRODUCTS or [])
+    new_index = CatalogIndex(items)
+    with _catalog_lock:
+        PRODUCTS = items
+        _CATALOG = new_index
+    return len(items)
+
+def _catalog_refresh_loop():
+    while True:
+        time.sleep(CATALOG_REFRESH_SECONDS)
+        try:
+            refresh_catalog()
+        except Exception as e:
+            print(f"[emma_agent] Catalog refresh failed: {e}")
+
+def _ensure_catalog_refresher():
+    global _catalog_refresher
+    if _catalog_refresher is not None or CATALOG_REFRESH_SECONDS <= 0:
+        return
+    with _catalog_lock:
+        if _catalog_refresher is None:
+            _catalog_refresher = threading.Thread(target=_catalog_refresh_loop, name="emma_catalog_refresh", daemon=True)
+            _catalog_refresher.start()
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Catalog / Bundles
 # ──────────────────────────────────────────────────────────────────────────────
@@ -471,32 +687,36 @@ def tool_search_catalog(query: Optional[str]=None, category: Optional[str]=None,
                         min_price: Optional[float]=None, max_price: Optional[float]=None,
                         natural_only: bool=False, avoid_titles: Optional[List[str]]=None,
                         limit: int=6, geo: Optional[str]=None) -> List[Dict[str, Any]]:
-    if not PRODUCTS: return []
+    idx = catalog()
+    products = idx.products
+    if not products: return []
     avoid = set(_norm(t) for t in (avoid_titles or []))
-    def ok(p: Dict[str, Any]) -> bool:
+    amounts, currencies, sorted_amounts, _ = idx.prices(geo)
+    q = _norm(query) if query else None
+
+    cands: Optional[Set[int]] = set(idx.text_candidates(q)) if q else None
+    def narrow(positions):
+        nonlocal cands
+        cands = set(positions) if cands is None else cands & set(positions)
+    if category: narrow(idx.by_category.get(category, ()))
+    if min_price is not None or max_price is not None: narrow(idx.in_price_range(geo, min_price, max_price))
+    if natural_only: narrow(idx.natural)
+
+    def ok(i: int) -> bool:
+        p = products[i]
         if _norm(p["Title"]) in avoid: return False
-        if category and categorize_product(p) != category: return False
-        if query:
-            q = _norm(query)
-            if q not in p.get("_title_l","") and q not in p.get("_tags_l","") and q not in p.get("_type_l",""):
-                return False
-        amt,_ = geo_price_for(p, geo)
-        if min_price is not None and amt < float(min_price): return False
-        if max_price is not None and amt > float(max_price): return False
-        if natural_only:
-            hay = " ".join([p.get("_title_l",""), p.get("_tags_l",""), p.get("_type_l","")])
-            if not any(k in hay for k in ["clean","vegan","fragrance-free","unscented","mineral","zinc","titanium"]): return False
+        if q is not None and q not in p.get("_title_l","") and q not in p.get("_tags_l","") and q not in p.get("_type_l",""):
+            return False
         return True
-    results = [with_geo_price(p, geo) for p in PRODUCTS if ok(p)]
+    hits = [i for i in (sorted(cands) if cands is not None else range(len(products))) if ok(i)]
     if min_price is not None or max_price is not None:
-        prices_all = [geo_price_for(p, geo)[0] for p in PRODUCTS]
-        lo = min_price if min_price is not None else (min(prices_all) if prices_all else 0.0)
-        hi = max_price if max_price is not None else (max(prices_all) if prices_all else 0.0)
+        lo = min_price if min_price is not None else (sorted_amounts[0] if sorted_amounts else 0.0)
+        hi = max_price if max_price is not None else (sorted_amounts[-1] if sorted_amounts else 0.0)
         mid = (float(lo)+float(hi))/2.0
-        results.sort(key=lambda x: abs(x["Price"]-mid))
+        hits.sort(key=lambda i: abs(amounts[i]-mid))
     else:
-        results.sort(key=lambda x: x["Price"], reverse=True)
-    return results[:max(1, min(limit, 12))]
+        hits.sort(key=lambda i: amounts[i], reverse=True)
+    return [_with_price(products[i], amounts[i], currencies[i]) for i in hits[:max(1, min(limit, 12))]]
 
 def _pick_items_to_budget(cands: List[Dict[str, Any]], budget: float, min_ratio: float) -> Tuple[List[Dict[str,Any]], float]:
     target_min = max(0.0, budget * min_ratio)
@@ -524,24 +744,27 @@ def _pick_items_to_budget(cands: List[Dict[str, Any]], budget: float, min_ratio:
 def tool_similar_to(base_title: str, band: str="similar", limit: int=3, geo: Optional[str]=None) -> List[Dict[str, Any]]:
     base = find_by_handle_or_title(base_title) or find_by_handle_or_title(base_title or "")
     if not base: return []
+    idx = catalog()
+    amounts, currencies, _, _ = idx.prices(geo)
     cat = categorize_product(base)
     base_amt,_ = geo_price_for(base, geo)
-    cands = [p for p in PRODUCTS if categorize_product(p)==cat and p["Title"]!=base["Title"]]
-    def amt(p): return geo_price_for(p, geo)[0]
+    cands = [i for i in idx.by_category.get(cat, []) if idx.products[i]["Title"]!=base["Title"]]
+    def amt(i): return amounts[i]
     if band=="premium":
-        cands = [p for p in cands if amt(p)>base_amt]; cands.sort(key=lambda p:(amt(p)-base_amt,-amt(p)))
+        cands = [i for i in cands if amt(i)>base_amt]; cands.sort(key=lambda i:(amt(i)-base_amt,-amt(i)))
     elif band=="budget":
-        cands = [p for p in cands if amt(p)<base_amt]; cands.sort(key=lambda p:(base_amt-amt(p),amt(p)))
+        cands = [i for i in cands if amt(i)<base_amt]; cands.sort(key=lambda i:(base_amt-amt(i),amt(i)))
     elif band=="mid":
         lo,hi = base_amt*1.2, base_amt*2.0
-        cands = [p for p in cands if lo<=amt(p)<=hi]; cands.sort(key=lambda p:abs(amt(p)-base_amt*1.5))
+        cands = [i for i in cands if lo<=amt(i)<=hi]; cands.sort(key=lambda i:abs(amt(i)-base_amt*1.5))
     else:
-        cands.sort(key=lambda p:abs(amt(p)-base_amt))
-    return [with_geo_price(p, geo) for p in cands[:max(1, min(limit, 6))]]
+        cands.sort(key=lambda i:abs(amt(i)-base_amt))
+    return [_with_price(idx.products[i], amounts[i], currencies[i]) for i in cands[:max(1, min(limit, 6))]]
 
 def tool_complements_for(base_title: str, limit: int=3, geo: Optional[str]=None) -> List[Dict[str, Any]]:
     base = find_by_handle_or_title(base_title)
     if not base: return []
+    idx = catalog()
     base_cat = categorize_product(base)
     comp = {
         "gua_sha":["oil","serum","moisturizer"], "serum":["moisturizer","sunscreen"],
@@ -553,10 +776,9 @@ def tool_complements_for(base_title: str, limit: int=3, geo: Optional[str]=None)
     }.get(base_cat, ["serum","moisturizer","sunscreen"])
     out: List[Dict[str, Any]] = []
     for c in comp:
-        for p in PRODUCTS:
-            if categorize_product(p)==c:
-                out.append(with_geo_price(p, geo))
-                if len(out)>=limit: return out
+        for i in idx.by_category.get(c, []):
+            out.append(with_geo_price(idx.products[i], geo))
+            if len(out)>=limit: return out
     return out[:limit]
 
 def tool_compose_bundle(base_title: str, limit: int=3, budget: Optional[float]=None, geo: Optional[str]=None) -> Dict[str, Any]:
@@ -1758,10 +1980,77 @@ Customer needs QUICK help:
     msgs.append({"role":"user","content":"Context\n" + "\n".join(ctx) + f"\n\nUser: {customer_msg}"})
     return msgs
 
+def dispatch_tool(name: str, args: Dict[str, Any], geo: Optional[str]=None) -> Any:
+    """Run one tool call by name and return its JSON-serialisable result"""
+    # SALES TOOLS
+    if name == "search_catalog":
+        return tool_search_catalog(query=args.get("query"), category=args.get("category"),
+                                   min_price=args.get("min_price"), max_price=args.get("max_price"),
+                                   natural_only=args.get("natural_only", False),
+                                   avoid_titles=args.get("avoid_titles"), limit=args.get("limit", 6), geo=geo)
+    elif name == "similar_to":
+        return tool_similar_to(base_title=args.get("base_title",""), band=args.get("band","similar"),
+                               limit=args.get("limit", 3), geo=geo)
+    elif name == "complements_for":
+        return tool_complements_for(base_title=args.get("base_title",""),
+                                    limit=args.get("limit", 3), geo=geo)
+    elif name == "compose_bundle":
+        return tool_compose_bundle(base_title=args.get("base_title",""), limit=args.get("limit", 3),
+                                   budget=args.get("budget"), geo=geo)
+    elif name == "get_promos":
+        return list_active_promos()
+    elif name == "get_shipping":
+        g = args.get("geo") or geo
+        return get_shipping_info(g) or {}
+    # SUPPORT TOOLS
+    elif name == "get_customer_orders":
+        return tool_get_customer_orders(email=args.get("email", ""), limit=args.get("limit", 5))
+    elif name == "get_order_details":
+        return tool_get_order_details(order_name=args.get("order_name", ""))
+    elif name == "check_order_status":
+        return tool_check_order_status(email=args.get("email", ""), order_name=args.get("order_name"))
+    elif name == "get_customer_profile":
+        return tool_get_customer_profile(email=args.get("email", ""))
+    elif name == "track_package":
+        return tool_track_package(tracking_number=args.get("tracking_number", ""), carrier=args.get("carrier"))
+    # EXPERTISE TOOLS
+    elif name == "get_skincare_advice":
+        return tool_get_skincare_advice(concern=args.get("concern", ""), skin_type=args.get("skin_type"))
+    return {"error": f"unknown tool {name}"}
+
+_tool_pool: Optional[ThreadPoolExecutor] = None
+_tool_pool_lock = threading.Lock()
+
+def _get_tool_pool() -> ThreadPoolExecutor:
+    global _tool_pool
+    with _tool_pool_lock:
+        if _tool_pool is None:
+            _tool_pool = ThreadPoolExecutor(max_workers=max(1, TOOL_WORKERS), thread_name_prefix="emma_tool")
+        return _tool_pool
+
+def _run_tool_calls(tool_calls: List[Dict[str, Any]], geo: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Execute all tool calls of one hop concurrently (bounded pool) and return
+    the tool messages in the same order as the calls.
+    """
+    def run(tc: Dict[str, Any]) -> Dict[str, Any]:
+        name = tc["function"]["name"]
+        try: args = json.loads(tc["function"]["arguments"] or "{}")
+        except Exception: args = {}
+        try:
+            data = dispatch_tool(name, args, geo)
+        except Exception as e:
+            data = {"error": str(e)}
+        return {"role":"tool","tool_call_id": tc["id"],"name": name,"content": json.dumps(data, ensure_ascii=False)}
+    if len(tool_calls) == 1:
+        return [run(tool_calls[0])]
+    return list(_get_tool_pool().map(run, tool_calls))
+
 def run_gpt_with_tools(messages: List[Dict[str,str]], geo: Optional[str]=None) -> str:
-    set_geo(geo)
+    # geo is threaded through explicitly: chats run concurrently in worker threads
+    geo = (geo or "").strip().upper() or None
     hops = 0
-    resp = client.chat.completions.create(model=EMMA_MODEL, messages=messages, tools=TOOLS, tool_choice="auto", temperature=0.3)
+    resp = _openai().chat.completions.create(model=EMMA_MODEL, messages=messages, tools=TOOLS, tool_choice="auto", temperature=0.3)
     while True:
         msg = resp.choices[0].message
         if not getattr(msg, "tool_calls", None):
@@ -1769,7 +2058,7 @@ def run_gpt_with_tools(messages: List[Dict[str,str]], geo: Optional[str]=None) -
 
         if hops >= MAX_TOOL_HOPS:
             messages.append({"role":"system","content":"Stop calling tools. Finalize your answer crisply now."})
-            resp = client.chat.completions.create(model=EMMA_MODEL, messages=messages, temperature=0.2)
+            resp = _openai().chat.completions.create(model=EMMA_MODEL, messages=messages, temperature=0.2)
             return (resp.choices[0].message.content or "").strip()
 
         assistant_msg = {"role":"assistant","content": msg.content or None,"tool_calls": []}
@@ -1779,51 +2068,52 @@ def run_gpt_with_tools(messages: List[Dict[str,str]], geo: Optional[str]=None) -
                 "function": {"name": tc.function.name, "arguments": tc.function.arguments or "{}"}
             })
         messages.append(assistant_msg)
+        messages.extend(_run_tool_calls(assistant_msg["tool_calls"], geo))
 
-        for tc in msg.tool_calls:
-            name = tc.function.name
-            try: args = json.loads(tc.function.arguments or "{}")
-            except Exception: args = {}
-            # SALES TOOLS
-            if name == "search_catalog":
-                data = tool_search_catalog(query=args.get("query"), category=args.get("category"),
-                                           min_price=args.get("min_price"), max_price=args.get("max_price"),
-                                           natural_only=args.get("natural_only", False),
-                                           avoid_titles=args.get("avoid_titles"), limit=args.get("limit", 6), geo=CURRENT_GEO)
-            elif name == "similar_to":
-                data = tool_similar_to(base_title=args.get("base_title",""), band=args.get("band","similar"),
-                                       limit=args.get("limit", 3), geo=CURRENT_GEO)
-            elif name == "complements_for":
-                data = tool_complements_for(base_title=args.get("base_title",""),
-                                            limit=args.get("limit", 3), geo=CURRENT_GEO)
-            elif name == "compose_bundle":
-                data = tool_compose_bundle(base_title=args.get("base_title",""), limit=args.get("limit", 3),
-                                           budget=args.get("budget"), geo=CURRENT_GEO)
-            elif name == "get_promos":
-                data = list_active_promos()
-            elif name == "get_shipping":
-                g = args.get("geo") or CURRENT_GEO
-                data = get_shipping_info(g) or {}
-            # SUPPORT TOOLS
-            elif name == "get_customer_orders":
-                data = tool_get_customer_orders(email=args.get("email", ""), limit=args.get("limit", 5))
-            elif name == "get_order_details":
-                data = tool_get_order_details(order_name=args.get("order_name", ""))
-            elif name == "check_order_status":
-                data = tool_check_order_status(email=args.get("email", ""), order_name=args.get("order_name"))
-            elif name == "get_customer_profile":
-                data = tool_get_customer_profile(email=args.get("email", ""))
-            elif name == "track_package":
-                data = tool_track_package(tracking_number=args.get("tracking_number", ""), carrier=args.get("carrier"))
-            # EXPERTISE TOOLS
-            elif name == "get_skincare_advice":
-                data = tool_get_skincare_advice(concern=args.get("concern", ""), skin_type=args.get("skin_type"))
-            else:
-                data = {"error": f"unknown tool {name}"}
-            messages.append({"role":"tool","tool_call_id": tc.id,"name": name,"content": json.dumps(data, ensure_ascii=False)})
+        hops += 1
+        resp = _openai().chat.completions.create(model=EMMA_MODEL, messages=messages, tools=TOOLS, tool_choice="auto", temperature=0.25)
+
+def stream_gpt_with_tools(messages: List[Dict[str,str]], geo: Optional[str]=None) -> Iterator[str]:
+    """
+    Streaming variant of run_gpt_with_tools: yields answer tokens as they arrive.
+    Tool-call hops are accumulated from the stream and executed like the blocking version.
+    """
+    geo = (geo or "").strip().upper() or None
+    hops = 0
+    kwargs = {"tools": TOOLS, "tool_choice": "auto", "temperature": 0.3}
+    while True:
+        stream = _openai().chat.completions.create(model=EMMA_MODEL, messages=messages, stream=True, **kwargs)
+        content: List[str] = []
+        calls: Dict[int, Dict[str, Any]] = {}
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if getattr(delta, "content", None):
+                content.append(delta.content)
+                yield delta.content
+            for tc in getattr(delta, "tool_calls", None) or []:
+                call = calls.setdefault(tc.index, {"id": None, "type": "function", "function": {"name": "", "arguments": ""}})
+                if tc.id: call["id"] = tc.id
+                if tc.function and tc.function.name: call["function"]["name"] += tc.function.name
+                if tc.function and tc.function.arguments: call["function"]["arguments"] += tc.function.arguments
+
+        if not calls:
+            return
+
+        if hops >= MAX_TOOL_HOPS:
+            messages.append({"role":"system","content":"Stop calling tools. Finalize your answer crisply now."})
+            kwargs = {"temperature": 0.2}
+            continue
+
+        tool_calls = [calls[i] for i in sorted(calls)]
+        for tc in tool_calls:
+            tc["function"]["arguments"] = tc["function"]["arguments"] or "{}"
+        messages.append({"role":"assistant","content": "".join(content) or None,"tool_calls": tool_calls})
+        messages.extend(_run_tool_calls(tool_calls, geo))
 
         hops += 1
-        resp = client.chat.completions.create(model=EMMA_MODEL, messages=messages, tools=TOOLS, tool_choice="auto", temperature=0.25)
+        kwargs = {"tools": TOOLS, "tool_choice": "auto", "temperature": 0.25}
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Public API
@@ -1854,7 +2144,6 @@ def respond_as_emma(first_name: str, cart_items: List[str], customer_msg: str,
     if history is None:
         history = []
     inferred_geo = infer_geo_from_text(customer_msg, fallback=geo or "EU")
-    set_geo(inferred_geo)
 
     if first_contact:
         # Gentle first touch; explain why you're reaching out; no prices.
@@ -1869,3 +2158,33 @@ def respond_as_emma(first_name: str, cart_items: List[str], customer_msg: str,
     except Exception:
         pass
     return out
+
+
+def stream_as_emma(first_name: str, cart_items: List[str], customer_msg: str,
+                   history: Optional[List[Dict[str, Any]]] = None, first_contact: bool=False,
+                   geo: Optional[str]=None, style_mode: Optional[str]=None,
+                   customer_email: Optional[str]=None,
+                   user_hints: Optional[str]=None) -> Iterator[str]:
+    """
+    Streaming version of respond_as_emma (same arguments).
+    Yields Emma's response in chunks as the model produces them.
+    """
+    if history is None:
+        history = []
+    inferred_geo = infer_geo_from_text(customer_msg, fallback=geo or "EU")
+
+    if first_contact:
+        yield deterministic_opener(first_name, cart_items)
+        return
+
+    msgs = build_messages(first_name, cart_items, customer_msg, history, extra_system=None,
+                          geo=inferred_geo, style_mode=style_mode, customer_email=customer_email,
+                          user_hints=user_hints)
+    parts: List[str] = []
+    for chunk in stream_gpt_with_tools(msgs, geo=inferred_geo):
+        parts.append(chunk)
+        yield chunk
+    try:
+        save_message(email="", role="emma", content="".join(parts).strip())
+    except Exception:
+        pass
@@ -1,10 +1,11 @@
 # gmail_poller.py
 # Runs an IMAP poller in a background thread. Exposes start/stop/status/force/reset.
-# Now also pushes emails to Mirai Dashboard for AI classification and draft generation.
+# Now also pushes emails to Mirai Dashboard for AI classification and draft generation
+# through a bounded queue with concurrent workers (see "Processing pipeline" below).
 # Supports MULTIPLE email accounts (emma@ and support@)
 
 from __future__ import annotations
-import os, time, imaplib, email, requests, re, sys, threading
+import os, time, imaplib, email, requests, re, sys, threading, queue, zlib
 from html import unescape
 from email.header import decode_header
 from typing import Optional, List, Dict, Any
@@ -17,12 +18,13 @@ except Exception:
 
 # Dashboard bridge for pushing emails to Mirai Dashboard
 try:
-    from dashboard_bridge import process_incoming_email, MIRAI_DASHBOARD_URL
+    from dashboard_bridge import (
+        finish_incoming_email, push_emails_to_dashboard_batch,
+        is_customer_email, MIRAI_DASHBOARD_URL
+    )
     DASHBOARD_ENABLED = bool(MIRAI_DASHBOARD_URL)
 except ImportError:
     DASHBOARD_ENABLED = False
-    def process_incoming_email(*args, **kwargs):
-        return {"success": False, "error": "dashboard_bridge not available"}
 
 # ---- Multi-Account Config ----
 # Account 1: Emma (sales/abandoned cart)
@@ -60,6 +62,17 @@ POLL_SECONDS  = int(os.getenv("INBOUND_POLL_SECONDS") or os.getenv("IMAP_POLL_SE
 # Legacy webhook - disabled by default, only enable if explicitly set
 WEBHOOK_URL   = os.getenv("INBOUND_WEBHOOK_URL", "")
 
+# ---- Processing pipeline ----
+# fetch (IMAP loop) -> bounded intake queue -> batcher (one dashboard insert per batch)
+# -> per-worker queues -> N workers (legacy webhook post, classification + Emma draft
+# + update). Nothing slow runs on the IMAP loop itself.
+# Emails are routed to workers by customer, so a customer thread is always handled
+# by the same worker and its messages are processed in arrival order.
+WORKERS          = int(os.getenv("INBOUND_WORKERS") or "4")
+QUEUE_SIZE       = int(os.getenv("INBOUND_QUEUE_SIZE") or "200")
+BATCH_SIZE       = int(os.getenv("INBOUND_BATCH_SIZE") or "25")
+BATCH_WAIT_SECS  = float(os.getenv("INBOUND_BATCH_WAIT_SECONDS") or "1.0")
+
 _state = {
     "running": False,
     "last_cycle": None,
@@ -69,6 +82,19 @@ _state = {
 }
 _thread: Optional[threading.Thread] = None
 
+_intake: "queue.Queue[dict]" = queue.Queue(maxsize=QUEUE_SIZE)
+_worker_queues: List["queue.Queue[dict]"] = []
+_pipeline_threads: List[threading.Thread] = []
+_pipeline_lock = threading.Lock()
+_pipeline_stats = {"enqueued": 0, "pushed": 0, "processed": 0, "failed": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(key: str):
+    """Bump a pipeline counter (called from the batcher and all workers)"""
+    with _stats_lock:
+        _pipeline_stats[key] += 1
+
 def _fatal_if_missing_creds():
     accounts = _get_active_accounts()
     if not accounts:
@@ -102,37 +128,149 @@ def _post_webhook(payload: dict):
         print("[gmail-poller] post error:", e)
 
 
-def _push_to_dashboard(payload: dict):
-    """Push email to Mirai Dashboard for AI processing and human review"""
-    if not DASHBOARD_ENABLED:
-        return
+def _customer_name(payload: dict) -> Optional[str]:
+    """Extract customer name from the From header if available"""
+    from_header = payload.get("from_header", "")
+    if from_header and "<" in from_header:
+        return from_header.split("<")[0].strip().strip('"')
+    return None
+
+
+def _thread_key(payload: dict) -> str:
+    """Ordering key: all messages from one customer are processed sequentially"""
+    return (payload.get("email") or "").lower() or payload.get("thread_id") or payload.get("message_id") or ""
+
+
+def _log_result(result: dict):
+    if result.get("success"):
+        print(f"[gmail-poller] → dashboard: email_id={result.get('email_id')}, "
+              f"classification={result.get('classification', {}).get('classification')}")
+    else:
+        print(f"[gmail-poller] → dashboard failed: {result.get('error')}")
+
+
+def _enqueue(payload: dict):
+    """Hand a fetched email to the processing pipeline (blocks when the queue is full)"""
+    _ensure_pipeline()
+    _intake.put(payload)
+    _count("enqueued")
+
+
+def _push_batch(batch: List[dict]):
+    """Insert a batch of emails in the dashboard, then fan out to the workers"""
+    results = _insert_batch(batch) if DASHBOARD_ENABLED else [None] * len(batch)
+    for payload, push_result in zip(batch, results):
+        if push_result is not None:
+            if not push_result.get("success"):
+                _count("failed")
+                print(f"[gmail-poller] → dashboard failed: {push_result.get('error')}")
+                if not WEBHOOK_URL:
+                    continue
+            else:
+                _count("pushed")
+                payload["_email_id"] = push_result.get("id")
+        idx = zlib.crc32(_thread_key(payload).encode("utf-8")) % len(_worker_queues)
+        _worker_queues[idx].put(payload)
+
+
+def _insert_batch(batch: List[dict]) -> List[dict]:
+    """One dashboard insert for the batch; a result per email"""
+    items = []
+    for payload in batch:
+        sender_check = is_customer_email(payload.get("email", ""), payload.get("subject", ""), payload.get("body_text", ""))
+        payload["_sender_check"] = sender_check
+        items.append({
+            "thread_id": payload.get("thread_id") or payload.get("message_id") or "",
+            "customer_email": payload.get("email", ""),
+            "subject": payload.get("subject", ""),
+            "content": payload.get("body_text", ""),
+            "customer_name": _customer_name(payload),
+            "content_html": payload.get("body_html"),
+            "message_id": payload.get("message_id"),
+            "inbox_type": payload.get("inbox_name") or payload.get("inbox_type") or "support",
+            "sender_type": sender_check.get("sender_type", "customer"),
+        })
 
     try:
-        # Extract customer name from email if available
-        customer_name = None
-        from_header = payload.get("from_header", "")
-        if from_header and "<" in from_header:
-            customer_name = from_header.split("<")[0].strip().strip('"')
-
-        result = process_incoming_email(
-            thread_id=payload.get("thread_id") or payload.get("message_id") or "",
-            customer_email=payload.get("email", ""),
-            subject=payload.get("subject", ""),
-            content=payload.get("body_text", ""),
-            customer_name=customer_name,
-            content_html=payload.get("body_html"),
-            message_id=payload.get("message_id"),
-            inbox_type=payload.get("inbox_name") or payload.get("inbox_type") or "support",
-            generate_draft=True  # Have Emma generate a draft response
-        )
-
-        if result.get("success"):
-            print(f"[gmail-poller] → dashboard: email_id={result.get('email_id')}, "
-                  f"classification={result.get('classification', {}).get('classification')}")
-        else:
-            print(f"[gmail-poller] → dashboard failed: {result.get('error')}")
+        return push_emails_to_dashboard_batch(items)
     except Exception as e:
-        print(f"[gmail-poller] dashboard error: {e}")
+        return [{"success": False, "error": str(e)} for _ in items]
+
+
+def _batcher_loop():
+    """Drain the intake queue into batches of up to BATCH_SIZE emails"""
+    while True:
+        batch = [_intake.get()]
+        deadline = time.time() + BATCH_WAIT_SECS
+        while len(batch) < BATCH_SIZE:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_intake.get(timeout=remaining))
+            except queue.Empty:
+                break
+        try:
+            _push_batch(batch)
+        except Exception as e:
+            print(f"[gmail-poller] batch error: {e}")
+        finally:
+            for _ in batch:
+                _intake.task_done()
+
+
+def _worker_loop(q: "queue.Queue[dict]"):
+    """Post to the legacy webhook, then classify and draft emails inserted in the dashboard"""
+    while True:
+        payload = q.get()
+        try:
+            _post_webhook(payload)
+            if "_email_id" not in payload:
+                continue
+            sender_check = payload.get("_sender_check") or {}
+            result = finish_incoming_email(
+                email_id=payload.get("_email_id"),
+                customer_email=payload.get("email", ""),
+                subject=payload.get("subject", ""),
+                content=payload.get("body_text", ""),
+                customer_name=_customer_name(payload),
+                sender_type=sender_check.get("sender_type", "customer"),
+                is_customer=sender_check.get("is_customer", True),
+                generate_draft=True
+            )
+            _count("processed")
+            _log_result(result)
+        except Exception as e:
+            _count("failed")
+            print(f"[gmail-poller] dashboard error: {e}")
+        finally:
+            q.task_done()
+
+
+def _ensure_pipeline():
+    """Start the batcher and worker threads once"""
+    with _pipeline_lock:
+        if _pipeline_threads:
+            return
+        for i in range(max(1, WORKERS)):
+            q: "queue.Queue[dict]" = queue.Queue(maxsize=QUEUE_SIZE)
+            _worker_queues.append(q)
+            t = threading.Thread(target=_worker_loop, args=(q,), name=f"gmail_worker_{i}", daemon=True)
+            t.start()
+            _pipeline_threads.append(t)
+        t = threading.Thread(target=_batcher_loop, name="gmail_batcher", daemon=True)
+        t.start()
+        _pipeline_threads.append(t)
+        print(f"[gmail-poller] pipeline started: {len(_worker_queues)} workers, batch={BATCH_SIZE}, queue={QUEUE_SIZE}")
+
+
+def _drain_pipeline():
+    """Block until every enqueued email has been fully processed"""
+    if not _pipeline_threads:
+        return
+    _intake.join()
+    for q in _worker_queues:
+        q.join()
 
 def _cycle_account(account: Dict[str, Any]):
     """Poll a single email account for new messages"""
@@ -218,8 +356,8 @@ def _cycle_account(account: Dict[str, Any]):
             }
 
             print(f"[gmail-poller:{account_name}] New email from {from_addr}: {subj[:50]}")
-            _post_webhook(payload)
-            _push_to_dashboard(payload)
+            if DASHBOARD_ENABLED or WEBHOOK_URL:
+                _enqueue(payload)
     finally:
         try:
             M.close()
@@ -275,11 +413,18 @@ def get_gmail_poller_status():
         "last_error": _state["last_error"],
         "accounts": [{"name": a["name"], "user": a["user"], "type": a["type"]} for a in accounts],
         "accounts_status": _state.get("accounts_status", {}),
+        "pipeline": {
+            "workers": len(_worker_queues),
+            "queued": _intake.qsize(),
+            "in_workers": sum(q.qsize() for q in _worker_queues),
+            **_pipeline_stats,
+        },
     }
 
 def force_cycle():
-    # Run one immediate cycle in the current thread
+    # Run one immediate cycle in the current thread and wait for its emails
     _cycle()
+    _drain_pipeline()
     _state["last_cycle"] = time.time()
 
 def reset_cursor():
@@ -9,6 +9,7 @@ import os
 import asyncio
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 
@@ -19,7 +20,7 @@ from gmail_poller import (
 )
 
 # Emma agent
-from emma_agent import respond_as_emma, detect_emotional_state
+from emma_agent import respond_as_emma, stream_as_emma, detect_emotional_state
 
 app = FastAPI(title="Emma Service", version="1.0.0")
 
@@ -41,6 +42,7 @@ class ChatRequest(BaseModel):
     cart_items: Optional[List[str]] = []
     geo: Optional[str] = None
     history: Optional[List[Dict[str, Any]]] = []
+    stream: Optional[bool] = False  # Stream response tokens as plain text
 
 
 class ChatResponse(BaseModel):
@@ -109,6 +111,9 @@ async def chat(req: ChatRequest):
     """
     Send a message to Emma and get a response.
     Used for testing or direct API integration.
+
+    With "stream": true the reply is streamed as text/plain chunks as the model
+    produces them; the detected emotional state is sent in the X-Emotional-State header.
     """
     try:
         # Detect emotional state
@@ -119,7 +124,7 @@ async def chat(req: ChatRequest):
         if req.customer_name:
             first_name = req.customer_name.split()[0]
 
-        response = respond_as_emma(
+        kwargs = dict(
             first_name=first_name,
             cart_items=req.cart_items or [],
             customer_msg=req.message,
@@ -129,6 +134,16 @@ async def chat(req: ChatRequest):
             customer_email=req.customer_email
         )
 
+        if req.stream:
+            return StreamingResponse(
+                stream_as_emma(**kwargs),
+                media_type="text/plain; charset=utf-8",
+                headers={"X-Emotional-State": emotion["primary_emotion"]}
+            )
+
+        # Blocking OpenAI/tool calls run off the event loop
+        response = await asyncio.to_thread(respond_as_emma, **kwargs)
+
         return ChatResponse(
             response=response,
             emotional_state=emotion
@@ -0,0 +1,358 @@
+"""
+Ad creative renderer - declarative templates over product / lifestyle photos
+
+Replaces the one-function-per-ad script in src/features/meta-ads/add_text_to_ads.py.
+A template is plain data:
+
+    {
+      "gradients": [{"edge": "top", "height": 180, "alpha": 120, "color": "black"}],
+      "panel": {"side": "right", "ratio": 0.6, "color": "beige"},        # optional
+      "text": [{"text": "{headline}", "x": 40, "y": 35, "size": 48, "bold": True,
+                "color": "white", "from": "top", "region": "photo", "max_width": 0.85}],
+      "defaults": {"headline": "Your Korean Skincare"},
+    }
+
+- coordinates and sizes are authored against a REF_SIZE px short edge and
+  scaled to the photo area, so one template serves every aspect ratio;
+  "from" anchors y to the top / bottom / center, "region" places a block on
+  the photo or the side panel
+- text is str.format'ed with the caller's vars over the template defaults;
+  blocks that render empty are skipped, max_width wraps words
+- gradient overlays are one NumPy column of RGBA values broadcast across the
+  width - no per-row ImageDraw.line loops
+- fonts are looked up on Linux paths first (DejaVu / Liberation), then macOS,
+  and cached per (size, bold)
+- render_batch fans asset x template jobs out to the image_service process
+  pool; each job decodes its source once and renders every aspect ratio
+
+Env:
+  AD_FONT_REGULAR / AD_FONT_BOLD   explicit font files (override the search list)
+"""
+import os
+import io
+import asyncio
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+BRAND_COLORS = {
+    "black": "#000000",
+    "white": "#FFFFFF",
+    "accent": "#D63A2F",
+    "gray": "#666666",
+    "beige": "#F3EEEA",
+}
+
+# Meta placements; "source" keeps the photo's own size
+ASPECT_RATIOS: Dict[str, Optional[Tuple[int, int]]] = {
+    "1:1": (1080, 1080),
+    "4:5": (1080, 1350),
+    "9:16": (1080, 1920),
+    "1.91:1": (1200, 628),
+    "source": None,
+}
+
+REF_SIZE = 896  # short edge the template coordinates were authored at
+
+FONT_CANDIDATES = {
+    False: [
+        "DejaVuSans.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+        "/usr/share/fonts/TTF/DejaVuSans.ttf",
+        "/System/Library/Fonts/Supplemental/Arial.ttf",
+        "/Library/Fonts/Arial Unicode.ttf",
+        "/System/Library/Fonts/Helvetica.ttc",
+    ],
+    True: [
+        "DejaVuSans-Bold.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+        "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf",
+        "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
+        "/System/Library/Fonts/Helvetica.ttc",
+    ],
+}
+
+TemplateLike = Union[str, Dict[str, Any]]
+
+TEMPLATES: Dict[str, Dict[str, Any]] = {
+    # Generic templates for agent-made creatives (headline / cta from the asset copy)
+    "headline_cta": {
+        "gradients": [{"edge": "top", "height": 300, "alpha": 160},
+                      {"edge": "bottom", "height": 160, "alpha": 140}],
+        "text": [
+            {"text": "{eyebrow}", "x": 48, "y": 44, "size": 32},
+            {"text": "{headline}", "x": 48, "y": 90, "size": 56, "bold": True, "max_width": 0.85},
+            {"text": "{cta}", "x": 48, "y": 80, "from": "bottom", "size": 32, "bold": True},
+        ],
+        "defaults": {"eyebrow": "", "headline": "", "cta": ""},
+    },
+    "bottom_headline": {
+        "gradients": [{"edge": "bottom", "height": 360, "alpha": 200}],
+        "text": [
+            {"text": "{headline}", "x": 44, "y": 200, "from": "bottom", "size": 52, "bold": True,
+             "max_width": 0.88},
+            {"text": "{cta}", "x": 44, "y": 60, "from": "bottom", "size": 30},
+        ],
+        "defaults": {"headline": "", "cta": ""},
+    },
+    # The launch campaign ads (formerly add_text_to_ads.create_ad_*)
+    "scan_results": {
+        "gradients": [{"edge": "top", "height": 180, "alpha": 120},
+                      {"edge": "bottom", "height": 100, "alpha": 100}],
+        "text": [
+            {"text": "{headline}", "x": 40, "y": 35, "size": 48, "bold": True},
+            {"text": "{subheadline}", "x": 40, "y": 90, "size": 32},
+            {"text": "{cta}", "x": 40, "y": 70, "from": "bottom", "size": 28, "bold": True},
+        ],
+        "defaults": {"headline": "Your Korean Skincare", "subheadline": "Routine Starts Here",
+                     "cta": "SELFIE  →  SCAN  →  ROUTINE"},
+    },
+    "discover": {
+        "gradients": [{"edge": "top", "height": 250, "alpha": 160},
+                      {"edge": "bottom", "height": 150, "alpha": 140}],
+        "text": [
+            {"text": "{eyebrow}", "x": 50, "y": 50, "size": 36},
+            {"text": "{headline}", "x": 50, "y": 95, "size": 64, "bold": True},
+            {"text": "{headline_2}", "x": 50, "y": 170, "size": 64, "bold": True},
+            {"text": "{body}", "x": 50, "y": 120, "from": "bottom", "size": 32},
+            {"text": "{body_2}", "x": 50, "y": 75, "from": "bottom", "size": 32},
+        ],
+        "defaults": {"eyebrow": "Discover Your", "headline": "Perfect Korean",
+                     "headline_2": "Skincare Routine", "body": "AI-Powered Skin Analysis",
+                     "body_2": "Personalized Just For You"},
+    },
+    "made_personal": {
+        "gradients": [{"edge": "bottom", "height": 180, "alpha": 200}],
+        "text": [
+            {"text": "{headline}", "x": 40, "y": 150, "from": "bottom", "size": 52, "bold": True},
+            {"text": "{headline_2}", "x": 40, "y": 90, "from": "bottom", "size": 52, "bold": True},
+            {"text": "{cta}", "x": 40, "y": 45, "from": "bottom", "size": 30},
+        ],
+        "defaults": {"headline": "Korean Skincare", "headline_2": "Made Personal",
+                     "cta": "Selfie  •  Scan  •  Your Daily Routine"},
+    },
+    "side_panel": {
+        "panel": {"side": "right", "ratio": 0.6, "color": "beige"},
+        "text": [
+            {"text": "{eyebrow}", "region": "panel", "x": 40, "y": -100, "from": "center",
+             "size": 28, "color": "black"},
+            {"text": "{headline}", "region": "panel", "x": 40, "y": -65, "from": "center",
+             "size": 48, "bold": True, "color": "black"},
+            {"text": "{headline_2}", "region": "panel", "x": 40, "y": -10, "from": "center",
+             "size": 48, "bold": True, "color": "black"},
+            {"text": "{headline_3}", "region": "panel", "x": 40, "y": 45, "from": "center",
+             "size": 48, "bold": True, "color": "black"},
+            {"text": "{step_1}", "region": "panel", "x": 40, "y": 120, "from": "center",
+             "size": 24, "color": "gray"},
+            {"text": "{step_2}", "region": "panel", "x": 40, "y": 155, "from": "center",
+             "size": 24, "color": "gray"},
+            {"text": "{step_3}", "region": "panel", "x": 40, "y": 190, "from": "center",
+             "size": 24, "color": "accent"},
+        ],
+        "defaults": {"eyebrow": "Your", "headline": "Korean", "headline_2": "Skincare",
+                     "headline_3": "Routine", "step_1": "1. Take a selfie",
+                     "step_2": "2. AI scans your skin", "step_3": "3. Get your routine"},
+    },
+    "morning": {
+        "gradients": [{"edge": "top", "height": 200, "alpha": 150}],
+        "text": [
+            {"text": "{eyebrow}", "x": 35, "y": 35, "size": 30},
+            {"text": "{headline}", "x": 35, "y": 75, "size": 48, "bold": True},
+            {"text": "{headline_2}", "x": 35, "y": 130, "size": 48, "bold": True},
+        ],
+        "defaults": {"eyebrow": "Find Your Perfect", "headline": "Korean Skincare",
+                     "headline_2": "Routine"},
+    },
+}
+
+
+# ---------- drawing primitives ----------
+
+def _rgb(color: str) -> Tuple[int, int, int]:
+    from PIL import ImageColor
+    return ImageColor.getrgb(BRAND_COLORS.get(color, color))[:3]
+
+
+@lru_cache(maxsize=128)
+def get_font(size: int, bold: bool = False):
+    """TrueType font at `size` px, cached per process."""
+    from PIL import ImageFont
+    override = os.getenv("AD_FONT_BOLD" if bold else "AD_FONT_REGULAR")
+    for path in ([override] if override else []) + FONT_CANDIDATES[bold]:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+
+def gradient_overlay(width: int, height: int, gradients: Sequence[Dict[str, Any]], scale: float = 1.0):
+    """RGBA overlay for edge gradients: the alpha ramp of every gradient is laid
+    into one height-long column, then broadcast across the width."""
+    import numpy as np
+    from PIL import Image
+
+    rows = np.arange(height, dtype=np.float32)
+    column = np.zeros((height, 4), dtype=np.float32)
+    for g in gradients:
+        h = max(1, min(height, int(round(g.get("height", 0) * scale))))
+        peak = float(g.get("alpha", 128))
+        if g.get("edge", "top") == "top":
+            alpha = np.where(rows < h, peak * (1 - rows / h), 0)
+        else:
+            alpha = np.where(rows >= height - h, peak * ((rows - (height - h)) / h), 0)
+        take = alpha > column[:, 3]
+        column[take, :3] = _rgb(g.get("color", "black"))
+        column[take, 3] = alpha[take]
+    overlay = np.broadcast_to(column.astype(np.uint8)[:, None, :], (height, width, 4))
+    return Image.fromarray(np.ascontiguousarray(overlay), "RGBA")
+
+
+class _Vars(dict):
+    def __missing__(self, key):
+        return ""
+
+
+def _wrap(text: str, font, max_px: float) -> List[str]:
+    lines: List[str] = []
+    for paragraph in text.split("\n"):
+        line = ""
+        for word in paragraph.split():
+            candidate = f"{line} {word}".strip()
+            if line and font.getlength(candidate) > max_px:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return lines
+
+
+def resolve_template(template: TemplateLike) -> Dict[str, Any]:
+    if isinstance(template, dict):
+        return template
+    if template not in TEMPLATES:
+        raise ValueError(f"Unknown ad template: {template}")
+    return TEMPLATES[template]
+
+
+def render_image(photo, template: TemplateLike, aspect: str = "source",
+                 texts: Optional[Dict[str, str]] = None):
+    """Render one creative from a decoded PIL image; returns an RGB image."""
+    from PIL import Image, ImageDraw, ImageOps
+
+    tpl = resolve_template(template)
+    if aspect not in ASPECT_RATIOS:
+        raise ValueError(f"Unknown aspect ratio: {aspect}")
+    photo = photo.convert("RGBA")
+    panel = tpl.get("panel")
+    ratio = float(panel.get("ratio", 0.6)) if panel else 0.0
+
+    target = ASPECT_RATIOS[aspect]
+    if target is None:
+        pw, ph = photo.size
+        cw, ch = int(pw * (1 + ratio)), ph
+    else:
+        cw, ch = target
+        pw, ph = int(round(cw / (1 + ratio))), ch
+        focus = tuple(tpl.get("focus", (0.5, 0.5)))
+        photo = ImageOps.fit(photo, (pw, ph), Image.LANCZOS, centering=focus)
+
+    scale = min(pw, ph) / REF_SIZE
+    if tpl.get("gradients"):
+        photo = Image.alpha_composite(photo, gradient_overlay(pw, ph, tpl["gradients"], scale))
+
+    photo_x = cw - pw if panel and panel.get("side") == "left" else 0
+    panel_x = 0 if photo_x else pw
+    if panel:
+        canvas = Image.new("RGBA", (cw, ch), _rgb(panel.get("color", "beige")) + (255,))
+        canvas.paste(photo, (photo_x, 0))
+    else:
+        canvas = photo
+
+    draw = ImageDraw.Draw(canvas)
+    values = _Vars({**tpl.get("defaults", {}), **{k: v for k, v in (texts or {}).items() if v}})
+    for block in tpl.get("text", []):
+        text = str(block.get("text", "")).format_map(values).strip()
+        if not text:
+            continue
+        size = max(8, int(round(block.get("size", 32) * scale)))
+        font = get_font(size, bool(block.get("bold")))
+        in_panel = block.get("region") == "panel"
+        region_x, region_w = (panel_x, cw - pw) if in_panel else (photo_x, pw)
+        x = region_x + block.get("x", 40) * scale
+        max_px = region_w * float(block.get("max_width", 1.0)) - (x - region_x)
+        lines = _wrap(text, font, max_px) if block.get("max_width") else [text]
+        line_h = size * 1.15
+        y = block.get("y", 0) * scale
+        anchor = block.get("from", "top")
+        if anchor == "bottom":
+            # bottom-anchored blocks grow upwards so wrapped lines stay on canvas
+            y = ch - y - line_h * (len(lines) - 1)
+        elif anchor == "center":
+            y = ch / 2 + y
+        fill = _rgb(block.get("color", "white"))
+        for i, line in enumerate(lines):
+            draw.text((x, y + i * line_h), line, font=font, fill=fill)
+    return canvas.convert("RGB")
+
+
+def _encode(img, fmt: str, quality: int) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "PNG":
+        img.save(buf, format=fmt, optimize=False)
+    else:
+        img.save(buf, format=fmt, quality=quality)
+    return buf.getvalue()
+
+
+def render_job(image: bytes, template: TemplateLike, aspects: Sequence[str],
+               texts: Optional[Dict[str, str]], fmt: str, quality: int) -> List[Tuple[str, Tuple[int, int], bytes]]:
+    """Pool worker: decode once, render every aspect -> [(aspect, (w, h), bytes)]."""
+    from PIL import Image
+    photo = Image.open(io.BytesIO(image))
+    photo.load()
+    out = []
+    for aspect in aspects:
+        img = render_image(photo, template, aspect, texts)
+        out.append((aspect, img.size, _encode(img, fmt, quality)))
+    return out
+
+
+# ---------- batch API ----------
+
+async def render_batch(assets: Dict[str, bytes], templates: Iterable[TemplateLike],
+                       aspects: Sequence[str] = ("1:1", "4:5", "9:16"),
+                       texts: Optional[Dict[str, str]] = None,
+                       asset_texts: Optional[Dict[str, Dict[str, str]]] = None,
+                       fmt: str = "JPEG", quality: int = 90) -> List[Dict[str, Any]]:
+    """Render every asset x template x aspect ratio on the image pool.
+
+    assets: {name: raw image bytes}; templates: TEMPLATES keys or template dicts
+    (give dicts a "name"); texts: vars for every asset, asset_texts: per-asset
+    overrides. Returns [{asset, template, aspect, format, width, height, data}]
+    in input order."""
+    from image_service import run_in_pool
+
+    fmt = fmt.upper().replace("JPG", "JPEG")
+    tpls = [(t if isinstance(t, str) else t.get("name", "custom"), resolve_template(t)) for t in templates]
+    bad = [a for a in aspects if a not in ASPECT_RATIOS]
+    if bad:
+        raise ValueError(f"Unknown aspect ratio: {', '.join(bad)}")
+
+    jobs, keys = [], []
+    for name, data in assets.items():
+        merged = {**(texts or {}), **((asset_texts or {}).get(name) or {})}
+        for tname, tpl in tpls:
+            keys.append((name, tname))
+            jobs.append(run_in_pool(render_job, data, tpl, list(aspects), merged, fmt, quality))
+    results = await asyncio.gather(*jobs)
+
+    ext = "jpeg" if fmt == "JPEG" else fmt.lower()
+    out = []
+    for (name, tname), rendered in zip(keys, results):
+        for aspect, (w, h), data in rendered:
+            out.append({"asset": name, "template": tname, "aspect": aspect, "format": ext,
+                        "width": w, "height": h, "data": data})
+    return out
@@ -16,8 +16,6 @@ from abc import ABC, abstractmethod
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 
-import httpx
-
 DATABASE_AVAILABLE = bool(os.getenv("DATABASE_URL"))
 
 
@@ -95,6 +93,7 @@ class BaseAgent(ABC):
                         decision_uuid=decision_uuid,
                     )
                     db.add(task)
+                self._notify_task_queued()
                 return task_uuid
             except Exception as e:
                 print(f"⚠️ DB task creation failed, using in-memory: {e}")
@@ -119,8 +118,14 @@ class BaseAgent(ABC):
             "created_at": datetime.utcnow().isoformat(),
         })
 
+        self._notify_task_queued()
         return task_uuid
 
+    @staticmethod
+    def _notify_task_queued():
+        from .orchestrator import notify_task_queued
+        notify_task_queued()
+
     async def log_decision(
         self,
         decision_type: str,
@@ -181,79 +186,53 @@ class BaseAgent(ABC):
         model: str = "gemini",
         temperature: float = 0.7,
         json_mode: bool = False,
+        cache: Optional[bool] = None,
     ) -> str:
         """
         Call AI for text generation.
         Tries Gemini first, falls back to GPT-4o.
+
+        Responses are cached (see llm_client) when temperature is at or below
+        LLM_CACHE_MAX_TEMPERATURE; cache=True forces caching, cache=False skips it.
         """
+        from llm_client import cached_completion
+
         gemini_key = os.getenv("GEMINI_API_KEY")
         openai_key = os.getenv("OPENAI_API_KEY")
-
-        if model == "gemini" and gemini_key:
-            try:
-                return await self._call_gemini(prompt, system_prompt, gemini_key, temperature, json_mode)
-            except Exception as e:
-                print(f"⚠️ Gemini failed, falling back to GPT-4o: {e}")
-
-        if openai_key:
+        if not (model == "gemini" and gemini_key) and not openai_key:
+            raise RuntimeError("No AI API key configured (GEMINI_API_KEY or OPENAI_API_KEY)")
+
+        async def generate() -> str:
+            if model == "gemini" and gemini_key:
+                try:
+                    return await self._call_gemini(prompt, system_prompt, gemini_key, temperature, json_mode)
+                except Exception as e:
+                    print(f"⚠️ Gemini failed, falling back to GPT-4o: {e}")
+                    if not openai_key:
+                        raise
             return await self._call_openai(prompt, system_prompt, openai_key, temperature, json_mode)
 
-        raise RuntimeError("No AI API key configured (GEMINI_API_KEY or OPENAI_API_KEY)")
+        return await cached_completion(
+            {"prompt": prompt, "system_prompt": system_prompt, "model": model,
+             "temperature": temperature, "json_mode": json_mode, "max_tokens": 8192},
+            generate, cache=cache,
+        )
 
     async def _call_gemini(
         self, prompt: str, system_prompt: str, api_key: str,
         temperature: float, json_mode: bool
     ) -> str:
-        """Call Gemini 2.0 Flash for text generation."""
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}"
-
-        contents = []
-        if system_prompt:
-            contents.append({"role": "user", "parts": [{"text": system_prompt}]})
-            contents.append({"role": "model", "parts": [{"text": "Understood. I will follow these instructions."}]})
-        contents.append({"role": "user", "parts": [{"text": prompt}]})
-
-        body = {
-            "contents": contents,
-            "generationConfig": {
-                "temperature": temperature,
-                "maxOutputTokens": 8192,
-            }
-        }
-
-        if json_mode:
-            body["generationConfig"]["responseMimeType"] = "application/json"
-
-        async with httpx.AsyncClient(timeout=120) as client:
-            resp = await client.post(url, json=body)
-            resp.raise_for_status()
-            data = resp.json()
-            return data["candidates"][0]["content"]["parts"][0]["text"]
+        """Call Gemini 2.0 Flash for text generation (shared pooled client)."""
+        from llm_client import call_gemini
+        return await call_gemini(prompt, system_prompt, api_key, temperature, json_mode, max_tokens=8192)
 
     async def _call_openai(
         self, prompt: str, system_prompt: str, api_key: str,
         temperature: float, json_mode: bool
     ) -> str:
-        """Call GPT-4o for text generation."""
-        from openai import OpenAI
-        client = OpenAI(api_key=api_key)
-
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
-
-        kwargs = {
-            "model": "gpt-4o",
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": 4096,
-        }
-        if json_mode:
-            kwargs["response_format"] = {"type": "json_object"}
-
-        response = client.chat.completions.create(**kwargs)
-        return response.choices[0].message.content
+        """Call GPT-4o for text generation (shared AsyncOpenAI client)."""
+        from llm_client import call_openai
+        return await call_openai(prompt, system_prompt, api_key, temperature, json_mode, max_tokens=4096)
 
     @abstractmethod
     def get_supported_tasks(self) -> List[str]:
@@ -12,6 +12,7 @@ Responsibilities:
 
 import json
 import random
+import asyncio
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 
@@ -88,20 +89,23 @@ class CMOAgent(BaseAgent):
             print(f"[cmo] Shopify product fetch failed: {e}")
             return []
 
-    def _get_shopify_orders(self, days: int = 30) -> List[Dict[str, Any]]:
-        """Lazy-import Shopify client and fetch recent orders."""
+    async def _get_shopify_orders(self, days: int = 30) -> List[Dict[str, Any]]:
+        """Recent main-store orders from the shared order snapshot (off the event loop)."""
         try:
             import sys, os
             parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             if parent_dir not in sys.path:
                 sys.path.insert(0, parent_dir)
-            from shopify_client import fetch_orders_created_between
+            from order_snapshot import get_orders
+            from shopify_client import SHOPIFY_STORE
 
             end = datetime.utcnow()
             start = end - timedelta(days=days)
-            return fetch_orders_created_between(
+            return await asyncio.to_thread(
+                get_orders,
                 start.strftime("%Y-%m-%dT00:00:00Z"),
                 end.strftime("%Y-%m-%dT23:59:59Z"),
+                SHOPIFY_STORE,
             )
         except Exception as e:
             print(f"[cmo] Shopify orders fetch failed: {e}")
@@ -150,7 +154,7 @@ class CMOAgent(BaseAgent):
         """
         # Products and bestsellers
         products = self._get_shopify_products()
-        orders = self._get_shopify_orders(days=30)
+        orders = await self._get_shopify_orders(days=30)
         bestsellers = self._derive_bestsellers(orders, top_n=10)
 
         # Existing calendar slots for the upcoming week
@@ -472,7 +476,7 @@ class CMOAgent(BaseAgent):
         else:
             month_end = f"{year}-{int(m) + 1:02d}-01"
 
-        orders = self._get_shopify_orders(days=60)
+        orders = await self._get_shopify_orders(days=60)
         # Filter to month
         month_orders = [
             o for o in orders
@@ -700,7 +704,7 @@ Respond in JSON with keys:
         period_days = params.get("period_days", 30)
         goals = params.get("goals", {})
 
-        orders = self._get_shopify_orders(days=period_days)
+        orders = await self._get_shopify_orders(days=period_days)
         bestsellers = self._derive_bestsellers(orders, top_n=5)
 
         total_revenue = 0.0
@@ -883,6 +887,7 @@ Respond in JSON with this structure:
                 model="gemini",
                 temperature=0.7,
                 json_mode=True,
+                cache=True,  # re-planning with unchanged inputs reuses the plan
             )
             return json.loads(raw)
         except Exception as e:
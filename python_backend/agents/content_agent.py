@@ -17,6 +17,7 @@ Task types:
     create_multi_format_asset — ONE concept → image, video, IG/TikTok/ad/blog text
     create_enhanced_video     — multi-take Veo 2 pipeline with frame-by-frame prompts
     analyze_content_gaps      — gap analysis via SEOAgent + follow-up task creation
+    render_ad_variants        — text-overlay creatives per template × aspect ratio (ad_renderer)
 """
 
 import os, json, asyncio, uuid as uuid_lib
@@ -233,7 +234,8 @@ class ContentAgent(BaseAgent):
         super().__init__()
         self.asset_store = ContentAssetStore()
         for name in ("create_social_asset", "create_ad_creative", "create_blog_article",
-                      "create_multi_format_asset", "create_enhanced_video", "analyze_content_gaps"):
+                      "create_multi_format_asset", "create_enhanced_video", "analyze_content_gaps",
+                      "render_ad_variants"):
             self.register_handler(name, getattr(self, name))
 
     def get_supported_tasks(self) -> List[str]:
@@ -634,6 +636,49 @@ class ContentAgent(BaseAgent):
                 "instagram_caption_preview": (asset.instagram_caption or "")[:200],
                 "status": asset.status}
 
+    async def render_ad_variants(self, params: dict) -> dict:
+        """Text-overlay ad creatives from existing image assets, rendered locally
+        on the image process pool (no AI calls). Each render is listed under
+        generation_params["ad_variants"]; its "data" is a media blob reference, or
+        inline base64 when the blob store is not persistent (media_store.persist).
+        Params: asset_uuids[] (or asset_uuid), templates[], aspect_ratios[], format."""
+        import base64
+        _ensure_parent_on_path()
+        import media_store
+        from ad_renderer import render_batch
+
+        uuids      = params.get("asset_uuids") or [params.get("asset_uuid")]
+        templates  = params.get("templates") or ["headline_cta", "bottom_headline"]
+        aspects    = params.get("aspect_ratios") or ["1:1", "4:5", "9:16"]
+        fmt        = params.get("format", "jpeg")
+
+        assets = {}
+        for u in uuids:
+            a = await self.asset_store.get_asset(u) if u else None
+            if a and a.primary_image_data:
+                assets[u] = a
+        if not assets:
+            raise ValueError("No image assets found to render")
+
+        print(f"📝 [ContentAgent] Rendering {len(assets)} asset(s) × {len(templates)} template(s) "
+              f"× {len(aspects)} ratio(s)")
+        renders = await render_batch(
+            {u: base64.b64decode(a.primary_image_data) for u, a in assets.items()},
+            templates, aspects, fmt=fmt,
+            asset_texts={u: {"headline": a.ad_headline or a.headline, "cta": a.cta_text}
+                         for u, a in assets.items()})
+
+        by_asset: Dict[str, List[Dict[str, Any]]] = {u: [] for u in assets}
+        for r in renders:
+            by_asset[r["asset"]].append({
+                "template": r["template"], "aspect": r["aspect"], "format": r["format"],
+                "width": r["width"], "height": r["height"],
+                "data": await asyncio.to_thread(media_store.persist, r["data"])})
+        for u, a in assets.items():
+            a.generation_params = {**(a.generation_params or {}), "ad_variants": by_asset[u]}
+            await self.asset_store.save_asset(a)
+        return {"rendered": len(renders), "assets": by_asset}
+
     async def analyze_content_gaps(self, params: dict) -> dict:
         """Gap analysis via SEOAgent, optional smart suggestions.
         Params: existing_articles[], generate_suggestions (bool), suggestion_count."""
@@ -87,6 +87,18 @@ class ContentAssetData:
     updated_at: str = ""
 
 
+# Columns returned by list_assets(); everything else is deferred to get_asset()
+ASSET_LIST_COLUMNS = (
+    "uuid", "title", "content_pillar", "content_category", "product_ids", "brand",
+    "headline", "body_copy", "cta_text", "hashtags",
+    "primary_image_thumbnail", "primary_image_url", "video_thumbnail", "video_url",
+    "content_intent", "used_in_organic", "used_in_paid", "used_in_blog",
+    "total_impressions", "total_engagement", "total_clicks",
+    "organic_engagement_rate", "ad_ctr", "ad_roas",
+    "status", "created_by_agent", "created_at", "updated_at",
+)
+
+
 class ContentAssetStore:
     """CRUD operations for content assets. DB primary, JSON fallback."""
 
@@ -209,6 +221,71 @@ class ContentAssetStore:
 
         return asset.uuid
 
+    @staticmethod
+    def _row_to_data(row) -> ContentAssetData:
+        """ORM row -> dataclass. Columns left unloaded by a list projection keep
+        their dataclass defaults instead of triggering a lazy load."""
+        from sqlalchemy import inspect as sa_inspect
+        unloaded = sa_inspect(row).unloaded
+
+        def col(name, default=None):
+            if name in unloaded:
+                return default
+            value = getattr(row, name)
+            return default if value is None else value
+
+        return ContentAssetData(
+            uuid=row.uuid,
+            title=col("title", ""),
+            content_pillar=col("content_pillar", ""),
+            content_category=col("content_category", ""),
+            product_ids=col("product_ids", []),
+            brand=col("brand", ""),
+            headline=col("headline", ""),
+            body_copy=col("body_copy", ""),
+            cta_text=col("cta_text", ""),
+            hashtags=col("hashtags", []),
+            seo_keywords=col("seo_keywords", []),
+            instagram_caption=col("instagram_caption", ""),
+            tiktok_caption=col("tiktok_caption", ""),
+            ad_headline=col("ad_headline", ""),
+            ad_primary_text=col("ad_primary_text", ""),
+            blog_intro=col("blog_intro", ""),
+            primary_image_data=col("primary_image_data"),
+            primary_image_url=col("primary_image_url"),
+            primary_image_thumbnail=col("primary_image_thumbnail"),
+            primary_image_format=col("primary_image_format", "png"),
+            carousel_images=col("carousel_images", []),
+            video_data=col("video_data"),
+            video_url=col("video_url"),
+            video_thumbnail=col("video_thumbnail"),
+            video_format=col("video_format", "mp4"),
+            video_duration_seconds=col("video_duration_seconds", 0),
+            visual_direction=col("visual_direction", ""),
+            video_direction=col("video_direction", ""),
+            ai_model_image=col("ai_model_image", ""),
+            ai_model_video=col("ai_model_video", ""),
+            ai_model_text=col("ai_model_text", ""),
+            generation_params=col("generation_params", {}),
+            content_intent=col("content_intent", ""),
+            used_in_organic=col("used_in_organic", False),
+            used_in_paid=col("used_in_paid", False),
+            used_in_blog=col("used_in_blog", False),
+            organic_post_ids=col("organic_post_ids", []),
+            ad_creative_ids=col("ad_creative_ids", []),
+            blog_draft_ids=col("blog_draft_ids", []),
+            total_impressions=col("total_impressions", 0),
+            total_engagement=col("total_engagement", 0),
+            total_clicks=col("total_clicks", 0),
+            organic_engagement_rate=float(col("organic_engagement_rate", 0)),
+            ad_ctr=float(col("ad_ctr", 0)),
+            ad_roas=float(col("ad_roas", 0)),
+            status=col("status", "draft"),
+            created_by_agent=col("created_by_agent", ""),
+            created_at=row.created_at.isoformat() if row.created_at else "",
+            updated_at=row.updated_at.isoformat() if row.updated_at else "",
+        )
+
     async def _get_db(self, uuid: str) -> Optional[ContentAssetData]:
         from database.connection import get_db
         from database.models import ContentAsset
@@ -221,80 +298,26 @@ class ContentAssetStore:
             row = result.scalar_one_or_none()
             if not row:
                 return None
-
-            return ContentAssetData(
-                uuid=row.uuid,
-                title=row.title or "",
-                content_pillar=row.content_pillar or "",
-                content_category=row.content_category or "",
-                product_ids=row.product_ids or [],
-                brand=row.brand or "",
-                headline=row.headline or "",
-                body_copy=row.body_copy or "",
-                cta_text=row.cta_text or "",
-                hashtags=row.hashtags or [],
-                seo_keywords=row.seo_keywords or [],
-                instagram_caption=row.instagram_caption or "",
-                tiktok_caption=row.tiktok_caption or "",
-                ad_headline=row.ad_headline or "",
-                ad_primary_text=row.ad_primary_text or "",
-                blog_intro=row.blog_intro or "",
-                primary_image_data=row.primary_image_data,
-                primary_image_url=row.primary_image_url,
-                primary_image_thumbnail=row.primary_image_thumbnail,
-                primary_image_format=row.primary_image_format or "png",
-                carousel_images=row.carousel_images or [],
-                video_data=row.video_data,
-                video_url=row.video_url,
-                video_thumbnail=row.video_thumbnail,
-                video_format=row.video_format or "mp4",
-                video_duration_seconds=row.video_duration_seconds or 0,
-                visual_direction=row.visual_direction or "",
-                video_direction=row.video_direction or "",
-                ai_model_image=row.ai_model_image or "",
-                ai_model_video=row.ai_model_video or "",
-                ai_model_text=row.ai_model_text or "",
-                generation_params=row.generation_params or {},
-                used_in_organic=row.used_in_organic or False,
-                used_in_paid=row.used_in_paid or False,
-                used_in_blog=row.used_in_blog or False,
-                organic_post_ids=row.organic_post_ids or [],
-                ad_creative_ids=row.ad_creative_ids or [],
-                blog_draft_ids=row.blog_draft_ids or [],
-                total_impressions=row.total_impressions or 0,
-                total_engagement=row.total_engagement or 0,
-                total_clicks=row.total_clicks or 0,
-                organic_engagement_rate=float(row.organic_engagement_rate or 0),
-                ad_ctr=float(row.ad_ctr or 0),
-                ad_roas=float(row.ad_roas or 0),
-                status=row.status or "draft",
-                created_by_agent=row.created_by_agent or "",
-                created_at=row.created_at.isoformat() if row.created_at else "",
-                updated_at=row.updated_at.isoformat() if row.updated_at else "",
-            )
+            return self._row_to_data(row)
 
     async def _list_db(self, status, content_pillar, used_in_organic, used_in_paid, limit) -> List[ContentAssetData]:
         from database.connection import get_db
         from database.models import ContentAsset
         from sqlalchemy import select
+        from sqlalchemy.orm import load_only
 
-        # Select only columns needed for list view — avoids loading
-        # multi-MB blob columns (primary_image_data, video_data, etc.)
-        list_columns = [
-            ContentAsset.uuid, ContentAsset.title, ContentAsset.content_pillar,
-            ContentAsset.content_category, ContentAsset.product_ids, ContentAsset.brand,
-            ContentAsset.headline, ContentAsset.body_copy, ContentAsset.cta_text,
-            ContentAsset.hashtags, ContentAsset.primary_image_thumbnail,
-            ContentAsset.video_thumbnail, ContentAsset.content_intent,
-            ContentAsset.used_in_organic, ContentAsset.used_in_paid,
-            ContentAsset.used_in_blog, ContentAsset.total_impressions,
-            ContentAsset.total_engagement, ContentAsset.total_clicks,
-            ContentAsset.status, ContentAsset.created_by_agent,
-            ContentAsset.created_at, ContentAsset.updated_at,
-        ]
+        # Load only the list-view columns — media (primary_image_data, video_data,
+        # carousel_images) and channel caption variants stay in the table until
+        # get_asset() asks for the full row.
+        list_columns = [getattr(ContentAsset, name) for name in ASSET_LIST_COLUMNS]
 
         async with get_db() as db:
-            query = select(*list_columns).order_by(ContentAsset.created_at.desc()).limit(limit)
+            query = (
+                select(ContentAsset)
+                .options(load_only(*list_columns, raiseload=True))
+                .order_by(ContentAsset.created_at.desc())
+                .limit(limit)
+            )
             if status:
                 query = query.where(ContentAsset.status == status)
             if content_pillar:
@@ -305,36 +328,7 @@ class ContentAssetStore:
                 query = query.where(ContentAsset.used_in_paid == used_in_paid)
 
             result = await db.execute(query)
-            rows = result.all()  # Returns Row tuples (not ORM objects)
-
-            assets = []
-            for row in rows:
-                assets.append(ContentAssetData(
-                    uuid=row.uuid,
-                    title=row.title or "",
-                    content_pillar=row.content_pillar or "",
-                    content_category=row.content_category or "",
-                    product_ids=row.product_ids or [],
-                    brand=row.brand or "",
-                    headline=row.headline or "",
-                    body_copy=row.body_copy or "",
-                    cta_text=row.cta_text or "",
-                    hashtags=row.hashtags or [],
-                    content_intent=row.content_intent or "",
-                    primary_image_thumbnail=row.primary_image_thumbnail,
-                    video_thumbnail=row.video_thumbnail,
-                    used_in_organic=row.used_in_organic or False,
-                    used_in_paid=row.used_in_paid or False,
-                    used_in_blog=row.used_in_blog or False,
-                    total_impressions=row.total_impressions or 0,
-                    total_engagement=row.total_engagement or 0,
-                    total_clicks=row.total_clicks or 0,
-                    status=row.status or "draft",
-                    created_by_agent=row.created_by_agent or "",
-                    created_at=row.created_at.isoformat() if row.created_at else "",
-                    updated_at=row.updated_at.isoformat() if row.updated_at else "",
-                ))
-            return assets
+            return [self._row_to_data(row) for row in result.scalars().all()]
 
     async def _delete_db(self, uuid: str) -> bool:
         from database.connection import get_db
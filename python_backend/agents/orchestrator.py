@@ -1,22 +1,46 @@
 """
-Agent Orchestrator — Background loop that dispatches tasks to agents.
+Agent Orchestrator — Background worker pool that dispatches tasks to agents.
 
 Runs as a background asyncio task alongside the FastAPI server.
-Polls agent_tasks table every 60 seconds, dispatches ready tasks.
+Ready tasks are claimed atomically (SELECT ... FOR UPDATE SKIP LOCKED) and run
+concurrently, bounded per target agent. The dispatcher wakes immediately on
+Postgres NOTIFY from the agent_tasks trigger (or an in-process event in memory
+mode) and otherwise re-checks every `interval_seconds` for scheduled tasks.
+
+Env:
+  ORCHESTRATOR_AGENT_CONCURRENCY   default parallel tasks per agent (default 2)
+  ORCHESTRATOR_CONCURRENCY_<AGENT> per-agent override, e.g. ORCHESTRATOR_CONCURRENCY_CMO=1
+  ORCHESTRATOR_RETRY_BACKOFF       delay before the first retry of a failed task in
+                                   seconds, doubled per retry up to 1h (default 60)
 """
 
 import os
 import asyncio
-from datetime import datetime
-from typing import Dict, Optional
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
 
 DATABASE_AVAILABLE = bool(os.getenv("DATABASE_URL"))
 
+NOTIFY_CHANNEL = "agent_tasks"
+DEFAULT_AGENT_CONCURRENCY = int(os.getenv("ORCHESTRATOR_AGENT_CONCURRENCY", "2"))
+# Planning/ad-spend agents default to one task at a time
+AGENT_CONCURRENCY = {"cmo": 1, "acquisition": 1}
+CLAIM_BATCH = 50  # candidate rows locked per claim (some are skipped for deps/approval)
+PRIORITY_RANK = {"urgent": 0, "high": 1, "normal": 2, "low": 3}
+RETRY_BACKOFF_SECONDS = int(os.getenv("ORCHESTRATOR_RETRY_BACKOFF", "60"))
+RETRY_BACKOFF_MAX_SECONDS = 3600
+
+
+def retry_delay(retry_count: int) -> int:
+    """Seconds before retry number retry_count + 1 (exponential backoff)."""
+    return min(RETRY_BACKOFF_SECONDS * (2 ** retry_count), RETRY_BACKOFF_MAX_SECONDS)
+
 
 class AgentOrchestrator:
     """
     Background task dispatcher for the CMO agent hierarchy.
-    Polls the agent_tasks queue and dispatches to registered agents.
+    Claims ready tasks from the agent_tasks queue and runs them on registered
+    agents in parallel, up to each agent's concurrency limit.
     """
 
     def __init__(self):
@@ -25,14 +49,41 @@ class AgentOrchestrator:
         self.last_run_at: Optional[datetime] = None
         self.tasks_processed = 0
         self.interval_seconds = 60
+        self.listening = False
+        self._wake: Optional[asyncio.Event] = None
+        self._running: Dict[str, int] = {}
+        self._inflight: Set[asyncio.Task] = set()
+        self._claim_lock: Optional[asyncio.Lock] = None
 
     def register_agent(self, name: str, agent):
         """Register an agent instance for task dispatch."""
         self.agents[name] = agent
         print(f"  📋 Registered agent: {name} ({', '.join(agent.get_supported_tasks())})")
 
+    def concurrency_for(self, agent_name: str) -> int:
+        env = os.getenv(f"ORCHESTRATOR_CONCURRENCY_{agent_name.upper()}")
+        if env:
+            return max(1, int(env))
+        return AGENT_CONCURRENCY.get(agent_name, DEFAULT_AGENT_CONCURRENCY)
+
+    def _free_slots(self) -> Dict[str, int]:
+        return {
+            name: self.concurrency_for(name) - self._running.get(name, 0)
+            for name in self.agents
+        }
+
+    def _event(self) -> asyncio.Event:
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        return self._wake
+
+    def wake(self):
+        """Wake the dispatcher (new task queued, approved, or finished)."""
+        if self._wake is not None:
+            self._wake.set()
+
     async def start(self):
-        """Start the orchestrator background loop."""
+        """Start the orchestrator dispatcher (and the NOTIFY listener in DB mode)."""
         if self.is_running:
             return
 
@@ -40,22 +91,67 @@ class AgentOrchestrator:
         self._load_agents()
 
         self.is_running = True
-        print(f"🚀 Agent Orchestrator started (interval: {self.interval_seconds}s)")
+        wake = self._event()
+        limits = {name: self.concurrency_for(name) for name in self.agents}
+        print(f"🚀 Agent Orchestrator started (fallback poll: {self.interval_seconds}s, concurrency: {limits})")
         print(f"   Registered agents: {list(self.agents.keys())}")
 
+        listener = asyncio.create_task(self._listen_loop()) if DATABASE_AVAILABLE else None
+
         while self.is_running:
+            wake.clear()
             try:
-                await self.process_cycle()
+                await self._claim_and_spawn()
             except Exception as e:
                 print(f"❌ Orchestrator cycle error: {e}")
 
-            await asyncio.sleep(self.interval_seconds)
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+        if listener:
+            listener.cancel()
 
     async def stop(self):
-        """Stop the orchestrator."""
+        """Stop the orchestrator. In-flight tasks are allowed to finish."""
         self.is_running = False
+        self.wake()
         print("🛑 Agent Orchestrator stopped")
 
+    async def _listen_loop(self):
+        """LISTEN on the agent_tasks channel with a dedicated asyncpg connection;
+        reconnects on failure. The poll interval covers any gap."""
+        import asyncpg
+        from database.connection import DATABASE_URL
+
+        dsn = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+        while self.is_running:
+            conn = None
+            try:
+                conn = await asyncpg.connect(dsn)
+                await conn.add_listener(NOTIFY_CHANNEL, lambda *_: self.wake())
+                self.listening = True
+                print(f"👂 Orchestrator listening on '{NOTIFY_CHANNEL}'")
+                # Catch anything queued while we were disconnected
+                self.wake()
+                while self.is_running:
+                    await asyncio.sleep(30)
+                    await conn.execute("SELECT 1")  # keep-alive / dead connection check
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"⚠️ Orchestrator LISTEN connection lost: {e}")
+            finally:
+                self.listening = False
+                if conn is not None and not conn.is_closed():
+                    try:
+                        await conn.close()
+                    except Exception:
+                        pass
+            if self.is_running:
+                await asyncio.sleep(5)
+
     def _load_agents(self):
         """Lazy-load all agent instances."""
         if self.agents:
@@ -85,41 +181,53 @@ class AgentOrchestrator:
         except Exception as e:
             print(f"⚠️ Failed to load Acquisition agent: {e}")
 
-    async def process_cycle(self):
-        """Run one processing cycle: fetch and dispatch ready tasks."""
-        self.last_run_at = datetime.utcnow()
-
-        if DATABASE_AVAILABLE:
-            tasks = await self._fetch_ready_tasks_db()
-        else:
-            tasks = self._fetch_ready_tasks_memory()
-
-        if not tasks:
-            return
-
-        for task in tasks:
+    async def _claim_and_spawn(self) -> List[asyncio.Task]:
+        """Claim as many ready tasks as there are free agent slots and start them."""
+        if self._claim_lock is None:
+            self._claim_lock = asyncio.Lock()
+        async with self._claim_lock:
+            self.last_run_at = datetime.utcnow()
+            free = self._free_slots()
+            if not any(n > 0 for n in free.values()):
+                return []
+
+            if DATABASE_AVAILABLE:
+                tasks = await self._claim_ready_tasks_db(free)
+            else:
+                tasks = self._claim_ready_tasks_memory(free)
+
+            spawned = []
+            for task in tasks:
+                target = task.get("target_agent")
+                self._running[target] = self._running.get(target, 0) + 1
+                t = asyncio.create_task(self._run_claimed(task))
+                self._inflight.add(t)
+                t.add_done_callback(self._inflight.discard)
+                spawned.append(t)
+            return spawned
+
+    async def _run_claimed(self, task: dict):
+        target = task.get("target_agent")
+        try:
             await self._dispatch_task(task)
+        except Exception as e:
+            print(f"❌ Task {task.get('uuid')} dispatch error: {e}")
+        finally:
+            self._running[target] = max(0, self._running.get(target, 1) - 1)
+            # A slot freed up and dependents may now be runnable
+            self.wake()
+
+    async def process_cycle(self):
+        """Run one processing cycle: claim ready tasks and run them concurrently to completion."""
+        spawned = await self._claim_and_spawn()
+        if spawned:
+            await asyncio.gather(*spawned, return_exceptions=True)
 
     async def _dispatch_task(self, task: dict):
-        """Dispatch a single task to the appropriate agent."""
+        """Run a claimed task on its agent and record the outcome."""
         target = task.get("target_agent")
         agent = self.agents.get(target)
 
-        if not agent:
-            await self._mark_task_failed(task, f"No agent registered for '{target}'")
-            return
-
-        # Check if linked decision requires and has approval
-        decision_uuid = task.get("decision_uuid")
-        if decision_uuid:
-            approved = await self._is_decision_approved(decision_uuid)
-            if not approved:
-                # Decision not yet approved — skip this task for now
-                return
-
-        # Mark as in_progress
-        await self._mark_task_in_progress(task)
-
         try:
             result = await agent.execute_task(task)
             await self._mark_task_completed(task, result)
@@ -130,38 +238,20 @@ class AgentOrchestrator:
             max_retries = task.get("max_retries", 3)
 
             if retry_count < max_retries:
-                await self._mark_task_retry(task, str(e))
-                print(f"⚠️ Task {task['uuid']} failed, will retry ({retry_count + 1}/{max_retries}): {e}")
+                delay = retry_delay(retry_count)
+                await self._mark_task_retry(task, str(e), delay)
+                # scheduled_for keeps the claim query away until then; wake up to pick it up
+                asyncio.get_running_loop().call_later(delay, self.wake)
+                print(f"⚠️ Task {task['uuid']} failed, will retry in {delay}s "
+                      f"({retry_count + 1}/{max_retries}): {e}")
             else:
                 await self._mark_task_failed(task, str(e))
                 print(f"❌ Task {task['uuid']} failed permanently: {e}")
 
     # ---- Decision approval check ----
 
-    async def _is_decision_approved(self, decision_uuid: str) -> bool:
-        """Check if a linked decision has been approved."""
-        if DATABASE_AVAILABLE:
-            try:
-                from database.connection import get_db
-                from database.models import AgentDecision
-                from sqlalchemy import select
-
-                async with get_db() as db:
-                    query = select(AgentDecision).where(AgentDecision.uuid == decision_uuid)
-                    result = await db.execute(query)
-                    decision = result.scalar_one_or_none()
-                    if not decision:
-                        return True  # Decision not found — allow execution
-                    if decision.rejected_at:
-                        return False
-                    if decision.requires_approval and not decision.approved_at:
-                        return False  # Still awaiting approval
-                    return True
-            except Exception as e:
-                print(f"⚠️ Decision approval check failed: {e}")
-                return True  # Fail open to avoid blocking all tasks
-
-        # In-memory fallback
+    def _is_decision_approved_memory(self, decision_uuid: str) -> bool:
+        """Check if a linked in-memory decision has been approved."""
         from .base_agent import BaseAgent
         for dec in getattr(BaseAgent, '_memory_decisions', []):
             if dec["uuid"] == decision_uuid:
@@ -174,12 +264,20 @@ class AgentOrchestrator:
 
     # ---- Database task operations ----
 
-    async def _fetch_ready_tasks_db(self) -> list:
-        """Fetch pending tasks from DB where dependencies are met."""
+    async def _claim_ready_tasks_db(self, free: Dict[str, int]) -> list:
+        """Atomically claim ready tasks (pending, due, dependencies completed,
+        linked decision approved) up to each agent's free slots.
+
+        Candidate rows are locked with FOR UPDATE SKIP LOCKED, so concurrent
+        dispatchers (other workers/instances) never claim the same task.
+        Claimed rows are flipped to in_progress in the same transaction.
+        """
         try:
             from database.connection import get_db
-            from database.models import AgentTask
-            from sqlalchemy import select, or_
+            from database.models import AgentTask, AgentDecision
+            from sqlalchemy import select, update, or_, case
+
+            priority_order = case(PRIORITY_RANK, value=AgentTask.priority, else_=len(PRIORITY_RANK))
 
             async with get_db() as db:
                 query = (
@@ -193,72 +291,95 @@ class AgentOrchestrator:
                     )
                     .order_by(
                         # Priority ordering: urgent > high > normal > low
-                        AgentTask.priority.desc(),
+                        priority_order,
                         AgentTask.created_at.asc()
                     )
-                    .limit(10)
+                    .limit(CLAIM_BATCH)
+                    .with_for_update(skip_locked=True)
                 )
                 result = await db.execute(query)
                 rows = result.scalars().all()
-
-                tasks = []
+                if not rows:
+                    return []
+
+                # Resolve every dependency and linked decision in one query each
+                dep_uuids = {d for row in rows for d in (row.depends_on or [])}
+                completed = await self._completed_dependencies(db, dep_uuids)
+                decision_uuids = {row.decision_uuid for row in rows if row.decision_uuid}
+                blocked_decisions = set()
+                if decision_uuids:
+                    try:
+                        async with db.begin_nested():
+                            r = await db.execute(
+                                select(AgentDecision.uuid, AgentDecision.requires_approval,
+                                       AgentDecision.approved_at, AgentDecision.rejected_at)
+                                .where(AgentDecision.uuid.in_(decision_uuids))
+                            )
+                        for d_uuid, requires_approval, approved_at, rejected_at in r.all():
+                            if rejected_at or (requires_approval and not approved_at):
+                                blocked_decisions.add(d_uuid)
+                    except Exception as e:
+                        # Fail open (missing decision = allowed) to avoid blocking all tasks
+                        print(f"⚠️ Decision approval check failed: {e}")
+
+                slots = dict(free)
+                claimed, unroutable = [], []
                 for row in rows:
-                    # Check dependencies
-                    deps = row.depends_on or []
-                    if deps:
-                        deps_met = await self._check_dependencies(db, deps)
-                        if not deps_met:
-                            continue
-
-                    tasks.append({
-                        "uuid": row.uuid,
-                        "source_agent": row.source_agent,
-                        "target_agent": row.target_agent,
-                        "task_type": row.task_type,
-                        "priority": row.priority,
-                        "params": row.params,
-                        "depends_on": row.depends_on,
-                        "parent_task_id": row.parent_task_id,
-                        "retry_count": row.retry_count,
-                        "max_retries": row.max_retries,
-                        "decision_uuid": row.decision_uuid,
-                    })
-
-                return tasks
+                    if row.target_agent not in self.agents:
+                        unroutable.append(row)
+                        continue
+                    if slots.get(row.target_agent, 0) <= 0:
+                        continue
+                    if any(d not in completed for d in (row.depends_on or [])):
+                        continue
+                    if row.decision_uuid in blocked_decisions:
+                        # Decision not yet approved — skip this task for now
+                        continue
+                    slots[row.target_agent] -= 1
+                    claimed.append(row)
+
+                now = datetime.utcnow()
+                if claimed:
+                    await db.execute(
+                        update(AgentTask)
+                        .where(AgentTask.id.in_([row.id for row in claimed]))
+                        .values(status="in_progress", started_at=now)
+                    )
+                for row in unroutable:
+                    row.status = "failed"
+                    row.error_message = f"No agent registered for '{row.target_agent}'"
+                    row.completed_at = now
+
+                return [{
+                    "uuid": row.uuid,
+                    "source_agent": row.source_agent,
+                    "target_agent": row.target_agent,
+                    "task_type": row.task_type,
+                    "priority": row.priority,
+                    "params": row.params,
+                    "depends_on": row.depends_on,
+                    "parent_task_id": row.parent_task_id,
+                    "retry_count": row.retry_count,
+                    "max_retries": row.max_retries,
+                    "decision_uuid": row.decision_uuid,
+                } for row in claimed]
         except Exception as e:
-            print(f"⚠️ DB fetch failed: {e}")
+            print(f"⚠️ DB claim failed: {e}")
             return []
 
-    async def _check_dependencies(self, db, dep_uuids: list) -> bool:
-        """Check if all dependency tasks are completed."""
+    async def _completed_dependencies(self, db, dep_uuids) -> Set[str]:
+        """Subset of dep_uuids whose tasks are completed (single IN query)."""
         from database.models import AgentTask
         from sqlalchemy import select
 
-        for dep_uuid in dep_uuids:
-            query = select(AgentTask.status).where(AgentTask.uuid == dep_uuid)
-            result = await db.execute(query)
-            status = result.scalar_one_or_none()
-            if status != "completed":
-                return False
-        return True
-
-    async def _mark_task_in_progress(self, task: dict):
-        if DATABASE_AVAILABLE:
-            try:
-                from database.connection import get_db
-                from database.models import AgentTask
-                from sqlalchemy import update
-
-                async with get_db() as db:
-                    await db.execute(
-                        update(AgentTask)
-                        .where(AgentTask.uuid == task["uuid"])
-                        .values(status="in_progress", started_at=datetime.utcnow())
-                    )
-            except Exception as e:
-                print(f"⚠️ DB update failed: {e}")
-        else:
-            self._update_memory_task(task["uuid"], {"status": "in_progress"})
+        if not dep_uuids:
+            return set()
+        result = await db.execute(
+            select(AgentTask.uuid)
+            .where(AgentTask.uuid.in_(list(dep_uuids)))
+            .where(AgentTask.status == "completed")
+        )
+        return set(result.scalars().all())
 
     async def _mark_task_completed(self, task: dict, result: dict):
         if DATABASE_AVAILABLE:
@@ -304,7 +425,8 @@ class AgentOrchestrator:
         else:
             self._update_memory_task(task["uuid"], {"status": "failed", "error_message": error})
 
-    async def _mark_task_retry(self, task: dict, error: str):
+    async def _mark_task_retry(self, task: dict, error: str, delay: int):
+        scheduled_for = datetime.utcnow() + timedelta(seconds=delay)
         if DATABASE_AVAILABLE:
             try:
                 from database.connection import get_db
@@ -318,7 +440,8 @@ class AgentOrchestrator:
                         .values(
                             status="pending",
                             error_message=error,
-                            retry_count=task.get("retry_count", 0) + 1
+                            retry_count=task.get("retry_count", 0) + 1,
+                            scheduled_for=scheduled_for
                         )
                     )
             except Exception as e:
@@ -326,37 +449,46 @@ class AgentOrchestrator:
         else:
             self._update_memory_task(task["uuid"], {
                 "status": "pending",
-                "retry_count": task.get("retry_count", 0) + 1
+                "retry_count": task.get("retry_count", 0) + 1,
+                "scheduled_for": scheduled_for.isoformat()
             })
 
     # ---- In-memory fallback ----
 
-    def _fetch_ready_tasks_memory(self) -> list:
-        """Fetch tasks from in-memory store (local dev fallback)."""
+    def _claim_ready_tasks_memory(self, free: Dict[str, int]) -> list:
+        """Claim tasks from the in-memory store (local dev fallback)."""
         from .base_agent import BaseAgent
         if not hasattr(BaseAgent, '_memory_tasks'):
             return []
 
-        ready = []
-        for task in BaseAgent._memory_tasks:
-            if task["status"] != "pending":
+        completed = {t["uuid"] for t in BaseAgent._memory_tasks if t["status"] == "completed"}
+        now_iso = datetime.utcnow().isoformat()
+        pending = sorted(
+            (t for t in BaseAgent._memory_tasks if t["status"] == "pending"),
+            key=lambda t: (PRIORITY_RANK.get(t.get("priority"), len(PRIORITY_RANK)), t.get("created_at", "")),
+        )
+
+        slots = dict(free)
+        claimed = []
+        for task in pending:
+            if task.get("scheduled_for") and task["scheduled_for"] > now_iso:
                 continue
-            if task.get("scheduled_for") and task["scheduled_for"] > datetime.utcnow().isoformat():
+            target = task.get("target_agent")
+            if target not in self.agents:
+                task.update({"status": "failed", "error_message": f"No agent registered for '{target}'"})
+                continue
+            if slots.get(target, 0) <= 0:
                 continue
-
             # Check dependencies
-            deps = task.get("depends_on", [])
-            if deps:
-                all_done = all(
-                    any(t["uuid"] == d and t["status"] == "completed" for t in BaseAgent._memory_tasks)
-                    for d in deps
-                )
-                if not all_done:
-                    continue
-
-            ready.append(task)
+            if any(d not in completed for d in task.get("depends_on", [])):
+                continue
+            if task.get("decision_uuid") and not self._is_decision_approved_memory(task["decision_uuid"]):
+                continue
+            slots[target] -= 1
+            task["status"] = "in_progress"
+            claimed.append(task)
 
-        return ready[:10]
+        return claimed
 
     def _update_memory_task(self, uuid: str, updates: dict):
         from .base_agent import BaseAgent
@@ -370,11 +502,20 @@ class AgentOrchestrator:
     # ---- Force run ----
 
     async def force_run(self) -> dict:
-        """Force an immediate processing cycle. Returns stats."""
+        """Force an immediate processing cycle. Returns stats.
+
+        With the dispatcher running this just wakes it; otherwise a one-off
+        cycle claims ready tasks and runs them concurrently to completion.
+        """
         self._load_agents()
-        await self.process_cycle()
+        if self.is_running:
+            self.wake()
+            status = "triggered"
+        else:
+            await self.process_cycle()
+            status = "completed"
         return {
-            "status": "completed",
+            "status": status,
             "tasks_processed": self.tasks_processed,
             "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
             "registered_agents": list(self.agents.keys()),
@@ -387,6 +528,9 @@ class AgentOrchestrator:
             "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
             "tasks_processed": self.tasks_processed,
             "interval_seconds": self.interval_seconds,
+            "listening": self.listening,
+            "running_tasks": {name: n for name, n in self._running.items() if n},
+            "concurrency": {name: self.concurrency_for(name) for name in self.agents},
             "registered_agents": list(self.agents.keys()),
         }
 
@@ -401,3 +545,10 @@ def get_orchestrator() -> AgentOrchestrator:
     if _orchestrator is None:
         _orchestrator = AgentOrchestrator()
     return _orchestrator
+
+
+def notify_task_queued():
+    """Wake the in-process dispatcher after queueing a task. Memory mode has no
+    NOTIFY; in DB mode this just saves the round-trip through Postgres."""
+    if _orchestrator is not None:
+        _orchestrator.wake()
@@ -201,16 +201,12 @@ class SocialNetworkAgent(BaseAgent):
             post_type = self._detect_post_type(asset)
 
             if post_type == "carousel" and asset.carousel_images:
-                # Publish carousel: create child containers first
-                children_ids = []
-                for img in asset.carousel_images:
-                    img_url = img.get("url") or img.get("image_url")
-                    if img_url:
-                        child_id = await publisher.create_image_container(ig_id, img_url, "")
-                        children_ids.append(child_id)
-
-                if not children_ids:
+                # Publish carousel: create child containers first (one batch call)
+                img_urls = [img.get("url") or img.get("image_url") for img in asset.carousel_images]
+                img_urls = [u for u in img_urls if u]
+                if not img_urls:
                     return {"error": "No valid carousel image URLs found"}
+                children_ids = await publisher.create_carousel_children(ig_id, img_urls)
 
                 container_id = await publisher.create_carousel_container(
                     ig_id, children_ids, caption
@@ -287,14 +283,7 @@ class SocialNetworkAgent(BaseAgent):
 
     async def _wait_for_container(self, publisher, container_id: str, max_retries: int = 10):
         """Poll the container status until it is ready or fails."""
-        for _ in range(max_retries):
-            status = await publisher.check_container_status(container_id)
-            if status == "FINISHED":
-                return
-            if status == "ERROR":
-                raise RuntimeError(f"Container {container_id} processing failed")
-            await asyncio.sleep(3)
-        raise TimeoutError(f"Container {container_id} did not finish within {max_retries * 3}s")
+        await publisher.wait_for_containers([container_id], max_checks=max_retries, interval=3)
 
     def _detect_post_type(self, asset) -> str:
         """Determine the appropriate post type from asset content."""
@@ -402,6 +391,7 @@ class SocialNetworkAgent(BaseAgent):
 
         Optional params:
             days_back: int — how many days of insights to fetch (default 7)
+            force: bool — re-sync every published post, ignoring the schedule
         """
         days_back = params.get("days_back", 7)
         storage = _get_social_storage()
@@ -415,46 +405,17 @@ class SocialNetworkAgent(BaseAgent):
         until_date = date.today()
         since_date = until_date - timedelta(days=days_back)
 
-        # Fetch account-level daily insights
-        account_insights = await publisher.fetch_account_insights(ig_id, since_date, until_date)
-
-        # Fetch recent media with per-post insights
-        recent_media = await publisher.fetch_recent_media_detailed(ig_id, limit=50)
-
-        # Persist per-post insights to storage
-        from social_media_service import PostInsight
-
-        synced_count = 0
-        for media in recent_media:
-            ig_media_id = media.get("id", "")
-            insights = media.get("insights", {})
-            if not ig_media_id:
-                continue
-
-            # Try to match to an existing post by ig_media_id
-            posts = await storage.get_all_posts_async(status="published")
-            matched_post = next(
-                (p for p in posts if p.ig_media_id == ig_media_id), None
-            )
-            post_id = matched_post.id if matched_post else ig_media_id
-
-            insight = PostInsight(
-                post_id=post_id,
-                ig_media_id=ig_media_id,
-                impressions=insights.get("impressions", 0),
-                reach=insights.get("reach", 0),
-                engagement=insights.get("total_interactions", 0),
-                likes=insights.get("likes", media.get("like_count", 0)),
-                comments=insights.get("comments", media.get("comments_count", 0)),
-                shares=insights.get("shares", 0),
-                saves=insights.get("saved", 0),
-                synced_at=datetime.utcnow().isoformat(),
-            )
-            await storage.save_insight_async(insight)
-            synced_count += 1
+        # Account-level daily insights, and per-post insights for the posts the
+        # scheduler says are due (recent posts often, settled ones never)
+        import insights_sync
+        account_insights, report = await asyncio.gather(
+            publisher.fetch_account_insights(ig_id, since_date, until_date),
+            insights_sync.sync_post_insights(storage, publisher, force=params.get("force", False)),
+        )
 
         return {
-            "synced_post_insights": synced_count,
+            "synced_post_insights": report["synced"],
+            "post_insights_sync": report,
             "account_insight_days": len(account_insights),
             "date_range": {"since": since_date.isoformat(), "until": until_date.isoformat()},
             "account_insights_summary": account_insights[:3] if account_insights else [],
@@ -475,46 +436,26 @@ class SocialNetworkAgent(BaseAgent):
         lookback_days = params.get("lookback_days", 30)
         storage = _get_social_storage()
 
-        # Gather published posts with timestamps
+        # Hour-of-week rollup (maintained on insight sync) - at most 168 buckets
         end_date = date.today().isoformat()
         start_date = (date.today() - timedelta(days=lookback_days)).isoformat()
+        buckets = await storage.get_hour_of_week_async(start_date, end_date)
 
-        posts = await storage.get_all_posts_async(
-            status="published", start_date=start_date, end_date=end_date
-        )
-        all_insights = await storage.get_insights_async()
-
-        # Build a lookup for insights by post_id
-        insight_map = {i.post_id: i for i in all_insights}
+        # Sum of per-post engagement rates and post counts by hour and day-of-week
+        hourly_engagement: Dict[int, List[float]] = {h: [0.0, 0] for h in range(24)}
+        daily_engagement: Dict[int, List[float]] = {d: [0.0, 0] for d in range(7)}
+        for b in buckets:
+            for acc, key in ((hourly_engagement, b["hour"]), (daily_engagement, b["dow"])):
+                acc[key][0] += b["rate_sum"]
+                acc[key][1] += b["posts"]
+        posts_analyzed = sum(b["posts"] for b in buckets)
 
-        # Group engagement by hour and day-of-week
-        hourly_engagement: Dict[int, List[float]] = {h: [] for h in range(24)}
-        daily_engagement: Dict[int, List[float]] = {d: [] for d in range(7)}
+        def _avg(total_count: list) -> float:
+            total, count = total_count
+            return round(total / count, 4) if count else 0.0
 
-        for post in posts:
-            if not post.published_at and not post.scheduled_at:
-                continue
-            ts_str = post.published_at or post.scheduled_at
-            try:
-                ts = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
-            except (ValueError, AttributeError):
-                continue
-
-            insight = insight_map.get(post.id)
-            engagement_rate = 0.0
-            if insight and insight.reach > 0:
-                engagement_rate = insight.engagement / insight.reach
-            elif insight:
-                engagement_rate = float(insight.engagement)
-
-            hourly_engagement[ts.hour].append(engagement_rate)
-            daily_engagement[ts.weekday()].append(engagement_rate)
-
-        def _avg(values: list) -> float:
-            return round(sum(values) / len(values), 4) if values else 0.0
-
-        hourly_avg = {h: _avg(v) for h, v in hourly_engagement.items() if v}
-        daily_avg = {d: _avg(v) for d, v in daily_engagement.items() if v}
+        hourly_avg = {h: _avg(v) for h, v in hourly_engagement.items() if v[1]}
+        daily_avg = {d: _avg(v) for d, v in daily_engagement.items() if v[1]}
 
         # Find top 3 hours and top 3 days
         top_hours = sorted(hourly_avg.items(), key=lambda x: x[1], reverse=True)[:3]
@@ -524,7 +465,7 @@ class SocialNetworkAgent(BaseAgent):
 
         result = {
             "analysis_period_days": lookback_days,
-            "posts_analyzed": len(posts),
+            "posts_analyzed": posts_analyzed,
             "best_hours": [{"hour": h, "avg_engagement_rate": r} for h, r in top_hours],
             "best_days": [
                 {"day": day_names[d], "day_index": d, "avg_engagement_rate": r}
@@ -536,14 +477,14 @@ class SocialNetworkAgent(BaseAgent):
 
         await self.log_decision(
             decision_type="best_times_analysis",
-            context={"lookback_days": lookback_days, "posts_analyzed": len(posts)},
+            context={"lookback_days": lookback_days, "posts_analyzed": posts_analyzed},
             decision=result,
             reasoning=(
-                f"Analyzed {len(posts)} published posts over {lookback_days} days. "
+                f"Analyzed {posts_analyzed} published posts over {lookback_days} days. "
                 f"Top posting hours: {[h for h, _ in top_hours]}. "
                 f"Top posting days: {[day_names[d] for d, _ in top_days]}."
             ),
-            confidence=0.7 if len(posts) >= 20 else 0.4,
+            confidence=0.7 if posts_analyzed >= 20 else 0.4,
             requires_approval=False,
         )
 
@@ -568,11 +509,9 @@ class SocialNetworkAgent(BaseAgent):
         end_date = date.today().isoformat()
         start_date = (date.today() - timedelta(days=days)).isoformat()
 
-        posts = await storage.get_all_posts_async(
-            status="published", start_date=start_date, end_date=end_date
-        )
-        all_insights = await storage.get_insights_async()
-        insight_map = {i.post_id: i for i in all_insights}
+        # Published posts grouped in SQL by (post_type, category, strategy)
+        groups = await storage.get_insight_breakdown_async(start_date, end_date)
+        total_posts = sum(g["posts"] for g in groups)
 
         # Aggregation buckets
         by_category: Dict[str, Dict] = {}
@@ -580,41 +519,27 @@ class SocialNetworkAgent(BaseAgent):
         by_post_type: Dict[str, Dict] = {}
         totals = _empty_totals()
 
-        for post in posts:
-            insight = insight_map.get(post.id)
-            if not insight:
+        for g in groups:
+            if not g["insight_posts"]:
                 continue
 
-            metrics = {
-                "impressions": insight.impressions,
-                "reach": insight.reach,
-                "engagement": insight.engagement,
-                "likes": insight.likes,
-                "comments": insight.comments,
-                "shares": insight.shares,
-                "saves": insight.saves,
-            }
-
-            _accumulate(totals, metrics)
+            _accumulate(totals, g)
 
-            cat = post.content_category or "uncategorized"
+            cat = g["content_category"] or "uncategorized"
             if cat not in by_category:
                 by_category[cat] = _empty_totals()
-            _accumulate(by_category[cat], metrics)
+            _accumulate(by_category[cat], g)
 
-            # Content pillar comes from the asset, but we track it via caption match
-            # or fallback to the calendar. For published posts, use strategy_id context.
-            pillar = getattr(post, "content_pillar", None) or "unknown"
-            if pillar == "unknown" and post.strategy_id:
-                pillar = post.strategy_id[:8]  # Fallback label
+            # Posts carry no content pillar; label by strategy when there is one
+            pillar = g["strategy_id"][:8] if g["strategy_id"] else "unknown"
             if pillar not in by_pillar:
                 by_pillar[pillar] = _empty_totals()
-            _accumulate(by_pillar[pillar], metrics)
+            _accumulate(by_pillar[pillar], g)
 
-            pt = post.post_type or "unknown"
+            pt = g["post_type"] or "unknown"
             if pt not in by_post_type:
                 by_post_type[pt] = _empty_totals()
-            _accumulate(by_post_type[pt], metrics)
+            _accumulate(by_post_type[pt], g)
 
         # Compute engagement rates
         _add_rates(totals)
@@ -631,7 +556,7 @@ class SocialNetworkAgent(BaseAgent):
 
         report = {
             "period_days": days,
-            "total_posts": len(posts),
+            "total_posts": total_posts,
             "totals": totals,
             "by_content_category": dict(ranked_categories),
             "by_content_pillar": by_pillar,
@@ -642,10 +567,10 @@ class SocialNetworkAgent(BaseAgent):
 
         await self.log_decision(
             decision_type="performance_report",
-            context={"period_days": days, "total_posts": len(posts)},
+            context={"period_days": days, "total_posts": total_posts},
             decision={"top_category": report["top_category"], "total_engagement": totals["engagement"]},
             reasoning=(
-                f"Performance report for {days} days covering {len(posts)} posts. "
+                f"Performance report for {days} days covering {total_posts} posts. "
                 f"Top category: {report['top_category']}. "
                 f"Overall engagement rate: {totals.get('engagement_rate', 0):.2%}."
             ),
@@ -764,7 +689,8 @@ def _empty_totals() -> dict:
 
 
 def _accumulate(totals: dict, metrics: dict):
-    totals["post_count"] += 1
+    """Add one post's metrics, or a pre-aggregated group (insight_posts = its post count)."""
+    totals["post_count"] += metrics.get("insight_posts", 1)
     for key in ("impressions", "reach", "engagement", "likes", "comments", "shares", "saves"):
         totals[key] += metrics.get(key, 0)
 
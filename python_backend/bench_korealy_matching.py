@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Korealy -> Shopify fuzzy matcher (steps 7-8 of map_korealy_to_shopify).
+
+Generates a synthetic catalog (default 20k Shopify variants) and 5k Korealy
+rows mixing exact names, size-suffixed names, substrings, reordered/partial
+token matches and misses, then:
+  - times reconcile() with the prebuilt VariantMatchIndex
+  - times the previous linear-scan steps 7-8 on a sample of rows and
+    extrapolates (a full legacy run takes many minutes)
+  - checks that both return the same variant for every sampled row
+
+Usage:
+    python bench_korealy_matching.py
+
+Env:
+  BENCH_VARIANTS       Shopify variants (default 20000)
+  BENCH_ROWS           Korealy rows (default 5000)
+  BENCH_LEGACY_SAMPLE  rows timed/compared against the legacy scan (default 150)
+  BENCH_SEED           RNG seed (default 7)
+"""
+import os
+import sys
+import time
+import random
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from korealy_reconciliation import (  # noqa: E402
+    build_name_maps, map_korealy_to_shopify, normalize_name, reconcile,
+)
+
+VARIANTS = int(os.getenv("BENCH_VARIANTS", "20000"))
+ROWS = int(os.getenv("BENCH_ROWS", "5000"))
+LEGACY_SAMPLE = int(os.getenv("BENCH_LEGACY_SAMPLE", "150"))
+SEED = int(os.getenv("BENCH_SEED", "7"))
+
+BRANDS = ["COSRX", "Beauty of Joseon", "Anua", "Round Lab", "Torriden", "Skin1004", "Isntree",
+          "Klairs", "Purito", "Some By Mi", "Laneige", "Innisfree", "Missha", "Etude", "Heimish",
+          "Medicube", "Mixsoon", "Numbuzin", "Ma:nyo", "Dr.Jart+"]
+INGREDIENTS = ["Snail", "Mugwort", "Centella", "Heartleaf", "Birch", "Rice", "Propolis", "Ginseng",
+               "Green Tea", "Niacinamide", "Retinal", "Peptide", "Ceramide", "Hyaluronic", "Vitamin C",
+               "Tea Tree", "Houttuynia", "Bean", "Galactomyces", "Madecassoside", "Panthenol", "Collagen"]
+KINDS = ["Toner", "Essence", "Serum", "Ampoule", "Cream", "Gel Cream", "Cleansing Oil", "Foam Cleanser",
+         "Sun Cream", "Toner Pad", "Sheet Mask", "Eye Cream", "Lip Balm", "Mist", "Emulsion", "Barrier Cream"]
+ADJECTIVES = ["Calming", "Brightening", "Hydrating", "Soothing", "Pore", "Firming", "Moisture", "Clear",
+              "Daily", "Intense", "Mild", "Revive", "Glow", "Relief", "Dive-In", "Deep"]
+SIZES = ["30ml", "50ml", "100ml", "150ml", "200ml", "250ml", "1 pc", "10 pcs", "70 pads"]
+
+
+def make_catalog(rng: random.Random) -> Dict[str, Dict]:
+    variants = {}
+    for i in range(VARIANTS):
+        title = f"{rng.choice(BRANDS)} {rng.choice(ADJECTIVES)} {rng.choice(INGREDIENTS)} {rng.choice(KINDS)} {i // 3}"
+        variant = "Default Title" if i % 3 == 0 else rng.choice(SIZES)
+        gid = f"gid://shopify/ProductVariant/{10_000_000 + i}"
+        variants[gid] = {"item": f"{title} — {variant}", "sku": f"SKU-{i}", "cogs": 5.0, "currency": "USD",
+                         "variant_id": str(10_000_000 + i)}
+    return variants
+
+
+def make_rows(rng: random.Random, variants: Dict[str, Dict]):
+    items = [v["item"] for v in variants.values()]
+    rows = []
+    for i in range(ROWS):
+        item = rng.choice(items)
+        product = item.split(" — ")[0]
+        words = product.split()
+        kind = i % 6
+        if kind == 0:
+            title = item                                              # exact
+        elif kind == 1:
+            title = f"{product} ({rng.choice(SIZES)})"                # partial / size suffix
+        elif kind == 2:
+            title = " ".join(words[1:-1])                             # substring of a Shopify name
+        elif kind == 3:
+            shuffled = words[:]
+            rng.shuffle(shuffled)
+            title = " ".join(shuffled[:-1] + ["Korea"])               # token overlap
+        elif kind == 4:
+            title = f"{rng.choice(ADJECTIVES)} {rng.choice(INGREDIENTS)} Set Limited Edition {i}"
+        else:
+            title = f"Unknown Brand Product {i}"                      # miss
+        rows.append({"title": title, "shop_pid": None, "cogs": 5.0, "currency": "USD"})
+    return rows
+
+
+def legacy_fuzzy(korealy_title: str, shopify_variants: Dict[str, Dict]) -> Optional[str]:
+    """Steps 7-8 as they were before VariantMatchIndex (linear scan per row)."""
+    normalized = normalize_name(korealy_title)
+    words = normalized.split()
+    if shopify_variants and len(normalized) >= 10:
+        for gid, info in shopify_variants.items():
+            shopify_name = normalize_name(info["item"])
+            if normalized in shopify_name or shopify_name in normalized:
+                return gid
+    if shopify_variants and len(words) >= 3:
+        korealy_tokens = set(words)
+        best_match = None
+        best_score = 0.75
+        for gid, info in shopify_variants.items():
+            shopify_tokens = set(normalize_name(info["item"]).split())
+            if not shopify_tokens:
+                continue
+            common = len(korealy_tokens & shopify_tokens)
+            total = min(len(korealy_tokens), len(shopify_tokens))
+            if total > 0:
+                score = common / total
+                if score > best_score:
+                    best_score = score
+                    best_match = gid
+        if best_match:
+            return best_match
+    return None
+
+
+def legacy_map(title, exact_map, loose_map, product_map, variants):
+    """Steps 2-6 through the current code (no variants -> no fuzzy), then legacy 7-8."""
+    gid = map_korealy_to_shopify(title, exact_map, loose_map, product_map=product_map)
+    return gid or legacy_fuzzy(title, variants)
+
+
+def main():
+    rng = random.Random(SEED)
+    variants = make_catalog(rng)
+    rows = make_rows(rng, variants)
+    exact_map, loose_map, product_map, sku_map = build_name_maps(variants)
+    print(f"{len(rows)} Korealy rows x {len(variants)} Shopify variants")
+
+    t0 = time.perf_counter()
+    results = reconcile(rows, variants, exact_map, loose_map, product_map, sku_map)
+    indexed_s = time.perf_counter() - t0
+    mapped = sum(1 for r in results if r["variant_gid"])
+
+    sample = rng.sample(range(len(rows)), min(LEGACY_SAMPLE, len(rows)))
+    t0 = time.perf_counter()
+    legacy = {i: legacy_map(rows[i]["title"], exact_map, loose_map, product_map, variants) for i in sample}
+    legacy_sample_s = time.perf_counter() - t0
+    legacy_est_s = legacy_sample_s / max(1, len(sample)) * len(rows)
+
+    mismatches = [i for i in sample if legacy[i] != results[i]["variant_gid"]]
+
+    print(f"\n{'matcher':<28} {'seconds':>10}")
+    print(f"{'indexed (reconcile)':<28} {indexed_s:>10.2f}")
+    print(f"{'legacy scan (estimated)':<28} {legacy_est_s:>10.2f}   ({len(sample)} rows timed)")
+    print(f"\nmapped {mapped}/{len(rows)} rows; speedup ~{legacy_est_s / max(indexed_s, 1e-9):.0f}x")
+    if mismatches:
+        print(f"❌ {len(mismatches)} sampled rows differ from the legacy matcher, e.g.:")
+        for i in mismatches[:5]:
+            print(f"   {rows[i]['title']!r}: legacy={legacy[i]} indexed={results[i]['variant_gid']}")
+        sys.exit(1)
+    print(f"✅ identical results on all {len(sample)} sampled rows")
+
+
+if __name__ == "__main__":
+    main()
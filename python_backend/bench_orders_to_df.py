@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Benchmark transform.orders_to_df (columnar builder + vectorized channel
+normalization) against the previous row-wise builder.
+
+Generates synthetic GraphQL orders (default 100k) with a realistic mix of
+customerJourneySummary shapes - no journey, UTMs on the first or last visit,
+Google / ChatGPT / self / other referrers, gclid links, Klaviyo, mixed case
+and padded values, missing fields - then:
+  - times the legacy builder (list of row dicts + df.apply(normalize_channel))
+  - times orders_to_df
+  - checks both frames are identical, channel labels included
+
+Usage:
+    python bench_orders_to_df.py
+
+Env:
+  BENCH_ORDERS  orders to generate (default 100000)
+  BENCH_SEED    RNG seed (default 7)
+"""
+import os
+import sys
+import time
+import random
+from typing import Any, Dict, List
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from channel_normalizer import normalize_channel, normalize_channel_columns  # noqa: E402
+from transform import _money, orders_to_df  # noqa: E402
+
+ORDERS = int(os.getenv("BENCH_ORDERS", "100000"))
+SEED = int(os.getenv("BENCH_SEED", "7"))
+
+UTMS = [("", ""), ("google", "cpc"), ("Google ", "CPC"), ("klaviyo", "email"), ("facebook", "paid"),
+        ("ig", "social"), ("", "product_sync"), ("chatgpt.com", ""), ("openai", "referral"),
+        ("newsletter", "Email"), ("tiktok", "paid"), ("", "")]
+REFERRERS = ["", "", "https://www.google.com/", "https://www.google.co.uk/search?q=serum",
+             "https://mirai-skin.com/products/x", "https://chatgpt.com/", "chatgpt.com",
+             "https://www.youtube.com/watch?v=1", "https://l.instagram.com/?u=x",
+             "https://www.bing.com/search?q=cosrx", "https://mirai-skin.com/?gclid=abc",
+             "https://googleads.g.doubleclick.net/pagead", "m.facebook.com/",
+             "https://www.reddit.com/r/AsianBeauty/"]
+SOURCE_NAMES = ["web", "web", "web", "shopify_draft_order", "Klaviyo", "google", "pos", None, ""]
+
+
+def make_orders(rng: random.Random) -> List[Dict[str, Any]]:
+    orders = []
+    for i in range(ORDERS):
+        journey: Any = None
+        shape = rng.random()
+        if shape > 0.2:
+            visits = {}
+            for which in ("firstVisit", "lastVisit"):
+                if rng.random() < 0.7:
+                    src, med = rng.choice(UTMS)
+                    ref = rng.choice(REFERRERS)
+                    if rng.random() < 0.05:
+                        ref = f"https://shop{rng.randint(0, 5000)}.example.com/p?gclid={rng.randint(0, 9)}"
+                    visits[which] = {"utmParameters": {"source": src or None, "medium": med or None}
+                                     if rng.random() < 0.9 else None,
+                                     "referrerUrl": ref or None}
+                else:
+                    visits[which] = None
+            journey = visits
+        items = [{
+            "quantity": rng.randint(1, 3),
+            "originalTotalSet": {"shopMoney": {"amount": f"{rng.uniform(5, 80):.2f}", "currencyCode": "USD"}},
+            "variant": {"inventoryItem": {"unitCost": {"amount": f"{rng.uniform(1, 20):.2f}"}
+                                          if rng.random() < 0.9 else None}},
+        } for _ in range(rng.randint(1, 4))]
+        orders.append({
+            "id": f"gid://shopify/Order/{i}",
+            "name": f"#{100000 + i}",
+            "createdAt": f"2025-06-{1 + i % 28:02d}T{i % 24:02d}:00:00Z",
+            "sourceName": rng.choice(SOURCE_NAMES),
+            "customer": {"numberOfOrders": str(rng.randint(1, 4))} if rng.random() < 0.5
+            else {"numberOfOrders": rng.randint(1, 4)} if rng.random() < 0.9 else None,
+            "customerJourneySummary": journey,
+            "currentTotalDiscountsSet": {"shopMoney": {"amount": f"{rng.uniform(0, 10):.2f}"}},
+            "totalRefundedSet": {"shopMoney": {"amount": "0.0" if rng.random() < 0.95 else "25.00"}},
+            "currentShippingPriceSet": {"shopMoney": {"amount": rng.choice(["0.0", "4.99", "9.99"])}},
+            "lineItems": {"nodes": items},
+        })
+    return orders
+
+
+# ---- previous implementation (row dicts + row-wise apply), kept for comparison ----
+
+def _legacy_utm(o, which, key):
+    try:
+        return (((o.get("customerJourneySummary") or {}).get(which) or {}).get("utmParameters") or {}).get(key) or ""
+    except Exception:
+        return ""
+
+
+def _legacy_ref_url(o, which):
+    try:
+        return ((o.get("customerJourneySummary") or {}).get(which) or {}).get("referrerUrl") or ""
+    except Exception:
+        return ""
+
+
+def legacy_orders_to_df(orders):
+    rows = []
+    for o in orders or []:
+        gross = cogs = 0.0
+        for li in ((o.get("lineItems") or {}).get("nodes") or []):
+            qty = int(li.get("quantity") or 0)
+            gross += _money(li, ["originalTotalSet", "shopMoney"])
+            try:
+                unit_cost = float((((li.get("variant") or {}).get("inventoryItem") or {})
+                                   .get("unitCost") or {}).get("amount") or 0)
+            except Exception:
+                unit_cost = 0.0
+            cogs += unit_cost * qty
+        discounts = _money(o, ["currentTotalDiscountsSet", "shopMoney"])
+        refunds = _money(o, ["totalRefundedSet", "shopMoney"])
+        shipping_charged = _money(o, ["currentShippingPriceSet", "shopMoney"])
+        try:
+            rcr = int(((o.get("customer") or {}).get("numberOfOrders") or 0) > 1)
+        except Exception:
+            rcr = 0
+        rows.append({
+            "created_at": o.get("createdAt"),
+            "name": o.get("name") or "",
+            "sourceName": o.get("sourceName") or "",
+            "utm_source": _legacy_utm(o, "lastVisit", "source") or _legacy_utm(o, "firstVisit", "source"),
+            "utm_medium": _legacy_utm(o, "lastVisit", "medium") or _legacy_utm(o, "firstVisit", "medium"),
+            "referrer_url": _legacy_ref_url(o, "lastVisit") or _legacy_ref_url(o, "firstVisit"),
+            "gross": round(gross, 2),
+            "discounts": round(discounts, 2),
+            "refunds": round(refunds, 2),
+            "net": round(max(gross - discounts - refunds, 0.0), 2),
+            "cogs": round(cogs, 2),
+            "shipping_charged": round(shipping_charged, 2),
+            "orders": 1,
+            "rcr": rcr,
+        })
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    df["channel_norm"] = legacy_channels(df)
+    return df
+
+
+def legacy_channels(df):
+    return df.apply(lambda r: normalize_channel(
+        source_name=r.get("sourceName") or "",
+        utm_source=r.get("utm_source") or "",
+        utm_medium=r.get("utm_medium") or "",
+        referrer_url=r.get("referrer_url") or "",
+    ), axis=1)
+
+
+def main() -> int:
+    rng = random.Random(SEED)
+    orders = make_orders(rng)
+    print(f"{len(orders)} synthetic orders")
+
+    t0 = time.perf_counter()
+    legacy = legacy_orders_to_df(orders)
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    df = orders_to_df(orders)
+    t_new = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    legacy_channels(df)
+    t_apply = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    normalize_channel_columns(df)
+    t_vec = time.perf_counter() - t0
+
+    print(f"legacy row-wise builder: {t_legacy:.2f}s")
+    print(f"columnar orders_to_df:   {t_new:.2f}s  ({t_legacy / t_new:.1f}x)")
+    print(f"channel step alone: apply {t_apply:.2f}s, vectorized {t_vec:.3f}s  ({t_apply / t_vec:.0f}x)")
+
+    labels_equal = legacy["channel_norm"].tolist() == df["channel_norm"].tolist()
+    print(f"channel mix: {df['channel_norm'].value_counts().to_dict()}")
+    try:
+        pd.testing.assert_frame_equal(legacy, df, check_dtype=False)
+        frames_equal = True
+    except AssertionError as e:
+        print(e)
+        frames_equal = False
+    print(f"{'✅' if labels_equal else '❌'} channel labels identical")
+    print(f"{'✅' if frames_equal else '❌'} frames identical")
+    return 0 if labels_equal and frames_equal else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
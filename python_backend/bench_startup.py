@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Startup profile: import cost of the server modules and time to first /health.
+
+Each run imports a module in a fresh interpreter with `python -X importtime`
+and reports the median total, the slowest top-level imports (cumulative) and
+anything the import printed - importing a module should not print, read data
+files or connect anywhere.
+
+    python bench_startup.py                        # simple_server, server, pricing_logic, ...
+    python bench_startup.py social_media_service   # specific modules
+    python bench_startup.py --serve                # also boot uvicorn, time until /health answers
+
+Env:
+  BENCH_RUNS   fresh-interpreter runs per module (default 5)
+  BENCH_TOP    slowest top-level imports to list (default 12)
+  BENCH_PORT   port for --serve (default 8765)
+"""
+import os
+import sys
+import time
+import socket
+import statistics
+import subprocess
+import urllib.request
+from typing import Dict, List, Tuple
+
+RUNS = int(os.getenv("BENCH_RUNS", "5"))
+TOP = int(os.getenv("BENCH_TOP", "12"))
+PORT = int(os.getenv("BENCH_PORT", "8765"))
+DEFAULT_MODULES = ["simple_server", "server", "pricing_logic", "social_media_service",
+                   "master_report_mirai", "agents.orchestrator"]
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _importtime(module: str) -> Tuple[float, Dict[str, int], str]:
+    """(module import ms, {direct import of the module: cumulative us}, stdout) for one fresh import."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=HERE, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    # Lines are "import time: self | cumulative | <2 spaces per level>name", children
+    # before their parent; the module itself is at level 0, its imports at level 1
+    children: Dict[str, int] = {}
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum_us, name = line.split("|")
+        level = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        if level == 1:
+            children[name.strip()] = int(cum_us)
+        elif level == 0:
+            if name.strip() == module:
+                total_us = int(cum_us)
+                break
+            children.clear()  # interpreter startup (site, encodings, ...)
+    return total_us / 1000, children, proc.stdout
+
+
+def profile_module(module: str) -> None:
+    totals: List[float] = []
+    tops: Dict[str, List[int]] = {}
+    output = ""
+    for _ in range(RUNS):
+        total, top, output = _importtime(module)
+        totals.append(total)
+        for name, us in top.items():
+            tops.setdefault(name, []).append(us)
+
+    print(f"\n{module}: median {statistics.median(totals):.0f} ms "
+          f"(min {min(totals):.0f}, max {max(totals):.0f}, {RUNS} runs)")
+    slowest = sorted(((statistics.median(v) / 1000, k) for k, v in tops.items()), reverse=True)[:TOP]
+    for ms, name in slowest:
+        if ms >= 1:
+            print(f"  {ms:8.1f} ms  {name}")
+    lines = [l for l in output.splitlines() if l.strip()]
+    if lines:
+        print(f"  ⚠️ import printed {len(lines)} line(s):")
+        for l in lines[:5]:
+            print(f"     {l}")
+
+
+def _free_port(port: int) -> bool:
+    with socket.socket() as s:
+        return s.connect_ex(("127.0.0.1", port)) != 0
+
+
+def time_to_health(app: str = "simple_server:app") -> None:
+    if not _free_port(PORT):
+        print(f"\nport {PORT} busy - set BENCH_PORT")
+        return
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", app, "--port", str(PORT)],
+                            cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < 120:
+            if proc.poll() is not None:
+                print(f"\n{app}: uvicorn exited with {proc.returncode}")
+                return
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{PORT}/health", timeout=1) as r:
+                    body = r.read().decode()
+                print(f"\n{app}: /health answered after {time.perf_counter() - started:.2f}s  {body}")
+                return
+            except OSError:
+                time.sleep(0.05)
+        print(f"\n{app}: no /health answer within 120s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    for module in args or DEFAULT_MODULES:
+        try:
+            profile_module(module)
+        except RuntimeError as e:
+            print(f"\n{module}: {e}")
+    if "--serve" in sys.argv:
+        time_to_health()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,8 @@ import os
 import pytz
 import re
 
-from config import SHOPIFY_STORES
-from shopify_client import fetch_orders_created_between_for_store, get_shop_timezone
+from order_snapshot import get_orders
+from shopify_client import get_shop_timezone
 
 
 def _parse_dt(s: str) -> datetime:
@@ -64,29 +64,8 @@ def fetch_bestsellers(days: int = 30) -> Dict[str, Any]:
 
     print(f"📊 Fetching best sellers for last {days} days ({start_date} to {end_date})")
 
-    # Fetch orders from all stores
-    all_orders = []
-    for store in SHOPIFY_STORES:
-        domain = store["domain"]
-        token = store["access_token"]
-        orders = fetch_orders_created_between_for_store(
-            domain, token,
-            start_local.isoformat(),
-            end_local.isoformat(),
-            exclude_cancelled=True  # Exclude cancelled orders
-        )
-        for o in orders:
-            o["_store"] = domain
-        all_orders.extend(orders)
-
-    # Deduplicate by ID
-    seen_ids = set()
-    unique_orders = []
-    for o in all_orders:
-        oid = o.get("id")
-        if oid and oid not in seen_ids:
-            seen_ids.add(oid)
-            unique_orders.append(o)
+    # Orders from all stores (shared snapshot, deduplicated by ID)
+    unique_orders = get_orders(start_local, end_local, exclude_cancelled=True)
 
     print(f"📦 Found {len(unique_orders)} orders")
 
@@ -243,31 +222,8 @@ def get_variant_order_count(variant_ids: List[str], days: int = 30) -> Dict[str,
     # Convert to set for faster lookup
     target_variants = set(str(v) for v in variant_ids)
 
-    # Fetch orders from all stores (skip stores that fail)
-    all_orders = []
-    for store in SHOPIFY_STORES:
-        domain = store["domain"]
-        token = store["access_token"]
-        try:
-            orders = fetch_orders_created_between_for_store(
-                domain, token,
-                start_local.isoformat(),
-                end_local.isoformat(),
-                exclude_cancelled=True
-            )
-            all_orders.extend(orders)
-        except Exception as e:
-            print(f"⚠️ Skipping store {store.get('label', domain)}: {e}")
-            continue
-
-    # Deduplicate by ID
-    seen_ids = set()
-    unique_orders = []
-    for o in all_orders:
-        oid = o.get("id")
-        if oid and oid not in seen_ids:
-            seen_ids.add(oid)
-            unique_orders.append(o)
+    # Orders from all stores (shared snapshot, skip stores that fail)
+    unique_orders = get_orders(start_local, end_local, exclude_cancelled=True, skip_failed_stores=True)
 
     # Count orders per variant
     variant_order_sets = defaultdict(set)
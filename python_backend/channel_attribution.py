@@ -0,0 +1,223 @@
+# channel_attribution.py — one rule table for order → marketing channel
+"""
+Channel attribution engine shared by every order pipeline:
+  - channel_normalizer.normalize_channel / normalize_channel_columns (orders_to_df)
+  - master_report_mirai._shopify_channel (daily KPIs: Google / Meta purchases)
+  - order_report_logic._shopify_channel (order report)
+  - sync_jobs.sync_orders.SyncOrders._normalize_channel (orders table)
+
+An order is reduced to an attribution key
+    (source_name, utm_source, utm_medium, referrer_host, has_gclid)
+- all lower-cased, UTMs/referrer from customerJourneySummary.lastVisit with
+  firstVisit filling the gaps - and the key is classified by RULES, first
+  match wins. Keys repeat heavily (a few hundred distinct per month), so
+  classify_key is LRU-cached; referrer hosts are matched against one
+  combined, precompiled regex and memoized per host.
+
+Channels: google, meta, klaviyo, chatgpt, direct, organic. Callers map them to
+their own labels.
+"""
+from __future__ import annotations
+import re
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+CHANNELS = ("google", "meta", "klaviyo", "chatgpt", "direct", "organic")
+
+# treat self-referrals as direct
+SELF_DOMAINS = ("mirai-skin.com",)
+
+# google surfaces to check in referrerUrl
+GOOGLE_HOST_HINTS = (
+    "google.", "youtube.", "gmail.", "googleadservices.", "doubleclick.", "googlesyndication."
+)
+META_HOST_HINTS = ("facebook.com", "instagram.com", "fb.com")
+
+GOOGLE_SOURCES = ("google", "google-search", "google_search", "google search",
+                  "google-shopping", "google_shopping", "google shopping")
+META_SOURCES = ("facebook", "fb", "instagram", "ig", "meta")
+CHATGPT_SOURCES = ("chatgpt.com", "openai", "chatgpt")
+
+# (channel, key field, values) - evaluated top to bottom, first match wins.
+#   "host" rules match host tags from _HOST_RE; "gclid" is a boolean flag.
+RULES: Tuple[Tuple[str, str, Tuple[str, ...]], ...] = (
+    ("klaviyo", "source_name", ("klaviyo",)),
+    ("klaviyo", "utm_source", ("klaviyo",)),
+    ("klaviyo", "utm_medium", ("email",)),
+    ("google", "gclid", ()),
+    ("google", "utm_source", GOOGLE_SOURCES),
+    ("google", "utm_medium", ("cpc", "product_sync")),
+    ("google", "source_name", ("google",)),
+    ("google", "host", ("google",)),
+    ("meta", "utm_source", META_SOURCES),
+    ("meta", "host", ("meta",)),
+    ("chatgpt", "utm_source", CHATGPT_SOURCES),
+    ("chatgpt", "host", ("chatgpt",)),
+)
+
+# One pass over a host tags it google / meta / chatgpt / self
+_HOST_RE = re.compile("|".join([
+    "(?P<google>" + "|".join(re.escape(t) for t in GOOGLE_HOST_HINTS) + ")",
+    "(?P<meta>" + "|".join(re.escape(t) for t in META_HOST_HINTS) + ")",
+    r"(?P<chatgpt>^chatgpt\.com$)",
+    "(?P<self>" + "|".join(re.escape(d) for d in SELF_DOMAINS) + ")",
+]))
+
+AttributionKey = Tuple[str, str, str, str, bool]
+
+
+@lru_cache(maxsize=65536)
+def host_of(url: str) -> str:
+    if not url:
+        return ""
+    try:
+        if "://" not in url:
+            url = "http://" + url
+        return (urlparse(url).netloc or "").lower()
+    except Exception:
+        return ""
+
+
+@lru_cache(maxsize=8192)
+def host_tags(host: str) -> FrozenSet[str]:
+    if not host:
+        return frozenset()
+    return frozenset(m.lastgroup for m in _HOST_RE.finditer(host))
+
+
+@lru_cache(maxsize=8192)
+def classify_key(source_name: str, utm_source: str, utm_medium: str, host: str, gclid: bool) -> str:
+    """Channel for an attribution key (fields already stripped + lower-cased)."""
+    tags = host_tags(host)
+    fields = {"source_name": source_name, "utm_source": utm_source, "utm_medium": utm_medium}
+    for channel, field, values in RULES:
+        if field == "gclid":
+            if gclid:
+                return channel
+        elif field == "host":
+            if tags.intersection(values):
+                return channel
+        elif fields[field] in values:
+            return channel
+
+    if not utm_source and not utm_medium and (not host or "self" in tags):
+        return "direct"
+    return "organic"
+
+
+def _clean(value: Any) -> str:
+    return value.strip().lower() if isinstance(value, str) else ""
+
+
+def make_key(source_name: str = "", utm_source: str = "", utm_medium: str = "",
+             referrer_url: str = "", landing_page_url: str = "") -> AttributionKey:
+    gclid = any(isinstance(u, str) and "gclid=" in u.lower() for u in (referrer_url, landing_page_url))
+    return (_clean(source_name), _clean(utm_source), _clean(utm_medium),
+            host_of(referrer_url if isinstance(referrer_url, str) else ""), gclid)
+
+
+def classify(source_name: str = "", utm_source: str = "", utm_medium: str = "",
+             referrer_url: str = "", landing_page_url: str = "") -> str:
+    """Channel from already extracted fields."""
+    return classify_key(*make_key(source_name, utm_source, utm_medium, referrer_url, landing_page_url))
+
+
+# ---------- orders ----------
+
+def journey(order: Dict[str, Any]) -> Dict[str, Any]:
+    """customerJourneySummary (GraphQL) or the legacy customerJourney key."""
+    j = order.get("customerJourneySummary") or order.get("customerJourney") or {}
+    return j if isinstance(j, dict) else {}
+
+
+def journey_visit(order: Dict[str, Any], which: str) -> Dict[str, Any]:
+    v = journey(order).get(which)
+    return v if isinstance(v, dict) else {}
+
+
+def _visit_fields(visit: Dict[str, Any]) -> Tuple[str, str, str, str]:
+    utm = visit.get("utmParameters")
+    if not isinstance(utm, dict):
+        utm = {}
+    landing = visit.get("landingPage") or visit.get("landingPageUrl") or ""
+    return utm.get("source") or "", utm.get("medium") or "", visit.get("referrerUrl") or "", landing
+
+
+def _explicit_attribution(order: Dict[str, Any]) -> Optional[str]:
+    """Server-side `_attribution_source` note attribute, when the order carries one."""
+    for attr in order.get("customAttributes") or []:
+        if isinstance(attr, dict) and attr.get("key") == "_attribution_source":
+            val = (attr.get("value") or "").lower()
+            if "google" in val:
+                return "google"
+            if "meta" in val or "facebook" in val or "instagram" in val:
+                return "meta"
+    return None
+
+
+def order_key(order: Dict[str, Any]) -> AttributionKey:
+    """Attribution key of a Shopify GraphQL order."""
+    last_src, last_med, last_ref, last_land = _visit_fields(journey_visit(order, "lastVisit"))
+    first_src, first_med, first_ref, first_land = _visit_fields(journey_visit(order, "firstVisit"))
+    gclid = any(isinstance(u, str) and "gclid=" in u.lower()
+                for u in (last_ref, last_land, first_ref, first_land))
+    key = make_key(order.get("sourceName") or "", last_src or first_src, last_med or first_med,
+                   last_ref or first_ref)
+    return key[:4] + (gclid,)
+
+
+def attribute_order(order: Dict[str, Any]) -> str:
+    """Channel of one Shopify GraphQL order."""
+    return _explicit_attribution(order) or classify_key(*order_key(order))
+
+
+def attribute_orders(orders: Iterable[Dict[str, Any]]) -> List[str]:
+    """Channels for a batch of orders, in order (each distinct key is classified once)."""
+    seen: Dict[AttributionKey, str] = {}
+    out = []
+    for o in orders:
+        channel = _explicit_attribution(o)
+        if channel is None:
+            key = order_key(o)
+            channel = seen.get(key)
+            if channel is None:
+                channel = seen[key] = classify_key(*key)
+        out.append(channel)
+    return out
+
+
+# ---------- columns ----------
+
+def classify_columns(source_name, utm_source, utm_medium, referrer_url):
+    """
+    Channels for aligned pandas Series (one row per order) as an object
+    ndarray. Strings are cleaned once per distinct value, URLs parsed once
+    per distinct URL, and each distinct attribution key classified once.
+    """
+    import numpy as np
+    import pandas as pd
+
+    def factor(col, fn):
+        codes, uniques = pd.factorize(col.fillna("").astype(object), use_na_sentinel=False)
+        return codes, np.array([fn(u) for u in uniques], dtype=object)
+
+    s_codes, s_vals = factor(source_name, _clean)
+    u_codes, u_vals = factor(utm_source, _clean)
+    m_codes, m_vals = factor(utm_medium, _clean)
+    r_codes, r_urls = pd.factorize(referrer_url.fillna("").astype(object), use_na_sentinel=False)
+    r_hosts = np.array([host_of(u) if isinstance(u, str) else "" for u in r_urls], dtype=object)
+    r_gclid = np.array([isinstance(u, str) and "gclid=" in u.lower() for u in r_urls], dtype=bool)
+
+    key_codes, keys = pd.MultiIndex.from_arrays([s_codes, u_codes, m_codes, r_codes]).factorize()
+    labels = np.empty(len(keys), dtype=object)
+    for i, (s, u, m, r) in enumerate(keys):
+        labels[i] = classify_key(s_vals[s], u_vals[u], m_vals[m], r_hosts[r], bool(r_gclid[r]))
+    return labels[key_codes]
+
+
+def get_attribution_stats() -> Dict[str, Any]:
+    info = classify_key.cache_info()
+    hosts = host_of.cache_info()
+    return {"keys_cached": info.currsize, "key_hits": info.hits, "key_misses": info.misses,
+            "hosts_cached": hosts.currsize, "host_hits": hosts.hits, "host_misses": hosts.misses}
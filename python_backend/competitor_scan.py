@@ -0,0 +1,319 @@
+"""
+Competitor scan engine - SerpAPI Google Shopping lookups for Shopify variants
+
+Used by /pricing/check-competitor-prices (pricing_execution) and the
+background competitor scan in simple_server.
+
+- Variant details come from Shopify in batched `nodes` queries
+- Variants that build the same search query share one SerpAPI call
+- Unique queries run on a bounded thread pool (COMPETITOR_SCAN_CONCURRENCY)
+- Raw shopping_results are cached on disk per (query, country) for
+  SERPAPI_CACHE_TTL_HOURS, so re-scans within the TTL cost no API credits
+
+Env:
+  SERPAPI_KEY / SERPAPI_API_KEY   API key
+  SERPAPI_URL                     endpoint (default https://serpapi.com/search.json;
+                                  point at serpapi_stub.py for local runs)
+  COMPETITOR_SCAN_CONCURRENCY     parallel SerpAPI queries (default 4)
+  SERPAPI_CACHE_TTL_HOURS         cache lifetime, 0 disables (default 24)
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from request_metrics import record_cache
+
+SERPAPI_URL = os.getenv("SERPAPI_URL", "https://serpapi.com/search.json")
+SCAN_CONCURRENCY = int(os.getenv("COMPETITOR_SCAN_CONCURRENCY", "4"))
+CACHE_TTL_SECONDS = float(os.getenv("SERPAPI_CACHE_TTL_HOURS", "24")) * 3600
+_CACHE_DIR = os.path.join(os.getenv("RENDER_DISK_PATH", os.path.dirname(__file__)), "serp_cache")
+
+SHOPIFY_NODES_BATCH = 100
+
+_stats_lock = threading.Lock()
+_STATS = {"serp_calls": 0, "cache_hits": 0, "deduped": 0}
+
+
+def _serpapi_key() -> Optional[str]:
+    return os.getenv("SERPAPI_KEY") or os.getenv("SERPAPI_API_KEY")
+
+
+def _bump(key: str, n: int = 1) -> None:
+    with _stats_lock:
+        _STATS[key] += n
+
+
+def get_scan_stats() -> Dict[str, int]:
+    """Process-wide SerpAPI call / cache hit / dedupe counters"""
+    with _stats_lock:
+        return dict(_STATS)
+
+
+# ================== SERPAPI + DISK CACHE ==================
+
+def _cache_path(query: str, country: str) -> str:
+    key = hashlib.sha256(f"google_shopping|{country}|en|100|{query}".encode()).hexdigest()
+    return os.path.join(_CACHE_DIR, f"{key}.json")
+
+
+def _read_cache(query: str, country: str) -> Optional[List[Dict[str, Any]]]:
+    if CACHE_TTL_SECONDS <= 0:
+        return None
+    path = _cache_path(query, country)
+    try:
+        if time.time() - os.path.getmtime(path) > CACHE_TTL_SECONDS:
+            return None
+        with open(path, "r") as f:
+            return json.load(f)["shopping_results"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_cache(query: str, country: str, results: List[Dict[str, Any]]) -> None:
+    if CACHE_TTL_SECONDS <= 0:
+        return
+    try:
+        os.makedirs(_CACHE_DIR, exist_ok=True)
+        path = _cache_path(query, country)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"query": query, "country": country, "fetched_at": time.time(),
+                       "shopping_results": results}, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"⚠️ Could not cache SerpAPI results: {e}")
+
+
+def fetch_shopping_results(query: str, country: str = "us", use_cache: bool = True) -> List[Dict[str, Any]]:
+    """Raw Google Shopping results for a query (disk-cached)"""
+    if use_cache:
+        cached = _read_cache(query, country)
+        record_cache("serpapi", hit=cached is not None)
+        if cached is not None:
+            _bump("cache_hits")
+            return cached
+
+    response = requests.get(SERPAPI_URL, params={
+        "engine": "google_shopping",
+        "q": query,
+        "gl": country,
+        "hl": "en",
+        "num": 100,
+        "api_key": _serpapi_key(),
+    }, timeout=60)
+    response.raise_for_status()
+    _bump("serp_calls")
+    results = response.json().get("shopping_results", [])
+    _write_cache(query, country, results)
+    return results
+
+
+# ================== SHOPIFY VARIANT DETAILS ==================
+
+_VARIANT_NODES_QUERY = """
+query($ids: [ID!]!) {
+    nodes(ids: $ids) {
+        ... on ProductVariant {
+            id
+            title
+            sku
+            price
+            compareAtPrice
+            product { title }
+            inventoryItem { unitCost { amount } }
+        }
+    }
+}
+"""
+
+
+def fetch_variant_details(variant_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """variant_id -> {product_title, variant_title, sku, current_price, compare_at, cogs}.
+    Variants Shopify does not return are left out."""
+    from pricing_execution import _shopify_graphql
+
+    details = {}
+    for i in range(0, len(variant_ids), SHOPIFY_NODES_BATCH):
+        chunk = variant_ids[i:i + SHOPIFY_NODES_BATCH]
+        result = _shopify_graphql(_VARIANT_NODES_QUERY,
+                                  {"ids": [f"gid://shopify/ProductVariant/{vid}" for vid in chunk]})
+        for node in result["data"]["nodes"]:
+            if not node or not node.get("id"):
+                continue
+            vid = node["id"].rsplit("/", 1)[-1]
+            unit_cost = (node.get("inventoryItem") or {}).get("unitCost")
+            details[vid] = {
+                "product_title": node["product"]["title"],
+                "variant_title": node["title"],
+                "sku": node["sku"],
+                "current_price": float(node["price"]) if node["price"] else 0.0,
+                "compare_at": float(node["compareAtPrice"]) if node["compareAtPrice"] else 0.0,
+                "cogs": float(unit_cost["amount"]) if unit_cost else 0.0,
+            }
+    return details
+
+
+def build_search_query(info: Dict[str, Any]) -> str:
+    query = f"{info['product_title']} {info['variant_title']}"
+    if info.get("sku"):
+        query += f" {info['sku']}"
+    return query
+
+
+# ================== ANALYSIS ==================
+
+def _analyze(info: Dict[str, Any], shopping_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    from smart_pricing import analyze_competitor_prices
+
+    competitor_prices = []
+    seller_counts = {}
+    for item in shopping_results:
+        price_str = item.get("extracted_price")
+        seller = item.get("source", "Unknown")
+        if price_str:
+            competitor_prices.append({
+                "price": float(price_str),
+                "seller": seller,
+                "title": item.get("title", ""),
+                "link": item.get("link", ""),
+                "domain": item.get("link", "").split("/")[2] if item.get("link") else ""
+            })
+            seller_counts[seller] = seller_counts.get(seller, 0) + 1
+
+    analysis = analyze_competitor_prices(competitor_prices)
+    top_sellers = sorted(seller_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+
+    # Competitive price: 3% below avg, min 25% margin
+    cogs = info["cogs"]
+    competitive_price = 0.0
+    comp_note = "N/A"
+    if analysis["comp_avg"] and analysis["comp_avg"] > 0:
+        min_margin = 0.25
+        min_price = cogs * (1 + min_margin) if cogs > 0 else 0
+        target_competitive = analysis["comp_avg"] * 0.97
+
+        if target_competitive >= min_price:
+            competitive_price = round(target_competitive, 2)
+            comp_note = "3% below avg"
+        elif min_price > 0:
+            competitive_price = round(min_price, 2)
+            comp_note = "Floor (25% margin)"
+
+    return {
+        "analysis": analysis,
+        "top_sellers": top_sellers,
+        "competitive_price": competitive_price,
+        "comp_note": comp_note,
+    }
+
+
+# ================== ENGINE ==================
+
+def scan_variant_details(
+    details: Dict[str, Dict[str, Any]],
+    variant_ids: List[str],
+    on_progress: Optional[Callable[[int, str], None]] = None,
+    country: str = "US",
+    concurrency: Optional[int] = None,
+    persist: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Scan variants whose Shopify details are already known.
+
+    Returns one record per variant_id, in input order:
+      {"variant_id", "status": "success", <details>, "analysis", "top_sellers",
+       "competitive_price", "comp_note"}  or  {"variant_id", "status": "failed", "error"}
+
+    on_progress(done, current_item) is called from the calling thread after each
+    variant completes; an exception it raises stops the scan. With persist=True, results go to pricing_logic competitor
+    data and scan history as they complete.
+    """
+    if persist:
+        from pricing_logic import update_competitor_data, log_competitor_scan
+
+    records: Dict[str, Dict[str, Any]] = {}
+    groups: Dict[str, List[str]] = {}
+    for vid in dict.fromkeys(variant_ids):
+        info = details.get(vid)
+        if not info:
+            records[vid] = {"variant_id": vid, "status": "failed", "error": "Variant not found in Shopify"}
+            continue
+        groups.setdefault(build_search_query(info), []).append(vid)
+
+    done = 0
+    for vid in records:
+        done += 1
+        if on_progress:
+            on_progress(done, vid)
+
+    deduped = sum(len(v) - 1 for v in groups.values())
+    if deduped:
+        _bump("deduped", deduped)
+        print(f"🔎 Competitor scan: {len(groups)} unique queries for {sum(len(v) for v in groups.values())} variants")
+
+    gl = country.lower()
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency or SCAN_CONCURRENCY))
+    try:
+        futures = {pool.submit(fetch_shopping_results, query, gl): query for query in groups}
+        for future in as_completed(futures):
+            query = futures[future]
+            try:
+                shopping_results = future.result()
+                error = None
+            except Exception as e:
+                shopping_results, error = None, str(e)
+
+            for vid in groups[query]:
+                info = details[vid]
+                item_name = f"{info['product_title']} - {info['variant_title']}"
+                if error is not None:
+                    records[vid] = {"variant_id": vid, "status": "failed", "error": error}
+                else:
+                    try:
+                        scored = _analyze(info, shopping_results)
+                        records[vid] = {"variant_id": vid, "status": "success", **info, **scored}
+                        if persist:
+                            analysis = scored["analysis"]
+                            scan_data = {
+                                "comp_low": analysis["comp_low"],
+                                "comp_avg": analysis["comp_avg"],
+                                "comp_high": analysis["comp_high"],
+                                "raw_count": analysis["raw_count"],
+                                "trusted_count": analysis["trusted_count"],
+                                "filtered_count": analysis["filtered_count"],
+                                "competitive_price": scored["competitive_price"],
+                                "top_sellers": scored["top_sellers"],
+                            }
+                            update_competitor_data(vid, scan_data)
+                            log_competitor_scan(vid, item_name, scan_data, country=country)
+                    except Exception as e:
+                        records[vid] = {"variant_id": vid, "status": "failed", "error": str(e)}
+                done += 1
+                if on_progress:
+                    on_progress(done, item_name)
+    finally:
+        # If on_progress aborts the scan (e.g. task cancellation), drop queued queries
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    return [records[vid] for vid in variant_ids if vid in records]
+
+
+def run_competitor_scan(
+    variant_ids: List[str],
+    on_progress: Optional[Callable[[int, str], None]] = None,
+    country: str = "US",
+    concurrency: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Fetch Shopify details for the variants, then scan them (see scan_variant_details)."""
+    if not _serpapi_key():
+        raise RuntimeError("SerpAPI key not configured")
+    variant_ids = [str(v) for v in variant_ids]
+    details = fetch_variant_details(list(dict.fromkeys(variant_ids)))
+    return scan_variant_details(details, variant_ids, on_progress=on_progress,
+                                country=country, concurrency=concurrency)
@@ -37,6 +37,8 @@ def get_engine():
             max_overflow=10,
             pool_pre_ping=True
         )
+        from request_metrics import instrument_engine
+        instrument_engine(_engine)
     return _engine
 
 
@@ -309,6 +311,51 @@ async def init_db():
                     END IF;
                 END $$;
                 """,
+                # Trigram indexes for substring product search (Emma dashboard_bridge.search_products)
+                """
+                DO $$
+                BEGIN
+                    BEGIN
+                        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+                    EXCEPTION WHEN OTHERS THEN
+                        RAISE NOTICE 'pg_trgm unavailable, trigram indexes skipped: %', SQLERRM;
+                    END;
+                    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+                        CREATE INDEX IF NOT EXISTS idx_products_title_trgm ON products USING gin (LOWER(title) gin_trgm_ops);
+                        CREATE INDEX IF NOT EXISTS idx_variants_title_trgm ON variants USING gin (LOWER(title) gin_trgm_ops);
+                        CREATE INDEX IF NOT EXISTS idx_variants_sku_trgm ON variants USING gin (LOWER(sku) gin_trgm_ops);
+                    END IF;
+                END $$;
+                """,
+                # Case-insensitive email lookups (customer orders, conversation history, tracking)
+                "CREATE INDEX IF NOT EXISTS idx_customers_email_lower ON customers (LOWER(email))",
+                "CREATE INDEX IF NOT EXISTS idx_support_emails_customer_email_lower ON support_emails (LOWER(customer_email))",
+                "CREATE INDEX IF NOT EXISTS idx_shipment_tracking_customer_email_lower ON shipment_tracking (LOWER(customer_email))",
+                "CREATE INDEX IF NOT EXISTS idx_orders_customer_created ON orders (customer_id, created_at DESC)",
+                "CREATE INDEX IF NOT EXISTS idx_orders_order_name ON orders (order_name)",
+                "CREATE INDEX IF NOT EXISTS idx_variants_product ON variants (product_id)",
+                "CREATE INDEX IF NOT EXISTS idx_support_messages_email ON support_messages (email_id)",
+                # Analytics aggregates join insights to posts and filter published posts by date
+                "CREATE INDEX IF NOT EXISTS idx_sm_insight_post ON social_media_insights (post_id)",
+                "CREATE INDEX IF NOT EXISTS idx_sm_post_published ON social_media_posts (status, published_at)",
+                # Wake the agent orchestrator when a task becomes runnable (new/approved/retried)
+                # or completes (may unblock dependents). Payload is the target agent.
+                """
+                CREATE OR REPLACE FUNCTION notify_agent_tasks() RETURNS trigger AS $$
+                BEGIN
+                    PERFORM pg_notify('agent_tasks', NEW.target_agent);
+                    RETURN NEW;
+                END;
+                $$ LANGUAGE plpgsql;
+                """,
+                "DROP TRIGGER IF EXISTS trg_agent_tasks_notify ON agent_tasks",
+                """
+                CREATE TRIGGER trg_agent_tasks_notify
+                AFTER INSERT OR UPDATE OF status ON agent_tasks
+                FOR EACH ROW WHEN (NEW.status IN ('pending', 'completed'))
+                EXECUTE FUNCTION notify_agent_tasks()
+                """,
+                "CREATE INDEX IF NOT EXISTS idx_agent_tasks_pending ON agent_tasks (created_at) WHERE status = 'pending'",
             ]
 
             for migration in migrations:
@@ -6,7 +6,7 @@ from decimal import Decimal
 from typing import Optional, List
 from sqlalchemy import (
     Column, Integer, String, DateTime, Date, Boolean,
-    ForeignKey, Text, Numeric, JSON, UniqueConstraint, Index
+    ForeignKey, Text, Numeric, JSON, UniqueConstraint, Index, Float
 )
 from sqlalchemy.orm import relationship
 from .connection import Base
@@ -591,10 +591,10 @@ class SocialMediaPost(Base):
     visual_direction = Column(Text)  # AI description of what the visual should be
     media_url = Column(Text)  # URL of uploaded media
     media_type = Column(String(20))  # IMAGE, VIDEO, CAROUSEL_ALBUM
-    media_data = Column(Text, nullable=True)        # base64-encoded full image
+    media_data = Column(Text, nullable=True)        # media_store ref "blob:sha256:<hex>" (legacy rows: base64)
     media_data_format = Column(String(10), nullable=True)  # "png", "jpeg", "mp4"
     media_thumbnail = Column(Text, nullable=True)    # base64 JPEG thumbnail (256px)
-    media_carousel = Column(JSON, nullable=True)     # [{data: b64, thumbnail: b64, format: str}]
+    media_carousel = Column(JSON, nullable=True)     # [{data: blob ref, thumbnail: b64, format: str}]
     ig_overlays = Column(JSON, nullable=True)        # [{type: "link_sticker"|"poll"|"question"|..., ...}]
     product_ids = Column(JSON)  # Linked Shopify product GIDs
     link_url = Column(Text)  # Website link with UTM params
@@ -706,6 +706,29 @@ class SocialMediaAccountSnapshot(Base):
     )
 
 
+class SocialMediaEngagementRollup(Base):
+    """Engagement of published posts per (day, hour) they went out, updated on
+    insight sync for the buckets of the synced posts. Best-time queries sum at most 168 hour-of-week buckets."""
+    __tablename__ = "social_media_engagement_rollup"
+
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    hour = Column(Integer, nullable=False)  # 0-23 (UTC)
+    dow = Column(Integer, nullable=False)   # 0=Monday
+    posts = Column(Integer, default=0)
+    insight_posts = Column(Integer, default=0)  # posts with a synced insight
+    impressions = Column(Integer, default=0)
+    reach = Column(Integer, default=0)
+    engagement = Column(Integer, default=0)
+    rate_sum = Column(Float, default=0.0)  # sum of per-post engagement / reach
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('day', 'hour', name='uq_sm_engagement_rollup'),
+        Index('idx_sm_rollup_dow_hour', 'dow', 'hour'),
+    )
+
+
 class SocialMediaConnection(Base):
     """Stores Meta/Instagram account connection credentials"""
     __tablename__ = "social_media_connections"
@@ -21,7 +21,7 @@ Key env vars:
     GOOGLE_ADS_CUSTOMER_ID=111          # single leaf fallback
     GOOGLE_ADS_EXCLUDE_IDS=333,444      # exclude specific leaves from discovery/union
     GOOGLE_ADS_DISCOVER=1               # discover leaf accounts under MCC and UNION with explicit list (default 1)
-    GOOGLE_ADS_DEBUG=1                  # verbose per-account logs
+    GOOGLE_ADS_DEBUG=1                  # verbose per-account logs (same as LOG_LEVELS=gads=DEBUG)
     GOOGLE_ADS_MAX_RETRIES=5
     GOOGLE_ADS_BACKOFF_BASE=0.7
 
@@ -32,6 +32,7 @@ FX:
 from __future__ import annotations
 import os
 import time
+import logging
 from datetime import datetime, timedelta
 from typing import Iterable, List, Optional, Tuple, Dict, Set
 
@@ -45,6 +46,9 @@ from google.auth.exceptions import RefreshError
 from google_auth_oauthlib.flow import InstalledAppFlow
 from grpc import RpcError
 
+from request_metrics import track_upstream
+from utils.log import get_logger, set_level
+
 
 # Load .env so the module also works when run standalone
 load_dotenv()
@@ -52,6 +56,10 @@ load_dotenv()
 GOOGLE_ADS_OAUTH_CLIENT = os.getenv("GOOGLE_ADS_OAUTH_CLIENT", "").strip()
 _SCOPES = ["https://www.googleapis.com/auth/adwords"]
 
+log = get_logger("gads")
+if os.getenv("GOOGLE_ADS_DEBUG", "0") == "1":
+    set_level("gads", "DEBUG")
+
 # --------------------- helpers ---------------------
 
 def _fx_any_to_usd(amount: float, currency: str) -> float:
@@ -152,14 +160,14 @@ def _reauthorize_and_update_yaml(config_path: str) -> str:
     return creds.refresh_token
 
 def _build_client(config_path: str) -> GoogleAdsClient:
-    print(f"🔍 [GADS] Loading config from: {config_path}")
-    if os.path.exists(config_path):
+    if not os.path.exists(config_path):
+        log.warning("Config file not found: %s", config_path, per_minute=1)
+    elif log.is_enabled(logging.DEBUG):
         cfg = _load_yaml(config_path)
-        print(f"🔍 [GADS] Config developer_token: {cfg.get('developer_token', 'NOT SET')[:10]}..." if cfg.get('developer_token') else "🔍 [GADS] Config developer_token: NOT SET")
-        print(f"🔍 [GADS] Config login_customer_id: {cfg.get('login_customer_id', 'NOT SET')}")
-        print(f"🔍 [GADS] Config client_id: {cfg.get('client_id', 'NOT SET')[:20]}..." if cfg.get('client_id') else "🔍 [GADS] Config client_id: NOT SET")
-    else:
-        print(f"⚠️ [GADS] Config file not found: {config_path}")
+        log.debug("🔍 Loaded config from %s", config_path,
+                  developer_token=f"{cfg['developer_token'][:10]}..." if cfg.get("developer_token") else "NOT SET",
+                  login_customer_id=cfg.get("login_customer_id", "NOT SET"),
+                  client_id=f"{cfg['client_id'][:20]}..." if cfg.get("client_id") else "NOT SET")
     return GoogleAdsClient.load_from_storage(path=config_path)
 
 # --------------------- GAQL pieces ---------------------
@@ -313,7 +321,7 @@ def _fetch_cost_one_account_aligned(client: GoogleAdsClient, customer_id: str,
 
     amount = round(total_micros / 1_000_000.0, 2)
 
-    if os.getenv("GOOGLE_ADS_DEBUG", "0") == "1":
+    if log.is_enabled(logging.DEBUG):
         native_pairs = []
         for d in sorted({span_start, span_end}):
             try:
@@ -321,8 +329,8 @@ def _fetch_cost_one_account_aligned(client: GoogleAdsClient, customer_id: str,
             except Exception:
                 native_pairs.append((d, "ERR"))
         s_acct, e_acct = start_acct.strftime('%Y-%m-%d %H:%M'), end_acct.strftime('%Y-%m-%d %H:%M')
-        print(f"[GADS][{customer_id}] TZ={acct_tz} shop_window=[{s_acct} .. {e_acct}) "
-              f"span={span_start}..{span_end} aligned={amount} {currency} native={native_pairs}")
+        log.debug("[%s] TZ=%s shop_window=[%s .. %s) span=%s..%s aligned=%s %s native=%s",
+                  customer_id, acct_tz, s_acct, e_acct, span_start, span_end, amount, currency, native_pairs)
 
     return amount, (currency or "USD"), acct_tz
 
@@ -335,7 +343,8 @@ def _with_retries(func, *args, **kwargs):
     last_exc = None
     for i in range(attempts):
         try:
-            return func(*args, **kwargs)
+            with track_upstream("google"):
+                return func(*args, **kwargs)
         except (GoogleAdsException, RpcError) as e:
             last_exc = e
             msg = str(e)
@@ -368,36 +377,34 @@ def _union_account_ids(client: GoogleAdsClient, config_path: str) -> List[str]:
     discover = os.getenv("GOOGLE_ADS_DISCOVER", "1") == "1"
     excludes = set(_parse_id_list(os.getenv("GOOGLE_ADS_EXCLUDE_IDS", "")))
 
-    # Always log for debugging
-    print(f"🔍 [GADS] GOOGLE_ADS_CUSTOMER_ID={single or 'NOT SET'}")
-    print(f"🔍 [GADS] GOOGLE_ADS_CUSTOMER_IDS={os.getenv('GOOGLE_ADS_CUSTOMER_IDS', 'NOT SET')}")
-    print(f"🔍 [GADS] GOOGLE_ADS_DISCOVER={os.getenv('GOOGLE_ADS_DISCOVER', '1 (default)')}")
-    print(f"🔍 [GADS] explicit accounts from env: {explicit}")
+    log.debug("🔍 explicit accounts from env: %s", explicit,
+              GOOGLE_ADS_CUSTOMER_ID=single or "NOT SET",
+              GOOGLE_ADS_CUSTOMER_IDS=os.getenv("GOOGLE_ADS_CUSTOMER_IDS", "NOT SET"),
+              GOOGLE_ADS_DISCOVER=os.getenv("GOOGLE_ADS_DISCOVER", "1 (default)"))
 
     discovered: List[str] = []
     if discover:
         cfg = _load_yaml(config_path)
         login_id = _only_digits(cfg.get("login_customer_id") or os.getenv("LOGIN_CUSTOMER_ID", ""))
-        print(f"🔍 [GADS] login_customer_id from yaml: {cfg.get('login_customer_id', 'NOT SET')}")
-        print(f"🔍 [GADS] LOGIN_CUSTOMER_ID from env: {os.getenv('LOGIN_CUSTOMER_ID', 'NOT SET')}")
-        print(f"🔍 [GADS] Using login_id for discovery: {login_id}")
+        log.debug("🔍 Using login_id for discovery: %s", login_id,
+                  yaml_login_customer_id=cfg.get("login_customer_id", "NOT SET"),
+                  LOGIN_CUSTOMER_ID=os.getenv("LOGIN_CUSTOMER_ID", "NOT SET"))
         if login_id:
             try:
-                print(f"🔍 [GADS] Attempting to discover leaf accounts under MCC {login_id}...")
                 discovered = _discover_leaf_accounts(client, login_id)
-                print(f"✅ [GADS] Discovered accounts: {discovered}")
+                log.debug("✅ Discovered accounts under MCC %s: %s", login_id, discovered)
             except Exception as e:
-                print(f"⚠️ [GADS] Discovery failed: {e}")
-                print(f"⚠️ [GADS] Will continue with explicit accounts only: {explicit}")
+                log.warning("Discovery failed: %s - continuing with explicit accounts only: %s",
+                            e, explicit, per_minute=1)
         else:
-            print("⚠️ [GADS] No login_customer_id configured; skipping discovery.")
+            log.warning("No login_customer_id configured; skipping discovery.", per_minute=1)
     else:
-        print("🔍 [GADS] Discovery disabled (GOOGLE_ADS_DISCOVER=0)")
+        log.debug("🔍 Discovery disabled (GOOGLE_ADS_DISCOVER=0)")
 
     union = sorted(set(explicit) | set(discovered))
     final = [cid for cid in union if cid not in excludes]
 
-    print(f"✅ [GADS] Final account list to query: {final}")
+    log.info("✅ Final account list to query: %s", final, per_minute=1)
 
     return final
 
@@ -410,21 +417,20 @@ def _sum_accounts_usd_aligned(day_iso: str, shop_tz: str, config_path: str,
         ids = _union_account_ids(client, config_path)
 
     if not ids:
-        if os.getenv("GOOGLE_ADS_DEBUG", "0") == "1":
-            print("[GADS] No accounts to query. Returning 0.")
+        log.debug("No accounts to query. Returning 0.")
         return 0.0
 
     total_usd = 0.0
-    debug = os.getenv("GOOGLE_ADS_DEBUG", "0") == "1"
+    debug = log.is_enabled(logging.DEBUG)
     for cid in ids:
         amt_acct, cur, acct_tz = _with_retries(_fetch_cost_one_account_aligned, client, cid, day_iso, shop_tz)
         usd = _fx_any_to_usd(amt_acct, cur)
         total_usd += usd
         if debug:
             s_acct, e_acct = _shop_window_in_account_tz(day_iso, shop_tz, acct_tz)
-            print(f"[GADS][{cid}] {day_iso} shop_tz={shop_tz} acct_tz={acct_tz} "
-                  f"window=[{s_acct.strftime('%Y-%m-%d %H:%M')} .. {e_acct.strftime('%Y-%m-%d %H:%M')}) "
-                  f"=> {amt_acct} {cur} → {usd} USD")
+            log.debug("[%s] %s shop_tz=%s acct_tz=%s window=[%s .. %s) => %s %s → %s USD",
+                      cid, day_iso, shop_tz, acct_tz, s_acct.strftime('%Y-%m-%d %H:%M'),
+                      e_acct.strftime('%Y-%m-%d %H:%M'), amt_acct, cur, usd)
 
     return round(total_usd, 2)
 
@@ -456,10 +462,8 @@ def daily_spend_usd_aligned(day_iso: str, shop_tz: str, config_path: str,
                 return _sum_accounts_usd_aligned(day_iso, shop_tz, config_path, include_ids)
             else:
                 # Production - log error and raise (don't attempt interactive reauth)
-                print("⚠️ Google Ads refresh token expired!")
-                print("⚠️ Please update the refresh_token in google-ads.yaml on your server.")
-                print("⚠️ Run locally: python google_ads_spend.py --reauth")
-                print("⚠️ Then copy the new refresh_token to your production environment.")
+                log.error("Google Ads refresh token expired! Run locally: python google_ads_spend.py --reauth, "
+                          "then copy the new refresh_token to google-ads.yaml in production.", per_minute=1)
                 raise RefreshError(f"Google Ads refresh token expired. Manual reauth required. Error: {msg}")
         raise
 
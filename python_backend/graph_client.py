@@ -0,0 +1,267 @@
+"""
+graph_client.py — shared Meta Graph API client (Marketing API + Instagram).
+
+One pooled httpx.AsyncClient lives on a dedicated event-loop thread, so async
+callers on any loop (InstagramPublisher, agents) and sync callers
+(MetaAdsClient, FastAPI sync endpoints) share the same keep-alive connections,
+concurrency cap and rate-limit state.
+
+- `request()` / `request_sync()`      single call
+- `batch()` / `batch_sync()`          Graph `batch` endpoint, ≤50 sub-requests
+                                      per HTTP call (graph.instagram.com has no
+                                      batch endpoint — those run concurrently)
+- throttling                          reads x-business-use-case-usage /
+                                      x-app-usage / x-ad-account-usage on every
+                                      response; slows down past the soft limit
+                                      and pauses for estimated_time_to_regain_access
+
+Env:
+  GRAPH_MAX_CONNECTIONS       pool size (default 20)
+  GRAPH_MAX_CONCURRENCY       in-flight requests (default 10)
+  GRAPH_THROTTLE_SOFT_PCT     usage % where delays start (default 75)
+  GRAPH_THROTTLE_MAX_DELAY    max per-request delay in seconds near 100% (default 30)
+"""
+
+from __future__ import annotations
+import os
+import json
+import time
+import asyncio
+import threading
+from typing import Any, List, Optional, Union
+from urllib.parse import urlencode, urlsplit
+
+import httpx
+
+MAX_CONNECTIONS = int(os.getenv("GRAPH_MAX_CONNECTIONS", "20"))
+MAX_CONCURRENCY = int(os.getenv("GRAPH_MAX_CONCURRENCY", "10"))
+THROTTLE_SOFT_PCT = float(os.getenv("GRAPH_THROTTLE_SOFT_PCT", "75"))
+THROTTLE_MAX_DELAY = float(os.getenv("GRAPH_THROTTLE_MAX_DELAY", "30"))
+BATCH_LIMIT = 50
+TIMEOUT = 60
+
+# Graph error codes that mean "rate limited, try again later"
+RATE_LIMIT_CODES = {4, 17, 32, 613, 80000, 80001, 80002, 80003, 80004, 80005, 80006, 80008, 80009, 80014}
+MAX_RATE_LIMIT_RETRIES = 3
+
+
+class GraphAPIError(Exception):
+    """Error returned for a single Graph call or batch sub-request."""
+
+    def __init__(self, status: int, body: Any):
+        self.status = status
+        self.body = body
+        err = body.get("error", {}) if isinstance(body, dict) else {}
+        self.code = err.get("code")
+        super().__init__(f"Graph API {status}: {err.get('message') or body}")
+
+
+class GraphClient:
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._start_lock = threading.Lock()
+        self._blocked_until = 0.0
+        self.usage_pct = 0.0
+        self.stats = {"requests": 0, "batch_calls": 0, "batched_subrequests": 0,
+                      "throttled_seconds": 0.0, "rate_limit_retries": 0}
+
+    # ---------- loop management ----------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._start_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    ready = threading.Event()
+
+                    def _run():
+                        asyncio.set_event_loop(loop)
+                        self._client = httpx.AsyncClient(
+                            timeout=TIMEOUT,
+                            limits=httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                                max_keepalive_connections=MAX_CONNECTIONS),
+                        )
+                        self._sem = asyncio.Semaphore(MAX_CONCURRENCY)
+                        ready.set()
+                        loop.run_forever()
+
+                    self._thread = threading.Thread(target=_run, name="graph-client", daemon=True)
+                    self._thread.start()
+                    ready.wait()
+                    self._loop = loop
+        return self._loop
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    # ---------- throttling ----------
+
+    def _note_usage(self, headers: httpx.Headers):
+        pct, regain_minutes = 0.0, 0.0
+        raw = headers.get("x-business-use-case-usage")
+        if raw:
+            try:
+                for entries in json.loads(raw).values():
+                    for e in entries:
+                        pct = max(pct, float(e.get("call_count", 0)), float(e.get("total_cputime", 0)),
+                                  float(e.get("total_time", 0)))
+                        regain_minutes = max(regain_minutes, float(e.get("estimated_time_to_regain_access", 0)))
+            except (ValueError, AttributeError, TypeError):
+                pass
+        raw = headers.get("x-app-usage")
+        if raw:
+            try:
+                pct = max(pct, *(float(v) for v in json.loads(raw).values()))
+            except (ValueError, AttributeError, TypeError):
+                pass
+        raw = headers.get("x-ad-account-usage")
+        if raw:
+            try:
+                pct = max(pct, float(json.loads(raw).get("acc_id_util_pct", 0)))
+            except (ValueError, AttributeError, TypeError):
+                pass
+        self.usage_pct = pct
+        if regain_minutes > 0:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + regain_minutes * 60)
+
+    async def _throttle(self):
+        delay = self._blocked_until - time.monotonic()
+        if delay <= 0 and self.usage_pct >= THROTTLE_SOFT_PCT:
+            span = max(1.0, 100 - THROTTLE_SOFT_PCT)
+            delay = min(1.0, (self.usage_pct - THROTTLE_SOFT_PCT) / span) * THROTTLE_MAX_DELAY
+        if delay > 0:
+            self.stats["throttled_seconds"] += delay
+            await asyncio.sleep(delay)
+
+    # ---------- core (runs on the client loop) ----------
+
+    async def _do_request(self, method: str, url: str, params: Optional[dict], data: Optional[dict],
+                          raise_errors: bool) -> Any:
+        if params:
+            # httpx replaces (not merges) a query string already on the URL
+            url, params = httpx.URL(url).copy_merge_params(params), None
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            await self._throttle()
+            async with self._sem:
+                resp = await self._client.request(method, url, params=params, data=data)
+            self.stats["requests"] += 1
+            self._note_usage(resp.headers)
+            try:
+                body = resp.json()
+            except ValueError:
+                body = {"error": {"message": resp.text}}
+            err = body.get("error") if isinstance(body, dict) else None
+            if err and err.get("code") in RATE_LIMIT_CODES and attempt < MAX_RATE_LIMIT_RETRIES:
+                self.stats["rate_limit_retries"] += 1
+                await asyncio.sleep(min(THROTTLE_MAX_DELAY, 2 ** attempt * 2))
+                continue
+            if raise_errors and resp.status_code >= 400:
+                raise GraphAPIError(resp.status_code, body)
+            return body
+        return body
+
+    async def _do_batch(self, base_url: str, access_token: str, calls: List[dict]) -> List[Any]:
+        results: List[Any] = []
+        for i in range(0, len(calls), BATCH_LIMIT):
+            chunk = calls[i:i + BATCH_LIMIT]
+            body = await self._do_request("POST", base_url.rstrip("/") + "/", None, {
+                "access_token": access_token,
+                "include_headers": "false",
+                "batch": json.dumps(chunk),
+            }, raise_errors=True)
+            self.stats["batch_calls"] += 1
+            self.stats["batched_subrequests"] += len(chunk)
+            for item in body:
+                if item is None:  # sub-request timed out server-side
+                    results.append(GraphAPIError(504, {"error": {"message": "batch sub-request timed out"}}))
+                    continue
+                try:
+                    payload = json.loads(item.get("body") or "null")
+                except ValueError:
+                    payload = item.get("body")
+                code = item.get("code", 200)
+                results.append(payload if code < 400 else GraphAPIError(code, payload))
+        return results
+
+    async def _do_concurrent(self, base_url: str, access_token: str, calls: List[dict]) -> List[Any]:
+        async def one(call):
+            method = call.get("method", "GET").upper()
+            url = f"{base_url.rstrip('/')}/{call['relative_url'].lstrip('/')}"
+            body = dict(call.get("body") or {})
+            try:
+                if method == "GET":
+                    return await self._do_request(method, url, {"access_token": access_token}, None, True)
+                return await self._do_request(method, url, None, {**body, "access_token": access_token}, True)
+            except GraphAPIError as e:
+                return e
+        return list(await asyncio.gather(*(one(c) for c in calls)))
+
+    # ---------- public API ----------
+
+    async def request(self, method: str, url: str, params: Optional[dict] = None,
+                      data: Optional[dict] = None, raise_errors: bool = True) -> Any:
+        """Single Graph call from any event loop. Raises GraphAPIError on HTTP errors
+        unless raise_errors=False (then the error JSON is returned, like requests' .json())."""
+        fut = self._submit(self._do_request(method.upper(), url, params, data, raise_errors))
+        return await asyncio.wrap_future(fut)
+
+    def request_sync(self, method: str, url: str, params: Optional[dict] = None,
+                     data: Optional[dict] = None, raise_errors: bool = False) -> Any:
+        """Blocking variant for sync callers (e.g. MetaAdsClient)."""
+        return self._submit(self._do_request(method.upper(), url, params, data, raise_errors)).result()
+
+    @staticmethod
+    def supports_batch(base_url: str) -> bool:
+        return urlsplit(base_url).netloc == "graph.facebook.com"
+
+    @classmethod
+    def http_calls_for(cls, base_url: str, n: int) -> int:
+        """HTTP requests batch() makes for n sub-requests against base_url."""
+        return -(-n // BATCH_LIMIT) if cls.supports_batch(base_url) else n
+
+    def _batch_coro(self, base_url: str, access_token: str, calls: List[dict]):
+        if self.supports_batch(base_url):
+            encoded = []
+            for c in calls:
+                sub = {"method": c.get("method", "GET").upper(), "relative_url": c["relative_url"].lstrip("/")}
+                if c.get("body"):
+                    sub["body"] = urlencode(c["body"])
+                encoded.append(sub)
+            return self._do_batch(base_url, access_token, encoded)
+        return self._do_concurrent(base_url, access_token, calls)
+
+    async def batch(self, base_url: str, access_token: str, calls: List[dict]) -> List[Union[Any, GraphAPIError]]:
+        """Run sub-requests ({"method", "relative_url", "body": dict}) and return one
+        result per call, in order — the parsed JSON body or a GraphAPIError.
+
+        Uses the Graph batch endpoint (≤50 per HTTP call) on graph.facebook.com and
+        concurrent single calls elsewhere."""
+        if not calls:
+            return []
+        return await asyncio.wrap_future(self._submit(self._batch_coro(base_url, access_token, calls)))
+
+    def batch_sync(self, base_url: str, access_token: str, calls: List[dict]) -> List[Union[Any, GraphAPIError]]:
+        """Blocking variant of batch()."""
+        if not calls:
+            return []
+        return self._submit(self._batch_coro(base_url, access_token, calls)).result()
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "usage_pct": self.usage_pct,
+                "blocked_for_seconds": max(0.0, round(self._blocked_until - time.monotonic(), 1))}
+
+
+_graph_client: Optional[GraphClient] = None
+_graph_lock = threading.Lock()
+
+
+def get_graph_client() -> GraphClient:
+    global _graph_client
+    if _graph_client is None:
+        with _graph_lock:
+            if _graph_client is None:
+                _graph_client = GraphClient()
+    return _graph_client
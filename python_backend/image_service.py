@@ -0,0 +1,295 @@
+"""
+Image service - Pillow work off the event loop, in a process pool
+
+Decoding a 1-2 MB PNG, a LANCZOS resize and a JPEG/WebP/AVIF encode are
+CPU-bound and hold the GIL, so doing them inside async handlers (media
+generation, carousels) stalls every other request on the worker. This module
+runs them in a ProcessPoolExecutor and exposes an async API over raw bytes:
+
+    thumbs = await image_service.thumbnails(png_bytes, sizes=(256, 512))
+    webp   = await image_service.convert(png_bytes, "WEBP", max_size=1080)
+    out    = await image_service.render_variants(png_bytes, [
+                 VariantSpec("thumb", 256, "JPEG", 70),
+                 VariantSpec("feed", 1080, "WEBP", 80),
+                 VariantSpec("feed_avif", 1080, "AVIF", 60)])
+
+- one job decodes the source once and encodes every variant it was given;
+  render_variants splits variants across workers by output format so large
+  encodes (WebP/AVIF at full size) run in parallel on separate cores
+- the pool is spawned lazily on first use (spawn context - no forked copy of
+  the server's threads/DB pools) and rebuilt if a worker dies
+- IMAGE_POOL_WORKERS=0 falls back to asyncio.to_thread (single-core hosts,
+  tests); work still leaves the event loop
+- formats the local Pillow build can't encode (AVIF needs Pillow >= 11.2 with
+  libavif, or pillow-avif-plugin) raise ValueError up front
+
+Served variants (variant_digest, behind the public media endpoint) are limited
+to VARIANT_WIDTHS x VARIANT_FORMATS and IMAGE_MAX_VARIANTS_PER_SOURCE renders
+per source, so arbitrary ?w=/&format= combinations can't fill the disk or
+burn CPU.
+
+Env:
+  IMAGE_POOL_WORKERS             worker processes (default min(4, cpu_count); 0 = threads)
+  IMAGE_MAX_PIXELS               refuse sources larger than this (default 50_000_000)
+  IMAGE_MAX_VARIANTS_PER_SOURCE  stored variants per source image (default 6)
+"""
+import os
+import io
+import time
+import atexit
+import asyncio
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+POOL_WORKERS = int(os.getenv("IMAGE_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", "50000000"))
+
+# Output format -> file extension / media_store format key
+EXTENSIONS = {"JPEG": "jpeg", "PNG": "png", "WEBP": "webp", "AVIF": "avif"}
+
+
+class VariantSpec(NamedTuple):
+    name: str
+    max_size: Optional[int] = None  # longest edge; None keeps the source size
+    fmt: str = "JPEG"
+    quality: int = 80
+
+
+# ---------- worker side (must stay top-level / picklable) ----------
+
+def _open(data: bytes):
+    from PIL import Image
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    img = Image.open(io.BytesIO(data))
+    img.load()
+    return img
+
+
+def _encode(img, max_size: Optional[int], fmt: str, quality: int) -> bytes:
+    from PIL import Image
+    if max_size and max(img.size) > max_size:
+        img = img.copy()
+        img.thumbnail((max_size, max_size), Image.LANCZOS)
+    if fmt == "JPEG" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    elif fmt != "PNG" and img.mode == "P":
+        img = img.convert("RGBA")
+    buf = io.BytesIO()
+    if fmt == "PNG":
+        img.save(buf, format=fmt, optimize=True)
+    elif fmt == "WEBP":
+        img.save(buf, format=fmt, quality=quality, method=4)
+    else:
+        img.save(buf, format=fmt, quality=quality)
+    return buf.getvalue()
+
+
+def render_variants_sync(data: bytes, specs: Sequence[Tuple]) -> Dict[str, bytes]:
+    """Decode once, encode every spec. Runs inside pool workers; also usable inline."""
+    img = _open(data)
+    return {name: _encode(img, max_size, fmt, quality) for name, max_size, fmt, quality in specs}
+
+
+# ---------- pool ----------
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_stats = {"jobs": 0, "variants": 0, "failed": 0, "pool_restarts": 0,
+          "bytes_in": 0, "bytes_out": 0, "busy_seconds": 0.0}
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if POOL_WORKERS <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+                print(f"🖼️ Image pool started ({POOL_WORKERS} workers)")
+    return _pool
+
+
+def _reset_pool(broken: ProcessPoolExecutor):
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+            _stats["pool_restarts"] += 1
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown)
+
+
+_supported: Optional[Dict[str, bool]] = None
+
+
+def supported_formats() -> Dict[str, bool]:
+    """Output formats this Pillow build can encode."""
+    global _supported
+    if _supported is None:
+        try:
+            from PIL import Image, features
+            try:
+                import pillow_avif  # noqa: F401  (registers AVIF on older Pillow)
+            except ImportError:
+                pass
+            Image.init()
+            _supported = {
+                "JPEG": "JPEG" in Image.SAVE,
+                "PNG": "PNG" in Image.SAVE,
+                "WEBP": "WEBP" in Image.SAVE and bool(features.check("webp")),
+                "AVIF": "AVIF" in Image.SAVE,
+            }
+        except ImportError:
+            _supported = {fmt: False for fmt in EXTENSIONS}
+    return _supported
+
+
+def _normalize(specs: Iterable[Any]) -> List[Tuple]:
+    out = []
+    formats = supported_formats()
+    for s in specs:
+        s = VariantSpec(*s) if not isinstance(s, VariantSpec) else s
+        fmt = s.fmt.upper().replace("JPG", "JPEG")
+        if not formats.get(fmt):
+            raise ValueError(f"Unsupported image format: {s.fmt}")
+        out.append((s.name, s.max_size, fmt, int(s.quality)))
+    return out
+
+
+async def run_in_pool(fn: Callable, *args) -> Any:
+    """Run a top-level (picklable) function on the image pool, or a thread when
+    IMAGE_POOL_WORKERS=0. Shared by other CPU-bound renderers (ad_renderer)."""
+    pool = _get_pool()
+    if pool is None:
+        return await asyncio.to_thread(fn, *args)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(pool, fn, *args)
+    except BrokenProcessPool:
+        # A worker died (OOM on a huge image, killed) - rebuild once and retry
+        _reset_pool(pool)
+        return await loop.run_in_executor(_get_pool(), fn, *args)
+
+
+async def _run(data: bytes, specs: List[Tuple]) -> Dict[str, bytes]:
+    started = time.perf_counter()
+    try:
+        result = await run_in_pool(render_variants_sync, data, specs)
+    except Exception:
+        _stats["failed"] += 1
+        raise
+    _stats["jobs"] += 1
+    _stats["variants"] += len(result)
+    _stats["bytes_in"] += len(data)
+    _stats["bytes_out"] += sum(len(b) for b in result.values())
+    _stats["busy_seconds"] += time.perf_counter() - started
+    return result
+
+
+# ---------- async API ----------
+
+async def render_variants(data: bytes, specs: Iterable[Any]) -> Dict[str, bytes]:
+    """{spec name: encoded bytes}. Specs are VariantSpec or (name, max_size, fmt, quality)
+    tuples; variants of different output formats are encoded on separate workers."""
+    specs = _normalize(specs)
+    if not specs:
+        return {}
+    groups: Dict[str, List[Tuple]] = {}
+    for spec in specs:
+        groups.setdefault(spec[2], []).append(spec)
+    if len(groups) == 1 or _get_pool() is None:
+        return await _run(data, specs)
+    parts = await asyncio.gather(*[_run(data, group) for group in groups.values()])
+    merged: Dict[str, bytes] = {}
+    for part in parts:
+        merged.update(part)
+    return {name: merged[name] for name, *_ in specs}
+
+
+async def thumbnails(data: bytes, sizes: Sequence[int] = (256,), fmt: str = "JPEG",
+                     quality: int = 70) -> Dict[int, bytes]:
+    """{size: thumbnail bytes} - longest edge <= size, aspect ratio kept."""
+    out = await render_variants(data, [VariantSpec(str(s), s, fmt, quality) for s in sizes])
+    return {int(k): v for k, v in out.items()}
+
+
+async def convert(data: bytes, fmt: str = "WEBP", quality: int = 80,
+                  max_size: Optional[int] = None) -> bytes:
+    """Re-encode an image (optionally downscaled) to another format."""
+    out = await render_variants(data, [VariantSpec("out", max_size, fmt, quality)])
+    return out["out"]
+
+
+# ---------- served variants ----------
+
+VARIANT_CACHE_SIZE = 2048
+VARIANT_WIDTHS = (256, 512, 1080, 1600)
+VARIANT_FORMATS = ("jpeg", "png", "webp")
+MAX_VARIANTS_PER_SOURCE = int(os.getenv("IMAGE_MAX_VARIANTS_PER_SOURCE", "6"))
+_variants: "OrderedDict[Tuple[str, Optional[int], str], str]" = OrderedDict()
+_source_variants: "OrderedDict[str, set]" = OrderedDict()  # source digest -> variant keys rendered
+
+
+def variant_width(w: Optional[int]) -> Optional[int]:
+    """Snap a requested max edge to the smallest VARIANT_WIDTHS entry >= w (else the largest)."""
+    if w is None:
+        return None
+    return next((v for v in VARIANT_WIDTHS if v >= w), VARIANT_WIDTHS[-1])
+
+
+async def variant_digest(digest: str, max_size: Optional[int], fmt: str, quality: int = 80) -> Optional[str]:
+    """Blob digest of a resized / re-encoded copy of blob `digest`, rendered on
+    first request and stored next to the original. None if the source is missing.
+    Variants are derived data and are never referenced from rows, so losing them
+    with a non-persistent store only costs a re-render."""
+    import media_store
+    from request_metrics import record_cache
+    fmt = fmt.upper().replace("JPG", "JPEG")
+    if fmt.lower() not in VARIANT_FORMATS or (max_size is not None and max_size not in VARIANT_WIDTHS):
+        raise ValueError("Unsupported variant")
+    key = (digest, max_size, fmt)
+    store = media_store.get_blob_store()
+    cached = _variants.get(key)
+    hit = bool(cached) and await asyncio.to_thread(store.exists, cached)
+    record_cache("image_variant", hit=hit)
+    if hit:
+        _variants.move_to_end(key)
+        return cached
+    rendered = _source_variants.get(digest, set())
+    if key not in rendered and len(rendered) >= MAX_VARIANTS_PER_SOURCE:
+        raise ValueError("Variant limit reached for this image")
+    data = await asyncio.to_thread(store.get, digest)
+    if data is None:
+        return None
+    out = await convert(data, fmt, quality, max_size)
+    variant = await asyncio.to_thread(store.put, out)
+    _variants[key] = variant
+    while len(_variants) > VARIANT_CACHE_SIZE:
+        _variants.popitem(last=False)
+    _source_variants.setdefault(digest, set()).add(key)
+    _source_variants.move_to_end(digest)
+    while len(_source_variants) > VARIANT_CACHE_SIZE:
+        _source_variants.popitem(last=False)
+    return variant
+
+
+def get_image_stats() -> Dict[str, Any]:
+    return {**_stats, "busy_seconds": round(_stats["busy_seconds"], 3),
+            "workers": POOL_WORKERS, "mode": "process" if POOL_WORKERS > 0 else "thread",
+            "pool_started": _pool is not None, "variants_cached": len(_variants), "formats": supported_formats()}
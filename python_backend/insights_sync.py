@@ -0,0 +1,216 @@
+"""
+Insights sync scheduler - refresh per-post Instagram insights by post age
+
+Post metrics move fast for a day or two and are flat after a few weeks, so
+re-fetching every published post on every sync mostly re-reads numbers that
+stopped changing long ago. Each post gets a tier from its age:
+
+    hot     published < INSIGHTS_HOT_HOURS ago    refresh every INSIGHTS_HOT_INTERVAL_MIN
+    warm    published < INSIGHTS_WARM_DAYS ago    refresh every INSIGHTS_WARM_INTERVAL_HOURS
+    frozen  older                                 one final sync after it crosses
+                                                  INSIGHTS_WARM_DAYS, then never
+
+A run plans from one query (post age + last synced_at), fetches only the due
+posts through the Graph batch endpoint (InstagramPublisher.fetch_post_insights_batch)
+and upserts them in one transaction:
+
+    report = await insights_sync.sync_post_insights(storage, publisher)
+    # {"synced": 12, "due": 12, "skipped_fresh": 30, "frozen": 410,
+    #  "api_calls": 1, "full_sync_api_calls": 452, "api_calls_saved": 451, ...}
+
+full_sync_api_calls is what the old one-call-per-post loop would have made.
+start_background_sync() runs the scheduler every INSIGHTS_SYNC_INTERVAL seconds.
+
+Env:
+  INSIGHTS_HOT_HOURS              age of "hot" posts (default 48)
+  INSIGHTS_HOT_INTERVAL_MIN       refresh interval for hot posts (default 60)
+  INSIGHTS_WARM_DAYS              age after which posts freeze (default 30)
+  INSIGHTS_WARM_INTERVAL_HOURS    refresh interval for warm posts (default 24)
+  INSIGHTS_SYNC_INTERVAL          background run interval in seconds (default 3600, 0 = off)
+"""
+import os
+import time
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from utils.log import get_logger
+
+HOT_AGE = timedelta(hours=float(os.getenv("INSIGHTS_HOT_HOURS", "48")))
+HOT_INTERVAL = timedelta(minutes=float(os.getenv("INSIGHTS_HOT_INTERVAL_MIN", "60")))
+WARM_AGE = timedelta(days=float(os.getenv("INSIGHTS_WARM_DAYS", "30")))
+WARM_INTERVAL = timedelta(hours=float(os.getenv("INSIGHTS_WARM_INTERVAL_HOURS", "24")))
+SYNC_INTERVAL = int(os.getenv("INSIGHTS_SYNC_INTERVAL", "3600"))
+
+log = get_logger("sync.insights")
+
+_stats = {"runs": 0, "synced": 0, "api_calls": 0, "api_calls_saved": 0, "failed": 0}
+_last_report: Optional[Dict[str, Any]] = None
+_lock: Optional[asyncio.Lock] = None
+_task: Optional[asyncio.Task] = None
+
+
+def _parse_ts(value: Optional[str]) -> Optional[datetime]:
+    """Naive UTC datetime from an ISO string ("...Z", offset or naive)."""
+    if not value:
+        return None
+    try:
+        ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if ts.tzinfo is not None:
+        ts = ts.replace(tzinfo=None) - ts.utcoffset()
+    return ts
+
+
+def tier(published_at: datetime, now: datetime) -> str:
+    age = now - published_at
+    if age < HOT_AGE:
+        return "hot"
+    if age < WARM_AGE:
+        return "warm"
+    return "frozen"
+
+
+def is_due(published_at: Optional[datetime], synced_at: Optional[datetime], now: datetime) -> bool:
+    if synced_at is None:
+        return True
+    if published_at is None:  # unknown age: refresh like a warm post
+        return now - synced_at >= WARM_INTERVAL
+    t = tier(published_at, now)
+    if t == "hot":
+        return now - synced_at >= HOT_INTERVAL
+    if t == "warm":
+        return now - synced_at >= WARM_INTERVAL
+    # Frozen: capture the settled numbers once, if the last sync predates the freeze
+    return synced_at < published_at + WARM_AGE
+
+
+def plan_sync(state: List[Dict], now: Optional[datetime] = None, force: bool = False) -> Dict[str, Any]:
+    """Split sync state rows (get_insight_sync_state_async) into due posts and
+    counts per tier. force=True makes every post due (full resync)."""
+    now = now or datetime.utcnow()
+    due, tiers = [], {"hot": 0, "warm": 0, "frozen": 0}
+    skipped_fresh = frozen = 0
+    for row in state:
+        published_at, synced_at = _parse_ts(row.get("published_at")), _parse_ts(row.get("synced_at"))
+        t = tier(published_at, now) if published_at else "warm"
+        tiers[t] += 1
+        if force or is_due(published_at, synced_at, now):
+            due.append(row)
+        elif t == "frozen":
+            frozen += 1
+        else:
+            skipped_fresh += 1
+    return {"due": due, "tiers": tiers, "skipped_fresh": skipped_fresh, "frozen": frozen}
+
+
+def _insight_from_metrics(row: Dict, metrics: Dict, synced_at: str):
+    from social_media_service import PostInsight
+    return PostInsight(
+        post_id=row["post_id"],
+        ig_media_id=row["ig_media_id"],
+        impressions=metrics.get("impressions", 0),
+        reach=metrics.get("reach", 0),
+        likes=metrics.get("likes", 0),
+        comments=metrics.get("comments", 0),
+        shares=metrics.get("shares", 0),
+        saves=metrics.get("saved", 0),
+        engagement=metrics.get("total_interactions", 0),
+        synced_at=synced_at,
+    )
+
+
+async def sync_post_insights(storage, publisher, force: bool = False) -> Dict[str, Any]:
+    """Fetch insights for the posts that are due and upsert them in bulk.
+    Runs are serialized per process so the background loop and a manual sync
+    don't fetch the same posts twice."""
+    global _lock, _last_report
+    from graph_client import GraphClient
+
+    if _lock is None:
+        _lock = asyncio.Lock()
+    async with _lock:
+        started = time.perf_counter()
+        state = await storage.get_insight_sync_state_async()
+        plan = plan_sync(state, force=force)
+        due = plan["due"]
+
+        insights = []
+        if due:
+            metrics = await publisher.fetch_post_insights_batch([row["ig_media_id"] for row in due])
+            synced_at = datetime.utcnow().isoformat() + "Z"
+            insights = [_insight_from_metrics(row, metrics[row["ig_media_id"]], synced_at)
+                        for row in due if metrics.get(row["ig_media_id"])]
+        synced = await storage.save_insights_bulk_async(insights)
+        if synced:
+            await storage.refresh_engagement_rollup_async([i.post_id for i in insights])
+
+        api_calls = GraphClient.http_calls_for(publisher.base_url, len(due))
+        report = {
+            "synced": synced,
+            "due": len(due),
+            "failed": len(due) - len(insights),
+            "skipped_fresh": plan["skipped_fresh"],
+            "frozen": plan["frozen"],
+            "tiers": plan["tiers"],
+            "api_calls": api_calls,
+            "full_sync_api_calls": len(state),
+            "api_calls_saved": len(state) - api_calls,
+            "forced": force,
+            "seconds": round(time.perf_counter() - started, 2),
+            "finished_at": datetime.utcnow().isoformat() + "Z",
+        }
+        _stats["runs"] += 1
+        _stats["synced"] += synced
+        _stats["api_calls"] += api_calls
+        _stats["api_calls_saved"] += report["api_calls_saved"]
+        _stats["failed"] += report["failed"]
+        _last_report = report
+        log.info("📈 Insights sync: %d/%d due posts synced in %d API calls (%d saved vs full sync, %d frozen)",
+                 synced, len(due), api_calls, report["api_calls_saved"], plan["frozen"])
+        return report
+
+
+async def connected_publisher(storage):
+    """InstagramPublisher for the stored Instagram connection, else env credentials.
+    Raises ValueError when no token is configured."""
+    from social_media_service import InstagramPublisher
+    connection = await storage.get_active_connection_async("instagram")
+    if connection and connection.get("access_token"):
+        return InstagramPublisher(access_token=connection["access_token"],
+                                  ig_account_id=connection.get("ig_account_id"))
+    return InstagramPublisher()
+
+
+async def _run_forever(interval: int):
+    from social_media_service import create_social_media_storage
+    storage = create_social_media_storage()
+    await asyncio.sleep(min(interval, 60))  # let startup finish first
+    while True:
+        try:
+            publisher = await connected_publisher(storage)
+            await sync_post_insights(storage, publisher)
+        except ValueError:
+            pass  # Instagram not connected yet
+        except Exception as e:
+            log.warning("Background insights sync failed: %s", e)
+        await asyncio.sleep(interval)
+
+
+def start_background_sync(interval: int = SYNC_INTERVAL) -> bool:
+    """Start the periodic scheduler on the running loop (once per process)."""
+    global _task
+    if interval <= 0 or (_task is not None and not _task.done()):
+        return False
+    _task = asyncio.get_running_loop().create_task(_run_forever(interval))
+    return True
+
+
+def get_sync_stats() -> Dict[str, Any]:
+    return {**_stats, "last_run": _last_report, "background": _task is not None and not _task.done(),
+            "interval_seconds": SYNC_INTERVAL,
+            "schedule": {"hot_hours": HOT_AGE.total_seconds() / 3600,
+                         "hot_interval_minutes": HOT_INTERVAL.total_seconds() / 60,
+                         "warm_days": WARM_AGE.days,
+                         "warm_interval_hours": WARM_INTERVAL.total_seconds() / 3600}}
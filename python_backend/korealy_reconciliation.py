@@ -382,6 +382,120 @@ def build_name_maps(shopify_variants: Dict[str, Dict]) -> Tuple[Dict[str, str],
     return exact_map, loose_map, product_map, sku_map
 
 
+class VariantMatchIndex:
+    """
+    Precomputed lookup structures for the fuzzy steps (7 and 8) of
+    map_korealy_to_shopify. Build once per reconcile() run.
+
+    - names / token sets are normalized once per variant
+    - trigram -> variant postings answer "Korealy title contained in a Shopify
+      name" (verify only variants holding the title's rarest trigram)
+    - each name is also filed under its own rarest trigram, so "Shopify name
+      contained in the Korealy title" only verifies names anchored on one of
+      the title's trigrams
+    - token -> variant postings, bucketed by token count, let the token match
+      score only variants that share enough of the title's rarest tokens to
+      clear the threshold (prefix filtering)
+
+    Results are identical to the original linear scans, including the
+    first-in-catalog-order tie-break.
+    """
+
+    FUZZY_THRESHOLD = 0.75
+
+    def __init__(self, shopify_variants: Dict[str, Dict]):
+        self.gids: List[str] = list(shopify_variants.keys())
+        self.names: List[str] = [normalize_name(info["item"]) for info in shopify_variants.values()]
+        self.token_sets: List[frozenset] = [frozenset(n.split()) for n in self.names]
+
+        # Containment structures
+        self.trigram_postings: Dict[str, List[int]] = {}
+        name_trigrams = []
+        for idx, name in enumerate(self.names):
+            grams = {name[i:i + 3] for i in range(len(name) - 2)}
+            name_trigrams.append(grams)
+            for g in grams:
+                self.trigram_postings.setdefault(g, []).append(idx)
+        self.anchored: Dict[str, List[int]] = {}
+        self.short_names: List[int] = []  # < 3 chars (incl. empty) - no trigram to anchor on
+        for idx, grams in enumerate(name_trigrams):
+            if not grams:
+                self.short_names.append(idx)
+                continue
+            anchor = min(grams, key=lambda g: (len(self.trigram_postings[g]), g))
+            self.anchored.setdefault(anchor, []).append(idx)
+
+        # Token structures: token -> {token_count: [idx, ...]}
+        self.token_postings: Dict[str, Dict[int, List[int]]] = {}
+        for idx, tokens in enumerate(self.token_sets):
+            for t in tokens:
+                self.token_postings.setdefault(t, {}).setdefault(len(tokens), []).append(idx)
+        self.token_df: Dict[str, int] = {
+            t: sum(len(v) for v in buckets.values()) for t, buckets in self.token_postings.items()
+        }
+
+    def find_containing(self, normalized: str) -> Optional[str]:
+        """First variant (catalog order) where the title is in its name or its name is in the title."""
+        best = len(self.names)
+
+        # a) title is a substring of the Shopify name
+        grams = {normalized[i:i + 3] for i in range(len(normalized) - 2)}
+        if grams:
+            postings = [self.trigram_postings.get(g, []) for g in grams]
+            for idx in min(postings, key=len):
+                if normalized in self.names[idx]:
+                    best = idx
+                    break
+        else:
+            for idx, name in enumerate(self.names):
+                if normalized in name:
+                    best = idx
+                    break
+
+        # b) Shopify name is a substring of the title
+        for idx in self.short_names:
+            if idx >= best:
+                break
+            if self.names[idx] in normalized:
+                best = idx
+                break
+        for g in grams:
+            for idx in self.anchored.get(g, ()):
+                if idx < best and self.names[idx] in normalized:
+                    best = idx
+
+        return self.gids[best] if best < len(self.names) else None
+
+    def _required_common(self, k: int, s: int) -> int:
+        # Smallest shared-token count with common / min(k, s) > threshold
+        m = min(k, s)
+        return int(self.FUZZY_THRESHOLD * m) + 1
+
+    def best_token_match(self, words: List[str]) -> Optional[str]:
+        """Variant with the highest token overlap score above the threshold (first on ties)."""
+        korealy_tokens = set(words)
+        k = len(korealy_tokens)
+        # Rarest first: a variant needing c shared tokens must hold one of the first k - c + 1
+        ordered = sorted(korealy_tokens, key=lambda t: (self.token_df.get(t, 0), t))
+
+        candidates = set()
+        for j, token in enumerate(ordered):
+            for s, idxs in self.token_postings.get(token, {}).items():
+                if j <= k - self._required_common(k, s):
+                    candidates.update(idxs)
+
+        best_match = None
+        best_score = self.FUZZY_THRESHOLD
+        for idx in sorted(candidates):
+            shopify_tokens = self.token_sets[idx]
+            common = len(korealy_tokens & shopify_tokens)
+            score = common / min(k, len(shopify_tokens))
+            if score > best_score:
+                best_score = score
+                best_match = self.gids[idx]
+        return best_match
+
+
 def map_korealy_to_shopify(
     korealy_title: str,
     exact_map: Dict[str, str],
@@ -389,7 +503,8 @@ def map_korealy_to_shopify(
     shop_pid: Optional[str] = None,
     shopify_variants: Optional[Dict[str, Dict]] = None,
     product_map: Optional[Dict[str, str]] = None,
-    sku_map: Optional[Dict[str, str]] = None
+    sku_map: Optional[Dict[str, str]] = None,
+    match_index: Optional[VariantMatchIndex] = None
 ) -> Optional[str]:
     """
     Map Korealy title to Shopify variant GID using multiple strategies
@@ -402,6 +517,7 @@ def map_korealy_to_shopify(
         shopify_variants: Dict of all Shopify variants for fallback matching
         product_map: Product-only name -> GID mapping
         sku_map: SKU -> GID mapping
+        match_index: Prebuilt VariantMatchIndex over shopify_variants (built on demand if omitted)
 
     Returns:
         variant_gid or None if no match
@@ -449,38 +565,18 @@ def map_korealy_to_shopify(
             return product_map[without_brand]
 
     # 7. Try substring containment - see if Korealy title is contained in any Shopify name
-    if shopify_variants and len(normalized) >= 10:
-        for gid, info in shopify_variants.items():
-            shopify_name = normalize_name(info["item"])
-            # Check if Korealy title is a substantial substring
-            if normalized in shopify_name or shopify_name in normalized:
-                return gid
-
     # 8. Token-based fuzzy match (>75% of words match)
-    if shopify_variants and len(words) >= 3:
-        korealy_tokens = set(words)
-        best_match = None
-        best_score = 0.75  # Minimum threshold
-
-        for gid, info in shopify_variants.items():
-            shopify_name = normalize_name(info["item"])
-            shopify_tokens = set(shopify_name.split())
-
-            if not shopify_tokens:
-                continue
-
-            # Calculate Jaccard-like score
-            common = len(korealy_tokens & shopify_tokens)
-            total = min(len(korealy_tokens), len(shopify_tokens))  # Use smaller set
-
-            if total > 0:
-                score = common / total
-                if score > best_score:
-                    best_score = score
-                    best_match = gid
-
-        if best_match:
-            return best_match
+    if shopify_variants and (len(normalized) >= 10 or len(words) >= 3):
+        if match_index is None:
+            match_index = VariantMatchIndex(shopify_variants)
+        if len(normalized) >= 10:
+            gid = match_index.find_containing(normalized)
+            if gid:
+                return gid
+        if len(words) >= 3:
+            gid = match_index.best_token_match(words)
+            if gid:
+                return gid
 
     return None
 
@@ -501,6 +597,7 @@ def reconcile(
     """
     results = []
     match_methods = {"pid": 0, "exact": 0, "loose": 0, "partial": 0, "fuzzy": 0, "none": 0}
+    match_index = VariantMatchIndex(shopify_variants) if shopify_variants else None
 
     for record in korealy_records:
         k_title = record.get("title", "")
@@ -514,7 +611,8 @@ def reconcile(
             shop_pid=shop_pid,
             shopify_variants=shopify_variants,
             product_map=product_map,
-            sku_map=sku_map
+            sku_map=sku_map,
+            match_index=match_index
         )
 
         if not variant_gid:
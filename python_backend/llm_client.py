@@ -0,0 +1,350 @@
+"""
+llm_client.py — shared LLM text calls (Gemini 2.0 Flash / GPT-4o) with a response cache.
+
+Used by BaseAgent.call_ai_text and SocialMediaAgent._call_ai.
+
+- Pooled clients: one httpx.AsyncClient (Gemini) and one AsyncOpenAI per event
+  loop, reused across calls — no per-call client setup, no blocking SDK calls
+  inside async code.
+- Response cache keyed by sha256(prompt, system, model, temperature, json_mode,
+  max_tokens). In-memory LRU + JSON files on disk, both with a TTL.
+  Calls with temperature above LLM_CACHE_MAX_TEMPERATURE bypass the cache
+  (callers want variety there) unless the caller passes cache=True;
+  cache=False always bypasses.
+- get_llm_stats(): hit rate and per-provider latency.
+
+Env:
+  LLM_CACHE_MAX_TEMPERATURE   highest temperature cached by default (default 0.6)
+  LLM_CACHE_TTL_HOURS         entry lifetime (default 24)
+  LLM_CACHE_MAX_ENTRIES       in-memory LRU size (default 512)
+  LLM_CACHE_MAX_DISK_ENTRIES  files kept on disk (default 5000)
+  LLM_CACHE_DIR               default $RENDER_DISK_PATH/llm_cache or ./data/llm_cache
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import httpx
+
+from request_metrics import record_cache
+
+GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+OPENAI_MODEL = "gpt-4o"
+
+CACHE_MAX_TEMPERATURE = float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0.6"))
+CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_HOURS", "24")) * 3600
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+CACHE_MAX_DISK_ENTRIES = int(os.getenv("LLM_CACHE_MAX_DISK_ENTRIES", "5000"))
+CACHE_DIR = os.getenv("LLM_CACHE_DIR") or (
+    os.path.join(os.getenv("RENDER_DISK_PATH"), "llm_cache") if os.getenv("RENDER_DISK_PATH")
+    else os.path.join(os.path.dirname(__file__), "data", "llm_cache")
+)
+
+
+# ============================================================
+# RESPONSE CACHE
+# ============================================================
+
+class LLMResponseCache:
+    """LRU + TTL cache of LLM responses, persisted as one JSON file per entry."""
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_entries: int = CACHE_MAX_ENTRIES,
+                 ttl_seconds: float = CACHE_TTL_SECONDS, max_disk_entries: int = CACHE_MAX_DISK_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self._mem: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (created_at, text)
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+
+    @staticmethod
+    def make_key(prompt: str, system_prompt: str, model: str, temperature: float,
+                 json_mode: bool, max_tokens: int) -> str:
+        raw = json.dumps([prompt, system_prompt, model, round(float(temperature), 3), bool(json_mode),
+                          int(max_tokens)], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                if now - hit[0] <= self.ttl_seconds:
+                    self._mem.move_to_end(key)
+                    return hit[1]
+                del self._mem[key]
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if now - entry.get("created_at", 0) > self.ttl_seconds:
+            self._remove_file(key)
+            return None
+        self._remember(key, entry["created_at"], entry["text"])
+        return entry["text"]
+
+    def put(self, key: str, text: str) -> None:
+        created_at = time.time()
+        self._remember(key, created_at, text)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{self._path(key)}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"created_at": created_at, "text": text}, f, ensure_ascii=False)
+            os.replace(tmp, self._path(key))
+        except OSError as e:
+            print(f"⚠️ [llm_cache] Could not persist entry: {e}")
+            return
+        self._writes_since_prune += 1
+        if self._writes_since_prune >= 100:
+            self._writes_since_prune = 0
+            self.prune_disk()
+
+    def _remember(self, key: str, created_at: float, text: str) -> None:
+        with self._lock:
+            self._mem[key] = (created_at, text)
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_entries:
+                self._mem.popitem(last=False)
+
+    def _remove_file(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def prune_disk(self) -> int:
+        """Drop expired files, then the least recently written beyond max_disk_entries."""
+        try:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    path = os.path.join(self.cache_dir, name)
+                    entries.append((os.path.getmtime(path), path))
+        except OSError:
+            return 0
+        entries.sort()
+        cutoff = time.time() - self.ttl_seconds
+        excess = max(0, len(entries) - self.max_disk_entries)
+        removed = 0
+        for i, (mtime, path) in enumerate(entries):
+            if i < excess or mtime < cutoff:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+        try:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.cache_dir, name))
+        except OSError:
+            pass
+
+    def __len__(self) -> int:
+        return len(self._mem)
+
+
+_cache = LLMResponseCache()
+
+
+# ============================================================
+# STATS
+# ============================================================
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Any] = {
+    "hits": 0, "misses": 0, "bypassed": 0, "errors": 0,
+    "hit_ms_total": 0.0,
+    "providers": {},  # provider -> {"calls", "ms_total", "ms_max"}
+}
+
+
+def _record_provider(provider: str, ms: float) -> None:
+    with _stats_lock:
+        p = _stats["providers"].setdefault(provider, {"calls": 0, "ms_total": 0.0, "ms_max": 0.0})
+        p["calls"] += 1
+        p["ms_total"] += ms
+        p["ms_max"] = max(p["ms_max"], ms)
+
+
+def _bump(key: str, amount: float = 1) -> None:
+    with _stats_lock:
+        _stats[key] += amount
+
+
+def get_llm_stats() -> Dict[str, Any]:
+    """Cache hit rate and provider latency since process start."""
+    with _stats_lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            "cache": {
+                "hits": _stats["hits"],
+                "misses": _stats["misses"],
+                "bypassed": _stats["bypassed"],
+                "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else 0.0,
+                "avg_hit_ms": round(_stats["hit_ms_total"] / _stats["hits"], 2) if _stats["hits"] else 0.0,
+                "entries_in_memory": len(_cache),
+                "max_temperature": CACHE_MAX_TEMPERATURE,
+                "ttl_hours": CACHE_TTL_SECONDS / 3600,
+            },
+            "providers": {
+                name: {
+                    "calls": p["calls"],
+                    "avg_ms": round(p["ms_total"] / p["calls"], 1) if p["calls"] else 0.0,
+                    "max_ms": round(p["ms_max"], 1),
+                }
+                for name, p in _stats["providers"].items()
+            },
+            "errors": _stats["errors"],
+        }
+
+
+# ============================================================
+# POOLED CLIENTS (one per event loop)
+# ============================================================
+
+_http_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_openai_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared httpx.AsyncClient for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(timeout=120, limits=httpx.Limits(max_connections=20,
+                                                                   max_keepalive_connections=10))
+        _http_clients[loop] = client
+    return client
+
+
+def get_openai_client(api_key: str):
+    """Shared AsyncOpenAI client for the running event loop (per API key)."""
+    loop = asyncio.get_running_loop()
+    clients = _openai_clients.setdefault(loop, {})
+    client = clients.get(api_key)
+    if client is None:
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI(api_key=api_key)
+        clients[api_key] = client
+    return client
+
+
+# ============================================================
+# PROVIDER CALLS
+# ============================================================
+
+async def call_gemini(prompt: str, system_prompt: str, api_key: str, temperature: float,
+                      json_mode: bool, max_tokens: int = 8192, use_system_instruction: bool = False) -> str:
+    """Gemini 2.0 Flash text generation. Raises on HTTP errors or empty output.
+
+    use_system_instruction sends the system prompt as systemInstruction; otherwise
+    it is primed as a leading user/model exchange (the agents' original format).
+    """
+    contents = []
+    body: Dict[str, Any] = {}
+    if system_prompt and use_system_instruction:
+        body["systemInstruction"] = {"parts": [{"text": system_prompt}]}
+    elif system_prompt:
+        contents.append({"role": "user", "parts": [{"text": system_prompt}]})
+        contents.append({"role": "model", "parts": [{"text": "Understood. I will follow these instructions."}]})
+    contents.append({"role": "user", "parts": [{"text": prompt}]})
+    body["contents"] = contents
+    body["generationConfig"] = {"temperature": temperature, "maxOutputTokens": max_tokens}
+    if json_mode:
+        body["generationConfig"]["responseMimeType"] = "application/json"
+
+    started = time.perf_counter()
+    resp = await get_http_client().post(GEMINI_URL, params={"key": api_key}, json=body)
+    _record_provider("gemini", (time.perf_counter() - started) * 1000)
+    resp.raise_for_status()
+    data = resp.json()
+    for part in (data.get("candidates") or [{}])[0].get("content", {}).get("parts", []):
+        if part.get("text"):
+            return part["text"]
+    raise RuntimeError(f"Gemini returned no text: {str(data)[:300]}")
+
+
+async def call_openai(prompt: str, system_prompt: str, api_key: str, temperature: float,
+                      json_mode: bool, max_tokens: int = 4096) -> str:
+    """GPT-4o text generation via the shared AsyncOpenAI client."""
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": prompt})
+
+    kwargs = {
+        "model": OPENAI_MODEL,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    if json_mode:
+        kwargs["response_format"] = {"type": "json_object"}
+
+    started = time.perf_counter()
+    response = await get_openai_client(api_key).chat.completions.create(**kwargs)
+    _record_provider("openai", (time.perf_counter() - started) * 1000)
+    return response.choices[0].message.content
+
+
+def _should_cache(temperature: float, cache: Optional[bool]) -> bool:
+    if cache is None:
+        return temperature <= CACHE_MAX_TEMPERATURE
+    return cache
+
+
+async def cached_completion(key_parts: Dict[str, Any], generate, cache: Optional[bool] = None) -> str:
+    """Return a cached response for key_parts or await generate() and cache its result.
+
+    key_parts: prompt, system_prompt, model, temperature, json_mode, max_tokens.
+    """
+    if not _should_cache(key_parts["temperature"], cache):
+        _bump("bypassed")
+        return await _generate_counted(generate)
+
+    started = time.perf_counter()
+    key = LLMResponseCache.make_key(**key_parts)
+    text = await asyncio.to_thread(_cache.get, key)
+    if text is not None:
+        _bump("hits")
+        record_cache("llm", hit=True)
+        _bump("hit_ms_total", (time.perf_counter() - started) * 1000)
+        return text
+
+    _bump("misses")
+    record_cache("llm", hit=False)
+    text = await _generate_counted(generate)
+    if text:
+        await asyncio.to_thread(_cache.put, key, text)
+    return text
+
+
+async def _generate_counted(generate) -> str:
+    try:
+        return await generate()
+    except Exception:
+        _bump("errors")
+        raise
+
+
+def get_llm_cache() -> LLMResponseCache:
+    return _cache
@@ -6,8 +6,7 @@
 #   - After the day ends, "yesterday" is computed normally by date roll
 
 from __future__ import annotations
-import os, re, csv
-from urllib.parse import urlparse, parse_qs
+import os, csv, logging
 from dataclasses import dataclass
 from datetime import datetime, date, timedelta
 from typing import Any, Dict, List, Tuple, Optional
@@ -16,11 +15,9 @@ import pytz
 from dotenv import load_dotenv
 
 from utils.date_range import local_day_window
-from shopify_client import (
-    fetch_orders_created_between_for_store,
-    get_shop_timezone,
-)
-from config import SHOPIFY_STORES
+from shopify_client import get_shop_timezone
+from order_snapshot import get_orders
+from channel_attribution import attribute_order, attribute_orders
 from paypal_client import fetch_transactions, extract_shipping_and_fees
 from transform import paypal_to_df, paypal_shipping_total_grouped
 # Make sheets_client optional
@@ -35,6 +32,11 @@ from telegram_client import upsert_daily_summary
 from psp_fee import get_psp_fees_daily
 from google_ads_spend import daily_spend_usd_aligned
 from meta_client import fetch_meta_insights_day
+from utils.log import get_logger
+
+log = get_logger("gads")
+kpi_log = get_logger("kpis")
+matrix_log = get_logger("matrix")
 
 # Quiet the gRPC/absl spam
 os.environ.setdefault("GRPC_VERBOSITY", "ERROR")
@@ -97,7 +99,7 @@ def _load_shipping_matrix_geo_weight() -> None:
 
     if not os.path.exists(_MATRIX_PATH):
         if not _WARNED_MATRIX:
-            print(f"⚠️ Shipping matrix CSV not found at {_MATRIX_PATH}")
+            matrix_log.warning("Shipping matrix CSV not found at %s", _MATRIX_PATH)
             _WARNED_MATRIX = True
         return
 
@@ -152,10 +154,10 @@ def _load_shipping_matrix_geo_weight() -> None:
                 out.setdefault(canon, {})[tier_kg] = float(price)
 
             _SHIP_MATRIX = out
-            print(f"[matrix] Loaded GEOs={len(_SHIP_MATRIX)} from {_MATRIX_PATH}")
+            matrix_log.info("Loaded GEOs=%d from %s", len(_SHIP_MATRIX), _MATRIX_PATH)
 
     except Exception as e:
-        print(f"⚠️ Shipping matrix load error: {e}")
+        matrix_log.warning("Shipping matrix load error: %s", e)
         _SHIP_MATRIX = {}
 
 def _order_geo(order: dict) -> str:
@@ -191,7 +193,7 @@ def _lookup_matrix_shipping_usd(geo: str, weight_kg: float) -> float:
     if not tbl:
         if canon not in _WARNED_MISSING_GEOS:
             preview = sorted(list(_SHIP_MATRIX.keys()))[:10]
-            print(f"⚠️ No matrix GEO match for '{geo}' (canon '{canon}'). Example GEOs: {preview}")
+            matrix_log.warning("No matrix GEO match for '%s' (canon '%s'). Example GEOs: %s", geo, canon, preview)
             _WARNED_MISSING_GEOS.add(canon)
         return 0.0
 
@@ -239,73 +241,9 @@ def _parse_dt(s: str) -> Optional[datetime]:
         return None
 
 # ---------- Shopify channel (Google/Meta) detection ----------
-_GOOGLE_PAT = re.compile(
-    r"""(?ix)
-        \bgoogle\b
-        | gclid=
-        | utm_source=(google|google[-_ ]?search|google[-_ ]?shopping)
-        | (google\.[a-z.]{2,11})
-        | \bgoogle\s*search\b
-    """
-)
-_META_PAT = re.compile(
-    r"""(?ix)
-        \b(facebook|instagram|meta)\b
-        | utm_source=(facebook|fb|instagram|ig)
-        | (facebook\.com|instagram\.com|fb\.com)
-    """
-)
-
-def _collect_value(x):
-    if isinstance(x, str):
-        return [x]
-    if isinstance(x, dict):
-        out = []
-        for v in x.values():
-            if isinstance(v, str) and v:
-                out.append(v)
-        return out
-    return []
-
-def _extract_urls_and_source(order: dict) -> str:
-    bits: List[str] = []
-    for k in ("referrerUrl", "sourceName", "referrer", "customerUrl"):
-        v = order.get(k)
-        bits.extend(_collect_value(v))
-    cjs = order.get("customerJourneySummary") or {}
-    for edge in ("firstVisit", "lastVisit"):
-        visit = cjs.get(edge) or {}
-        if not isinstance(visit, dict):
-            continue
-        for k in ("referrerUrl"):
-            u = visit.get(k)
-            if isinstance(u, str) and u:
-                bits.append(u)
-                try:
-                    q = parse_qs(urlparse(u).query)
-                    for kk in ("utm_source", "utm_medium", "utm_campaign", "gclid", "utm_content", "utm_term"):
-                        vv = q.get(kk)
-                        if vv:
-                            bits.extend(vv)
-                except Exception:
-                    pass
-        utm = visit.get("utmParameters") or {}
-        if isinstance(utm, dict):
-            for kk in ("source", "medium", "campaign", "content", "term"):
-                vv = utm.get(kk)
-                if isinstance(vv, str) and vv:
-                    bits.append(f"utm_{kk}={vv}")
-    return " | ".join(bits)
-
 def _shopify_channel(order: dict) -> str | None:
-    blob = _extract_urls_and_source(order)
-    if not blob:
-        return None
-    if _GOOGLE_PAT.search(blob):
-        return "google"
-    if _META_PAT.search(blob):
-        return "meta"
-    return None
+    ch = attribute_order(order)
+    return ch if ch in ("google", "meta") else None
 
 # ------------------------------------------------------------------------------
 # KPIs
@@ -342,14 +280,14 @@ class KPIs:
 def _google_spend_usd(day_iso: str, shop_tz: str) -> float:
     global _GADS_WARNED, _GADS_CACHE
     if _GADS_DISABLED:
-        print(f"[GADS] Disabled via DISABLE_GOOGLE_ADS=1")
+        log.debug("Disabled via DISABLE_GOOGLE_ADS=1", every=100)
         return 0.0
 
     ids_key = (os.getenv("GOOGLE_ADS_CUSTOMER_IDS", "") or "").strip() \
               or (os.getenv("GOOGLE_ADS_CUSTOMER_ID", "") or "").strip()
 
     key = f"{day_iso}|{shop_tz}|{ids_key}"
-    print(f"[GADS] Fetching spend for {day_iso}, tz={shop_tz}, ids={ids_key}")
+    log.debug("Fetching spend for %s", day_iso, tz=shop_tz, ids=ids_key)
 
     # Check cache and TTL (with safety check for old cache format)
     if key in _GADS_CACHE:
@@ -360,16 +298,16 @@ def _google_spend_usd(day_iso: str, shop_tz: str) -> float:
                 cached_value, cached_time = cached_entry
                 age_minutes = (datetime.now() - cached_time).total_seconds() / 60
                 if age_minutes < _GADS_CACHE_TTL_MINUTES:
-                    print(f"[GADS] Using cached value: ${cached_value:.2f} (age={age_minutes:.1f}m)")
+                    log.debug("Using cached value: $%.2f (age=%.1fm)", cached_value, age_minutes)
                     return cached_value
                 else:
-                    print(f"[GADS] Cache expired for {day_iso} (age={age_minutes:.1f}m), refreshing...")
+                    log.debug("Cache expired for %s (age=%.1fm), refreshing...", day_iso, age_minutes)
             else:
                 # Old cache format (float) - clear it
-                print(f"[GADS] Old cache format detected, clearing cache entry")
+                log.debug("Old cache format detected, clearing cache entry")
                 del _GADS_CACHE[key]
         except Exception as cache_err:
-            print(f"[GADS] Cache error: {cache_err}, clearing cache entry")
+            log.warning("Cache error: %s, clearing cache entry", cache_err)
             _GADS_CACHE.pop(key, None)
 
     # Get config file path - use absolute path if relative doesn't exist
@@ -387,35 +325,31 @@ def _google_spend_usd(day_iso: str, shop_tz: str) -> float:
                 if os.path.exists(cfg_abs):
                     cfg = cfg_abs
 
-    print(f"[GADS] Config file: {cfg}")
-    print(f"[GADS] Config exists: {os.path.exists(cfg)}")
-
     if not os.path.exists(cfg):
-        print(f"⚠️ Google Ads config file not found at: {cfg}")
+        log.warning("Google Ads config file not found at: %s", cfg, per_minute=1)
         return 0.0
+    log.debug("Config file: %s", cfg)
 
     include_ids = None
     ids_env = (os.getenv("GOOGLE_ADS_CUSTOMER_IDS", "") or "").strip()
     if ids_env:
         include_ids = ids_env
-        print(f"[GADS] Using customer IDs: {include_ids}")
+        log.debug("Using customer IDs: %s", include_ids)
     else:
-        print(f"[GADS] No customer IDs specified in env")
+        log.debug("No customer IDs specified in env")
 
     try:
-        print(f"[GADS] Calling daily_spend_usd_aligned...")
         usd = daily_spend_usd_aligned(day_iso, shop_tz, cfg, include_ids=include_ids)
-        print(f"[GADS] ✅ Fetched spend: ${usd:.2f} for {day_iso}")
+        log.info("✅ Fetched spend: $%.2f for %s", usd, day_iso)
         _GADS_CACHE[key] = (usd, datetime.now())
         return usd
     except Exception as e:
-        print(f"⚠️ Google Ads spend ERROR for {day_iso}: {e}")
-        print(f"⚠️ Error type: {type(e).__name__}")
-        import traceback
-        traceback.print_exc()
         if not _GADS_WARNED:
-            print(f"⚠️ Google Ads spend fallback (treating as 0): {e}")
+            log.exception("Google Ads spend ERROR for %s (treating as 0): %s", day_iso, e)
             _GADS_WARNED = True
+        else:
+            log.warning("Google Ads spend ERROR for %s (treating as 0): %s", day_iso, e,
+                        per_minute=5, error_type=type(e).__name__)
         # Don't cache errors - let it retry next time
         return 0.0
 
@@ -470,21 +404,20 @@ def _kpis_from_orders(
             in_window.append(o)
 
     # Log boundary orders if any found
-    if boundary_orders:
-        print(f"  [KPIs] {day_label}: Found {len(boundary_orders)} boundary order(s):")
-        for bo in boundary_orders:
-            status = "INCLUDED" if bo["in_window"] else "EXCLUDED"
-            print(f"    - {bo['order_name']}: {bo['created_at_local']} [{status}]")
+    if boundary_orders and kpi_log.is_enabled(logging.DEBUG):
+        kpi_log.debug("%s: Found %d boundary order(s): %s", day_label, len(boundary_orders),
+                      ", ".join(f"{bo['order_name']} {bo['created_at_local']} "
+                                f"[{'INCLUDED' if bo['in_window'] else 'EXCLUDED'}]"
+                                for bo in boundary_orders))
 
     orders_created = len(in_window)
     orders_net_count = 0
     g_orders_created = 0
     m_orders_created = 0
 
-    for o in in_window:
+    for o, ch in zip(in_window, attribute_orders(in_window)):
         is_cancelled = bool(o.get("cancelledAt"))
 
-        ch = _shopify_channel(o)
         if ch == "google":
             g_orders_created += 1
         elif ch == "meta":
@@ -593,7 +526,7 @@ def _kpis_from_orders(
     )
 
 # ------------------------------------------------------------------------------
-# day KPIs (explicit fetch per day, createdAt only)
+# day KPIs (per-day slice of the order snapshot, createdAt only)
 # ------------------------------------------------------------------------------
 
 def compute_day_kpis(day: date, tz_name: str) -> KPIs:
@@ -602,16 +535,7 @@ def compute_day_kpis(day: date, tz_name: str) -> KPIs:
     end_local   = tz.localize(datetime.combine(day + timedelta(days=1), datetime.min.time()))
     _, _, _, _, label = local_day_window(tz_name, day.strftime("%Y-%m-%d"))
 
-    nodes: List[dict] = []
-    for store in SHOPIFY_STORES:
-        domain = store["domain"]
-        token  = store["access_token"]
-        created = fetch_orders_created_between_for_store(
-            domain, token, start_local.isoformat(), end_local.isoformat(), exclude_cancelled=False
-        )
-        nodes.extend(created)
-
-    nodes = _uniq_by_id(nodes)
+    nodes = get_orders(start_local, end_local, exclude_cancelled=False)
     return _kpis_from_orders(nodes, label, start_local, end_local, tz_name)
 
 def compute_mtd_kpis(anchor_day: date, tz_name: str) -> KPIs:
@@ -707,16 +631,7 @@ def build_month_rows(anchor_day: date, tz_name: str) -> Tuple[str, int, int, Dic
     start_local = tz.localize(datetime.combine(first_d, datetime.min.time()))
     end_local   = tz.localize(datetime.combine(anchor_day + timedelta(days=1), datetime.min.time()))
 
-    month_orders: List[dict] = []
-    for store in SHOPIFY_STORES:
-        domain = store["domain"]
-        token  = store["access_token"]
-        created = fetch_orders_created_between_for_store(
-            domain, token, start_local.isoformat(), end_local.isoformat(), exclude_cancelled=False
-        )
-        month_orders.extend(created)
-
-    month_orders = _uniq_by_id(month_orders)
+    month_orders = get_orders(start_local, end_local, exclude_cancelled=False)
 
     buckets: Dict[date, List[dict]] = {}
     for o in month_orders:
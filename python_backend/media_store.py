@@ -0,0 +1,337 @@
+"""
+media_store.py — content-addressed blob store for generated social media assets.
+
+Raw image/video bytes live outside Postgres, keyed by their SHA-256 digest.
+Rows only keep a reference string ("blob:sha256:<hex>") in place of the old
+base64 payload, so listing posts never drags media over the wire.
+
+Backends are pluggable; the default keeps files on local disk under
+RENDER_DISK_PATH (the same persistent disk pricing_logic uses).
+
+Rows are only rewritten to references when the store survives a redeploy
+(is_persistent): a non-local backend, or a writable local root on an explicitly
+configured disk. Without one, media bytes stay inline in the DB and the local
+store is just a serving cache that is rebuilt from the rows after a deploy;
+resolve() remembers the digest of each inline payload it has served, so only
+the first request after a boot decodes and hashes it.
+
+Env:
+  MEDIA_BLOB_BACKEND   backend name (default: local)
+  MEDIA_BLOB_DIR       root directory for the local backend
+                       (default: $RENDER_DISK_PATH/media_blobs, else ./data/media_blobs)
+  MEDIA_INLINE_DIGEST_CACHE  inline payload digests remembered by resolve() (default 2048)
+"""
+
+from __future__ import annotations
+import os
+import re
+import base64
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+BLOB_REF_PREFIX = "blob:sha256:"
+INLINE_DIGEST_CACHE_SIZE = int(os.getenv("MEDIA_INLINE_DIGEST_CACHE", "2048"))
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "jpg": "image/jpeg",
+    "webp": "image/webp",
+    "avif": "image/avif",
+    "mp4": "video/mp4",
+}
+
+
+def _default_root() -> str:
+    base = os.getenv("RENDER_DISK_PATH") or os.path.join(os.path.dirname(__file__), "data")
+    return os.path.join(base, "media_blobs")
+
+
+def _configured_root() -> Optional[str]:
+    """Local root on an explicitly configured disk, else None (ephemeral app dir)."""
+    if os.getenv("MEDIA_BLOB_DIR"):
+        return os.getenv("MEDIA_BLOB_DIR")
+    if os.getenv("RENDER_DISK_PATH"):
+        return _default_root()
+    return None
+
+
+class BlobStore:
+    """Interface for blob backends. Digests are lowercase hex SHA-256."""
+
+    def put(self, data: bytes) -> str:
+        raise NotImplementedError
+
+    def get(self, digest: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def exists(self, digest: str) -> bool:
+        raise NotImplementedError
+
+    def size(self, digest: str) -> Optional[int]:
+        data = self.get(digest)
+        return len(data) if data is not None else None
+
+    def local_path(self, digest: str) -> Optional[str]:
+        """Filesystem path for zero-copy serving, or None if the backend is remote."""
+        return None
+
+
+class LocalDiskBlobStore(BlobStore):
+    """Files fanned out as <root>/ab/cd/<digest>; writes are atomic (tmp + rename)."""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.getenv("MEDIA_BLOB_DIR") or _default_root()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        if not _DIGEST_RE.match(digest):
+            raise ValueError(f"Invalid blob digest: {digest!r}")
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if os.path.exists(path):
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except Exception:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        return digest
+
+    def get(self, digest: str) -> Optional[bytes]:
+        try:
+            with open(self._path(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest))
+
+    def size(self, digest: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self._path(digest))
+        except FileNotFoundError:
+            return None
+
+    def local_path(self, digest: str) -> Optional[str]:
+        path = self._path(digest)
+        return path if os.path.exists(path) else None
+
+
+_BACKENDS: Dict[str, Callable[[], BlobStore]] = {"local": LocalDiskBlobStore}
+_store: Optional[BlobStore] = None
+_store_lock = threading.Lock()
+
+
+def register_backend(name: str, factory: Callable[[], BlobStore]):
+    """Register an alternative backend (e.g. object storage) selectable via MEDIA_BLOB_BACKEND."""
+    _BACKENDS[name] = factory
+
+
+_persistent: Optional[bool] = None
+
+
+def is_persistent() -> bool:
+    """True if stored blobs survive a redeploy, so rows may drop their inline bytes."""
+    global _persistent
+    if _persistent is None:
+        name = os.getenv("MEDIA_BLOB_BACKEND", "local").strip().lower() or "local"
+        if name != "local":
+            _persistent = True
+        else:
+            root = _configured_root()
+            try:
+                if root:
+                    os.makedirs(root, exist_ok=True)
+                _persistent = bool(root) and os.access(root, os.W_OK)
+            except OSError:
+                _persistent = False
+        if not _persistent:
+            print("ℹ️ Media blob store is not on a persistent disk (set RENDER_DISK_PATH or "
+                  "MEDIA_BLOB_DIR); media bytes stay in the database")
+    return _persistent
+
+
+def get_blob_store() -> BlobStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                name = os.getenv("MEDIA_BLOB_BACKEND", "local").strip().lower() or "local"
+                if name not in _BACKENDS:
+                    raise ValueError(f"Unknown MEDIA_BLOB_BACKEND: {name}")
+                _store = _BACKENDS[name]()
+    return _store
+
+
+# ---------- References ----------
+
+def is_blob_ref(value) -> bool:
+    return isinstance(value, str) and value.startswith(BLOB_REF_PREFIX)
+
+
+def ref_digest(ref: str) -> str:
+    return ref[len(BLOB_REF_PREFIX):]
+
+
+def _put_b64(value: str) -> str:
+    return BLOB_REF_PREFIX + get_blob_store().put(base64.b64decode(value))
+
+
+def offload_b64(value: Optional[str]) -> Optional[str]:
+    """Move an inline base64 payload into the store and return its reference.
+    References, empty values and everything when the store is not persistent
+    pass through unchanged."""
+    if not value or is_blob_ref(value) or not is_persistent():
+        return value
+    return _put_b64(value)
+
+
+def persist(data: bytes) -> str:
+    """Value to keep in a row for new media: a blob reference on a persistent
+    store, else the inline base64 payload."""
+    if is_persistent():
+        return BLOB_REF_PREFIX + get_blob_store().put(data)
+    return base64.b64encode(data).decode()
+
+
+def offload_carousel(slides: Optional[List[Dict]]) -> Optional[List[Dict]]:
+    """Replace each slide's inline `data` with a blob reference (thumbnails stay inline)."""
+    if not slides:
+        return slides
+    out = []
+    for s in slides:
+        if isinstance(s, dict) and s.get("data") and not is_blob_ref(s["data"]):
+            s = {**s, "data": offload_b64(s["data"])}
+        out.append(s)
+    return out
+
+
+def needs_offload(media_data: Optional[str], media_carousel: Optional[List[Dict]]) -> bool:
+    if not is_persistent():
+        return False
+    if media_data and not is_blob_ref(media_data):
+        return True
+    return any(isinstance(s, dict) and s.get("data") and not is_blob_ref(s["data"])
+               for s in (media_carousel or []))
+
+
+_inline_digests: "OrderedDict[tuple, str]" = OrderedDict()
+_inline_lock = threading.Lock()
+
+
+def resolve(value: Optional[str], key: Optional[tuple] = None) -> Optional[str]:
+    """Digest for a stored media value. Inline base64 is written to the store on the
+    fly so it can be served like any other blob; the row itself is not touched.
+    With `key` (e.g. (post uuid, slide, updated_at)) the inline payload's digest is
+    remembered, and later calls skip the decode + hash while its blob is stored."""
+    if not value:
+        return None
+    if is_blob_ref(value):
+        return ref_digest(value)
+    if key is not None:
+        key = (*key, len(value))
+        with _inline_lock:
+            digest = _inline_digests.get(key)
+            if digest:
+                _inline_digests.move_to_end(key)
+        if digest and get_blob_store().exists(digest):
+            return digest
+    digest = ref_digest(_put_b64(value))
+    if key is not None:
+        with _inline_lock:
+            _inline_digests[key] = digest
+            while len(_inline_digests) > INLINE_DIGEST_CACHE_SIZE:
+                _inline_digests.popitem(last=False)
+    return digest
+
+
+# ---------- HTTP serving ----------
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Single `bytes=` range -> inclusive (start, end); None if unsatisfiable/unsupported."""
+    m = re.match(r"^bytes=(\d*)-(\d*)$", header.strip())
+    if not m or (not m.group(1) and not m.group(2)):
+        return None
+    if m.group(1):
+        start = int(m.group(1))
+        end = int(m.group(2)) if m.group(2) else size - 1
+    else:
+        start = max(0, size - int(m.group(2)))
+        end = size - 1
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+def _iter_file(path: str, start: int, length: int, chunk: int = 256 * 1024):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            data = f.read(min(chunk, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+def blob_response(request, digest: str, fmt: str, max_age: int = 86400):
+    """FastAPI response for a blob: ETag/If-None-Match 304s, single byte ranges,
+    and FileResponse (sendfile) for full reads from the local backend."""
+    from fastapi import HTTPException, Response
+    from fastapi.responses import FileResponse, StreamingResponse
+
+    store = get_blob_store()
+    media_type = CONTENT_TYPES.get(fmt, "application/octet-stream")
+    etag = f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}",
+        "Accept-Ranges": "bytes",
+    }
+
+    inm = request.headers.get("if-none-match", "")
+    if inm and (inm.strip() == "*" or etag in [t.strip().removeprefix("W/") for t in inm.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    size = store.size(digest)
+    if size is None:
+        raise HTTPException(status_code=404, detail="Media not found")
+
+    path = store.local_path(digest)
+    range_header = request.headers.get("range")
+    if range_header:
+        rng = _parse_range(range_header, size)
+        if rng is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        start, end = rng
+        length = end - start + 1
+        headers.update({"Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(length)})
+        if path:
+            return StreamingResponse(_iter_file(path, start, length), status_code=206,
+                                     media_type=media_type, headers=headers)
+        data = store.get(digest) or b""
+        return Response(content=data[start:end + 1], status_code=206, media_type=media_type, headers=headers)
+
+    if path:
+        return FileResponse(path, media_type=media_type, headers=headers)
+    return Response(content=store.get(digest) or b"", media_type=media_type, headers=headers)
@@ -1,29 +1,35 @@
 # meta_client.py
 from __future__ import annotations
-import os, json, requests
+import os, json, logging, requests
 from typing import Dict, Any, List, Tuple
 from datetime import datetime, timedelta
 import pytz
 
+from utils.log import get_logger, set_level
+
 # You can override these via env:
 #   META_GRAPH_VERSION (default v24.0)
 #   META_ACCESS_TOKEN
 #   META_AD_ACCOUNT_ID  (with or without "act_")
-#   META_DEBUG=1        (verbose logs)
+#   META_DEBUG=1        (verbose logs, same as LOG_LEVELS=meta=DEBUG)
 #   DISABLE_META=1      (skip Meta completely and return 0 spend)
 GRAPH_VER = os.getenv("META_GRAPH_VERSION", "v24.0")
 
+log = get_logger("meta")
+if os.getenv("META_DEBUG", "0") == "1":
+    set_level("meta", "DEBUG")
+
 _META_WARNED: bool = False
 
 # ----------------- small utils -----------------
 def _dbg() -> bool:
-    return os.getenv("META_DEBUG", "0") == "1"
+    return log.is_enabled(logging.DEBUG)
 
 def _token() -> str:
     token = (os.getenv("META_ACCESS_TOKEN", "") or "").strip()
     if _dbg():
         # Do NOT print full token, only prefix + length, for sanity check
-        print(f"[META] using token prefix={token[:10]}... len={len(token)}")
+        log.debug("using token prefix=%s... len=%d", token[:10], len(token))
     return token
 
 def _act_id() -> str:
@@ -37,8 +43,7 @@ def _print_params(tag: str, url: str, params: Dict[str, Any]) -> None:
         return
     safe = params.copy()
     safe["access_token"] = "***"  # don't leak token in logs
-    print(f"[META] {tag} URL={url}")
-    print("[META]   params:", json.dumps(safe, indent=2, sort_keys=True))
+    log.debug("%s URL=%s params=%s", tag, url, json.dumps(safe, sort_keys=True))
 
 # ----------------- HTTP helpers -----------------
 def _get(url: str, params: Dict[str, Any]) -> dict | None:
@@ -51,19 +56,19 @@ def _get(url: str, params: Dict[str, Any]) -> dict | None:
                 payload = r.json()
             except Exception:
                 payload = r.text[:400]
-            if _dbg():
-                print("[META] ERR", r.status_code, payload)
             if not _META_WARNED:
-                print("⚠️ Meta Insights warning:", r.status_code, payload)
+                log.warning("Meta Insights warning: %s %s", r.status_code, payload)
                 _META_WARNED = True
+            else:
+                log.debug("ERR %s %s", r.status_code, payload)
             return None
         return r.json() or {}
     except Exception as e:
-        if _dbg():
-            print("[META] EXC", e)
         if not _META_WARNED:
-            print("⚠️ Meta Insights exception:", e)
+            log.warning("Meta Insights exception: %s", e)
             _META_WARNED = True
+        else:
+            log.debug("EXC %s", e)
         return None
 
 def _iterate_paged(url: str, params: dict) -> List[dict]:
@@ -94,8 +99,7 @@ def _fetch_account_meta() -> Tuple[str, str]:
     js = _get(url, {"access_token": token, "fields": "timezone_name,currency"}) or {}
     tz = (js.get("timezone_name") or "UTC").strip() or "UTC"
     cur = (js.get("currency") or "USD").strip().upper() or "USD"
-    if _dbg():
-        print(f"[META] acct meta tz={tz} currency={cur}")
+    log.debug("acct meta tz=%s currency=%s", tz, cur)
     return tz, cur
 
 # ----------------- time mapping -----------------
@@ -172,8 +176,7 @@ def _hourly_sum(level: str, span_start: str, span_end: str, hours_map: dict[str,
             currency = (r["account_currency"] or currency)
         matched += 1
 
-    if _dbg():
-        print(f"[META] hourly level={level} span={span_start}..{span_end} rows={matched} spend={round(spend,2)} {currency}")
+    log.debug("hourly level=%s span=%s..%s rows=%d spend=%.2f %s", level, span_start, span_end, matched, spend, currency)
     return (round(spend, 2), currency or "USD", matched)
 
 # ----------------- public API -----------------
@@ -183,8 +186,7 @@ def fetch_meta_insights_day(since_yyyy_mm_dd: str, until_yyyy_mm_dd: str) -> Dic
     """
     # Allow hard disabling from env
     if os.getenv("DISABLE_META", "0") == "1":
-        if _dbg():
-            print("[META] DISABLE_META=1 → returning 0 spend")
+        log.debug("DISABLE_META=1 → returning 0 spend", every=100)
         return {"meta_spend": 0.0, "currency": "USD"}
 
     # Shopify/store timezone is supplied by your app into env:
@@ -204,8 +206,8 @@ def fetch_meta_insights_day(since_yyyy_mm_dd: str, until_yyyy_mm_dd: str) -> Dic
                 spend, cur = spend2, cur2
 
         final_currency = (cur or acct_currency or "USD").upper()
-        if _dbg():
-            print(f"[META] aligned result day={since_yyyy_mm_dd} shop_tz={shop_tz} acct_tz={acct_tz} spend={spend} {final_currency}")
+        log.debug("aligned result day=%s shop_tz=%s acct_tz=%s spend=%s %s",
+                  since_yyyy_mm_dd, shop_tz, acct_tz, spend, final_currency)
         return {"meta_spend": round(spend, 2), "currency": final_currency}
 
     # -------- multi-day (simple daily account totals) --------
@@ -232,6 +234,5 @@ def fetch_meta_insights_day(since_yyyy_mm_dd: str, until_yyyy_mm_dd: str) -> Dic
             pass
         currency = row.get("account_currency") or currency
 
-    if _dbg():
-        print(f"[META] range {since_yyyy_mm_dd}..{until_yyyy_mm_dd} spend={round(spend,2)} {currency}")
+    log.debug("range %s..%s spend=%.2f %s", since_yyyy_mm_dd, until_yyyy_mm_dd, spend, currency)
     return {"meta_spend": round(spend, 2), "currency": (currency or "USD").upper()}
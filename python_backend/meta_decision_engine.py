@@ -14,7 +14,9 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
 from enum import Enum
-import requests
+from concurrent.futures import ThreadPoolExecutor
+
+from graph_client import get_graph_client
 
 # Configuration
 META_API_VERSION = "v18.0"
@@ -132,6 +134,14 @@ class EngineConfig:
 class MetaAdsClient:
     """Meta Marketing API client"""
 
+    INSIGHT_FIELDS = [
+        "impressions", "reach", "clicks", "spend", "ctr", "cpc", "cpm",
+        "frequency", "actions", "action_values", "cost_per_action_type"
+    ]
+    ADSET_FIELDS = "id,name,status,effective_status,daily_budget,campaign_id,optimization_goal,created_time,start_time"
+    AD_FIELDS = "id,name,status,effective_status,adset_id,created_time"
+    CAMPAIGN_FIELDS = "id,name,status,effective_status,daily_budget,lifetime_budget,objective,created_time,start_time"
+
     def __init__(self, access_token: str, ad_account_id: str):
         self.access_token = access_token
         self.ad_account_id = ad_account_id
@@ -140,12 +150,11 @@ class MetaAdsClient:
         url = f"{META_API_BASE}{endpoint}"
         params = {"access_token": self.access_token}
 
+        # Shared pooled client: keep-alive connections and usage-header throttling
+        graph = get_graph_client()
         if method == "GET":
-            response = requests.get(url, params={**params, **(data or {})})
-        else:
-            response = requests.post(url, params=params, data=data)
-
-        return response.json()
+            return graph.request_sync("GET", url, params={**params, **(data or {})})
+        return graph.request_sync("POST", url, params=params, data=data)
 
     def get_campaigns(self, status_filter: str = None) -> List[dict]:
         """Get all campaigns"""
@@ -175,10 +184,7 @@ class MetaAdsClient:
     def get_insights(self, object_id: str, level: str = "account",
                      date_preset: str = "today") -> PerformanceMetrics:
         """Get insights for campaign/adset/ad"""
-        fields = [
-            "impressions", "reach", "clicks", "spend", "ctr", "cpc", "cpm",
-            "frequency", "actions", "action_values", "cost_per_action_type"
-        ]
+        fields = self.INSIGHT_FIELDS
 
         if level == "account":
             endpoint = f"/act_{self.ad_account_id}/insights"
@@ -192,6 +198,61 @@ class MetaAdsClient:
         data = data_list[0] if data_list else {}
         return self._parse_insights(data)
 
+    def _paginate(self, endpoint: str, params: dict = None) -> List[dict]:
+        """GET an edge and follow paging.next until exhausted."""
+        return self._complete_edge(self._request(endpoint, data=params))
+
+    def _complete_edge(self, edge: Optional[dict]) -> List[dict]:
+        """Rows of a nested (field-expanded) edge, fetching any remaining pages."""
+        if not edge:
+            return []
+        rows = list(edge.get("data", []))
+        next_url = edge.get("paging", {}).get("next")
+        while next_url:
+            page = get_graph_client().request_sync("GET", next_url)
+            rows.extend(page.get("data", []))
+            next_url = page.get("paging", {}).get("next")
+        return rows
+
+    def get_entity_tree(self, campaign_id: str = None) -> List[dict]:
+        """Campaigns with their ad sets and ads in one field-expanded call.
+
+        Returns campaign dicts (get_campaigns fields) where each carries
+        "adsets" (get_adsets fields), and each ad set carries "ads" (get_ads fields).
+        """
+        fields = (f"{self.CAMPAIGN_FIELDS},"
+                  f"adsets.limit(200){{{self.ADSET_FIELDS},ads.limit(200){{{self.AD_FIELDS}}}}}")
+        params = {"fields": fields, "limit": 100}
+        if campaign_id:
+            params["filtering"] = json.dumps([{"field": "id", "operator": "EQUAL", "value": campaign_id}])
+        campaigns = self._paginate(f"/act_{self.ad_account_id}/campaigns", params)
+        for campaign in campaigns:
+            adsets = self._complete_edge(campaign.get("adsets"))
+            for adset in adsets:
+                adset["ads"] = self._complete_edge(adset.get("ads"))
+            campaign["adsets"] = adsets
+        return campaigns
+
+    def get_insights_by_level(self, level: str, date_preset: str = "today",
+                              campaign_id: str = None) -> Dict[str, PerformanceMetrics]:
+        """Account-level insights broken down by campaign/adset/ad in one (paged) query.
+
+        Returns {entity_id: PerformanceMetrics}. Entities without delivery in the
+        range have no row — callers fall back to empty metrics, matching what
+        a per-entity get_insights() call returns for them.
+        """
+        id_field = f"{level}_id"
+        params = {
+            "level": level,
+            "fields": ",".join([id_field] + self.INSIGHT_FIELDS),
+            "date_preset": date_preset,
+            "limit": 500,
+        }
+        if campaign_id:
+            params["filtering"] = json.dumps([{"field": "campaign.id", "operator": "EQUAL", "value": campaign_id}])
+        rows = self._paginate(f"/act_{self.ad_account_id}/insights", params)
+        return {row[id_field]: self._parse_insights(row) for row in rows if row.get(id_field)}
+
     def get_ad_quality_scores(self, ad_id: str, date_preset: str = "last_7d") -> dict:
         """
         Get ad quality/relevance scores from Meta
@@ -938,15 +999,25 @@ class DecisionEngine:
         account_metrics = self.client.get_insights(None, "account", date_range)
         report["account_summary"] = asdict(account_metrics)
 
-        # Analyze campaigns
-        campaigns = self.client.get_campaigns()
+        # Analyze campaigns: one nested call for the entity tree plus one
+        # account-level insights query per level, instead of per-entity calls
+        # (the four reads are independent, so they run in parallel on the shared pool)
+        levels = ("campaign", "adset", "ad")
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            tree_future = pool.submit(self.client.get_entity_tree, campaign_id)
+            level_futures = {
+                level: pool.submit(self.client.get_insights_by_level, level, date_range, campaign_id)
+                for level in levels
+            }
+            campaigns = tree_future.result()
+            insights = {level: f.result() for level, f in level_futures.items()}
         for campaign in campaigns:
             if campaign_id and campaign["id"] != campaign_id:
                 continue
             if campaign.get("effective_status") != "ACTIVE":
                 continue
 
-            campaign_analysis = self._analyze_campaign_entity(campaign, date_range)
+            campaign_analysis = self._analyze_campaign_entity(campaign, insights)
             report["campaigns"].append(campaign_analysis)
 
         # Compile decisions and recommendations
@@ -957,9 +1028,16 @@ class DecisionEngine:
 
         return report
 
-    def _analyze_campaign_entity(self, campaign: dict, date_range: str) -> dict:
+    def _metrics_for(self, insights: Dict[str, Dict[str, PerformanceMetrics]], level: str,
+                     entity_id: str) -> PerformanceMetrics:
+        metrics = insights[level].get(entity_id)
+        # Parse an empty row (not PerformanceMetrics()) so zero values keep the
+        # same int/float types as a per-entity insights call with no data
+        return metrics if metrics is not None else self.client._parse_insights({})
+
+    def _analyze_campaign_entity(self, campaign: dict, insights: dict) -> dict:
         """Analyze a single campaign and its ad sets/ads"""
-        campaign_metrics = self.client.get_insights(campaign["id"], "campaign", date_range)
+        campaign_metrics = self._metrics_for(insights, "campaign", campaign["id"])
 
         analysis = {
             "id": campaign["id"],
@@ -973,18 +1051,17 @@ class DecisionEngine:
         self._evaluate_entity(campaign, campaign_metrics, "campaign")
 
         # Analyze ad sets
-        adsets = self.client.get_adsets(campaign["id"])
-        for adset in adsets:
+        for adset in campaign.get("adsets", []):
             if adset.get("effective_status") != "ACTIVE":
                 continue
-            adset_analysis = self._analyze_adset(adset, date_range)
+            adset_analysis = self._analyze_adset(adset, insights)
             analysis["adsets"].append(adset_analysis)
 
         return analysis
 
-    def _analyze_adset(self, adset: dict, date_range: str) -> dict:
+    def _analyze_adset(self, adset: dict, insights: dict) -> dict:
         """Analyze ad set and its ads"""
-        adset_metrics = self.client.get_insights(adset["id"], "adset", date_range)
+        adset_metrics = self._metrics_for(insights, "adset", adset["id"])
 
         analysis = {
             "id": adset["id"],
@@ -998,11 +1075,10 @@ class DecisionEngine:
         self._evaluate_entity(adset, adset_metrics, "adset")
 
         # Analyze individual ads
-        ads = self.client.get_ads(adset["id"])
-        for ad in ads:
+        for ad in adset.get("ads", []):
             if ad.get("effective_status") != "ACTIVE":
                 continue
-            ad_metrics = self.client.get_insights(ad["id"], "ad", date_range)
+            ad_metrics = self._metrics_for(insights, "ad", ad["id"])
             analysis["ads"].append({
                 "id": ad["id"],
                 "name": ad["name"],
@@ -8,8 +8,9 @@ import os
 import pytz
 import re
 
-from config import SHOPIFY_STORES
-from shopify_client import fetch_orders_created_between_for_store, get_shop_timezone
+from order_snapshot import get_orders
+from channel_attribution import attribute_order
+from shopify_client import get_shop_timezone
 
 
 def _parse_dt(s: str) -> datetime:
@@ -36,16 +37,9 @@ def _money_at(obj: dict, path: list) -> float:
 
 
 def _shopify_channel(order: dict) -> str:
-    """Determine order source channel"""
-    attrs = order.get("customAttributes") or []
-    for attr in attrs:
-        if attr.get("key") == "_attribution_source":
-            val = (attr.get("value") or "").lower()
-            if "google" in val:
-                return "google"
-            if "meta" in val or "facebook" in val or "instagram" in val:
-                return "meta"
-    return "organic"
+    """Determine order source channel (google / meta / organic buckets of the report)"""
+    ch = attribute_order(order)
+    return ch if ch in ("google", "meta") else "organic"
 
 
 def _line_nodes(order: dict) -> list:
@@ -71,29 +65,8 @@ def fetch_order_report(start_date: date, end_date: date) -> Dict[str, Any]:
 
     print(f"📦 Fetching orders from {start_date} to {end_date}")
 
-    # Fetch orders from all stores
-    all_orders = []
-    for store in SHOPIFY_STORES:
-        domain = store["domain"]
-        token = store["access_token"]
-        orders = fetch_orders_created_between_for_store(
-            domain, token,
-            start_local.isoformat(),
-            end_local.isoformat(),
-            exclude_cancelled=False
-        )
-        for o in orders:
-            o["_store"] = domain
-        all_orders.extend(orders)
-
-    # Deduplicate by ID
-    seen_ids = set()
-    unique_orders = []
-    for o in all_orders:
-        oid = o.get("id")
-        if oid and oid not in seen_ids:
-            seen_ids.add(oid)
-            unique_orders.append(o)
+    # Orders from all stores (shared snapshot, deduplicated by ID)
+    unique_orders = get_orders(start_local, end_local, exclude_cancelled=False)
 
     print(f"📦 Found {len(unique_orders)} orders")
 
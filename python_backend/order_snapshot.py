@@ -0,0 +1,332 @@
+"""
+Order snapshot service - shared, incrementally refreshed window of Shopify orders
+
+The CMO agent, bestsellers, the order report and the master report all slice
+the same recent orders. Instead of each pulling its own 7-60 day window from
+Shopify, they read from one in-process snapshot per store:
+
+- the first read loads the last ORDER_SNAPSHOT_DAYS of orders (cancelled included)
+- later syncs only fetch orders *updated* since the last sync (new orders,
+  cancellations, refunds), deduplicated by order id
+- a daemon thread syncs every ORDER_SNAPSHOT_REFRESH_SECONDS; a read that finds
+  the snapshot older than ORDER_SNAPSHOT_MAX_AGE_SECONDS syncs first
+- a full reload every ORDER_SNAPSHOT_FULL_RELOAD_HOURS drops deleted orders
+- orders are indexed in columns sorted by createdAt (epoch array, ids,
+  cancelled flags), so any [start, end) slice is two bisects
+
+Ranges that start before the snapshot window fall back to a direct Shopify
+fetch for that store. Returned orders are shared between callers: treat them
+as read-only. Each order carries "_store" (the store domain).
+
+Env:
+  ORDER_SNAPSHOT_ENABLED              0 disables the snapshot (every read goes to Shopify)
+  ORDER_SNAPSHOT_DAYS                 window size in days (default 62)
+  ORDER_SNAPSHOT_REFRESH_SECONDS      background sync interval (default 300)
+  ORDER_SNAPSHOT_MAX_AGE_SECONDS      max staleness served to a read (default 60)
+  ORDER_SNAPSHOT_FULL_RELOAD_HOURS    full reload interval (default 6)
+"""
+import os
+import time
+import threading
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Union
+
+SNAPSHOT_ENABLED = os.getenv("ORDER_SNAPSHOT_ENABLED", "1") != "0"
+SNAPSHOT_DAYS = int(os.getenv("ORDER_SNAPSHOT_DAYS", "62"))
+REFRESH_SECONDS = float(os.getenv("ORDER_SNAPSHOT_REFRESH_SECONDS", "300"))
+MAX_AGE_SECONDS = float(os.getenv("ORDER_SNAPSHOT_MAX_AGE_SECONDS", "60"))
+FULL_RELOAD_SECONDS = float(os.getenv("ORDER_SNAPSHOT_FULL_RELOAD_HOURS", "6")) * 3600
+
+# Re-read a little before the last watermark so orders updated during the
+# previous sync are not missed (dedupe by id makes the overlap free)
+_WATERMARK_OVERLAP = timedelta(minutes=2)
+
+TimeLike = Union[datetime, str]
+
+
+def _parse_ts(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def _to_utc(value: TimeLike) -> datetime:
+    dt = _parse_ts(value) if isinstance(value, str) else value
+    if dt is None:
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class StoreSnapshot:
+    """Rolling order window for one store."""
+
+    def __init__(self, store: Dict[str, str], days: int = SNAPSHOT_DAYS):
+        self.store = store
+        self.domain = store["domain"]
+        self.days = days
+        self._orders: Dict[str, Dict[str, Any]] = {}
+        # Columns, sorted by createdAt
+        self._ts = array("d")
+        self._ids: List[str] = []
+        self._cancelled = bytearray()
+
+        self.window_start: Optional[datetime] = None
+        self.watermark: Optional[datetime] = None
+        self.last_sync = 0.0
+        self.last_full_load = 0.0
+        self.last_error: Optional[str] = None
+        self.fetched_orders = 0
+        self.syncs = 0
+        self._data_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.window_start is not None
+
+    def _fetch(self, search: str) -> List[Dict[str, Any]]:
+        from shopify_client import _search_orders_for
+        orders = _search_orders_for(self.domain, self.store["access_token"], search)
+        self.fetched_orders += len(orders)
+        return orders
+
+    def sync(self, full: bool = False) -> None:
+        """Load the window (first call / full=True) or fetch orders updated since the last sync."""
+        with self._sync_lock:
+            now = datetime.now(timezone.utc)
+            window_start = now - timedelta(days=self.days)
+            full = full or not self.loaded or time.time() - self.last_full_load >= FULL_RELOAD_SECONDS
+            started = time.time()
+            try:
+                if full:
+                    fetched = self._fetch(f"created_at:>={_iso(window_start)}")
+                else:
+                    since = self.watermark - _WATERMARK_OVERLAP
+                    fetched = self._fetch(f"created_at:>={_iso(window_start)} updated_at:>={_iso(since)}")
+            except Exception as e:
+                self.last_error = str(e)
+                raise
+            self._merge(fetched, window_start, replace=full)
+            self.last_error = None
+            self.last_sync = time.time()
+            self.syncs += 1
+            if full:
+                self.last_full_load = self.last_sync
+                print(f"📦 Order snapshot {self.domain}: loaded {len(self._ids)} orders "
+                      f"({self.days}d) in {self.last_sync - started:.1f}s")
+
+    def _merge(self, fetched: List[Dict[str, Any]], window_start: datetime, replace: bool) -> None:
+        orders = {} if replace else dict(self._orders)
+        watermark = None if replace else self.watermark
+        for o in fetched:
+            oid = o.get("id")
+            if not oid:
+                continue
+            o["_store"] = self.domain
+            orders[oid] = o
+            updated = _parse_ts(o.get("updatedAt")) or _parse_ts(o.get("createdAt"))
+            if updated and (watermark is None or updated > watermark):
+                watermark = updated
+
+        cutoff = window_start.timestamp()
+        rows = []
+        for oid, o in orders.items():
+            created = _parse_ts(o.get("createdAt"))
+            if created is None or created.timestamp() < cutoff:
+                continue
+            rows.append((created.timestamp(), oid, bool(o.get("cancelledAt"))))
+        rows.sort()
+
+        ts = array("d", (r[0] for r in rows))
+        ids = [r[1] for r in rows]
+        cancelled = bytearray(r[2] for r in rows)
+        with self._data_lock:
+            self._orders = {oid: orders[oid] for oid in ids}
+            self._ts, self._ids, self._cancelled = ts, ids, cancelled
+            self.window_start = window_start
+            # An empty store still needs a watermark for the next incremental sync
+            self.watermark = watermark or window_start
+
+    def covers(self, start: datetime) -> bool:
+        return self.loaded and start >= self.window_start
+
+    def slice(self, start: datetime, end: datetime, exclude_cancelled: bool = True) -> List[Dict[str, Any]]:
+        """Orders with createdAt in [start, end), oldest first."""
+        with self._data_lock:
+            lo = bisect_left(self._ts, start.timestamp())
+            hi = bisect_left(self._ts, end.timestamp())
+            return [self._orders[self._ids[i]] for i in range(lo, hi)
+                    if not (exclude_cancelled and self._cancelled[i])]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._data_lock:
+            count = len(self._ids)
+            cancelled = sum(self._cancelled)
+        return {
+            "domain": self.domain,
+            "orders": count,
+            "cancelled": cancelled,
+            "window_start": self.window_start.isoformat() if self.window_start else None,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "last_sync_age_s": round(time.time() - self.last_sync, 1) if self.last_sync else None,
+            "syncs": self.syncs,
+            "fetched_orders": self.fetched_orders,
+            "last_error": self.last_error,
+        }
+
+
+class OrderSnapshot:
+    """Per-store snapshots plus the background refresh thread."""
+
+    def __init__(self, stores: Optional[List[Dict[str, str]]] = None, days: int = SNAPSHOT_DAYS):
+        if stores is None:
+            from config import SHOPIFY_STORES
+            stores = SHOPIFY_STORES
+        self.stores = {s["domain"]: StoreSnapshot(s, days) for s in stores}
+        self._aliases = {}
+        for s in stores:
+            for alias in (s.get("key"), s.get("label"), s["domain"]):
+                if alias:
+                    self._aliases[alias] = s["domain"]
+        self.direct_fetches = 0
+        self.served = 0
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    def _resolve(self, store: Optional[str]) -> List[StoreSnapshot]:
+        if store is None:
+            return list(self.stores.values())
+        domain = self._aliases.get(store, store)
+        if domain not in self.stores:
+            raise ValueError(f"Unknown Shopify store: {store}")
+        return [self.stores[domain]]
+
+    def start(self) -> None:
+        """Start the background refresh thread (idempotent)."""
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._refresh_loop, name="order-snapshot", daemon=True)
+                self._thread.start()
+
+    def _refresh_loop(self) -> None:
+        # The first read loads the window; this thread only keeps it current
+        while True:
+            time.sleep(REFRESH_SECONDS)
+            for snap in self.stores.values():
+                if not snap.loaded or time.time() - snap.last_sync < REFRESH_SECONDS / 2:
+                    continue
+                try:
+                    snap.sync()
+                except Exception as e:
+                    print(f"⚠️ Order snapshot sync failed for {snap.domain}: {e}")
+
+    def _fresh(self, snap: StoreSnapshot) -> None:
+        if not snap.loaded or time.time() - snap.last_sync > MAX_AGE_SECONDS:
+            try:
+                snap.sync()
+            except Exception:
+                if not snap.loaded:
+                    raise
+                print(f"⚠️ Order snapshot {snap.domain}: sync failed, serving data from "
+                      f"{time.time() - snap.last_sync:.0f}s ago")
+
+    def get_orders(
+        self,
+        start: TimeLike,
+        end: TimeLike,
+        store: Optional[str] = None,
+        *,
+        exclude_cancelled: bool = True,
+        skip_failed_stores: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Orders created in [start, end) for one store (key, label or domain) or
+        all stores, deduplicated by id and sorted by createdAt.
+        """
+        start_utc, end_utc = _to_utc(start), _to_utc(end)
+        if SNAPSHOT_ENABLED:
+            self.start()
+
+        out: List[Dict[str, Any]] = []
+        for snap in self._resolve(store):
+            try:
+                in_window = start_utc >= datetime.now(timezone.utc) - timedelta(days=snap.days)
+                if SNAPSHOT_ENABLED and in_window:
+                    self._fresh(snap)
+                if SNAPSHOT_ENABLED and snap.covers(start_utc):
+                    out.extend(snap.slice(start_utc, end_utc, exclude_cancelled))
+                else:
+                    out.extend(self._direct_fetch(snap, start_utc, end_utc, exclude_cancelled))
+            except Exception as e:
+                if not skip_failed_stores:
+                    raise
+                print(f"⚠️ Skipping store {snap.store.get('label', snap.domain)}: {e}")
+
+        if len(self.stores) > 1 and store is None:
+            seen = set()
+            out = [o for o in out if not (o["id"] in seen or seen.add(o["id"]))]
+            out.sort(key=lambda o: o.get("createdAt") or "")
+        self.served += 1
+        return out
+
+    def _direct_fetch(self, snap: StoreSnapshot, start: datetime, end: datetime,
+                      exclude_cancelled: bool) -> List[Dict[str, Any]]:
+        from shopify_client import fetch_orders_created_between_for_store
+        self.direct_fetches += 1
+        orders = fetch_orders_created_between_for_store(
+            snap.domain, snap.store["access_token"], start.isoformat(), end.isoformat(),
+            exclude_cancelled=exclude_cancelled)
+        for o in orders:
+            o["_store"] = snap.domain
+        return orders
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": SNAPSHOT_ENABLED,
+            "days": SNAPSHOT_DAYS,
+            "refresh_seconds": REFRESH_SECONDS,
+            "max_age_seconds": MAX_AGE_SECONDS,
+            "served": self.served,
+            "direct_fetches": self.direct_fetches,
+            "stores": [s.get_stats() for s in self.stores.values()],
+        }
+
+
+_snapshot: Optional[OrderSnapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def get_order_snapshot() -> OrderSnapshot:
+    global _snapshot
+    if _snapshot is None:
+        with _snapshot_lock:
+            if _snapshot is None:
+                _snapshot = OrderSnapshot()
+    return _snapshot
+
+
+def get_orders(
+    start: TimeLike,
+    end: TimeLike,
+    store: Optional[str] = None,
+    *,
+    exclude_cancelled: bool = True,
+    skip_failed_stores: bool = False,
+) -> List[Dict[str, Any]]:
+    """Orders created in [start, end) from the shared snapshot (see OrderSnapshot.get_orders)."""
+    return get_order_snapshot().get_orders(start, end, store, exclude_cancelled=exclude_cancelled,
+                                           skip_failed_stores=skip_failed_stores)
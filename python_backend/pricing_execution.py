@@ -381,163 +381,42 @@ def check_competitor_prices(variant_ids: List[str]) -> Dict[str, Any]:
             "message": "SerpAPI key not configured. Set SERPAPI_KEY in environment."
         }
 
-    from smart_pricing import analyze_competitor_prices
-    from pricing_logic import update_competitor_data, log_competitor_scan
+    from competitor_scan import run_competitor_scan
 
     results = []
     scanned_count = 0
 
-    # Get product info from Shopify
-    for variant_id in variant_ids:
-        try:
-            variant_gid = f"gid://shopify/ProductVariant/{variant_id}"
-
-            # Get product details
-            query = """
-            query($id: ID!) {
-                productVariant(id: $id) {
-                    id
-                    title
-                    sku
-                    product {
-                        title
-                    }
-                }
-            }
-            """
-
-            result = _shopify_graphql(query, {"id": variant_gid})
-            variant = result["data"]["productVariant"]
-
-            product_title = variant["product"]["title"]
-            variant_title = variant["title"]
-            sku = variant["sku"]
-
-            # Build search query
-            search_query = f"{product_title} {variant_title}"
-            if sku:
-                search_query += f" {sku}"
-
-            # Call SerpAPI
-            serp_params = {
-                "engine": "google_shopping",
-                "q": search_query,
-                "gl": "us",
-                "hl": "en",
-                "num": 100,
-                "api_key": SERPAPI_KEY
-            }
-
-            response = requests.get("https://serpapi.com/search.json", params=serp_params, timeout=60)
-            response.raise_for_status()
-            serp_data = response.json()
-
-            # Extract prices with seller details
-            competitor_prices = []
-            seller_counts = {}
-
-            for item in serp_data.get("shopping_results", []):
-                price_str = item.get("extracted_price")
-                seller = item.get("source", "Unknown")
-                if price_str:
-                    competitor_prices.append({
-                        "price": float(price_str),
-                        "seller": seller,
-                        "title": item.get("title", ""),
-                        "link": item.get("link", ""),
-                        "domain": item.get("link", "").split("/")[2] if item.get("link") else ""
-                    })
-                    # Count sellers
-                    seller_counts[seller] = seller_counts.get(seller, 0) + 1
-
-            # Apply smart filtering
-            analysis = analyze_competitor_prices(competitor_prices)
-
-            # Get top sellers
-            top_sellers = sorted(seller_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-
-            # Get current price from Shopify
-            price_query = """
-            query($id: ID!) {
-                productVariant(id: $id) {
-                    price
-                    compareAtPrice
-                    inventoryItem {
-                        unitCost {
-                            amount
-                        }
-                    }
-                }
-            }
-            """
-            price_result = _shopify_graphql(price_query, {"id": variant_gid})
-            variant_data = price_result["data"]["productVariant"]
-            current_price = float(variant_data["price"]) if variant_data["price"] else 0.0
-            compare_at = float(variant_data["compareAtPrice"]) if variant_data["compareAtPrice"] else 0.0
-            cogs = 0.0
-            if variant_data.get("inventoryItem") and variant_data["inventoryItem"].get("unitCost"):
-                cogs = float(variant_data["inventoryItem"]["unitCost"]["amount"])
-
-            # Calculate competitive price (3% below avg, min 25% margin)
-            competitive_price = 0.0
-            comp_note = "N/A"
-            if analysis["comp_avg"] and analysis["comp_avg"] > 0:
-                min_margin = 0.25
-                min_price = cogs * (1 + min_margin) if cogs > 0 else 0
-                target_competitive = analysis["comp_avg"] * 0.97
-
-                if target_competitive >= min_price:
-                    competitive_price = round(target_competitive, 2)
-                    comp_note = "3% below avg"
-                elif min_price > 0:
-                    competitive_price = round(min_price, 2)
-                    comp_note = "Floor (25% margin)"
-
-            # Store competitor data for use in target prices
-            scan_data = {
-                "comp_low": analysis["comp_low"],
-                "comp_avg": analysis["comp_avg"],
-                "comp_high": analysis["comp_high"],
-                "raw_count": analysis["raw_count"],
-                "trusted_count": analysis["trusted_count"],
-                "filtered_count": analysis["filtered_count"],
-                "competitive_price": competitive_price,
-                "top_sellers": top_sellers,
-            }
-            update_competitor_data(variant_id, scan_data)
-
-            # Log scan to history
-            item_name = f"{product_title} - {variant_title}"
-            log_competitor_scan(variant_id, item_name, scan_data)
-
+    # Shopify details in one batched query; SerpAPI queries deduped, cached and run concurrently
+    for r in run_competitor_scan(variant_ids):
+        if r["status"] != "success":
+            print(f"❌ Failed to check prices for {r['variant_id']}: {r['error']}")
             results.append({
-                "variant_id": variant_id,
-                "product_name": f"{product_title} - {variant_title}",
-                "sku": sku,
-                "current_price": current_price,
-                "compare_at_price": compare_at,
-                "cogs": cogs,
-                "raw_count": analysis["raw_count"],
-                "trusted_count": analysis["trusted_count"],
-                "filtered_count": analysis["filtered_count"],
-                "comp_low": analysis["comp_low"],
-                "comp_avg": analysis["comp_avg"],
-                "comp_high": analysis["comp_high"],
-                "competitive_price": competitive_price,
-                "comp_note": comp_note,
-                "top_sellers": [{"seller": s, "count": c} for s, c in top_sellers],
-                "price_diff_pct": round(((current_price - analysis["comp_avg"]) / analysis["comp_avg"] * 100), 1) if analysis["comp_avg"] else 0
-            })
-
-            scanned_count += 1
-            time.sleep(0.6)  # Rate limiting for SerpAPI
-
-        except Exception as e:
-            print(f"❌ Failed to check prices for {variant_id}: {e}")
-            results.append({
-                "variant_id": variant_id,
-                "error": str(e)
+                "variant_id": r["variant_id"],
+                "error": r["error"]
             })
+            continue
+
+        analysis = r["analysis"]
+        current_price = r["current_price"]
+        results.append({
+            "variant_id": r["variant_id"],
+            "product_name": f"{r['product_title']} - {r['variant_title']}",
+            "sku": r["sku"],
+            "current_price": current_price,
+            "compare_at_price": r["compare_at"],
+            "cogs": r["cogs"],
+            "raw_count": analysis["raw_count"],
+            "trusted_count": analysis["trusted_count"],
+            "filtered_count": analysis["filtered_count"],
+            "comp_low": analysis["comp_low"],
+            "comp_avg": analysis["comp_avg"],
+            "comp_high": analysis["comp_high"],
+            "competitive_price": r["competitive_price"],
+            "comp_note": r["comp_note"],
+            "top_sellers": [{"seller": s, "count": c} for s, c in r["top_sellers"]],
+            "price_diff_pct": round(((current_price - analysis["comp_avg"]) / analysis["comp_avg"] * 100), 1) if analysis["comp_avg"] else 0
+        })
+        scanned_count += 1
 
     return {
         "scanned_count": scanned_count,
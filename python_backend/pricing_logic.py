@@ -4,14 +4,21 @@ Also fetches historical update log from Google Sheets
 """
 import os
 import time
+import threading
 import requests
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 from datetime import datetime
+from collections import deque
 from functools import lru_cache
 
+from utils.jsonl_journal import JsonlJournal, load_legacy_json
+from utils.log import get_logger
+
 load_dotenv()
 
+log = get_logger("pricing")
+
 # Shopify config
 SHOPIFY_STORE = os.getenv("SHOPIFY_STORE")
 SHOPIFY_TOKEN = os.getenv("SHOPIFY_ACCESS_TOKEN") or os.getenv("SHOPIFY_TOKEN")
@@ -25,42 +32,47 @@ _CACHE_TTL = 300  # seconds
 # Otherwise fall back to local directory
 _DATA_DIR = os.getenv("RENDER_DISK_PATH", os.path.dirname(__file__))
 
-# Log the data directory being used
-print(f"📁 Data directory: {_DATA_DIR}")
-print(f"   RENDER_DISK_PATH env: {os.getenv('RENDER_DISK_PATH', 'NOT SET')}")
-
-# Ensure data directory exists
-os.makedirs(_DATA_DIR, exist_ok=True)
-
-# Persistent competitor data storage (survives cache clears AND server restarts)
-_COMPETITOR_DATA_FILE = os.path.join(_DATA_DIR, "competitor_data.json")
+# Persistent competitor data storage (survives cache clears AND server restarts).
+# Append-only journal: one {"v": variant_id, "d": data} line per update, replayed
+# on startup and compacted to one line per variant once it grows past
+# _COMPACT_FACTOR x the live entries. competitor_data.json is the pre-journal
+# format, imported once if no journal exists yet.
+_COMPETITOR_DATA_FILE = os.path.join(_DATA_DIR, "competitor_data.jsonl")
+_LEGACY_COMPETITOR_DATA_FILE = os.path.join(_DATA_DIR, "competitor_data.json")
 _COMPETITOR_DATA = {}  # variant_id -> {comp_low, comp_avg, comp_high, ...}
+_COMPACT_FACTOR = 2
+_COMPACT_MIN_ENTRIES = 500
 
 # Persistent update log file
 _UPDATE_LOG_FILE = os.path.join(_DATA_DIR, "update_log.json")
 _UPDATE_LOG = []  # In-memory cache of update records
 
-# Persistent competitor scan history
-_SCAN_HISTORY_FILE = os.path.join(_DATA_DIR, "scan_history.json")
-_SCAN_HISTORY = []  # List of {timestamp, variant_id, item, comp_low, comp_avg, comp_high, ...}
+# Persistent competitor scan history (append-only journal, last _SCAN_HISTORY_MAX kept)
+_SCAN_HISTORY_FILE = os.path.join(_DATA_DIR, "scan_history.jsonl")
+_LEGACY_SCAN_HISTORY_FILE = os.path.join(_DATA_DIR, "scan_history.json")
+_SCAN_HISTORY_MAX = 1000
+_SCAN_HISTORY = deque(maxlen=_SCAN_HISTORY_MAX)  # {timestamp, variant_id, item, comp_low, comp_avg, comp_high, ...}
 
-print(f"📁 Competitor data file: {_COMPETITOR_DATA_FILE}")
-print(f"📁 Update log file: {_UPDATE_LOG_FILE}")
-print(f"📁 Scan history file: {_SCAN_HISTORY_FILE}")
+_COMPETITOR_JOURNAL = JsonlJournal(_COMPETITOR_DATA_FILE)
+_SCAN_JOURNAL = JsonlJournal(_SCAN_HISTORY_FILE)
+
+# The three stores above are read from disk on first use (ensure_loaded), not at
+# import - importing this module must not touch the filesystem
+_LOADED = False
+_LOAD_LOCK = threading.Lock()
 
 
 def _load_update_log() -> List[Dict[str, Any]]:
     """Load update log from file"""
-    global _UPDATE_LOG
     try:
         if os.path.exists(_UPDATE_LOG_FILE):
             with open(_UPDATE_LOG_FILE, 'r') as f:
                 import json
-                _UPDATE_LOG = json.load(f)
-                print(f"📂 Loaded {len(_UPDATE_LOG)} updates from {_UPDATE_LOG_FILE}")
+                _UPDATE_LOG[:] = json.load(f)
+                log.info("📂 Loaded %d updates from %s", len(_UPDATE_LOG), _UPDATE_LOG_FILE)
         return _UPDATE_LOG
     except Exception as e:
-        print(f"⚠️ Could not load update log: {e}")
+        log.warning("Could not load update log: %s", e)
         return []
 
 
@@ -70,74 +82,119 @@ def _save_update_log() -> None:
         import json
         with open(_UPDATE_LOG_FILE, 'w') as f:
             json.dump(_UPDATE_LOG, f, indent=2)
-        print(f"💾 Saved {len(_UPDATE_LOG)} updates to {_UPDATE_LOG_FILE}")
+        log.debug("💾 Saved %d updates to %s", len(_UPDATE_LOG), _UPDATE_LOG_FILE)
     except Exception as e:
-        print(f"⚠️ Could not save update log: {e}")
+        log.warning("Could not save update log: %s", e, per_minute=5)
 
 
 def _load_competitor_data() -> Dict[str, Dict[str, Any]]:
-    """Load competitor data from file"""
-    global _COMPETITOR_DATA
+    """Rebuild competitor data by replaying the journal"""
     try:
-        if os.path.exists(_COMPETITOR_DATA_FILE):
-            with open(_COMPETITOR_DATA_FILE, 'r') as f:
-                import json
-                _COMPETITOR_DATA = json.load(f)
-                print(f"📂 Loaded competitor data for {len(_COMPETITOR_DATA)} variants from {_COMPETITOR_DATA_FILE}")
+        if not _COMPETITOR_JOURNAL.exists():
+            legacy = load_legacy_json(_LEGACY_COMPETITOR_DATA_FILE)
+            if legacy:
+                _COMPETITOR_DATA.update(legacy)
+                _save_competitor_data()
+                log.info("📂 Imported competitor data for %d variants from %s", len(_COMPETITOR_DATA), _LEGACY_COMPETITOR_DATA_FILE)
+            return _COMPETITOR_DATA
+        for entry in _COMPETITOR_JOURNAL.load():
+            _COMPETITOR_DATA[entry["v"]] = entry["d"]
+        log.info("📂 Loaded competitor data for %d variants from %s", len(_COMPETITOR_DATA), _COMPETITOR_DATA_FILE)
         return _COMPETITOR_DATA
     except Exception as e:
-        print(f"⚠️ Could not load competitor data: {e}")
+        log.warning("Could not load competitor data: %s", e)
         return {}
 
 
 def _save_competitor_data() -> None:
-    """Save competitor data to file"""
+    """Compact the competitor journal to one line per variant"""
     try:
-        import json
-        with open(_COMPETITOR_DATA_FILE, 'w') as f:
-            json.dump(_COMPETITOR_DATA, f, indent=2)
-        print(f"💾 Saved competitor data for {len(_COMPETITOR_DATA)} variants to {_COMPETITOR_DATA_FILE}")
+        count = _COMPETITOR_JOURNAL.rewrite({"v": vid, "d": data} for vid, data in list(_COMPETITOR_DATA.items()))
+        log.info("💾 Saved competitor data for %d variants to %s", count, _COMPETITOR_DATA_FILE)
     except Exception as e:
-        print(f"⚠️ Could not save competitor data: {e}")
+        log.warning("Could not save competitor data: %s", e, per_minute=5)
+
+
+def _append_competitor_data(variant_id: str, data: Dict[str, Any]) -> None:
+    """Journal one variant update; compact when the journal outgrows the live data"""
+    try:
+        _COMPETITOR_JOURNAL.append({"v": variant_id, "d": data})
+        if _COMPETITOR_JOURNAL.appended_since_compact > max(_COMPACT_MIN_ENTRIES,
+                                                            _COMPACT_FACTOR * len(_COMPETITOR_DATA)):
+            _save_competitor_data()
+    except Exception as e:
+        log.warning("Could not save competitor data: %s", e, per_minute=5)
 
 
 def _load_scan_history() -> List[Dict[str, Any]]:
-    """Load scan history from file"""
-    global _SCAN_HISTORY
+    """Rebuild scan history by replaying the journal"""
     try:
-        if os.path.exists(_SCAN_HISTORY_FILE):
-            with open(_SCAN_HISTORY_FILE, 'r') as f:
-                import json
-                _SCAN_HISTORY = json.load(f)
-                print(f"📂 Loaded {len(_SCAN_HISTORY)} scan history records from {_SCAN_HISTORY_FILE}")
-        return _SCAN_HISTORY
+        if not _SCAN_JOURNAL.exists():
+            legacy = load_legacy_json(_LEGACY_SCAN_HISTORY_FILE)
+            if legacy:
+                _SCAN_HISTORY.extend(legacy)
+                _save_scan_history()
+                log.info("📂 Imported %d scan history records from %s", len(_SCAN_HISTORY), _LEGACY_SCAN_HISTORY_FILE)
+            return list(_SCAN_HISTORY)
+        _SCAN_HISTORY.extend(_SCAN_JOURNAL.load())
+        log.info("📂 Loaded %d scan history records from %s", len(_SCAN_HISTORY), _SCAN_HISTORY_FILE)
+        return list(_SCAN_HISTORY)
     except Exception as e:
-        print(f"⚠️ Could not load scan history: {e}")
+        log.warning("Could not load scan history: %s", e)
         return []
 
 
 def _save_scan_history() -> None:
-    """Save scan history to file"""
+    """Compact the scan history journal to the retained records"""
     try:
-        import json
-        with open(_SCAN_HISTORY_FILE, 'w') as f:
-            json.dump(_SCAN_HISTORY, f, indent=2)
-        print(f"💾 Saved {len(_SCAN_HISTORY)} scan history records to {_SCAN_HISTORY_FILE}")
+        count = _SCAN_JOURNAL.rewrite(list(_SCAN_HISTORY))
+        log.info("💾 Saved %d scan history records to %s", count, _SCAN_HISTORY_FILE)
     except Exception as e:
-        print(f"⚠️ Could not save scan history: {e}")
+        log.warning("Could not save scan history: %s", e, per_minute=5)
 
 
-# Load existing data on module import
-_load_update_log()
-_load_competitor_data()
-_load_scan_history()
+def _append_scan_history(record: Dict[str, Any]) -> None:
+    """Journal one scan record; compact once the journal holds _COMPACT_FACTOR x the retained records"""
+    try:
+        _SCAN_JOURNAL.append(record)
+        if _SCAN_JOURNAL.appended_since_compact > _COMPACT_FACTOR * _SCAN_HISTORY_MAX:
+            _save_scan_history()
+    except Exception as e:
+        log.warning("Could not save scan history: %s", e, per_minute=5)
+
+
+def ensure_loaded() -> None:
+    """Load the update log, competitor data and scan history on first use."""
+    global _LOADED
+    if _LOADED:
+        return
+    with _LOAD_LOCK:
+        if _LOADED:
+            return
+        log.info("📁 Data directory: %s", _DATA_DIR, RENDER_DISK_PATH=os.getenv("RENDER_DISK_PATH", "NOT SET"))
+        os.makedirs(_DATA_DIR, exist_ok=True)
+        _load_update_log()
+        _load_competitor_data()
+        _load_scan_history()
+        _LOADED = True
+
+
+def get_store_counts() -> Dict[str, Any]:
+    """Sizes of the persisted stores (loads them if needed) - for startup warm-up logs."""
+    ensure_loaded()
+    return {"data_dir": _DATA_DIR, "competitor_variants": len(_COMPETITOR_DATA),
+            "update_log": len(_UPDATE_LOG), "scan_history": len(_SCAN_HISTORY)}
+
 
 def _get_cache(key: str):
     """Get cached value if not expired"""
+    from request_metrics import record_cache
     if key in _CACHE:
         value, timestamp = _CACHE[key]
         if time.time() - timestamp < _CACHE_TTL:
+            record_cache("pricing", hit=True)
             return value
+    record_cache("pricing", hit=False)
     return None
 
 def _set_cache(key: str, value):
@@ -217,10 +274,10 @@ def _collect_sellable_variant_ids() -> set:
             time.sleep(0.05)
 
         except Exception as e:
-            print(f"❌ Error collecting sellable variants: {e}")
+            log.error("Error collecting sellable variants: %s", e)
             break
 
-    print(f"ℹ️ Found {len(sellable)} sellable variants")
+    log.info("ℹ️ Found %d sellable variants", len(sellable))
     return sellable
 
 
@@ -234,7 +291,7 @@ def fetch_items(market_filter: Optional[str] = None, use_cache: bool = True) ->
     if use_cache:
         cached = _get_cache(cache_key)
         if cached is not None:
-            print(f"✅ Using cached items data ({len(cached)} items)")
+            log.debug("✅ Using cached items data (%d items)", len(cached))
             return cached
 
     # First, get the list of sellable variant IDs
@@ -351,12 +408,10 @@ def fetch_items(market_filter: Optional[str] = None, use_cache: bool = True) ->
             time.sleep(0.05)  # Rate limiting
 
         except Exception as e:
-            print(f"❌ Error fetching variants: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Error fetching variants: %s", e)
             break
 
-    print(f"ℹ️ Filtered to {kept} sellable variants from ACTIVE products out of {total_admin} admin variants total.")
+    log.info("ℹ️ Filtered to %d sellable variants from ACTIVE products out of %d admin variants total.", kept, total_admin)
 
     # Cache the results
     _set_cache(cache_key, items)
@@ -389,14 +444,14 @@ def fetch_update_log(limit: Optional[int] = None) -> List[Dict[str, Any]]:
         GOOGLE_AUTH_MODE = os.getenv("GOOGLE_AUTH_MODE_1", "oauth").lower()
 
         if not SHEET_ID:
-            print("⚠️ GOOGLE_SHEET_ID_1 not configured")
+            log.warning("GOOGLE_SHEET_ID_1 not configured", per_minute=1)
             return []
 
         # Authenticate
         if GOOGLE_AUTH_MODE == "service_account":
             SERVICE_ACCOUNT_JSON = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON_1")
             if not SERVICE_ACCOUNT_JSON or not os.path.exists(SERVICE_ACCOUNT_JSON):
-                print("⚠️ Service account JSON not found")
+                log.warning("Service account JSON not found", per_minute=1)
                 return []
 
             SCOPES = [
@@ -410,7 +465,7 @@ def fetch_update_log(limit: Optional[int] = None) -> List[Dict[str, Any]]:
             token_path = os.path.join(OAUTH_DIR, "token.json")
 
             if not os.path.exists(token_path):
-                print("⚠️ OAuth token not found. Run auth_google.py first.")
+                log.warning("OAuth token not found. Run auth_google.py first.", per_minute=1)
                 return []
 
             gc = gspread.oauth(
@@ -425,7 +480,7 @@ def fetch_update_log(limit: Optional[int] = None) -> List[Dict[str, Any]]:
         try:
             ws = sh.worksheet("UpdatesLog")
         except:
-            print("⚠️ UpdatesLog worksheet not found")
+            log.warning("UpdatesLog worksheet not found", per_minute=1)
             return []
 
         # Get all values
@@ -480,19 +535,20 @@ def fetch_update_log(limit: Optional[int] = None) -> List[Dict[str, Any]]:
         if limit and limit > 0:
             result = result[:limit]
 
-        print(f"✅ Loaded {len(result)} update log entries from Google Sheets")
+        log.info("✅ Loaded %d update log entries from Google Sheets", len(result))
         return result
 
     except ImportError:
-        print("⚠️ gspread not installed, using in-memory log")
+        log.warning("gspread not installed, using in-memory log", per_minute=1)
         return _get_inmemory_update_log(limit)
     except Exception as e:
-        print(f"⚠️ Google Sheets error, using in-memory log: {e}")
+        log.warning("Google Sheets error, using in-memory log: %s", e, per_minute=5)
         return _get_inmemory_update_log(limit)
 
 
 def _get_inmemory_update_log(limit: Optional[int] = None) -> List[Dict[str, Any]]:
     """Get update log from in-memory storage"""
+    ensure_loaded()
     result = sorted(_UPDATE_LOG, key=lambda x: x.get("timestamp", ""), reverse=True)
     if limit and limit > 0:
         result = result[:limit]
@@ -522,6 +578,7 @@ def log_price_update(
         status: Update status (success/failed)
         notes: Optional notes
     """
+    ensure_loaded()
     timestamp = datetime.utcnow().isoformat() + "Z"
 
     # Calculate change percentage
@@ -553,11 +610,12 @@ def log_price_update(
     # Save to file for persistence
     _save_update_log()
 
-    print(f"📝 Logged update: {variant_id} ${old_price} -> ${new_price} ({status})")
+    log.info("📝 Logged update: %s $%s -> $%s (%s)", variant_id, old_price, new_price, status, every=25)
 
 
 def clear_update_log() -> None:
     """Clear the update log (both memory and file)"""
+    ensure_loaded()
     _UPDATE_LOG.clear()
     _save_update_log()
 
@@ -579,7 +637,7 @@ def invalidate_cache(keys: Optional[List[str]] = None) -> Dict[str, Any]:
         # Clear all cache
         count = len(_CACHE)
         _CACHE.clear()
-        print(f"🔄 Cleared all {count} cache entries")
+        log.info("🔄 Cleared all %d cache entries", count)
         return {"cleared": count, "keys": "all"}
     else:
         # Clear specific keys
@@ -588,7 +646,7 @@ def invalidate_cache(keys: Optional[List[str]] = None) -> Dict[str, Any]:
             if key in _CACHE:
                 del _CACHE[key]
                 cleared.append(key)
-        print(f"🔄 Cleared {len(cleared)} cache entries: {cleared}")
+        log.info("🔄 Cleared %d cache entries: %s", len(cleared), cleared)
         return {"cleared": len(cleared), "keys": cleared}
 
 
@@ -598,6 +656,7 @@ def fetch_target_prices(country_filter: Optional[str] = "US", use_cache: bool =
     Calculate target prices based on Shopify data
     Returns calculated metrics for each variant
     """
+    ensure_loaded()
     # Define country at the start
     country = (country_filter or "US").upper()
 
@@ -606,7 +665,7 @@ def fetch_target_prices(country_filter: Optional[str] = "US", use_cache: bool =
     if use_cache:
         cached = _get_cache(cache_key)
         if cached is not None:
-            print(f"✅ Using cached target prices data ({len(cached)} items)")
+            log.debug("✅ Using cached target prices data (%d items)", len(cached))
             return cached
 
     # Get base items data (will also use cache)
@@ -720,7 +779,7 @@ def fetch_target_prices(country_filter: Optional[str] = "US", use_cache: bool =
 
         target_prices.append(result)
 
-    print(f"✅ Calculated {len(target_prices)} target prices for {country}")
+    log.info("✅ Calculated %d target prices for %s", len(target_prices), country)
 
     # Cache the results
     _set_cache(cache_key, target_prices)
@@ -750,13 +809,14 @@ def update_competitor_data(variant_id: str, data: Dict[str, Any]) -> None:
         variant_id: The variant ID
         data: Dict with comp_low, comp_avg, comp_high, etc.
     """
+    ensure_loaded()
     _COMPETITOR_DATA[str(variant_id)] = data
     # Clear target prices cache to force recalculation with new competitor data
     keys_to_clear = [k for k in _CACHE.keys() if k.startswith("target_prices_")]
     for k in keys_to_clear:
         del _CACHE[k]
-    # Save to file for persistence across restarts
-    _save_competitor_data()
+    # Journal the update for persistence across restarts
+    _append_competitor_data(str(variant_id), data)
 
 
 def get_competitor_data(variant_id: str) -> Optional[Dict[str, Any]]:
@@ -769,6 +829,7 @@ def get_competitor_data(variant_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         Dict with competitor data or None if not available
     """
+    ensure_loaded()
     return _COMPETITOR_DATA.get(str(variant_id))
 
 
@@ -779,11 +840,13 @@ def get_all_competitor_data() -> Dict[str, Dict[str, Any]]:
     Returns:
         Dict mapping variant_id -> competitor data
     """
+    ensure_loaded()
     return _COMPETITOR_DATA.copy()
 
 
 def clear_competitor_data() -> None:
-    """Clear all stored competitor data (and delete the file)"""
+    """Clear all stored competitor data (and empty the journal)"""
+    ensure_loaded()
     _COMPETITOR_DATA.clear()
     _save_competitor_data()
 
@@ -791,7 +854,7 @@ def clear_competitor_data() -> None:
 # ================== COMPETITOR SCAN HISTORY ==================
 def log_competitor_scan(variant_id: str, item: str, scan_result: Dict[str, Any], country: str = "US") -> None:
     """
-    Log a competitor scan to history (JSON file + database)
+    Log a competitor scan to history (JSONL journal + database)
 
     Args:
         variant_id: The variant ID that was scanned
@@ -799,6 +862,7 @@ def log_competitor_scan(variant_id: str, item: str, scan_result: Dict[str, Any],
         scan_result: Dict with comp_low, comp_avg, comp_high, etc.
         country: Country code for the scan (default: US)
     """
+    ensure_loaded()
     from datetime import datetime
 
     record = {
@@ -816,14 +880,9 @@ def log_competitor_scan(variant_id: str, item: str, scan_result: Dict[str, Any],
         "top_sellers": scan_result.get("top_sellers", []),
     }
 
-    # Save to JSON file (legacy)
+    # Keep only the last _SCAN_HISTORY_MAX records (deque maxlen) and journal the new one
     _SCAN_HISTORY.append(record)
-
-    # Keep only last 1000 records in JSON
-    if len(_SCAN_HISTORY) > 1000:
-        _SCAN_HISTORY.pop(0)
-
-    _save_scan_history()
+    _append_scan_history(record)
 
     # Also save to database (async)
     _save_scan_to_db(variant_id, country, scan_result)
@@ -861,7 +920,7 @@ def _save_scan_to_db(variant_id: str, country: str, scan_result: Dict[str, Any])
             asyncio.run(save())
 
     except Exception as e:
-        print(f"⚠️ Could not save scan to database: {e}")
+        log.warning("Could not save scan to database: %s", e, per_minute=5)
 
 
 def get_scan_history(limit: int = 100) -> List[Dict[str, Any]]:
@@ -874,6 +933,7 @@ def get_scan_history(limit: int = 100) -> List[Dict[str, Any]]:
     Returns:
         List of scan history records, newest first
     """
+    ensure_loaded()
     result = sorted(_SCAN_HISTORY, key=lambda x: x.get("timestamp", ""), reverse=True)
     if limit and limit > 0:
         result = result[:limit]
@@ -882,5 +942,6 @@ def get_scan_history(limit: int = 100) -> List[Dict[str, Any]]:
 
 def clear_scan_history() -> None:
     """Clear all scan history"""
+    ensure_loaded()
     _SCAN_HISTORY.clear()
     _save_scan_history()
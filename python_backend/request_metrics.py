@@ -0,0 +1,397 @@
+"""
+Request metrics - per-request latency breakdown, Prometheus /metrics, slow-request log
+
+An ASGI middleware opens a RequestStats for every HTTP request and keeps it in
+a context variable; code running for that request adds to it without passing
+anything around:
+
+    with request_metrics.track_upstream("shopify"):     # time in an upstream API
+        r = requests.post(...)
+    request_metrics.record_cache("pricing", hit=True)  # cache hit / miss
+
+- upstream calls are timed automatically for `requests` and `httpx` clients
+  (install() wraps Session.send / Client.send / AsyncClient.send) and attributed
+  to shopify / meta / google / paypal / aftership / llm by host; gRPC clients
+  (Google Ads) use track_upstream() explicitly
+- SQL statements and rows come from SQLAlchemy cursor events (instrument_engine,
+  hooked up in database.connection.get_engine)
+- work on other threads or loops keeps the request's context where Python
+  copies it (asyncio tasks, to_thread, run_in_threadpool, graph_client's loop);
+  plain executor threads are only counted in the process-wide totals
+
+render_prometheus() exports per-route duration histograms, per-route upstream
+seconds / SQL / cache counters and per-service upstream histograms. Requests
+slower than METRICS_SLOW_REQUEST_MS are printed with their breakdown and kept
+for /metrics/slow.
+
+Env:
+  METRICS_SLOW_REQUEST_MS   slow-request threshold in ms (default 2000)
+  METRICS_SLOW_LOG_SIZE     slow requests kept in memory (default 100)
+  METRICS_TOKEN             scrape token: /metrics accepts "Authorization: Bearer <token>";
+                            otherwise (or when unset) it requires a dashboard login
+"""
+import os
+import hmac
+import time
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+SLOW_REQUEST_MS = float(os.getenv("METRICS_SLOW_REQUEST_MS", "2000"))
+SLOW_LOG_SIZE = int(os.getenv("METRICS_SLOW_LOG_SIZE", "100"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Host suffix -> upstream service (first match wins, so specific hosts go first)
+UPSTREAM_HOSTS = (
+    ("generativelanguage.googleapis.com", "llm"),
+    ("aiplatform.googleapis.com", "llm"),
+    ("api.openai.com", "llm"),
+    ("api.anthropic.com", "llm"),
+    ("myshopify.com", "shopify"),
+    ("shopify.com", "shopify"),
+    ("graph.facebook.com", "meta"),
+    ("graph.instagram.com", "meta"),
+    ("googleads.googleapis.com", "google"),
+    ("googleapis.com", "google"),
+    ("paypal.com", "paypal"),
+    ("aftership.com", "aftership"),
+)
+
+
+def service_for_url(url: Any) -> str:
+    host = (urlsplit(str(url)).hostname or "").lower()
+    for suffix, service in UPSTREAM_HOSTS:
+        if host == suffix or host.endswith("." + suffix):
+            return service
+    return "other"
+
+
+# ---------- per-request state ----------
+
+class RequestStats:
+    __slots__ = ("method", "path", "route", "started", "upstream", "sql_statements", "sql_rows",
+                 "sql_seconds", "cache", "_lock")
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.route = "unmatched"
+        self.started = time.perf_counter()
+        self.upstream: Dict[str, List[float]] = {}    # service -> [calls, seconds]
+        self.sql_statements = 0
+        self.sql_rows = 0
+        self.sql_seconds = 0.0
+        self.cache: Dict[str, List[int]] = {}         # cache name -> [hits, misses]
+        self._lock = threading.Lock()                 # graph_client / to_thread add from other threads
+
+    def add_upstream(self, service: str, seconds: float):
+        with self._lock:
+            entry = self.upstream.setdefault(service, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def add_sql(self, rows: int, seconds: float):
+        with self._lock:
+            self.sql_statements += 1
+            self.sql_rows += max(rows, 0)
+            self.sql_seconds += seconds
+
+    def add_cache(self, name: str, hit: bool):
+        with self._lock:
+            self.cache.setdefault(name, [0, 0])[0 if hit else 1] += 1
+
+    def breakdown(self, seconds: float, status: int) -> Dict[str, Any]:
+        return {
+            "at": datetime.utcnow().isoformat() + "Z",
+            "method": self.method, "path": self.path, "route": self.route, "status": status,
+            "ms": round(seconds * 1000, 1),
+            "upstream": {s: {"calls": int(c), "ms": round(t * 1000, 1)} for s, (c, t) in self.upstream.items()},
+            "sql": {"statements": self.sql_statements, "rows": self.sql_rows,
+                    "ms": round(self.sql_seconds * 1000, 1)},
+            "cache": {n: {"hits": h, "misses": m} for n, (h, m) in self.cache.items()},
+        }
+
+
+_current: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+
+def current() -> Optional[RequestStats]:
+    return _current.get()
+
+
+# ---------- process-wide registry ----------
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+_lock = threading.Lock()
+_requests: Dict[Tuple[str, str, str], _Histogram] = {}          # (method, route, status) -> duration
+_upstream: Dict[str, _Histogram] = {}                           # service -> call duration
+_route_upstream: Dict[Tuple[str, str], List[float]] = {}        # (route, service) -> [calls, seconds]
+_route_sql: Dict[str, List[float]] = {}                         # route -> [statements, rows, seconds]
+_route_cache: Dict[Tuple[str, str, str], int] = {}              # (route, cache, hit|miss) -> count
+_cache_totals: Dict[Tuple[str, str], int] = {}                  # (cache, hit|miss) -> count
+_in_flight = 0
+_slow: deque = deque(maxlen=SLOW_LOG_SIZE)
+
+
+def record_upstream(service: str, seconds: float):
+    with _lock:
+        _upstream.setdefault(service, _Histogram()).observe(seconds)
+    stats = _current.get()
+    if stats is not None:
+        stats.add_upstream(service, seconds)
+
+
+@contextmanager
+def track_upstream(service: str):
+    """Time the enclosed upstream call (sync or async body) under `service`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_upstream(service, time.perf_counter() - started)
+
+
+def record_cache(name: str, hit: bool):
+    result = "hit" if hit else "miss"
+    with _lock:
+        _cache_totals[(name, result)] = _cache_totals.get((name, result), 0) + 1
+    stats = _current.get()
+    if stats is not None:
+        stats.add_cache(name, hit)
+
+
+def _finish(stats: RequestStats, status: int):
+    seconds = time.perf_counter() - stats.started
+    route = stats.route
+    with _lock:
+        _requests.setdefault((stats.method, route, str(status)), _Histogram()).observe(seconds)
+        for service, (calls, secs) in stats.upstream.items():
+            entry = _route_upstream.setdefault((route, service), [0, 0.0])
+            entry[0] += calls
+            entry[1] += secs
+        if stats.sql_statements:
+            entry = _route_sql.setdefault(route, [0, 0, 0.0])
+            entry[0] += stats.sql_statements
+            entry[1] += stats.sql_rows
+            entry[2] += stats.sql_seconds
+        for name, (hits, misses) in stats.cache.items():
+            for result, n in (("hit", hits), ("miss", misses)):
+                if n:
+                    _route_cache[(route, name, result)] = _route_cache.get((route, name, result), 0) + n
+    if seconds * 1000 >= SLOW_REQUEST_MS:
+        entry = stats.breakdown(seconds, status)
+        _slow.append(entry)
+        parts = [f"{s} {v['calls']}x/{v['ms']:.0f}ms" for s, v in entry["upstream"].items()]
+        if stats.sql_statements:
+            parts.append(f"sql {stats.sql_statements}q/{stats.sql_rows}r/{entry['sql']['ms']:.0f}ms")
+        print(f"🐢 Slow request {stats.method} {stats.path} -> {status} in {entry['ms']:.0f}ms"
+              f" [{', '.join(parts) or 'no upstream/sql'}]")
+
+
+# ---------- middleware ----------
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware (keeps the context variable visible to the endpoint,
+    including sync endpoints run in the threadpool)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _in_flight
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(scope.get("method", "GET"), scope.get("path", ""))
+        token = _current.set(stats)
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        _in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _in_flight -= 1
+            route = scope.get("route")
+            # Route template ("/orders/{id}"), never the raw path - keeps label cardinality bounded
+            stats.route = getattr(route, "path", None) or "unmatched"
+            _current.reset(token)
+            _finish(stats, status_holder[0])
+
+
+# ---------- client instrumentation ----------
+
+# Start time lives on the per-statement execution context, so a statement that
+# fails (no after_cursor_execute) leaves nothing behind
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    stats = _current.get()
+    if stats is None or started is None:
+        return
+    rows = getattr(cursor, "rowcount", -1)
+    if rows is None or rows < 0:
+        # asyncpg's adapter reports -1 for SELECTs but has already fetched the rows
+        rows = len(getattr(cursor, "_rows", None) or ())
+    stats.add_sql(rows, time.perf_counter() - started)
+
+
+def instrument_engine(engine) -> None:
+    """Count statements, rows and time per request on an (async) SQLAlchemy engine."""
+    from sqlalchemy import event
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+_http_instrumented = False
+
+
+def instrument_http_clients() -> None:
+    """Time every requests / httpx call by upstream service (idempotent)."""
+    global _http_instrumented
+    if _http_instrumented:
+        return
+    _http_instrumented = True
+
+    try:
+        import requests
+        original_send = requests.Session.send
+
+        def send(self, request, **kwargs):
+            with track_upstream(service_for_url(request.url)):
+                return original_send(self, request, **kwargs)
+        requests.Session.send = send
+    except ImportError:
+        pass
+
+    try:
+        import httpx
+        original_sync = httpx.Client.send
+        original_async = httpx.AsyncClient.send
+
+        def sync_send(self, request, **kwargs):
+            with track_upstream(service_for_url(request.url)):
+                return original_sync(self, request, **kwargs)
+
+        async def async_send(self, request, **kwargs):
+            with track_upstream(service_for_url(request.url)):
+                return await original_async(self, request, **kwargs)
+        httpx.Client.send = sync_send
+        httpx.AsyncClient.send = async_send
+    except ImportError:
+        pass
+
+
+def install(app) -> None:
+    """Add the middleware to a FastAPI app and instrument HTTP clients."""
+    app.add_middleware(RequestMetricsMiddleware)
+    instrument_http_clients()
+
+
+# ---------- export ----------
+
+def _labels(**kv) -> str:
+    def esc(v):
+        return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in kv.items()) + "}"
+
+
+def _histogram_lines(name: str, hist: _Histogram, **labels) -> List[str]:
+    lines, cumulative = [], 0
+    for bound, n in zip(BUCKETS, hist.counts):
+        cumulative += n
+        lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {hist.count}")
+    lines.append(f"{name}_sum{_labels(**labels)} {hist.total:.6f}")
+    lines.append(f"{name}_count{_labels(**labels)} {hist.count}")
+    return lines
+
+
+def render_prometheus() -> str:
+    """Prometheus text exposition format (0.0.4)."""
+    out: List[str] = []
+    with _lock:
+        out += ["# HELP http_request_duration_seconds Request latency by route template.",
+                "# TYPE http_request_duration_seconds histogram"]
+        for (method, route, status), hist in sorted(_requests.items()):
+            out += _histogram_lines("http_request_duration_seconds", hist,
+                                    method=method, route=route, status=status)
+
+        out += ["# HELP http_requests_in_flight Requests being served.",
+                "# TYPE http_requests_in_flight gauge",
+                f"http_requests_in_flight {_in_flight}"]
+
+        out += ["# HELP upstream_call_duration_seconds Upstream API call latency by service.",
+                "# TYPE upstream_call_duration_seconds histogram"]
+        for service, hist in sorted(_upstream.items()):
+            out += _histogram_lines("upstream_call_duration_seconds", hist, service=service)
+
+        out += ["# HELP http_request_upstream_calls_total Upstream calls made while serving a route.",
+                "# TYPE http_request_upstream_calls_total counter"]
+        out += [f"http_request_upstream_calls_total{_labels(route=r, service=s)} {int(c)}"
+                for (r, s), (c, _) in sorted(_route_upstream.items())]
+        out += ["# HELP http_request_upstream_seconds_total Time in upstream calls while serving a route.",
+                "# TYPE http_request_upstream_seconds_total counter"]
+        out += [f"http_request_upstream_seconds_total{_labels(route=r, service=s)} {t:.6f}"
+                for (r, s), (_, t) in sorted(_route_upstream.items())]
+
+        for metric, idx, help_text in (
+                ("http_request_sql_statements_total", 0, "SQL statements executed while serving a route."),
+                ("http_request_sql_rows_total", 1, "Rows returned or affected by those statements."),
+                ("http_request_sql_seconds_total", 2, "Time spent executing them.")):
+            out += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            out += [f"{metric}{_labels(route=r)} {v[idx]:g}" for r, v in sorted(_route_sql.items())]
+
+        out += ["# HELP cache_requests_total Cache lookups by cache and result (all callers).",
+                "# TYPE cache_requests_total counter"]
+        out += [f"cache_requests_total{_labels(cache=c, result=res)} {n}"
+                for (c, res), n in sorted(_cache_totals.items())]
+        out += ["# HELP http_request_cache_requests_total Cache lookups while serving a route.",
+                "# TYPE http_request_cache_requests_total counter"]
+        out += [f"http_request_cache_requests_total{_labels(route=r, cache=c, result=res)} {n}"
+                for (r, c, res), n in sorted(_route_cache.items())]
+    return "\n".join(out) + "\n"
+
+
+def authorized(authorization: Optional[str]) -> bool:
+    """True if the request carries the METRICS_TOKEN bearer token (never when unset)."""
+    return bool(METRICS_TOKEN) and hmac.compare_digest(
+        (authorization or "").encode(), f"Bearer {METRICS_TOKEN}".encode())
+
+
+def get_slow_requests(limit: int = 50) -> List[Dict[str, Any]]:
+    """Most recent slow requests first, with their upstream / SQL / cache breakdown."""
+    return list(_slow)[::-1][:limit]
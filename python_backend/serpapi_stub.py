@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Local SerpAPI stub for exercising the competitor scan engine without credits.
+
+Serves /search.json with deterministic google_shopping results derived from
+the query, counts requests per (q, gl), can add artificial latency and can
+fail chosen queries (HTTP 500). test_competitor_scan.py runs it in-process.
+
+Usage:
+    python serpapi_stub.py [--port 8765] [--latency 0.3]
+        then run the backend with SERPAPI_URL=http://127.0.0.1:8765/search.json
+"""
+import json
+import time
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+SELLERS = ["Amazon.com", "YesStyle", "Stylevana", "Olive Young Global", "Walmart", "Ulta Beauty", "eBay"]
+
+
+class StubState:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.hits = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_queries = set()
+
+
+def shopping_results(query: str, n: int = 12):
+    seed = int(hashlib.sha256(query.encode()).hexdigest()[:8], 16)
+    base = 10 + seed % 40
+    return [{
+        "title": f"{query} #{i}",
+        "source": SELLERS[(seed + i) % len(SELLERS)],
+        "extracted_price": round(base * (0.85 + 0.03 * i), 2),
+        "link": f"https://shop{(seed + i) % 5}.example.com/p/{seed}-{i}",
+    } for i in range(n)]
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/search.json":
+                self.send_error(404)
+                return
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            if not params.get("api_key"):
+                self._json(401, {"error": "Invalid API key."})
+                return
+            with state.lock:
+                key = (params.get("q", ""), params.get("gl", ""))
+                state.hits[key] = state.hits.get(key, 0) + 1
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            try:
+                if state.latency:
+                    time.sleep(state.latency)
+                if key[0] in state.fail_queries:
+                    self._json(500, {"error": "Stub failure."})
+                    return
+                self._json(200, {"search_parameters": params,
+                                 "shopping_results": shopping_results(params.get("q", ""))})
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+
+        def _json(self, status: int, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(port: int, latency: float = 0.0, background: bool = False):
+    state = StubState(latency)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    else:
+        print(f"SerpAPI stub on http://127.0.0.1:{server.server_address[1]}/search.json")
+        server.serve_forever()
+    return server, state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds of delay per request")
+    args = parser.parse_args()
+    serve(args.port, args.latency)
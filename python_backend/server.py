@@ -10,7 +10,7 @@ import httpx
 from typing import List, Optional, Dict, Any
 
 import pytz
-from fastapi import FastAPI, HTTPException, Depends, Response
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, field_validator
@@ -35,15 +35,10 @@ if FIRST_ADMIN_EMAIL and FIRST_ADMIN_EMAIL not in ALLOWED_EMAILS:
 
 security = HTTPBearer(auto_error=False)
 
-# Database service (with graceful fallback)
-try:
-    from database.service import db_service
-    DB_SERVICE_AVAILABLE = True
-    print("✅ Database service imported successfully")
-except ImportError as e:
-    DB_SERVICE_AVAILABLE = False
-    db_service = None
-    print(f"⚠️ Database service not available: {e}")
+# Database service (SQLAlchemy + models) is imported on first use, not at startup;
+# db_service is falsy if the import fails
+from utils.lazy_import import LazyImport
+db_service = LazyImport("database.service", "db_service")
 
 
 # ---------- Pydantic models ----------
@@ -134,6 +129,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request latency / upstream / SQL / cache metrics (see request_metrics.py)
+import request_metrics
+request_metrics.install(app)
+
 
 # ==================== AUTH HELPERS ====================
 
@@ -280,6 +279,24 @@ async def health():
     return {"status": "ok", "message": "FastAPI is running"}
 
 
+@app.get("/metrics")
+async def prometheus_metrics(authorization: Optional[str] = Header(None),
+                             credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Prometheus scrape endpoint: request latency histograms per route, upstream
+    call time per service, SQL statements/rows and cache hits per route.
+    Requires the METRICS_TOKEN bearer token or a dashboard login."""
+    if not request_metrics.authorized(authorization) and not await get_current_user(credentials):
+        raise HTTPException(status_code=401, detail="Metrics token or login required")
+    return Response(request_metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/metrics/slow")
+async def slow_requests(limit: int = 50, user: dict = Depends(require_auth)):
+    """Recent requests over METRICS_SLOW_REQUEST_MS with their time breakdown."""
+    return {"threshold_ms": request_metrics.SLOW_REQUEST_MS,
+            "requests": request_metrics.get_slow_requests(limit)}
+
+
 # ==================== AUTH ENDPOINTS ====================
 
 @app.post("/auth/google")
@@ -291,7 +308,7 @@ async def google_login(req: GoogleAuthRequest):
 
         print(f"🔐 Login attempt: {email}")
 
-        if DB_SERVICE_AVAILABLE:
+        if db_service:
             from database.connection import get_db
             from database.models import User
             from sqlalchemy import select, func
@@ -390,7 +407,7 @@ async def get_me(user: dict = Depends(require_auth)):
 @app.get("/auth/users")
 async def list_users(user: dict = Depends(require_admin)):
     """List all users (admin only)"""
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         return {"users": [], "message": "Database not available"}
 
     from database.connection import get_db
@@ -421,7 +438,7 @@ async def list_users(user: dict = Depends(require_admin)):
 @app.post("/auth/users")
 async def add_user(req: AddUserRequest, user: dict = Depends(require_admin)):
     """Add a new allowed user (admin only)"""
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db
@@ -453,7 +470,7 @@ async def add_user(req: AddUserRequest, user: dict = Depends(require_admin)):
 @app.delete("/auth/users/{user_id}")
 async def delete_user(user_id: int, user: dict = Depends(require_admin)):
     """Delete a user (admin only)"""
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db
@@ -479,7 +496,7 @@ async def delete_user(user_id: int, user: dict = Depends(require_admin)):
 @app.put("/auth/users/{user_id}/toggle-admin")
 async def toggle_admin(user_id: int, user: dict = Depends(require_admin)):
     """Toggle admin status for a user (admin only)"""
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db
@@ -2639,12 +2656,13 @@ async def sm_bulk_delete_posts(req: SMBulkDeleteRequest, user: dict = Depends(re
 @app.get("/social-media/calendar")
 async def sm_get_calendar(start_date: Optional[str] = None, end_date: Optional[str] = None,
                            user: dict = Depends(require_auth)):
-    """Get posts in date range for calendar view"""
+    """Get posts in date range for calendar view (lightweight projection — full
+    post detail comes from /social-media/post/{uuid})"""
     try:
         from social_media_service import create_social_media_storage
         from dataclasses import asdict
         storage = create_social_media_storage()
-        posts = await storage.get_all_posts_async(start_date=start_date, end_date=end_date)
+        posts = await storage.get_all_posts_async(start_date=start_date, end_date=end_date, view="calendar")
         return {"posts": [asdict(p) for p in posts]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get calendar: {str(e)}")
@@ -2872,12 +2890,14 @@ async def sm_generate_media(uuid: str, engine: str = "gemini", user: dict = Depe
 
 
 @app.get("/social-media/media/{uuid}")
-async def sm_serve_media(uuid: str, slide: Optional[int] = None):
-    """Serve generated media as raw image/video bytes (unauthenticated for Meta API).
-    Use ?slide=N to serve carousel slides (0-indexed)."""
+async def sm_serve_media(uuid: str, request: Request, slide: Optional[int] = None):
+    """Serve generated media from the blob store (unauthenticated for Meta API).
+    Use ?slide=N to serve carousel slides (0-indexed). Supports ETag/If-None-Match
+    and byte ranges (video scrubbing)."""
     try:
         from social_media_service import create_social_media_storage
-        import base64
+        import asyncio
+        import media_store
         storage = create_social_media_storage()
         post = await storage.get_post_async(uuid)
         if not post or not post.media_data:
@@ -2887,23 +2907,16 @@ async def sm_serve_media(uuid: str, slide: Optional[int] = None):
         if slide is not None and slide > 0 and post.media_carousel:
             if slide < len(post.media_carousel):
                 slide_data = post.media_carousel[slide]
-                raw = base64.b64decode(slide_data["data"])
+                value = slide_data["data"]
                 fmt = slide_data.get("format", "png")
             else:
                 raise HTTPException(status_code=404, detail=f"Slide {slide} not found")
         else:
-            raw = base64.b64decode(post.media_data)
+            value = post.media_data
             fmt = post.media_data_format or "png"
 
-        content_type = {
-            "png": "image/png",
-            "jpeg": "image/jpeg",
-            "jpg": "image/jpeg",
-            "mp4": "video/mp4",
-        }.get(fmt, "application/octet-stream")
-
-        return Response(content=raw, media_type=content_type,
-                        headers={"Cache-Control": "public, max-age=86400"})
+        digest = await asyncio.to_thread(media_store.resolve, value)
+        return media_store.blob_response(request, digest, fmt)
     except HTTPException:
         raise
     except Exception as e:
@@ -2932,7 +2945,7 @@ async def sm_delete_post(uuid: str, user: dict = Depends(require_auth)):
 async def sm_get_products(user: dict = Depends(require_auth)):
     """Get Shopify products for featuring in posts"""
     try:
-        if DB_SERVICE_AVAILABLE and db_service:
+        if db_service:
             products = await db_service.get_products()
             return {"products": products}
 
@@ -3054,6 +3067,13 @@ async def agents_orchestrator_status(user: dict = Depends(require_auth)):
         return {"is_running": False, "error": str(e)}
 
 
+@app.get("/agents/llm-stats")
+async def agents_llm_stats(user: dict = Depends(require_auth)):
+    """LLM response cache hit rate and provider latencies."""
+    from llm_client import get_llm_stats
+    return get_llm_stats()
+
+
 @app.post("/agents/orchestrator/run")
 async def agents_orchestrator_force_run(user: dict = Depends(require_auth)):
     """Force an immediate processing cycle."""
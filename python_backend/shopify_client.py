@@ -149,6 +149,7 @@ query Orders($cursor: String, $search: String!) {
         name
         createdAt
         processedAt
+        updatedAt
         cancelledAt
         test
         displayFinancialStatus
@@ -5,14 +5,13 @@ Just: fetch data from APIs → calculate metrics → return JSON
 Supports PostgreSQL database with fallback to real-time API calls
 """
 import os
-import uuid
+import time
 import asyncio
-import threading
 import jwt
 import httpx
 from datetime import datetime, date, timedelta
 from typing import List, Optional, Dict, Any
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Header, Response
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
@@ -34,29 +33,26 @@ if FIRST_ADMIN_EMAIL and FIRST_ADMIN_EMAIL not in ALLOWED_EMAILS:
 
 security = HTTPBearer(auto_error=False)
 
-# Database service import (with graceful fallback)
-try:
-    from database.service import db_service
-    DB_SERVICE_AVAILABLE = True
-    print("✅ Database service imported successfully")
-except ImportError as e:
-    DB_SERVICE_AVAILABLE = False
-    db_service = None
-    print(f"⚠️ Database service import failed: {e}")
+# Database service (SQLAlchemy + models) is imported on first use, not at startup;
+# db_service is falsy if the import fails
+from utils.lazy_import import LazyImport
+db_service = LazyImport("database.service", "db_service")
 
 app = FastAPI(title="Mirai Reports API - Simple", version="2.0.0")
 
 # ==================== BACKGROUND TASK TRACKING ====================
-# In-memory store for background task progress
-_BACKGROUND_TASKS: Dict[str, Dict[str, Any]] = {}
+# Bounded worker pool; task state in shared SQLite so any uvicorn worker can report progress.
+# The registry (SQLite file + pool) is created on first use, not at import
+from task_registry import get_task_registry
+from utils.log import get_logger
+task_log = get_logger("tasks")
 
 
-def _run_price_update_background(task_id: str, updates: List[Dict[str, Any]]):
+def _run_price_update_background(task, updates: List[Dict[str, Any]]):
     """Run price updates in background thread with progress tracking"""
     import time
     import requests
 
-    task = _BACKGROUND_TASKS[task_id]
     task["status"] = "running"
     task["started_at"] = datetime.utcnow().isoformat() + "Z"
 
@@ -71,6 +67,7 @@ def _run_price_update_background(task_id: str, updates: List[Dict[str, Any]]):
         failed_count = 0
 
         for idx, update in enumerate(updates):
+            task.check_cancelled()
             task["progress"] = idx
             task["current_item"] = update.get("item", f"Variant {update.get('variant_id', '?')}")
 
@@ -150,7 +147,7 @@ def _run_price_update_background(task_id: str, updates: List[Dict[str, Any]]):
                 )
 
                 # Update database immediately
-                if DB_SERVICE_AVAILABLE and db_service.is_available():
+                if db_service and db_service.is_available():
                     try:
                         import asyncio
                         loop = asyncio.new_event_loop()
@@ -161,7 +158,7 @@ def _run_price_update_background(task_id: str, updates: List[Dict[str, Any]]):
                         ))
                         loop.close()
                     except Exception as db_err:
-                        print(f"⚠️ DB update failed for {variant_id}: {db_err}")
+                        task_log.warning("DB update failed for %s: %s", variant_id, db_err, per_minute=5)
 
                 updated_count += 1
                 results.append({
@@ -194,168 +191,43 @@ def _run_price_update_background(task_id: str, updates: List[Dict[str, Any]]):
         task["completed_at"] = datetime.utcnow().isoformat() + "Z"
 
 
-def _run_competitor_scan_background(task_id: str, variant_ids: List[str]):
+def _run_competitor_scan_background(task, variant_ids: List[str]):
     """Run competitor price scan in background thread with progress tracking"""
-    import time
-    import requests
-
-    task = _BACKGROUND_TASKS[task_id]
     task["status"] = "running"
     task["started_at"] = datetime.utcnow().isoformat() + "Z"
 
     try:
-        from smart_pricing import analyze_competitor_prices
-        from pricing_logic import update_competitor_data, log_competitor_scan
-
-        SERPAPI_KEY = os.getenv("SERPAPI_KEY") or os.getenv("SERPAPI_API_KEY")
-        SHOPIFY_STORE = os.getenv("SHOPIFY_STORE")
-        SHOPIFY_TOKEN = os.getenv("SHOPIFY_ACCESS_TOKEN") or os.getenv("SHOPIFY_TOKEN")
-        SHOPIFY_API_VERSION = os.getenv("SHOPIFY_API_VERSION", "2025-07")
+        from competitor_scan import run_competitor_scan
 
-        if not SERPAPI_KEY:
+        if not (os.getenv("SERPAPI_KEY") or os.getenv("SERPAPI_API_KEY")):
             task["status"] = "failed"
             task["error"] = "SerpAPI key not configured"
             return
 
-        results = []
         total = len(variant_ids)
 
-        for idx, variant_id in enumerate(variant_ids):
-            task["progress"] = idx
-            task["current_item"] = variant_id
-
-            try:
-                variant_gid = f"gid://shopify/ProductVariant/{variant_id}"
-
-                # Get product details from Shopify
-                url = f"https://{SHOPIFY_STORE}/admin/api/{SHOPIFY_API_VERSION}/graphql.json"
-                headers = {
-                    "Content-Type": "application/json",
-                    "X-Shopify-Access-Token": SHOPIFY_TOKEN
-                }
-
-                query = """
-                query($id: ID!) {
-                    productVariant(id: $id) {
-                        id
-                        title
-                        sku
-                        price
-                        compareAtPrice
-                        product { title }
-                        inventoryItem { unitCost { amount } }
-                    }
-                }
-                """
-
-                response = requests.post(url, json={"query": query, "variables": {"id": variant_gid}}, headers=headers, timeout=30)
-                response.raise_for_status()
-                data = response.json()
-
-                if "errors" in data:
-                    raise RuntimeError(f"GraphQL errors: {data['errors']}")
-
-                variant = data["data"]["productVariant"]
-                product_title = variant["product"]["title"]
-                variant_title = variant["title"]
-                sku = variant["sku"]
-                current_price = float(variant["price"]) if variant["price"] else 0.0
-                compare_at = float(variant["compareAtPrice"]) if variant["compareAtPrice"] else 0.0
-                cogs = 0.0
-                if variant.get("inventoryItem") and variant["inventoryItem"].get("unitCost"):
-                    cogs = float(variant["inventoryItem"]["unitCost"]["amount"])
-
-                # Build search query
-                search_query = f"{product_title} {variant_title}"
-                if sku:
-                    search_query += f" {sku}"
-
-                task["current_item"] = f"{product_title} - {variant_title}"
-
-                # Call SerpAPI
-                serp_params = {
-                    "engine": "google_shopping",
-                    "q": search_query,
-                    "gl": "us",
-                    "hl": "en",
-                    "num": 100,
-                    "api_key": SERPAPI_KEY
-                }
-
-                serp_response = requests.get("https://serpapi.com/search.json", params=serp_params, timeout=60)
-                serp_response.raise_for_status()
-                serp_data = serp_response.json()
-
-                # Extract prices
-                competitor_prices = []
-                seller_counts = {}
-
-                for item in serp_data.get("shopping_results", []):
-                    price_str = item.get("extracted_price")
-                    seller = item.get("source", "Unknown")
-                    if price_str:
-                        competitor_prices.append({
-                            "price": float(price_str),
-                            "seller": seller,
-                            "title": item.get("title", ""),
-                            "link": item.get("link", ""),
-                        })
-                        seller_counts[seller] = seller_counts.get(seller, 0) + 1
-
-                # Apply smart filtering
-                analysis = analyze_competitor_prices(competitor_prices)
-                top_sellers = sorted(seller_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-
-                # Calculate competitive price
-                competitive_price = 0.0
-                comp_note = "N/A"
-                if analysis["comp_avg"] and analysis["comp_avg"] > 0:
-                    min_margin = 0.25
-                    min_price = cogs * (1 + min_margin) if cogs > 0 else 0
-                    target_competitive = analysis["comp_avg"] * 0.97
-
-                    if target_competitive >= min_price:
-                        competitive_price = round(target_competitive, 2)
-                        comp_note = "3% below avg"
-                    elif min_price > 0:
-                        competitive_price = round(min_price, 2)
-                        comp_note = "Floor (25% margin)"
-
-                # Store competitor data
-                scan_data = {
-                    "comp_low": analysis["comp_low"],
-                    "comp_avg": analysis["comp_avg"],
-                    "comp_high": analysis["comp_high"],
-                    "raw_count": analysis["raw_count"],
-                    "trusted_count": analysis["trusted_count"],
-                    "filtered_count": analysis["filtered_count"],
-                    "competitive_price": competitive_price,
-                    "top_sellers": top_sellers,
-                }
-                update_competitor_data(variant_id, scan_data)
-
-                # Log scan to history
-                item_name = f"{product_title} - {variant_title}"
-                log_competitor_scan(variant_id, item_name, scan_data)
-
-                results.append({
-                    "variant_id": variant_id,
-                    "product_name": item_name,
-                    "sku": sku,
-                    "current_price": current_price,
-                    "comp_avg": analysis["comp_avg"],
-                    "competitive_price": competitive_price,
-                    "status": "success"
-                })
+        def on_progress(done: int, current_item: str):
+            # Called once per finished variant (queries run concurrently)
+            task["progress"] = min(done, total)
+            task["current_item"] = current_item
+            task.check_cancelled()
 
-                time.sleep(0.6)  # Rate limiting
+        records = run_competitor_scan(variant_ids, on_progress=on_progress)
 
-            except Exception as e:
-                results.append({
-                    "variant_id": variant_id,
-                    "status": "failed",
-                    "error": str(e)
-                })
+        results = []
+        for r in records:
+            if r["status"] != "success":
+                results.append({"variant_id": r["variant_id"], "status": "failed", "error": r["error"]})
+                continue
+            results.append({
+                "variant_id": r["variant_id"],
+                "product_name": f"{r['product_title']} - {r['variant_title']}",
+                "sku": r["sku"],
+                "current_price": r["current_price"],
+                "comp_avg": r["analysis"]["comp_avg"],
+                "competitive_price": r["competitive_price"],
+                "status": "success"
+            })
 
         task["status"] = "completed"
         task["progress"] = total
@@ -369,11 +241,10 @@ def _run_competitor_scan_background(task_id: str, variant_ids: List[str]):
         task["completed_at"] = datetime.utcnow().isoformat() + "Z"
 
 
-def _run_korealy_sync_background(task_id: str, variant_ids: List[str], korealy_cogs_map: Dict[str, float]):
+def _run_korealy_sync_background(task, variant_ids: List[str], korealy_cogs_map: Dict[str, float]):
     """Run Korealy COGS sync in background thread with progress tracking"""
     import time
 
-    task = _BACKGROUND_TASKS[task_id]
     task["status"] = "running"
     task["started_at"] = datetime.utcnow().isoformat() + "Z"
 
@@ -388,6 +259,7 @@ def _run_korealy_sync_background(task_id: str, variant_ids: List[str], korealy_c
         skipped_count = 0
 
         for idx, variant_id in enumerate(variant_ids):
+            task.check_cancelled()
             task["progress"] = idx
             task["current_item"] = f"Variant {variant_id}"
 
@@ -488,7 +360,7 @@ def _run_korealy_sync_background(task_id: str, variant_ids: List[str], korealy_c
                 )
 
                 # Update database immediately
-                if DB_SERVICE_AVAILABLE and db_service.is_available():
+                if db_service and db_service.is_available():
                     try:
                         import asyncio
                         loop = asyncio.new_event_loop()
@@ -498,7 +370,7 @@ def _run_korealy_sync_background(task_id: str, variant_ids: List[str], korealy_c
                         ))
                         loop.close()
                     except Exception as db_err:
-                        print(f"⚠️ DB update failed for {variant_id}: {db_err}")
+                        task_log.warning("DB update failed for %s: %s", variant_id, db_err, per_minute=5)
 
                 updated_count += 1
                 results.append({
@@ -535,6 +407,25 @@ def _run_korealy_sync_background(task_id: str, variant_ids: List[str], korealy_c
         task["completed_at"] = datetime.utcnow().isoformat() + "Z"
 
 
+# Requests wait for the database warm-up step (see STARTUP / WARM-UP below).
+# Registered before CORS / metrics so it runs innermost: 503s still carry CORS
+# headers and the wait shows up in request latency.
+_DB_READY = asyncio.Event()
+WARMUP_DB_WAIT_SECONDS = float(os.getenv("WARMUP_DB_WAIT_SECONDS", "60"))
+_NO_DB_WAIT = ("/health", "/metrics")
+
+
+@app.middleware("http")
+async def _wait_for_database(request: Request, call_next):
+    if not _DB_READY.is_set() and not request.url.path.startswith(_NO_DB_WAIT):
+        try:
+            await asyncio.wait_for(_DB_READY.wait(), timeout=WARMUP_DB_WAIT_SECONDS)
+        except asyncio.TimeoutError:
+            return Response(status_code=503, content="Database initialization in progress",
+                            headers={"Retry-After": "5"})
+    return await call_next(request)
+
+
 # CORS - read allowed origins from environment
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*")
 if CORS_ORIGINS == "*":
@@ -550,15 +441,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request latency / upstream / SQL / cache metrics (see request_metrics.py)
+import request_metrics
+request_metrics.install(app)
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database and log configuration on startup"""
-    print("=" * 60)
-    print("🚀 Mirai Reports API Starting Up")
-    print("=" * 60)
 
-    # Initialize database tables (creates new tables if they don't exist)
+# ==================== STARTUP / WARM-UP ====================
+# startup_event returns right away so uvicorn starts accepting connections
+# (Render's health check hits /health seconds after boot). Table creation,
+# migrations, background services and config probes run afterwards in
+# _warm_up(). /health is a liveness check (always 200, reports warm-up progress);
+# /health/ready answers 503 until the database step (schema creation + migrations)
+# is done, and every other route waits for it (up to WARMUP_DB_WAIT_SECONDS, then
+# 503) so no request hits a table or column that doesn't exist yet. The agent
+# table checks and the draft → ready data migration run in a later step.
+
+_WARMUP: Dict[str, Any] = {"status": "pending", "started_at": None, "finished_at": None, "steps": {}}
+
+
+async def _init_database():
+    """Initialize database tables (creates new tables if they don't exist)"""
     try:
         from database.connection import init_db
         await init_db()
@@ -566,6 +468,9 @@ async def startup_event():
     except Exception as e:
         print(f"⚠️ Database init: {e}")
 
+
+async def _check_agent_tables():
+    """Agent table sanity check + one-time data migrations (after the DB is ready)"""
     # Verify agent tables are queryable
     try:
         from database.connection import get_db
@@ -598,16 +503,42 @@ async def startup_event():
     except Exception as e:
         print(f"⚠️ Draft→ready migration: {e}")
 
+
+async def _start_background_services():
+    # One-time migration: move inline base64 post media into the blob store (background)
+    async def _migrate_post_media():
+        try:
+            import media_store
+            if not await asyncio.to_thread(media_store.is_persistent):
+                return  # blobs would not survive a redeploy; keep the bytes in the DB
+            from social_media_service import create_social_media_storage
+            moved = await create_social_media_storage().migrate_media_to_blobs_async()
+            print(f"✅ Moved media for {moved} social posts into the blob store")
+        except Exception as e:
+            print(f"⚠️ Post media → blob store migration: {e}")
+
+    asyncio.create_task(_migrate_post_media())
+
+    # Periodic per-post insights sync (only posts due per their age tier)
+    try:
+        from insights_sync import start_background_sync, SYNC_INTERVAL
+        if start_background_sync():
+            print(f"✅ Insights sync scheduler started (every {SYNC_INTERVAL}s)")
+    except Exception as e:
+        print(f"⚠️ Insights sync scheduler failed to start: {e}")
+
     # Start Agent Orchestrator as background task
     try:
-        import asyncio as _asyncio
         from agents.orchestrator import get_orchestrator
         orch = get_orchestrator()
-        _asyncio.create_task(orch.start())
+        asyncio.create_task(orch.start())
         print("✅ Agent Orchestrator started as background task")
     except Exception as e:
         print(f"⚠️ Agent Orchestrator failed to start: {e}")
 
+
+def _log_configuration():
+    """Config / persistence / database status probes (filesystem + data loads)"""
     # Check for google-ads.yaml
     config_path = os.getenv("GOOGLE_ADS_CONFIG", "google-ads.yaml")
     config_locations = [
@@ -632,18 +563,19 @@ async def startup_event():
     render_disk = os.getenv("RENDER_DISK_PATH", "not set")
     print(f"  RENDER_DISK_PATH: {render_disk}")
 
-    # Check if pricing_logic has loaded any data
+    # Load pricing data (competitor data / update log / scan history) ahead of first use
     try:
-        from pricing_logic import _COMPETITOR_DATA, _UPDATE_LOG, _DATA_DIR
-        print(f"  Data directory: {_DATA_DIR}")
-        print(f"  Competitor data loaded: {len(_COMPETITOR_DATA)} variants")
-        print(f"  Update log loaded: {len(_UPDATE_LOG)} entries")
+        from pricing_logic import get_store_counts
+        counts = get_store_counts()
+        print(f"  Data directory: {counts['data_dir']}")
+        print(f"  Competitor data loaded: {counts['competitor_variants']} variants")
+        print(f"  Update log loaded: {counts['update_log']} entries")
     except Exception as e:
         print(f"  ⚠️ Could not check pricing data: {e}")
 
     # Database status
     print("\n🗄️ Database Status:")
-    if DB_SERVICE_AVAILABLE:
+    if db_service:
         if db_service.is_available():
             print("  ✅ Database configured and available")
             print("  📊 Data will be served from database (with API fallback)")
@@ -654,10 +586,39 @@ async def startup_event():
         print("  ⚠️ Database service not available (import error)")
         print("  📊 Data will be served from real-time API calls")
 
+
+async def _warm_up():
+    _WARMUP.update(status="running", started_at=datetime.utcnow().isoformat() + "Z")
+    steps = (
+        ("database", _init_database),
+        ("agent_tables", _check_agent_tables),
+        ("background_services", _start_background_services),
+        ("configuration", lambda: asyncio.to_thread(_log_configuration)),
+    )
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            await step()
+        except Exception as e:
+            print(f"⚠️ Warm-up step {name} failed: {e}")
+        _WARMUP["steps"][name] = round(time.perf_counter() - started, 3)
+        if name == "database":
+            _DB_READY.set()  # even on failure: routes fall back like before the warm-up existed
+    _WARMUP.update(status="done", finished_at=datetime.utcnow().isoformat() + "Z")
+    print(f"✅ Warm-up finished in {sum(_WARMUP['steps'].values()):.2f}s {_WARMUP['steps']}")
     print("\n" + "=" * 60)
     print()
 
 
+@app.on_event("startup")
+async def startup_event():
+    """Start serving immediately; initialize the database and services in the background"""
+    print("=" * 60)
+    print("🚀 Mirai Reports API Starting Up")
+    print("=" * 60)
+    app.state.warmup_task = asyncio.create_task(_warm_up())
+
+
 class DateRangeRequest(BaseModel):
     start_date: str  # YYYY-MM-DD
     end_date: str    # YYYY-MM-DD
@@ -665,7 +626,35 @@ class DateRangeRequest(BaseModel):
 
 @app.get("/health")
 async def health():
-    return {"status": "ok", "message": "Simple FastAPI is running"}
+    """Liveness: 200 as soon as the server accepts connections."""
+    return {"status": "ok", "message": "Simple FastAPI is running",
+            "warmup": _WARMUP["status"], "db_ready": _DB_READY.is_set()}
+
+
+@app.get("/health/ready")
+async def health_ready(response: Response):
+    """Readiness: 503 until the database schema step of the warm-up has run."""
+    if not _DB_READY.is_set():
+        response.status_code = 503
+        return {"status": "starting", "message": "Initializing database", "warmup": _WARMUP["status"]}
+    return {"status": "ready", "warmup": _WARMUP["status"]}
+
+
+@app.get("/health/warmup")
+async def health_warmup():
+    """Background warm-up progress: status and seconds per step."""
+    return _WARMUP
+
+
+@app.get("/metrics")
+async def prometheus_metrics(authorization: Optional[str] = Header(None),
+                             credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Prometheus scrape endpoint: request latency histograms per route, upstream
+    call time per service, SQL statements/rows and cache hits per route.
+    Requires the METRICS_TOKEN bearer token or a dashboard login."""
+    if not request_metrics.authorized(authorization) and not await get_current_user(credentials):
+        raise HTTPException(status_code=401, detail="Metrics token or login required")
+    return Response(request_metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/db-status")
@@ -673,7 +662,7 @@ async def db_status():
     """
     Check database connection status
     """
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         return {
             "available": False,
             "configured": False,
@@ -709,7 +698,7 @@ async def db_stats():
     """
     Get database statistics - orders, products, variants count
     """
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         # Try to get more info about why import failed
         import subprocess
         try:
@@ -753,7 +742,7 @@ async def daily_report(req: DateRangeRequest):
             raise HTTPException(status_code=400, detail="start_date must be <= end_date")
 
         # Try database first
-        if DB_SERVICE_AVAILABLE and db_service.is_available():
+        if db_service and db_service.is_available():
             print(f"  📊 Trying database query...")
             try:
                 db_data = await db_service.get_daily_kpis(start_date, end_date)
@@ -793,7 +782,7 @@ async def get_items(market: str = None):
     """
     try:
         # Try database first
-        if DB_SERVICE_AVAILABLE and db_service.is_available():
+        if db_service and db_service.is_available():
             try:
                 db_data = await db_service.get_items()
                 if db_data is not None:
@@ -940,7 +929,6 @@ async def execute_price_updates(req: ExecuteUpdatesRequest):
             raise HTTPException(status_code=500, detail=f"Failed to execute price updates: {str(e)}")
 
     # For larger batches, run in background
-    task_id = str(uuid.uuid4())
 
     # Convert Pydantic models to dicts for background thread
     updates_data = [
@@ -957,23 +945,8 @@ async def execute_price_updates(req: ExecuteUpdatesRequest):
         for u in req.updates
     ]
 
-    _BACKGROUND_TASKS[task_id] = {
-        "task_id": task_id,
-        "type": "price_update",
-        "status": "pending",
-        "total": num_updates,
-        "progress": 0,
-        "current_item": "",
-        "created_at": datetime.utcnow().isoformat() + "Z",
-        "results": [],
-        "updated_count": 0,
-        "failed_count": 0,
-        "message": ""
-    }
-
-    thread = threading.Thread(target=_run_price_update_background, args=(task_id, updates_data))
-    thread.daemon = True
-    thread.start()
+    task_id = get_task_registry().submit("price_update", _run_price_update_background, updates_data,
+                            total=num_updates, updated_count=0, failed_count=0)
 
     return {
         "success": True,
@@ -988,11 +961,10 @@ async def get_update_status(task_id: str):
     """
     Get status of a background price update
     """
-    if task_id not in _BACKGROUND_TASKS:
+    task = get_task_registry().get(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    task = _BACKGROUND_TASKS[task_id]
-
     # Invalidate cache when completed
     if task["status"] == "completed" and task.get("updated_count", 0) > 0:
         try:
@@ -1040,23 +1012,8 @@ async def check_competitor_prices(req: CompetitorPriceCheckRequest):
             raise HTTPException(status_code=500, detail=f"Failed to check competitor prices: {str(e)}")
 
     # For larger batches, redirect to background task
-    task_id = str(uuid.uuid4())
-    _BACKGROUND_TASKS[task_id] = {
-        "task_id": task_id,
-        "type": "competitor_scan",
-        "status": "pending",
-        "total": len(req.variant_ids),
-        "progress": 0,
-        "current_item": "",
-        "created_at": datetime.utcnow().isoformat() + "Z",
-        "results": [],
-        "message": ""
-    }
-
-    # Start background thread
-    thread = threading.Thread(target=_run_competitor_scan_background, args=(task_id, req.variant_ids))
-    thread.daemon = True
-    thread.start()
+    task_id = get_task_registry().submit("competitor_scan", _run_competitor_scan_background, req.variant_ids,
+                            total=len(req.variant_ids))
 
     return {
         "success": True,
@@ -1075,23 +1032,8 @@ async def start_competitor_scan(req: CompetitorPriceCheckRequest):
     if not req.variant_ids:
         raise HTTPException(status_code=400, detail="No variant IDs provided")
 
-    task_id = str(uuid.uuid4())
-    _BACKGROUND_TASKS[task_id] = {
-        "task_id": task_id,
-        "type": "competitor_scan",
-        "status": "pending",
-        "total": len(req.variant_ids),
-        "progress": 0,
-        "current_item": "",
-        "created_at": datetime.utcnow().isoformat() + "Z",
-        "results": [],
-        "message": ""
-    }
-
-    # Start background thread
-    thread = threading.Thread(target=_run_competitor_scan_background, args=(task_id, req.variant_ids))
-    thread.daemon = True
-    thread.start()
+    task_id = get_task_registry().submit("competitor_scan", _run_competitor_scan_background, req.variant_ids,
+                            total=len(req.variant_ids))
 
     return {
         "success": True,
@@ -1106,10 +1048,10 @@ async def get_scan_status(task_id: str):
     """
     Get status of a background competitor scan
     """
-    if task_id not in _BACKGROUND_TASKS:
+    task = get_task_registry().get(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    task = _BACKGROUND_TASKS[task_id]
     return {
         "task_id": task_id,
         "status": task["status"],
@@ -1153,7 +1095,7 @@ async def get_scan_history(limit: int = 100):
     """
     try:
         # Try database first for faster loading
-        if DB_SERVICE_AVAILABLE:
+        if db_service:
             from database.service import db_service
             db_data = await db_service.get_scan_history(limit=limit)
             if db_data is not None and len(db_data) > 0:
@@ -1262,25 +1204,9 @@ async def sync_korealy_to_shopify_endpoint(req: KorealySyncRequest):
             }
 
         # For larger batches, run in background
-        task_id = str(uuid.uuid4())
-        _BACKGROUND_TASKS[task_id] = {
-            "task_id": task_id,
-            "type": "korealy_sync",
-            "status": "pending",
-            "total": num_updates,
-            "progress": 0,
-            "current_item": "",
-            "created_at": datetime.utcnow().isoformat() + "Z",
-            "results": [],
-            "updated_count": 0,
-            "failed_count": 0,
-            "skipped_count": len(skipped),
-            "message": ""
-        }
-
-        thread = threading.Thread(target=_run_korealy_sync_background, args=(task_id, variant_ids, korealy_cogs_map))
-        thread.daemon = True
-        thread.start()
+        task_id = get_task_registry().submit("korealy_sync", _run_korealy_sync_background, variant_ids, korealy_cogs_map,
+                                total=num_updates, updated_count=0, failed_count=0,
+                                skipped_count=len(skipped))
 
         return {
             "success": True,
@@ -1302,10 +1228,10 @@ async def get_korealy_sync_status(task_id: str):
     """
     Get status of a background Korealy sync
     """
-    if task_id not in _BACKGROUND_TASKS:
+    task = get_task_registry().get(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    task = _BACKGROUND_TASKS[task_id]
     return {
         "task_id": task_id,
         "status": task["status"],
@@ -1324,6 +1250,37 @@ async def get_korealy_sync_status(task_id: str):
     }
 
 
+@app.get("/background-tasks")
+async def list_background_tasks(type: Optional[str] = None, limit: int = 50):
+    """
+    Recent background tasks (price updates, competitor scans, Korealy syncs) across all workers
+    """
+    return {"tasks": get_task_registry().list(task_type=type, limit=limit), "stats": get_task_registry().get_stats()}
+
+
+@app.get("/background-tasks/{task_id}")
+async def get_background_task(task_id: str):
+    """
+    Full state of any background task, read from shared storage
+    """
+    task = get_task_registry().get(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+
+@app.post("/background-tasks/{task_id}/cancel")
+async def cancel_background_task(task_id: str):
+    """
+    Cancel a background task. Queued tasks stop immediately; running ones stop
+    before their next item (status "cancelling" until then)
+    """
+    status = get_task_registry().cancel(task_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return {"success": status in ("cancelled", "cancelling"), "task_id": task_id, "status": status}
+
+
 # ==================== ORDER REPORT ENDPOINT ====================
 
 class OrderReportRequest(BaseModel):
@@ -1347,7 +1304,7 @@ async def order_report(req: OrderReportRequest):
             raise HTTPException(status_code=400, detail="start_date must be <= end_date")
 
         # Try database first
-        if DB_SERVICE_AVAILABLE and db_service.is_available():
+        if db_service and db_service.is_available():
             print(f"  📊 Trying database query...")
             try:
                 db_data = await db_service.get_orders(start_date, end_date)
@@ -1389,7 +1346,7 @@ async def get_bestsellers(days: int = 30):
 
     try:
         # Try database first
-        if DB_SERVICE_AVAILABLE and db_service.is_available():
+        if db_service and db_service.is_available():
             try:
                 db_data = await db_service.get_bestsellers(days=days)
                 if db_data is not None:
@@ -1424,7 +1381,7 @@ async def get_variant_order_counts(req: VariantOrderCountRequest):
     Uses database when available (fast), falls back to Shopify API.
     """
     # Try database first (fast — single SQL query)
-    if DB_SERVICE_AVAILABLE and db_service.is_available():
+    if db_service and db_service.is_available():
         try:
             db_counts = await db_service.get_variant_order_counts(req.variant_ids, req.days)
             if db_counts is not None:
@@ -1532,6 +1489,13 @@ async def require_admin(user: dict = Depends(require_auth)) -> dict:
     return user
 
 
+@app.get("/metrics/slow")
+async def slow_requests(limit: int = 50, user: dict = Depends(require_auth)):
+    """Recent requests over METRICS_SLOW_REQUEST_MS with their time breakdown."""
+    return {"threshold_ms": request_metrics.SLOW_REQUEST_MS,
+            "requests": request_metrics.get_slow_requests(limit)}
+
+
 @app.post("/auth/google")
 async def google_login(req: GoogleAuthRequest):
     """
@@ -1546,7 +1510,7 @@ async def google_login(req: GoogleAuthRequest):
         print(f"🔐 Login attempt: {email}")
 
         # Check if user exists in database
-        if DB_SERVICE_AVAILABLE:
+        if db_service:
             from database.connection import get_db, is_db_configured
             from database.models import User
             from sqlalchemy import select, func
@@ -1655,7 +1619,7 @@ async def get_me(user: dict = Depends(require_auth)):
 @app.get("/auth/users")
 async def list_users(user: dict = Depends(require_admin)):
     """List all users (admin only)"""
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         return {"users": [], "message": "Database not available"}
 
     from database.connection import get_db, is_db_configured
@@ -1686,7 +1650,7 @@ async def list_users(user: dict = Depends(require_admin)):
 @app.post("/auth/users")
 async def add_user(req: AddUserRequest, user: dict = Depends(require_admin)):
     """Add a new allowed user (admin only)"""
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db, is_db_configured
@@ -1721,7 +1685,7 @@ async def add_user(req: AddUserRequest, user: dict = Depends(require_admin)):
 @app.delete("/auth/users/{user_id}")
 async def delete_user(user_id: int, user: dict = Depends(require_admin)):
     """Delete a user (admin only)"""
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db, is_db_configured
@@ -1748,7 +1712,7 @@ async def delete_user(user_id: int, user: dict = Depends(require_admin)):
 @app.put("/auth/users/{user_id}/toggle-admin")
 async def toggle_admin(user_id: int, user: dict = Depends(require_admin)):
     """Toggle admin status for a user (admin only)"""
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db, is_db_configured
@@ -1786,6 +1750,10 @@ class SupportEmailCreate(BaseModel):
     sender_type: Optional[str] = None  # 'customer', 'supplier', 'automated', 'internal'
 
 
+class SupportEmailBatchCreate(BaseModel):
+    emails: List[SupportEmailCreate]
+
+
 class SupportEmailUpdate(BaseModel):
     status: Optional[str] = None
     classification: Optional[str] = None
@@ -1807,9 +1775,9 @@ async def list_support_emails(
     user: dict = Depends(get_current_user)
 ):
     """List support emails with optional filters"""
-    print(f"📧 [support/emails] DB_SERVICE_AVAILABLE={DB_SERVICE_AVAILABLE}, status={status}, inbox_type={inbox_type}")
+    print(f"📧 [support/emails] db_service={bool(db_service)}, status={status}, inbox_type={inbox_type}")
 
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         print("📧 [support/emails] Database service not available")
         return {"emails": [], "total": 0, "message": "Database not available"}
 
@@ -1887,9 +1855,9 @@ async def list_support_emails(
 @app.get("/support/emails/{email_id}")
 async def get_support_email(email_id: int, user: dict = Depends(get_current_user)):
     """Get a single support email with all messages"""
-    print(f"📧 [support/emails/{email_id}] DB_SERVICE_AVAILABLE={DB_SERVICE_AVAILABLE}")
+    print(f"📧 [support/emails/{email_id}] db_service={bool(db_service)}")
 
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db, is_db_configured
@@ -1953,7 +1921,7 @@ async def get_support_email(email_id: int, user: dict = Depends(get_current_user
 @app.post("/webhook/support-email")
 async def webhook_support_email(req: SupportEmailCreate):
     """Webhook for internal services (Emma poller) - no auth required for internal use"""
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db, is_db_configured
@@ -2012,10 +1980,74 @@ async def webhook_support_email(req: SupportEmailCreate):
         return {"id": email.id, "message": "Email created successfully"}
 
 
+@app.post("/webhook/support-email/batch")
+async def webhook_support_email_batch(req: SupportEmailBatchCreate):
+    """
+    Batched variant of /webhook/support-email for the Emma poller.
+    All emails are inserted in one transaction, in request order.
+    Returns {"results": [{"id": ...}, ...]} aligned with the request.
+    """
+    if not db_service:
+        raise HTTPException(status_code=503, detail="Database not available")
+
+    from database.connection import get_db
+    from database.models import SupportEmail, SupportMessage
+    from sqlalchemy import select
+
+    if not req.emails:
+        return {"results": []}
+
+    async with get_db() as db:
+        # One lookup for every thread referenced by the batch
+        thread_ids = {e.thread_id for e in req.emails}
+        result = await db.execute(
+            select(SupportEmail).where(SupportEmail.thread_id.in_(thread_ids))
+        )
+        threads = {e.thread_id: e for e in result.scalars().all()}
+
+        # Create missing threads (first message of a thread in this batch wins)
+        new_threads = []
+        for item in req.emails:
+            if item.thread_id in threads:
+                continue
+            email = SupportEmail(
+                thread_id=item.thread_id,
+                message_id=item.message_id,
+                customer_email=item.customer_email,
+                customer_name=item.customer_name,
+                subject=item.subject,
+                status="pending",
+                inbox_type=item.inbox_type or "support",
+                sender_type=item.sender_type or "customer",
+                received_at=datetime.utcnow()
+            )
+            threads[item.thread_id] = email
+            new_threads.append(email)
+        db.add_all(new_threads)
+        await db.flush()
+
+        messages = []
+        for item in req.emails:
+            email = threads[item.thread_id]
+            email.status = "pending"
+            messages.append(SupportMessage(
+                email_id=email.id,
+                direction="inbound",
+                sender_email=item.customer_email,
+                sender_name=item.customer_name,
+                content=item.content,
+                content_html=item.content_html
+            ))
+        db.add_all(messages)
+        await db.commit()
+
+        return {"results": [{"id": threads[item.thread_id].id} for item in req.emails]}
+
+
 @app.patch("/webhook/support-email/{email_id}")
 async def webhook_update_support_email(email_id: int, req: SupportEmailUpdate):
     """Webhook for internal services (Emma) to update email drafts - no auth required"""
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db, is_db_configured
@@ -2068,7 +2100,7 @@ async def webhook_update_support_email(email_id: int, req: SupportEmailUpdate):
 @app.post("/support/emails")
 async def create_support_email(req: SupportEmailCreate, user: dict = Depends(get_current_user)):
     """Create a new support email (authenticated endpoint for frontend)"""
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db, is_db_configured
@@ -2134,7 +2166,7 @@ async def update_support_email(
     user: dict = Depends(get_current_user)
 ):
     """Update support email status, classification, or AI draft"""
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db, is_db_configured
@@ -2196,7 +2228,7 @@ async def approve_support_email(email_id: int, user: dict = Depends(get_current_
     """Approve AI draft and mark for sending"""
     print(f"📧 [APPROVE] Starting approval for email_id={email_id}, user={user.get('email', 'unknown')}")
 
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         print(f"❌ [APPROVE] Database not available")
         raise HTTPException(status_code=503, detail="Database not available")
 
@@ -2258,7 +2290,7 @@ async def migrate_sent_at(user: dict = Depends(get_current_user)):
     One-time migration: Set sent_at = approved_at for messages that were approved but don't have sent_at.
     This backfills Activity Center tracking for existing approved emails.
     """
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db
@@ -2292,7 +2324,7 @@ async def backfill_shipping_costs(user: dict = Depends(get_current_user)):
     Backfill shipping_cost for all orders using the shipping matrix.
     This recalculates shipping costs based on weight and country.
     """
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db
@@ -2337,7 +2369,7 @@ async def reject_support_email(email_id: int, user: dict = Depends(get_current_u
     """Reject/archive email"""
     print(f"📧 [REJECT] Starting rejection for email_id={email_id}, user={user.get('email', 'unknown')}")
 
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         print(f"❌ [REJECT] Database not available")
         raise HTTPException(status_code=503, detail="Database not available")
 
@@ -2375,7 +2407,7 @@ async def resolve_support_email(email_id: int, req: ResolveRequest, user: dict =
     """
     print(f"📧 [RESOLVE] Starting resolution for email_id={email_id}, resolution={req.resolution}, user={user.get('email', 'unknown')}")
 
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         print(f"❌ [RESOLVE] Database not available")
         raise HTTPException(status_code=503, detail="Database not available")
 
@@ -2438,7 +2470,7 @@ async def regenerate_ai_response(
     """
     print(f"📧 [REGENERATE] Starting AI regeneration for email_id={email_id}, user={user.get('email', 'unknown')}")
 
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         print(f"❌ [REGENERATE] Database not available")
         raise HTTPException(status_code=503, detail="Database not available")
 
@@ -2543,7 +2575,7 @@ async def mark_email_seen(email_id: int, user: dict = Depends(get_current_user))
     """
     print(f"👁️ [MARK-SEEN] Marking email_id={email_id} as seen, user={user.get('email', 'unknown')}")
 
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         return {"success": False, "error": "Database not available"}
 
     from database.connection import get_db
@@ -2578,7 +2610,7 @@ async def reset_all_to_new(user: dict = Depends(get_current_user)):
     """
     print(f"🔄 [RESET-TO-NEW] Resetting all tickets to 'new', user={user.get('email', 'unknown')}")
 
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         return {"success": False, "error": "Database not available"}
 
     from database.connection import get_db
@@ -2602,7 +2634,7 @@ async def reset_all_to_new(user: dict = Depends(get_current_user)):
 @app.get("/support/stats")
 async def get_support_stats(user: dict = Depends(get_current_user)):
     """Get support dashboard statistics with detailed analytics"""
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         return {"pending": 0, "draft_ready": 0, "approved": 0, "sent": 0, "total": 0}
 
     from database.connection import get_db, is_db_configured
@@ -2731,7 +2763,7 @@ async def get_support_tickets(
     Get support tickets grouped by customer email.
     Returns one ticket per customer with aggregated info for manager decision-making.
     """
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         return {"tickets": [], "total": 0}
 
     from database.connection import get_db, is_db_configured
@@ -2882,7 +2914,7 @@ async def get_customer_support_details(email: str, user: dict = Depends(get_curr
     Get complete support history for a customer including all conversations,
     tracking info, and order details for manager decision-making.
     """
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db, is_db_configured
@@ -3024,7 +3056,7 @@ async def get_recent_trackings(limit: int = 10, user: dict = Depends(get_current
     Get recent tracking information for the support dashboard.
     Shows the last N trackings with their current status.
     """
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         return {"trackings": []}
 
     from database.connection import get_db, is_db_configured
@@ -3078,7 +3110,7 @@ async def get_activity_log(
     Get activity log for manager review.
     Shows resolved tickets, sent emails, and sent followups.
     """
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         return {"activities": [], "summary": {}}
 
     from database.connection import get_db, is_db_configured
@@ -3220,7 +3252,7 @@ async def get_resolution_stats(
     Get resolution statistics for manager review.
     Shows resolution type breakdown, response times, and agent performance.
     """
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         return {}
 
     from database.connection import get_db, is_db_configured
@@ -3336,7 +3368,7 @@ async def get_sent_emails(
     Get all sent emails from the system.
     Includes support replies and delivery followups.
     """
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         return {"emails": [], "total_sent": 0, "by_type": {}}
 
     from database.connection import get_db, is_db_configured
@@ -3438,7 +3470,7 @@ async def list_shipments(
     user: dict = Depends(get_current_user)
 ):
     """List all tracked shipments with status."""
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db, is_db_configured
@@ -3496,7 +3528,7 @@ async def list_shipments(
 @app.get("/tracking/stats")
 async def get_tracking_stats(user: dict = Depends(get_current_user)):
     """Get tracking dashboard statistics."""
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db, is_db_configured
@@ -3624,7 +3656,7 @@ async def sync_shipments_from_shopify(user: dict = Depends(get_current_user)):
     """Sync shipments from Shopify fulfillments."""
     print(f"🚚 [SYNC] Starting Shopify sync, user={user.get('email', 'unknown')}")
 
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         print(f"❌ [SYNC] Database not available")
         raise HTTPException(status_code=503, detail="Database not available")
 
@@ -3721,7 +3753,7 @@ async def check_single_tracking(tracking_number: str, user: dict = Depends(get_c
     """Check tracking status for a single package via AfterShip."""
     print(f"🚚 [CHECK] Checking tracking {tracking_number}, user={user.get('email', 'unknown')}")
 
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         print(f"❌ [CHECK] Database not available")
         raise HTTPException(status_code=503, detail="Database not available")
 
@@ -3859,7 +3891,7 @@ async def check_single_tracking(tracking_number: str, user: dict = Depends(get_c
 @app.post("/tracking/check-all")
 async def check_all_active_trackings(background_tasks: BackgroundTasks, user: dict = Depends(get_current_user)):
     """Queue check for all active (non-delivered) shipments."""
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db, is_db_configured
@@ -3969,7 +4001,7 @@ async def check_trackings_background(tracking_numbers: List[str]):
 @app.post("/tracking/mark-followup-sent/{tracking_id}")
 async def mark_followup_sent(tracking_id: int, user: dict = Depends(get_current_user)):
     """Mark a delivered shipment as having followup sent."""
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db, is_db_configured
@@ -4034,7 +4066,7 @@ async def send_followup_for_shipment(tracking_id: int, user: dict = Depends(get_
     """
     Generate and send followup email for a specific delivered shipment.
     """
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db, is_db_configured
@@ -4115,7 +4147,7 @@ async def send_all_pending_followups(
     """
     Queue sending followup emails for all delivered shipments that haven't had followup sent.
     """
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db, is_db_configured
@@ -4215,7 +4247,7 @@ async def list_pending_followups(limit: int = 50, user: dict = Depends(get_curre
     """
     List all delivered shipments that need followup emails.
     """
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db, is_db_configured
@@ -4264,7 +4296,7 @@ class RegenerateFollowupRequest(BaseModel):
 @app.post("/tracking/followup/generate/{tracking_id}")
 async def generate_followup_draft(tracking_id: int, user: dict = Depends(get_current_user)):
     """Generate a followup email draft for approval (without sending)."""
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db
@@ -4329,7 +4361,7 @@ async def generate_followup_draft(tracking_id: int, user: dict = Depends(get_cur
 @app.post("/tracking/followup/regenerate/{tracking_id}")
 async def regenerate_followup_draft(tracking_id: int, req: RegenerateFollowupRequest, user: dict = Depends(get_current_user)):
     """Regenerate followup email draft with custom instructions."""
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         raise HTTPException(status_code=503, detail="Database not available")
 
     from database.connection import get_db
@@ -4410,7 +4442,7 @@ async def approve_and_send_followup(tracking_id: int, user: dict = Depends(get_c
     """Approve the draft and send the followup email."""
     print(f"📬 [FOLLOWUP-APPROVE] Starting approval for tracking_id={tracking_id}, user={user.get('email', 'unknown')}")
 
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         print(f"❌ [FOLLOWUP-APPROVE] Database not available")
         raise HTTPException(status_code=503, detail="Database not available")
 
@@ -4477,7 +4509,7 @@ async def reject_followup(tracking_id: int, user: dict = Depends(get_current_use
     """Reject/skip the followup for this shipment."""
     print(f"📬 [FOLLOWUP-REJECT] Rejecting followup for tracking_id={tracking_id}, user={user.get('email', 'unknown')}")
 
-    if not DB_SERVICE_AVAILABLE:
+    if not db_service:
         print(f"❌ [FOLLOWUP-REJECT] Database not available")
         raise HTTPException(status_code=503, detail="Database not available")
 
@@ -5354,12 +5386,13 @@ async def sm_bulk_delete_posts(req: SMBulkDeleteRequest, user: dict = Depends(re
 @app.get("/social-media/calendar")
 async def sm_get_calendar(start_date: Optional[str] = None, end_date: Optional[str] = None,
                            user: dict = Depends(require_auth)):
-    """Get posts in date range for calendar view"""
+    """Get posts in date range for calendar view (lightweight projection — full
+    post detail comes from /social-media/post/{uuid})"""
     try:
         from social_media_service import create_social_media_storage
         from dataclasses import asdict
         storage = create_social_media_storage()
-        posts = await storage.get_all_posts_async(start_date=start_date, end_date=end_date)
+        posts = await storage.get_all_posts_async(start_date=start_date, end_date=end_date, view="calendar")
         return {"posts": [asdict(p) for p in posts]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get calendar: {str(e)}")
@@ -5585,12 +5618,16 @@ async def sm_generate_media(uuid: str, engine: str = "gemini", user: dict = Depe
 
 
 @app.get("/social-media/media/{uuid}")
-async def sm_serve_media(uuid: str, slide: Optional[int] = None):
-    """Serve generated media as raw image/video bytes (unauthenticated for Meta API).
-    Use ?slide=N to serve carousel slides (0-indexed)."""
+async def sm_serve_media(uuid: str, request: Request, slide: Optional[int] = None,
+                         w: Optional[int] = None, format: Optional[str] = None):
+    """Serve generated media from the blob store (unauthenticated for Meta API).
+    Use ?slide=N to serve carousel slides (0-indexed). Supports ETag/If-None-Match
+    and byte ranges (video scrubbing). Images also take ?w=<max edge> (snapped up
+    to 256/512/1080/1600) and ?format=webp|jpeg|png - variants are rendered once on
+    the image pool and stored as blobs, a few per image at most."""
     try:
         from social_media_service import create_social_media_storage
-        import base64
+        import media_store
         storage = create_social_media_storage()
         post = await storage.get_post_async(uuid)
         if not post or not post.media_data:
@@ -5600,20 +5637,31 @@ async def sm_serve_media(uuid: str, slide: Optional[int] = None):
         if slide is not None and slide > 0 and post.media_carousel:
             if slide < len(post.media_carousel):
                 slide_data = post.media_carousel[slide]
-                raw = base64.b64decode(slide_data["data"])
+                value = slide_data["data"]
                 fmt = slide_data.get("format", "png")
             else:
                 raise HTTPException(status_code=404, detail=f"Slide {slide} not found")
         else:
-            raw = base64.b64decode(post.media_data)
+            value = post.media_data
             fmt = post.media_data_format or "png"
 
-        content_type = {
-            "png": "image/png", "jpeg": "image/jpeg",
-            "jpg": "image/jpeg", "mp4": "video/mp4",
-        }.get(fmt, "application/octet-stream")
-        return Response(content=raw, media_type=content_type,
-                        headers={"Cache-Control": "public, max-age=86400"})
+        # Inline (non-persistent store) payloads: digest remembered per post/slide/version,
+        # so repeat and If-None-Match requests don't decode + hash the bytes again
+        digest = await asyncio.to_thread(media_store.resolve, value,
+                                         (uuid, slide or 0, post.updated_at))
+        if (w or format) and fmt != "mp4":
+            import image_service
+            out_fmt = (format or fmt).lower().replace("jpg", "jpeg")
+            if out_fmt not in image_service.VARIANT_FORMATS or (w is not None and w <= 0):
+                raise HTTPException(status_code=400, detail="Unsupported variant")
+            try:
+                digest = await image_service.variant_digest(digest, image_service.variant_width(w), out_fmt)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            if not digest:
+                raise HTTPException(status_code=404, detail="Media not found")
+            fmt = out_fmt
+        return media_store.blob_response(request, digest, fmt)
     except HTTPException:
         raise
     except Exception as e:
@@ -5640,7 +5688,7 @@ async def sm_delete_post(uuid: str, user: dict = Depends(require_auth)):
 async def sm_get_products(user: dict = Depends(require_auth)):
     """Get Shopify products for featuring in posts"""
     try:
-        if DB_SERVICE_AVAILABLE and db_service:
+        if db_service:
             products = await db_service.get_products()
             return {"products": products}
         return {"products": [], "message": "Product data requires database sync"}
@@ -5690,17 +5738,24 @@ async def sm_get_post_insights(uuid: str, user: dict = Depends(require_auth)):
 
 
 @app.post("/social-media/insights/sync")
-async def sm_sync_insights(user: dict = Depends(require_auth)):
-    """Sync latest insights from Instagram API"""
+async def sm_sync_insights(force: bool = False, user: dict = Depends(require_auth)):
+    """Sync latest insights from Instagram API (posts due per the age schedule; force=true syncs all)"""
     try:
         from social_media_service import create_social_media_agent
         agent = create_social_media_agent()
-        synced = await agent.sync_insights()
-        return {"synced": synced}
+        report = await agent.sync_insights_report(force=force)
+        return {"synced": report.get("synced", 0), "report": report}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to sync insights: {str(e)}")
 
 
+@app.get("/social-media/insights/sync/stats")
+async def sm_insights_sync_stats(user: dict = Depends(require_auth)):
+    """Insights scheduler: schedule, last run report, API calls saved vs full syncs."""
+    from insights_sync import get_sync_stats
+    return get_sync_stats()
+
+
 @app.get("/social-media/insights/best-times")
 async def sm_best_times(user: dict = Depends(require_auth)):
     """Data-driven best posting times"""
@@ -5753,6 +5808,27 @@ async def agents_orchestrator_status(user: dict = Depends(require_auth)):
         return {"is_running": False, "error": str(e)}
 
 
+@app.get("/agents/llm-stats")
+async def agents_llm_stats(user: dict = Depends(require_auth)):
+    """LLM response cache hit rate and provider latencies."""
+    from llm_client import get_llm_stats
+    return get_llm_stats()
+
+
+@app.get("/orders/snapshot-stats")
+async def order_snapshot_stats(user: dict = Depends(require_auth)):
+    """Shared order snapshot: window, sync freshness and Shopify fetch counts per store."""
+    from order_snapshot import get_order_snapshot
+    return get_order_snapshot().get_stats()
+
+
+@app.get("/images/stats")
+async def image_service_stats(user: dict = Depends(require_auth)):
+    """Image process pool: workers, jobs, bytes in/out, encodable formats."""
+    from image_service import get_image_stats
+    return get_image_stats()
+
+
 @app.post("/agents/orchestrator/run")
 async def agents_orchestrator_force_run(user: dict = Depends(require_auth)):
     """Force an immediate processing cycle."""
@@ -5773,7 +5849,7 @@ async def agents_list_tasks(
     user: dict = Depends(require_auth),
 ):
     """List agent tasks with optional filters."""
-    if DB_SERVICE_AVAILABLE:
+    if db_service:
         try:
             from database.connection import get_db
             from database.models import AgentTask
@@ -5845,7 +5921,7 @@ async def agents_create_task(body: dict, user: dict = Depends(require_auth)):
 @app.get("/agents/tasks/{uuid}")
 async def agents_get_task(uuid: str, user: dict = Depends(require_auth)):
     """Get task details by UUID."""
-    if DB_SERVICE_AVAILABLE:
+    if db_service:
         try:
             from database.connection import get_db
             from database.models import AgentTask
@@ -5886,7 +5962,7 @@ async def agents_get_task(uuid: str, user: dict = Depends(require_auth)):
 @app.post("/agents/tasks/{uuid}/approve")
 async def agents_approve_task(uuid: str, user: dict = Depends(require_auth)):
     """Approve an awaiting_approval task for execution."""
-    if DB_SERVICE_AVAILABLE:
+    if db_service:
         try:
             from database.connection import get_db
             from database.models import AgentTask
@@ -5920,7 +5996,7 @@ async def agents_list_decisions(
     user: dict = Depends(require_auth),
 ):
     """List recent agent decisions. Pass cleanup=true to auto-expire stale pending decisions."""
-    if DB_SERVICE_AVAILABLE:
+    if db_service:
         try:
             from database.connection import get_db
             from database.models import AgentDecision
@@ -5989,7 +6065,7 @@ async def agents_list_decisions(
 @app.post("/agents/decisions/{uuid}/approve")
 async def agents_approve_decision(uuid: str, user: dict = Depends(require_auth)):
     """Approve an agent decision and cascade to linked tasks."""
-    if DB_SERVICE_AVAILABLE:
+    if db_service:
         try:
             from database.connection import get_db
             from database.models import AgentDecision, AgentTask
@@ -6025,7 +6101,7 @@ async def agents_approve_decision(uuid: str, user: dict = Depends(require_auth))
 @app.post("/agents/decisions/{uuid}/reject")
 async def agents_reject_decision(uuid: str, body: dict = {}, user: dict = Depends(require_auth)):
     """Reject an agent decision and cancel linked tasks."""
-    if DB_SERVICE_AVAILABLE:
+    if db_service:
         try:
             from database.connection import get_db
             from database.models import AgentDecision, AgentTask
@@ -6213,7 +6289,7 @@ async def agents_cmo_status(user: dict = Depends(require_auth)):
 
         # Count tasks by status
         task_counts = {"pending": 0, "in_progress": 0, "completed": 0, "failed": 0}
-        if DB_SERVICE_AVAILABLE:
+        if db_service:
             try:
                 from database.connection import get_db
                 from database.models import AgentTask
@@ -6258,7 +6334,7 @@ async def agents_cmo_kpis(days: int = 30, user: dict = Depends(require_auth)):
 async def agents_pending_count(user: dict = Depends(require_auth)):
     """Get count of pending approvals for sidebar badge."""
     counts = {"pending_decisions": 0, "pending_tasks": 0}
-    if DB_SERVICE_AVAILABLE:
+    if db_service:
         try:
             from database.connection import get_db
             from database.models import AgentDecision, AgentTask
@@ -6293,7 +6369,7 @@ async def agents_pending_count(user: dict = Depends(require_auth)):
 async def agents_debug():
     """Diagnostic endpoint — no auth, shows DB state for debugging."""
     info = {
-        "DB_SERVICE_AVAILABLE": DB_SERVICE_AVAILABLE,
+        "DB_SERVICE_AVAILABLE": bool(db_service),
         "DATABASE_URL_SET": bool(os.getenv("DATABASE_URL")),
     }
 
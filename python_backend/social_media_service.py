@@ -14,7 +14,6 @@ import re
 import json
 import uuid as uuid_lib
 import base64
-import io
 import asyncio
 from datetime import datetime, date, timedelta
 from typing import Optional, List, Dict, Any
@@ -162,22 +161,29 @@ CATEGORY_PROMPTS = {
 
 
 def compress_to_thumbnail(b64_data: str, max_size: int = 256) -> str:
-    """Compress a base64 PNG image to a small JPEG thumbnail."""
+    """Compress a base64 PNG image to a small JPEG thumbnail (blocking; prefer
+    thumbnail_async inside request handlers)."""
     try:
-        from PIL import Image as PILImage
-        img_bytes = base64.b64decode(b64_data)
-        img = PILImage.open(io.BytesIO(img_bytes))
-        img.thumbnail((max_size, max_size), PILImage.LANCZOS)
-        if img.mode == "RGBA":
-            img = img.convert("RGB")
-        buf = io.BytesIO()
-        img.save(buf, format="JPEG", quality=70)
-        return base64.b64encode(buf.getvalue()).decode("utf-8")
+        from image_service import render_variants_sync
+        out = render_variants_sync(base64.b64decode(b64_data), [("thumb", max_size, "JPEG", 70)])
+        return base64.b64encode(out["thumb"]).decode("utf-8")
     except Exception as e:
         print(f"[compress_to_thumbnail] Skipping (Pillow not available): {e}")
         return ""
 
 
+async def thumbnail_async(b64_data: str, max_size: int = 256) -> str:
+    """compress_to_thumbnail on the image_service process pool - keeps the
+    decode/resize/encode off the event loop (carousel slides run concurrently)."""
+    try:
+        import image_service
+        thumbs = await image_service.thumbnails(base64.b64decode(b64_data), sizes=(max_size,))
+        return base64.b64encode(thumbs[max_size]).decode("utf-8")
+    except Exception as e:
+        print(f"[thumbnail_async] Skipping: {e}")
+        return ""
+
+
 # ============================================================
 # DATA CLASSES
 # ============================================================
@@ -229,10 +235,10 @@ class Post:
     published_at: Optional[str] = None
     approved_by: Optional[int] = None
     approved_at: Optional[str] = None
-    media_data: Optional[str] = None
+    media_data: Optional[str] = None  # b64 until saved, then a media_store blob ref
     media_data_format: Optional[str] = None
     media_thumbnail: Optional[str] = None
-    media_carousel: Optional[List[Dict]] = None  # [{data: b64, thumbnail: b64, format: str}]
+    media_carousel: Optional[List[Dict]] = None  # [{data: b64 | blob ref, thumbnail: b64, format: str}]
     ig_overlays: Optional[List[Dict]] = None  # [{type: "link_sticker"|"poll"|"question"|..., ...}]
 
 
@@ -258,6 +264,25 @@ class PostInsight:
 # STORAGE — PostgreSQL with JSON fallback
 # ============================================================
 
+# Column projections for post list reads: fields deferred per view. Only
+# get_post_async (detail / publish / media serving) loads the full row.
+POST_LIST_VIEWS = {
+    # /social-media/posts and internal listings: everything but the full media
+    "list": ("media_data",),
+    # Calendar grid: scheduling metadata + thumbnail only
+    "calendar": ("media_data", "media_carousel", "visual_direction", "ig_overlays",
+                 "rejection_reason", "product_ids"),
+}
+
+
+# Account snapshot columns summed per analytics period
+SNAPSHOT_SUM_FIELDS = ("impressions", "reach", "profile_views", "website_clicks", "follows",
+                       "total_likes", "total_comments", "total_saves", "total_shares",
+                       "posts_published", "stories_published", "reels_published")
+INSIGHT_SUM_FIELDS = ("impressions", "reach", "engagement", "likes", "comments", "shares", "saves")
+TOP_POST_FIELDS = ("impressions", "reach", "likes", "comments", "saves", "shares", "engagement")
+
+
 class SocialMediaStorage:
     def __init__(self):
         self.use_db = DATABASE_AVAILABLE
@@ -347,7 +372,20 @@ class SocialMediaStorage:
 
     # ---------- Post CRUD ----------
 
+    async def _offload_media(self, post: Post):
+        """Move inline base64 media into the blob store; the post keeps only references."""
+        import media_store
+        if not media_store.needs_offload(post.media_data, post.media_carousel):
+            return
+
+        def _offload():
+            post.media_data = media_store.offload_b64(post.media_data)
+            post.media_carousel = media_store.offload_carousel(post.media_carousel)
+
+        await asyncio.to_thread(_offload)
+
     async def save_post_async(self, post: Post) -> str:
+        await self._offload_media(post)
         if self.use_db:
             return await self._save_post_db(post)
         data = self._load_data()
@@ -370,11 +408,15 @@ class SocialMediaStorage:
 
     async def get_all_posts_async(self, status: Optional[str] = None, post_type: Optional[str] = None,
                                    strategy_id: Optional[str] = None,
-                                   start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Post]:
+                                   start_date: Optional[str] = None, end_date: Optional[str] = None,
+                                   view: str = "list") -> List[Post]:
+        """List posts using the column projection for `view` (see POST_LIST_VIEWS).
+        Deferred fields come back as None; use get_post_async for the full row."""
         if self.use_db:
-            return await self._get_all_posts_db(status, post_type, strategy_id, start_date, end_date)
+            return await self._get_all_posts_db(status, post_type, strategy_id, start_date, end_date, view)
         data = self._load_data()
-        posts = [Post(**p) for p in data["posts"]]
+        deferred = POST_LIST_VIEWS[view]
+        posts = [Post(**{**p, **{f: None for f in deferred}}) for p in data["posts"]]
         if status:
             posts = [p for p in posts if p.status == status]
         if post_type:
@@ -416,6 +458,60 @@ class SocialMediaStorage:
             self._save_data(data)
         return deleted
 
+    async def migrate_media_to_blobs_async(self) -> int:
+        """One-time migration: move inline base64 media out of stored posts into
+        the blob store. Idempotent; returns the number of posts rewritten. Rows are
+        never touched unless the blob store is persistent (media_store.is_persistent)."""
+        import media_store
+        if not await asyncio.to_thread(media_store.is_persistent):
+            return 0
+        if not self.use_db:
+            data = self._load_data()
+            moved = 0
+            for p in data["posts"]:
+                if media_store.needs_offload(p.get("media_data"), p.get("media_carousel")):
+                    p["media_data"] = await asyncio.to_thread(media_store.offload_b64, p.get("media_data"))
+                    p["media_carousel"] = await asyncio.to_thread(media_store.offload_carousel, p.get("media_carousel"))
+                    moved += 1
+            if moved:
+                self._save_data(data)
+            return moved
+
+        from database.connection import get_db
+        from database.models import SocialMediaPost
+        from sqlalchemy import select, or_, and_
+
+        async with get_db() as db:
+            r = await db.execute(
+                select(SocialMediaPost.id).where(or_(
+                    and_(SocialMediaPost.media_data.isnot(None),
+                         ~SocialMediaPost.media_data.like(media_store.BLOB_REF_PREFIX + "%")),
+                    SocialMediaPost.media_carousel.isnot(None),
+                ))
+            )
+            candidate_ids = [row[0] for row in r.all()]
+
+        moved = 0
+        # One row per transaction: each payload can be tens of MB
+        for post_pk in candidate_ids:
+            async with get_db() as db:
+                r = await db.execute(
+                    select(SocialMediaPost.id, SocialMediaPost.media_data, SocialMediaPost.media_carousel)
+                    .where(SocialMediaPost.id == post_pk)
+                )
+                row = r.one_or_none()
+                if not row or not media_store.needs_offload(row.media_data, row.media_carousel):
+                    continue
+                media_data = await asyncio.to_thread(media_store.offload_b64, row.media_data)
+                carousel = await asyncio.to_thread(media_store.offload_carousel, row.media_carousel)
+                await db.execute(
+                    SocialMediaPost.__table__.update()
+                    .where(SocialMediaPost.id == post_pk)
+                    .values(media_data=media_data, media_carousel=carousel)
+                )
+                moved += 1
+        return moved
+
     # ---------- Insights ----------
 
     async def save_insight_async(self, insight: PostInsight):
@@ -438,6 +534,79 @@ class SocialMediaStorage:
             insights = [i for i in insights if i.post_id == post_id]
         return insights
 
+    async def get_insight_sync_state_async(self) -> List[Dict]:
+        """Published posts that have an ig_media_id, with their publish time and last
+        insight sync (None if never synced) - the input of the insights scheduler."""
+        if not self.use_db:
+            return [{"post_id": p["id"], "ig_media_id": p["ig_media_id"],
+                     "published_at": p.get("published_at") or p.get("scheduled_at"),
+                     "synced_at": (p["insight"] or {}).get("synced_at")}
+                    for p in self._published_records_json() if p.get("ig_media_id")]
+
+        from database.connection import get_db
+        from database.models import SocialMediaPost as P, SocialMediaInsight as I
+        from sqlalchemy import select, func
+
+        query = (
+            select(P.uuid, P.ig_media_id, func.coalesce(P.published_at, P.scheduled_at).label("published_at"),
+                   I.synced_at)
+            .select_from(P)
+            .outerjoin(I, I.post_id == P.id)
+            .where(P.status == "published", P.ig_media_id.isnot(None), P.ig_media_id != "")
+        )
+        def _iso(ts):
+            return ts.isoformat() + "Z" if ts else None
+        async with get_db() as db:
+            return [{"post_id": r.uuid, "ig_media_id": r.ig_media_id,
+                     "published_at": _iso(r.published_at), "synced_at": _iso(r.synced_at)}
+                    for r in (await db.execute(query)).all()]
+
+    async def save_insights_bulk_async(self, insights: List[PostInsight]) -> int:
+        """Upsert many post insights in one transaction (one load/save in JSON mode).
+        Returns the number of rows written."""
+        if not insights:
+            return 0
+        if not self.use_db:
+            data = self._load_data()
+            index = {ins["post_id"]: i for i, ins in enumerate(data["insights"])}
+            for insight in insights:
+                if insight.post_id in index:
+                    data["insights"][index[insight.post_id]] = asdict(insight)
+                else:
+                    index[insight.post_id] = len(data["insights"])
+                    data["insights"].append(asdict(insight))
+            self._save_data(data)
+            return len(insights)
+
+        from database.connection import get_db
+        from database.models import SocialMediaInsight, SocialMediaPost
+        from sqlalchemy import select
+
+        fields = ("ig_media_id", "impressions", "reach", "engagement", "likes", "comments", "shares",
+                  "saves", "video_views", "profile_visits", "website_clicks", "follower_delta")
+        now = datetime.utcnow()
+        async with get_db() as db:
+            r = await db.execute(select(SocialMediaPost.uuid, SocialMediaPost.id)
+                                 .where(SocialMediaPost.uuid.in_([i.post_id for i in insights])))
+            post_fks = dict(r.all())
+            r = await db.execute(select(SocialMediaInsight)
+                                 .where(SocialMediaInsight.post_id.in_(list(post_fks.values()))))
+            existing = {row.post_id: row for row in r.scalars().all()}
+            written = 0
+            for insight in insights:
+                post_fk = post_fks.get(insight.post_id)
+                if not post_fk:
+                    continue
+                row = existing.get(post_fk)
+                if row is None:
+                    row = existing[post_fk] = SocialMediaInsight(post_id=post_fk)
+                    db.add(row)
+                for f in fields:
+                    setattr(row, f, getattr(insight, f))
+                row.synced_at = now
+                written += 1
+        return written
+
     # ---------- Profile Cache ----------
 
     async def save_profile_cache_async(self, cache: Dict):
@@ -674,46 +843,62 @@ class SocialMediaStorage:
             return self._db_post_to_dataclass(p, strategy_uuid, include_media_data=True)
 
     def _db_post_to_dataclass(self, p, strategy_uuid=None, include_media_data=False) -> Post:
+        from sqlalchemy import inspect as sa_inspect
+        # Columns deferred by a list projection are reported as None, never lazy-loaded
+        unloaded = sa_inspect(p).unloaded
+
+        def col(name):
+            return None if name in unloaded else getattr(p, name, None)
+
         return Post(
             id=p.uuid,
             strategy_id=strategy_uuid,
             post_type=p.post_type or "",
-            caption=p.caption or "",
-            visual_direction=p.visual_direction or "",
+            caption=col("caption") or "",
+            visual_direction=col("visual_direction") or "",
             status=p.status or "draft",
-            content_category=getattr(p, 'content_category', None),
+            content_category=col("content_category"),
             created_at=p.created_at.isoformat() + "Z" if p.created_at else "",
             updated_at=p.updated_at.isoformat() + "Z" if p.updated_at else "",
-            media_url=p.media_url,
-            media_type=p.media_type,
-            product_ids=p.product_ids,
-            link_url=p.link_url,
-            utm_source=p.utm_source or "instagram",
-            utm_medium=p.utm_medium or "organic",
-            utm_campaign=p.utm_campaign,
+            media_url=col("media_url"),
+            media_type=col("media_type"),
+            product_ids=col("product_ids"),
+            link_url=col("link_url"),
+            utm_source=col("utm_source") or "instagram",
+            utm_medium=col("utm_medium") or "organic",
+            utm_campaign=col("utm_campaign"),
             scheduled_at=p.scheduled_at.isoformat() + "Z" if p.scheduled_at else None,
-            rejection_reason=p.rejection_reason,
-            ig_container_id=p.ig_container_id,
-            ig_media_id=p.ig_media_id,
-            fb_post_id=p.fb_post_id,
+            rejection_reason=col("rejection_reason"),
+            ig_container_id=col("ig_container_id"),
+            ig_media_id=col("ig_media_id"),
+            fb_post_id=col("fb_post_id"),
             published_at=p.published_at.isoformat() + "Z" if p.published_at else None,
-            approved_by=p.approved_by,
+            approved_by=col("approved_by"),
             approved_at=p.approved_at.isoformat() + "Z" if p.approved_at else None,
-            media_data=p.media_data if include_media_data else None,
-            media_data_format=p.media_data_format,
-            media_thumbnail=p.media_thumbnail,
-            media_carousel=getattr(p, 'media_carousel', None),
-            ig_overlays=getattr(p, 'ig_overlays', None),
+            media_data=col("media_data") if include_media_data else None,
+            media_data_format=col("media_data_format"),
+            media_thumbnail=col("media_thumbnail"),
+            media_carousel=col("media_carousel"),
+            ig_overlays=col("ig_overlays"),
         )
 
     async def _get_all_posts_db(self, status=None, post_type=None, strategy_id=None,
-                                 start_date=None, end_date=None) -> List[Post]:
+                                 start_date=None, end_date=None, view="list") -> List[Post]:
         from database.connection import get_db
         from database.models import SocialMediaPost, SocialMediaStrategy
         from sqlalchemy import select
+        from sqlalchemy.orm import defer
+
+        deferred = [defer(getattr(SocialMediaPost, f), raiseload=True) for f in POST_LIST_VIEWS[view]]
 
         async with get_db() as db:
-            query = select(SocialMediaPost).order_by(SocialMediaPost.scheduled_at.asc().nullslast())
+            # Strategy uuid comes from the join instead of a second lookup
+            query = (
+                select(SocialMediaPost, SocialMediaStrategy.uuid)
+                .outerjoin(SocialMediaStrategy, SocialMediaPost.strategy_id == SocialMediaStrategy.id)
+                .options(*deferred)
+                .order_by(SocialMediaPost.scheduled_at.asc().nullslast())
+            )
 
             if status:
                 query = query.where(SocialMediaPost.status == status)
@@ -730,19 +915,7 @@ class SocialMediaStorage:
                 query = query.where(SocialMediaPost.scheduled_at <= datetime.fromisoformat(end_date + "T23:59:59"))
 
             result = await db.execute(query)
-            rows = result.scalars().all()
-
-            # Batch resolve strategy uuids
-            strategy_ids = {p.strategy_id for p in rows if p.strategy_id}
-            strategy_map = {}
-            if strategy_ids:
-                r = await db.execute(
-                    select(SocialMediaStrategy.id, SocialMediaStrategy.uuid)
-                    .where(SocialMediaStrategy.id.in_(strategy_ids))
-                )
-                strategy_map = {row[0]: row[1] for row in r.all()}
-
-            return [self._db_post_to_dataclass(p, strategy_map.get(p.strategy_id)) for p in rows]
+            return [self._db_post_to_dataclass(p, strategy_uuid) for p, strategy_uuid in result.all()]
 
     async def _delete_post_db(self, post_id: str) -> bool:
         from database.connection import get_db
@@ -1007,6 +1180,230 @@ class SocialMediaStorage:
                 "online_followers": row.online_followers,
             } for row in rows]
 
+    # ---------- Aggregates (analytics, reports, best times) ----------
+
+    async def get_account_totals_async(self, periods: Dict[str, tuple]) -> Dict[str, Dict]:
+        """Snapshot sums per named (start_date, end_date) period in one grouped query,
+        plus the latest follower_count of each period."""
+        out = {name: {**{f: 0 for f in SNAPSHOT_SUM_FIELDS}, "follower_count": 0, "days": 0}
+               for name in periods}
+        if not self.use_db:
+            for s in sorted(self._load_data().get("account_snapshots", []), key=lambda s: s.get("date", "")):
+                for name, (sd, ed) in periods.items():
+                    if sd <= s.get("date", "") <= ed:
+                        t = out[name]
+                        for f in SNAPSHOT_SUM_FIELDS:
+                            t[f] += s.get(f, 0) or 0
+                        t["follower_count"] = s.get("follower_count", 0) or 0
+                        t["days"] += 1
+            return out
+
+        from database.connection import get_db
+        from database.models import SocialMediaAccountSnapshot as S
+        from sqlalchemy import select, func, case, literal, or_
+        from sqlalchemy.dialects.postgresql import array_agg, aggregate_order_by
+
+        bounds = {name: (date.fromisoformat(sd), date.fromisoformat(ed)) for name, (sd, ed) in periods.items()}
+        period = case(*[(S.date.between(sd, ed), literal(name)) for name, (sd, ed) in bounds.items()])
+        query = (
+            select(period.label("period"),
+                   *[func.coalesce(func.sum(getattr(S, f)), 0).label(f) for f in SNAPSHOT_SUM_FIELDS],
+                   array_agg(aggregate_order_by(S.follower_count, S.date.desc()))[1].label("follower_count"),
+                   func.count().label("days"))
+            .where(or_(*[S.date.between(sd, ed) for sd, ed in bounds.values()]))
+            .group_by(period)
+        )
+        async with get_db() as db:
+            for row in (await db.execute(query)).mappings():
+                out[row["period"]] = {**{f: int(row[f]) for f in SNAPSHOT_SUM_FIELDS},
+                                      "follower_count": row["follower_count"] or 0, "days": row["days"]}
+        return out
+
+    def _published_records_json(self) -> List[Dict]:
+        """Published posts joined with their insight (None if not synced) - JSON storage only."""
+        data = self._load_data()
+        insights = {i["post_id"]: i for i in data["insights"]}
+        return [{**p, "insight": insights.get(p["id"])}
+                for p in data["posts"] if p.get("status") == "published"]
+
+    async def get_insight_breakdown_async(self, start_date: Optional[str] = None,
+                                          end_date: Optional[str] = None) -> List[Dict]:
+        """Published posts grouped by (post_type, content_category, strategy_id):
+        post count, posts with insights and summed insight metrics. The optional
+        window applies to scheduled_at, like get_all_posts_async."""
+        if not self.use_db:
+            groups: Dict[tuple, Dict] = {}
+            for p in self._published_records_json():
+                if start_date and end_date and not (p.get("scheduled_at") and start_date <= p["scheduled_at"][:10] <= end_date):
+                    continue
+                key = (p.get("post_type"), p.get("content_category"), p.get("strategy_id"))
+                g = groups.setdefault(key, {"post_type": key[0], "content_category": key[1], "strategy_id": key[2],
+                                            "posts": 0, "insight_posts": 0, **{m: 0 for m in INSIGHT_SUM_FIELDS}})
+                g["posts"] += 1
+                if p["insight"]:
+                    g["insight_posts"] += 1
+                    for m in INSIGHT_SUM_FIELDS:
+                        g[m] += p["insight"].get(m, 0) or 0
+            return list(groups.values())
+
+        from database.connection import get_db
+        from database.models import SocialMediaPost as P, SocialMediaInsight as I, SocialMediaStrategy
+        from sqlalchemy import select, func
+
+        query = (
+            select(P.post_type, P.content_category, SocialMediaStrategy.uuid.label("strategy_id"),
+                   func.count(func.distinct(P.id)).label("posts"),
+                   func.count(I.id).label("insight_posts"),
+                   *[func.coalesce(func.sum(getattr(I, m)), 0).label(m) for m in INSIGHT_SUM_FIELDS])
+            .select_from(P)
+            .outerjoin(I, I.post_id == P.id)
+            .outerjoin(SocialMediaStrategy, P.strategy_id == SocialMediaStrategy.id)
+            .where(P.status == "published")
+            .group_by(P.post_type, P.content_category, SocialMediaStrategy.uuid)
+        )
+        if start_date:
+            query = query.where(P.scheduled_at >= datetime.fromisoformat(start_date))
+        if end_date:
+            query = query.where(P.scheduled_at <= datetime.fromisoformat(end_date + "T23:59:59"))
+        async with get_db() as db:
+            return [dict(row) for row in (await db.execute(query)).mappings()]
+
+    async def get_top_posts_async(self, limit: int = 10) -> List[Dict]:
+        """Published posts with insights, highest engagement first."""
+        def _entry(post_id, post_type, caption, thumb, published_at, ins):
+            return {"id": post_id, "post_type": post_type, "caption": (caption or "")[:100],
+                    "media_thumbnail": thumb, "published_at": published_at,
+                    **{m: ins.get(m, 0) or 0 for m in TOP_POST_FIELDS}}
+
+        if not self.use_db:
+            rows = [_entry(p["id"], p.get("post_type"), p.get("caption"), p.get("media_thumbnail"),
+                           p.get("published_at"), p["insight"])
+                    for p in self._published_records_json() if p["insight"]]
+            rows.sort(key=lambda x: x.get("engagement", 0), reverse=True)
+            return rows[:limit]
+
+        from database.connection import get_db
+        from database.models import SocialMediaPost as P, SocialMediaInsight as I
+        from sqlalchemy import select, func
+
+        query = (
+            select(P.uuid, P.post_type, func.substr(P.caption, 1, 100).label("caption"), P.media_thumbnail,
+                   P.published_at, *[getattr(I, m) for m in TOP_POST_FIELDS])
+            .join(I, I.post_id == P.id)
+            .where(P.status == "published")
+            .order_by(I.engagement.desc().nullslast())
+            .limit(limit)
+        )
+        async with get_db() as db:
+            return [_entry(r.uuid, r.post_type, r.caption, r.media_thumbnail,
+                           r.published_at.isoformat() + "Z" if r.published_at else None, r._mapping)
+                    for r in (await db.execute(query)).all()]
+
+    async def refresh_engagement_rollup_async(self, post_ids: Optional[List[str]] = None):
+        """Upsert the (day, hour) engagement rollup from published posts + insights.
+        With post_ids (post uuids, e.g. the batch an insight sync just wrote) only
+        the buckets those posts went out in are recomputed; without (or while the
+        rollup is still empty) every bucket is. One INSERT ... SELECT ... ON CONFLICT,
+        so concurrent refreshes never collide on uq_sm_engagement_rollup."""
+        if not self.use_db:
+            return
+        from database.connection import get_db
+        from database.models import (SocialMediaPost as P, SocialMediaInsight as I,
+                                     SocialMediaEngagementRollup as R)
+        from sqlalchemy import select, func, case, cast, extract, and_, or_, Date, Float, Integer
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+        ts = func.coalesce(P.published_at, P.scheduled_at)
+        day, hour = cast(ts, Date), cast(extract("hour", ts), Integer)
+        dow = cast(extract("isodow", ts), Integer) - 1
+        rate = case((I.reach > 0, cast(I.engagement, Float) / cast(I.reach, Float)),
+                    (I.id.isnot(None), cast(func.coalesce(I.engagement, 0), Float)),
+                    else_=0.0)
+        rollup = (
+            select(day, hour, dow, func.count(P.id), func.count(I.id),
+                   func.coalesce(func.sum(I.impressions), 0), func.coalesce(func.sum(I.reach), 0),
+                   func.coalesce(func.sum(I.engagement), 0), func.sum(rate), func.now())
+            .select_from(P)
+            .outerjoin(I, I.post_id == P.id)
+            .where(P.status == "published", ts.isnot(None))
+            .group_by(day, hour, dow)
+        )
+        async with get_db() as db:
+            if post_ids is not None and (await db.execute(select(R.id).limit(1))).first() is None:
+                post_ids = None  # empty rollup (first sync after deploy): bootstrap every bucket
+            if post_ids is not None:
+                if not post_ids:
+                    return
+                buckets = (await db.execute(
+                    select(day, hour).distinct()
+                    .where(P.uuid.in_(post_ids), P.status == "published", ts.isnot(None))
+                )).all()
+                if not buckets:
+                    return
+                rollup = rollup.where(or_(*[and_(day == d, hour == h) for d, h in buckets]))
+            stmt = pg_insert(R).from_select(
+                ["day", "hour", "dow", "posts", "insight_posts", "impressions", "reach",
+                 "engagement", "rate_sum", "updated_at"], rollup)
+            await db.execute(stmt.on_conflict_do_update(
+                constraint="uq_sm_engagement_rollup",
+                set_={c: getattr(stmt.excluded, c) for c in
+                      ("posts", "insight_posts", "impressions", "reach", "engagement",
+                       "rate_sum", "updated_at")}))
+        if post_ids is None:
+            self._rollup_ready = True
+
+    async def get_hour_of_week_async(self, start_date: Optional[str] = None,
+                                     end_date: Optional[str] = None) -> List[Dict]:
+        """Engagement per (dow, hour) bucket (dow 0=Monday, hour UTC) for posts that
+        went out between start_date and end_date - at most 168 rows."""
+        if not self.use_db:
+            buckets: Dict[tuple, Dict] = {}
+            for p in self._published_records_json():
+                ts_str = p.get("published_at") or p.get("scheduled_at")
+                try:
+                    ts = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
+                except (ValueError, AttributeError):
+                    continue
+                if (start_date and ts.date().isoformat() < start_date) or (end_date and ts.date().isoformat() > end_date):
+                    continue
+                b = buckets.setdefault((ts.weekday(), ts.hour), {
+                    "dow": ts.weekday(), "hour": ts.hour, "posts": 0, "insight_posts": 0,
+                    "impressions": 0, "reach": 0, "engagement": 0, "rate_sum": 0.0})
+                ins = p["insight"]
+                b["posts"] += 1
+                if ins:
+                    b["insight_posts"] += 1
+                    for m in ("impressions", "reach", "engagement"):
+                        b[m] += ins.get(m, 0) or 0
+                    reach, eng = ins.get("reach", 0) or 0, ins.get("engagement", 0) or 0
+                    b["rate_sum"] += eng / reach if reach > 0 else float(eng)
+            return list(buckets.values())
+
+        from database.connection import get_db
+        from database.models import SocialMediaEngagementRollup as R
+        from sqlalchemy import select, func
+
+        if not getattr(self, "_rollup_ready", False):
+            # First read in this process: make sure deploys with history have a rollup
+            async with get_db() as db:
+                has_rows = (await db.execute(select(R.id).limit(1))).first() is not None
+            if not has_rows:
+                await self.refresh_engagement_rollup_async()
+            self._rollup_ready = True
+
+        query = (
+            select(R.dow, R.hour, *[func.sum(getattr(R, m)).label(m) for m in
+                                    ("posts", "insight_posts", "impressions", "reach", "engagement", "rate_sum")])
+            .group_by(R.dow, R.hour)
+        )
+        if start_date:
+            query = query.where(R.day >= date.fromisoformat(start_date))
+        if end_date:
+            query = query.where(R.day <= date.fromisoformat(end_date))
+        async with get_db() as db:
+            return [{**dict(row), "rate_sum": float(row["rate_sum"] or 0)}
+                    for row in (await db.execute(query)).mappings()]
+
     # ---------- Connection management ----------
 
     async def save_connection_async(self, connection_data: Dict) -> int:
@@ -1352,10 +1749,8 @@ class InstagramPublisher:
         self.base_url = IG_GRAPH_URL if self.is_ig_token else META_GRAPH_URL
 
     async def _request(self, method: str, url: str, **kwargs) -> Dict:
-        async with httpx.AsyncClient(timeout=60) as client:
-            resp = await client.request(method, url, **kwargs)
-            resp.raise_for_status()
-            return resp.json()
+        from graph_client import get_graph_client
+        return await get_graph_client().request(method, url, **kwargs)
 
     async def get_ig_account_id(self) -> str:
         if self._ig_account_id:
@@ -1430,11 +1825,51 @@ class InstagramPublisher:
                                           "access_token": self.access_token})
         return data["id"]
 
+    async def create_carousel_children(self, ig_account_id: str, image_urls: List[str]) -> List[str]:
+        """Create all carousel item containers in one Graph batch (concurrently on IG tokens)."""
+        from graph_client import get_graph_client, GraphAPIError
+        calls = [{"method": "POST", "relative_url": f"{ig_account_id}/media",
+                  "body": {"image_url": url, "is_carousel_item": "true"}}
+                 for url in image_urls]
+        results = await get_graph_client().batch(self.base_url, self.access_token, calls)
+        for r in results:
+            if isinstance(r, GraphAPIError):
+                raise r
+        return [r["id"] for r in results]
+
     async def check_container_status(self, container_id: str) -> str:
         data = await self._request("GET", f"{self.base_url}/{container_id}",
                                     params={"fields": "status_code", "access_token": self.access_token})
         return data.get("status_code", "IN_PROGRESS")
 
+    async def check_container_statuses(self, container_ids: List[str]) -> Dict[str, str]:
+        """Status of several containers with one batch call."""
+        from graph_client import get_graph_client, GraphAPIError
+        calls = [{"method": "GET", "relative_url": f"{cid}?fields=status_code"} for cid in container_ids]
+        results = await get_graph_client().batch(self.base_url, self.access_token, calls)
+        statuses = {}
+        for cid, r in zip(container_ids, results):
+            if isinstance(r, GraphAPIError):
+                raise r
+            statuses[cid] = r.get("status_code", "IN_PROGRESS")
+        return statuses
+
+    async def wait_for_containers(self, container_ids: List[str], max_checks: int = 30,
+                                  interval: float = 2) -> None:
+        """Poll containers until all are FINISHED; one batch call per round covers
+        every container still in progress."""
+        pending = list(container_ids)
+        for _ in range(max_checks):
+            statuses = await self.check_container_statuses(pending)
+            failed = [cid for cid, st in statuses.items() if st == "ERROR"]
+            if failed:
+                raise RuntimeError(f"Media container processing failed: {', '.join(failed)}")
+            pending = [cid for cid, st in statuses.items() if st != "FINISHED"]
+            if not pending:
+                return
+            await asyncio.sleep(interval)
+        raise TimeoutError(f"Containers {', '.join(pending)} did not finish within {max_checks * interval:.0f}s")
+
     async def publish_container(self, ig_account_id: str, container_id: str) -> str:
         data = await self._request("POST", f"{self.base_url}/{ig_account_id}/media_publish",
                                     data={"creation_id": container_id, "access_token": self.access_token})
@@ -1574,35 +2009,55 @@ class InstagramPublisher:
                                                 "limit": limit, "access_token": self.access_token})
             media_list = data.get("data", [])
 
+            insights = await self.fetch_post_insights_batch([m["id"] for m in media_list])
             for media in media_list:
-                try:
-                    insights = await self.fetch_post_insights(media["id"])
-                    media["insights"] = insights
-                except Exception:
-                    media["insights"] = {}
+                media["insights"] = insights.get(media["id"], {})
 
             return media_list
         except Exception as e:
             print(f"[InstagramPublisher] Failed to fetch detailed media: {e}")
             return []
 
+    @property
+    def post_insight_metrics(self) -> str:
+        if self.is_ig_token:
+            return "reach,saved,shares,likes,comments,total_interactions"
+        return "impressions,reach,saved,shares,likes,comments,total_interactions"
+
+    @staticmethod
+    def _parse_post_insights(data: Dict) -> Dict:
+        return {item["name"]: item["values"][0]["value"] if item.get("values") else 0
+                for item in data.get("data", [])}
+
     async def fetch_post_insights(self, ig_media_id: str) -> Dict:
         try:
-            if self.is_ig_token:
-                metrics = "reach,saved,shares,likes,comments,total_interactions"
-            else:
-                metrics = "impressions,reach,saved,shares,likes,comments,total_interactions"
             data = await self._request("GET", f"{self.base_url}/{ig_media_id}/insights",
-                                        params={"metric": metrics,
+                                        params={"metric": self.post_insight_metrics,
                                                 "access_token": self.access_token})
-            metrics_dict = {}
-            for item in data.get("data", []):
-                metrics_dict[item["name"]] = item["values"][0]["value"] if item.get("values") else 0
-            return metrics_dict
+            return self._parse_post_insights(data)
         except Exception as e:
             print(f"[InstagramPublisher] Failed to fetch insights for {ig_media_id}: {e}")
             return {}
 
+    async def fetch_post_insights_batch(self, ig_media_ids: List[str]) -> Dict[str, Dict]:
+        """{ig_media_id: metrics} for many posts via one Graph batch (≤50 per HTTP
+        call; concurrent on IG tokens). Posts whose sub-request failed are left out."""
+        from graph_client import get_graph_client, GraphAPIError
+        calls = [{"method": "GET", "relative_url": f"{mid}/insights?metric={self.post_insight_metrics}"}
+                 for mid in ig_media_ids]
+        try:
+            results = await get_graph_client().batch(self.base_url, self.access_token, calls)
+        except Exception as e:
+            print(f"[InstagramPublisher] Insights batch failed ({len(calls)} posts): {e}")
+            return {}
+        out = {}
+        for mid, r in zip(ig_media_ids, results):
+            if isinstance(r, GraphAPIError):
+                print(f"[InstagramPublisher] Failed to fetch insights for {mid}: {r}")
+            elif isinstance(r, dict):
+                out[mid] = self._parse_post_insights(r)
+        return out
+
 
 # ============================================================
 # SOCIAL MEDIA AI AGENT
@@ -1627,66 +2082,39 @@ class SocialMediaAgent:
             self._openai_client = _get_openai_client(api_key=self.api_key)
         return self._openai_client
 
-    def _call_ai(self, system_prompt: str, user_prompt: str, json_mode: bool = True, max_tokens: int = 4000) -> str:
-        """Generate text using Gemini (preferred) or OpenAI GPT-4o (fallback)."""
-        if self.gemini_api_key:
-            result = self._call_gemini(system_prompt, user_prompt, json_mode, max_tokens)
-            if result:
-                return result
-            print("[SocialMediaAgent] Gemini text generation failed, falling back to GPT-4o")
-
-        if not self.api_key:
-            raise ValueError("No AI API key available for text generation")
+    async def _call_ai(self, system_prompt: str, user_prompt: str, json_mode: bool = True,
+                       max_tokens: int = 4000, cache: Optional[bool] = None) -> str:
+        """Generate text using Gemini (preferred) or OpenAI GPT-4o (fallback).
 
-        kwargs = {"model": "gpt-4o", "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ], "temperature": 0.7, "max_tokens": max_tokens}
-        if json_mode:
-            kwargs["response_format"] = {"type": "json_object"}
-        response = self.client.chat.completions.create(**kwargs)
-        return response.choices[0].message.content
-
-    def _call_gemini(self, system_prompt: str, user_prompt: str, json_mode: bool = True, max_tokens: int = 4000) -> Optional[str]:
-        """Call Google Gemini for text generation."""
-        try:
-            gen_config = {
-                "temperature": 0.7,
-                "maxOutputTokens": max_tokens,
-            }
-            if json_mode:
-                gen_config["responseMimeType"] = "application/json"
+        Goes through llm_client: pooled async clients and the response cache
+        (temperature 0.7 is above the default cache threshold, so only calls
+        with cache=True are cached)."""
+        from llm_client import cached_completion, call_gemini, call_openai
 
-            payload = {
-                "contents": [{"role": "user", "parts": [{"text": user_prompt}]}],
-                "systemInstruction": {"parts": [{"text": system_prompt}]},
-                "generationConfig": gen_config,
-            }
+        if not self.gemini_api_key and not self.api_key:
+            raise ValueError("No AI API key available for text generation")
 
-            resp = httpx.post(
-                "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent",
-                params={"key": self.gemini_api_key},
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=90,
-            )
+        async def generate() -> str:
+            if self.gemini_api_key:
+                try:
+                    text = await call_gemini(user_prompt, system_prompt, self.gemini_api_key, 0.7, json_mode,
+                                             max_tokens=max_tokens, use_system_instruction=True)
+                    print("[SocialMediaAgent] Text generated via Gemini")
+                    return text
+                except Exception as e:
+                    print(f"[SocialMediaAgent] Gemini text error: {str(e)[:300]}")
+                print("[SocialMediaAgent] Gemini text generation failed, falling back to GPT-4o")
 
-            if resp.status_code == 200:
-                data = resp.json()
-                candidates = data.get("candidates", [])
-                if candidates:
-                    parts = candidates[0].get("content", {}).get("parts", [])
-                    for part in parts:
-                        text = part.get("text", "")
-                        if text:
-                            print("[SocialMediaAgent] Text generated via Gemini")
-                            return text
-
-            print(f"[SocialMediaAgent] Gemini text failed (HTTP {resp.status_code}): {resp.text[:300]}")
-            return None
-        except Exception as e:
-            print(f"[SocialMediaAgent] Gemini text error: {e}")
-            return None
+            if not self.api_key:
+                raise ValueError("No AI API key available for text generation")
+            return await call_openai(user_prompt, system_prompt, self.api_key, 0.7, json_mode,
+                                     max_tokens=max_tokens)
+
+        return await cached_completion(
+            {"prompt": user_prompt, "system_prompt": system_prompt, "model": "gemini",
+             "temperature": 0.7, "json_mode": json_mode, "max_tokens": max_tokens},
+            generate, cache=cache,
+        )
 
     async def sync_product_catalog(self) -> List[Dict]:
         """Fetch full product catalog from Shopify and upsert into DB.
@@ -1840,7 +2268,8 @@ Return JSON:
   "sample_phrases": ["characteristic phrases"]
 }}"""
 
-        result = json.loads(self._call_ai(system_prompt, user_prompt))
+        # Same posts -> same analysis: cache even at the agent's default temperature
+        result = json.loads(await self._call_ai(system_prompt, user_prompt, cache=True))
 
         cache = {
             "ig_account_id": ig_account_id or "default",
@@ -2005,7 +2434,7 @@ Return JSON:
   ]
 }}"""
 
-        result = json.loads(self._call_ai(system_prompt, user_prompt, max_tokens=8000))
+        result = json.loads(await self._call_ai(system_prompt, user_prompt, max_tokens=8000))
 
         strategy = Strategy(
             id=str(uuid_lib.uuid4()),
@@ -2097,7 +2526,7 @@ Return JSON:
 ig_overlays are optional — use them for stories or posts that benefit from interactive stickers.
 The visual_direction MUST NEVER include instructions to render text on the image."""
 
-        result = json.loads(self._call_ai(system_prompt, user_prompt))
+        result = json.loads(await self._call_ai(system_prompt, user_prompt))
 
         # Resolve ig_overlays
         ig_overlays = result.get("ig_overlays")
@@ -2225,7 +2654,7 @@ IMPORTANT: ig_overlays are OPTIONAL — include them only for stories and posts
 elements make sense. For regular photo/carousel posts, you may include a link_sticker only.
 The visual_direction must NEVER mention rendering text or UI elements on the photograph."""
 
-            result = json.loads(self._call_ai(system_prompt, user_prompt, max_tokens=4000))
+            result = json.loads(await self._call_ai(system_prompt, user_prompt, max_tokens=4000))
             posts_data = result.get("posts", [])
 
             for p_data in posts_data:
@@ -2309,7 +2738,7 @@ Return JSON:
   ]
 }}"""
 
-        result = json.loads(self._call_ai(system_prompt, user_prompt))
+        result = json.loads(await self._call_ai(system_prompt, user_prompt))
         posts_data = result.get("posts", [])
 
         created_posts = []
@@ -2368,7 +2797,7 @@ Return JSON:
   "link_url": "Updated UTM link if applicable"
 }}"""
 
-        result = json.loads(self._call_ai(system_prompt, user_prompt))
+        result = json.loads(await self._call_ai(system_prompt, user_prompt))
 
         post.caption = result.get("caption", post.caption)
         post.visual_direction = result.get("visual_direction", post.visual_direction)
@@ -2497,7 +2926,7 @@ Return JSON:
                                 b64_data = inline.get("data", "")
                                 if b64_data:
                                     fmt = "png" if "png" in mime else "jpeg"
-                                    thumbnail = compress_to_thumbnail(b64_data, 256)
+                                    thumbnail = await thumbnail_async(b64_data, 256)
                                     return b64_data, thumbnail, fmt
 
                 print(f"[Gemini Image] No image in response (status {resp.status_code}): {resp.text[:300]}")
@@ -2526,7 +2955,7 @@ Return JSON:
             n=1,
         )
         b64_data = response.data[0].b64_json
-        thumbnail = compress_to_thumbnail(b64_data, 256)
+        thumbnail = await thumbnail_async(b64_data, 256)
         return b64_data, thumbnail, "png"
 
     async def _generate_video(self, visual_direction: str, caption: str = "",
@@ -2834,46 +3263,36 @@ Return JSON:
         return link
 
     async def suggest_optimal_times(self) -> Dict:
-        """Data-driven scheduling recommendations"""
-        insights = await self.storage.get_insights_async()
-        posts = await self.storage.get_all_posts_async(status="published")
+        """Data-driven scheduling recommendations (from the hour-of-week rollup)"""
+        buckets = await self.storage.get_hour_of_week_async()
 
-        if not posts or not insights:
+        if not any(b["insight_posts"] for b in buckets):
             return {
                 "best_days": ["Monday", "Wednesday", "Friday", "Saturday"],
                 "best_times": ["10:00", "13:00", "18:00"],
                 "note": "Default recommendations. More data needed for optimization."
             }
 
-        # Analyze engagement by day/time
-        day_engagement = {}
-        hour_engagement = {}
-        insight_map = {i.post_id: i for i in insights}
-
-        for post in posts:
-            if post.published_at and post.id in insight_map:
-                try:
-                    dt = datetime.fromisoformat(post.published_at.replace("Z", "+00:00"))
-                    day_name = dt.strftime("%A")
-                    hour = dt.hour
-                    eng = insight_map[post.id].engagement
-
-                    day_engagement.setdefault(day_name, []).append(eng)
-                    hour_engagement.setdefault(hour, []).append(eng)
-                except Exception:
-                    pass
-
-        best_days = sorted(day_engagement.keys(),
-                          key=lambda d: sum(day_engagement[d]) / len(day_engagement[d]) if day_engagement[d] else 0,
-                          reverse=True)[:4]
-        best_hours = sorted(hour_engagement.keys(),
-                           key=lambda h: sum(hour_engagement[h]) / len(hour_engagement[h]) if hour_engagement[h] else 0,
-                           reverse=True)[:3]
+        # Average engagement per post with insights, by day and by hour
+        day_names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+        day_engagement: Dict[str, List[int]] = {}
+        hour_engagement: Dict[int, List[int]] = {}
+        for b in buckets:
+            if b["insight_posts"]:
+                for acc, key in ((day_engagement, day_names[b["dow"]]), (hour_engagement, b["hour"])):
+                    tot = acc.setdefault(key, [0, 0])
+                    tot[0] += b["engagement"]
+                    tot[1] += b["insight_posts"]
+
+        best_days = sorted(day_engagement, key=lambda d: day_engagement[d][0] / day_engagement[d][1],
+                           reverse=True)[:4]
+        best_hours = sorted(hour_engagement, key=lambda h: hour_engagement[h][0] / hour_engagement[h][1],
+                            reverse=True)[:3]
 
         return {
             "best_days": best_days or ["Monday", "Wednesday", "Friday", "Saturday"],
             "best_times": [f"{h:02d}:00" for h in best_hours] or ["10:00", "13:00", "18:00"],
-            "data_points": len(posts),
+            "data_points": sum(b["posts"] for b in buckets),
         }
 
     async def publish_post(self, post_id: str) -> Post:
@@ -2917,17 +3336,13 @@ Return JSON:
             elif post.media_type == "VIDEO" or post.post_type == "reel":
                 container_id = await publisher.create_reel_container(ig_account_id, post.media_url, post.caption)
             elif post.post_type == "carousel" and post.media_carousel:
-                # For carousels, create child containers first, then parent
-                import asyncio
-                child_ids = []
-                # Create child containers (images only for carousel children)
-                for i, slide in enumerate(post.media_carousel):
-                    # Child containers need a publicly accessible URL
-                    slide_url = slide.get("url") or f"{os.getenv('APP_URL', 'http://localhost:8080')}/api/social-media/media/{post.id}?slide={i}"
-                    child_data = await publisher._request("POST", f"{publisher.base_url}/{ig_account_id}/media",
-                        data={"image_url": slide_url, "is_carousel_item": "true", "access_token": publisher.access_token})
-                    child_ids.append(child_data["id"])
-                    await asyncio.sleep(0.5)  # Rate limit
+                # For carousels, create child containers first (one batch call), then parent.
+                # Child containers need a publicly accessible URL
+                slide_urls = [
+                    slide.get("url") or f"{os.getenv('APP_URL', 'http://localhost:8080')}/api/social-media/media/{post.id}?slide={i}"
+                    for i, slide in enumerate(post.media_carousel)
+                ]
+                child_ids = await publisher.create_carousel_children(ig_account_id, slide_urls)
                 # Create parent carousel container
                 container_id = await publisher.create_carousel_container(ig_account_id, child_ids, post.caption)
             else:
@@ -2935,15 +3350,11 @@ Return JSON:
 
             post.ig_container_id = container_id
 
-            # Poll for container readiness
-            import asyncio
-            for _ in range(30):
-                status = await publisher.check_container_status(container_id)
-                if status == "FINISHED":
-                    break
-                if status == "ERROR":
-                    raise RuntimeError("Media container creation failed")
-                await asyncio.sleep(2)
+            # Poll for container readiness; on timeout the publish call surfaces any error
+            try:
+                await publisher.wait_for_containers([container_id], max_checks=30, interval=2)
+            except TimeoutError:
+                pass
 
             # Publish
             media_id = await publisher.publish_container(ig_account_id, container_id)
@@ -2970,47 +3381,19 @@ Return JSON:
         await self.storage.save_post_async(post)
         return post
 
-    async def sync_insights(self) -> int:
-        """Sync insights for all published posts"""
-        posts = await self.storage.get_all_posts_async(status="published")
-        synced = 0
+    async def sync_insights(self, force: bool = False) -> int:
+        """Sync insights for published posts that are due (see insights_sync)"""
+        report = await self.sync_insights_report(force=force)
+        return report.get("synced", 0)
 
+    async def sync_insights_report(self, force: bool = False) -> Dict:
+        """Scheduled insights sync; returns the run report (synced, API calls saved, ...)"""
+        import insights_sync
         try:
-            connection = await self.storage.get_active_connection_async("instagram")
-            if connection and connection.get("access_token"):
-                publisher = InstagramPublisher(
-                    access_token=connection["access_token"],
-                    ig_account_id=connection.get("ig_account_id"),
-                )
-            else:
-                publisher = InstagramPublisher()
+            publisher = await insights_sync.connected_publisher(self.storage)
         except ValueError:
-            return 0
-
-        for post in posts:
-            if not post.ig_media_id:
-                continue
-            try:
-                metrics = await publisher.fetch_post_insights(post.ig_media_id)
-                if metrics:
-                    insight = PostInsight(
-                        post_id=post.id,
-                        ig_media_id=post.ig_media_id,
-                        impressions=metrics.get("impressions", 0),
-                        reach=metrics.get("reach", 0),
-                        likes=metrics.get("likes", 0),
-                        comments=metrics.get("comments", 0),
-                        shares=metrics.get("shares", 0),
-                        saves=metrics.get("saved", 0),
-                        engagement=metrics.get("total_interactions", 0),
-                        synced_at=datetime.utcnow().isoformat() + "Z",
-                    )
-                    await self.storage.save_insight_async(insight)
-                    synced += 1
-            except Exception as e:
-                print(f"[SocialMediaAgent] Failed to sync insights for {post.id}: {e}")
-
-        return synced
+            return {"synced": 0, "error": "Instagram not connected"}
+        return await insights_sync.sync_post_insights(self.storage, publisher, force=force)
 
     async def sync_account_insights(self, days: int = 30) -> int:
         """Sync account-level daily metrics from Instagram Insights API."""
@@ -3036,21 +3419,19 @@ Return JSON:
         start_dt = end_dt - timedelta(days=days)
         print(f"[SocialMediaAgent] Fetching insights from {start_dt} to {end_dt}")
 
-        # Fetch account-level insights from IG API
-        daily_data = await publisher.fetch_account_insights(ig_account_id, start_dt, end_dt)
+        # Account-level insights, current follower count (profile) and recent media
+        # (content published per day) are independent - fetch them concurrently
+        daily_data, profile_info, recent_media = await asyncio.gather(
+            publisher.fetch_account_insights(ig_account_id, start_dt, end_dt),
+            publisher.get_profile_info(ig_account_id),
+            publisher.get_recent_media(ig_account_id, limit=50),
+            return_exceptions=True,
+        )
+        if isinstance(daily_data, BaseException):
+            raise daily_data
         print(f"[SocialMediaAgent] Received {len(daily_data)} days of insight data")
-
-        # Also get current follower count from profile
-        try:
-            profile_info = await publisher.get_profile_info(ig_account_id)
-            current_followers = profile_info.get("followers_count", 0)
-        except Exception:
-            current_followers = 0
-
-        # Get recent media to count content published per day
-        try:
-            recent_media = await publisher.get_recent_media(ig_account_id, limit=50)
-        except Exception:
+        current_followers = 0 if isinstance(profile_info, BaseException) else profile_info.get("followers_count", 0)
+        if isinstance(recent_media, BaseException):
             recent_media = []
 
         # Build per-day content counts and engagement from recent_media
@@ -3135,97 +3516,60 @@ Return JSON:
         prev_end_dt = start_dt - timedelta(days=1)
         prev_start_dt = prev_end_dt - timedelta(days=period_days - 1)
 
-        # Get snapshots for both periods
-        current_snapshots = await self.storage.get_account_snapshots_async(
-            start_dt.isoformat(), end_dt.isoformat()
+        # Daily rows feed the charts (bounded by the period); totals come from one
+        # grouped SUM query over both periods instead of re-walking the rows per metric
+        current_snapshots, prev_snapshots, totals, breakdown, top_posts = await asyncio.gather(
+            self.storage.get_account_snapshots_async(start_dt.isoformat(), end_dt.isoformat()),
+            self.storage.get_account_snapshots_async(prev_start_dt.isoformat(), prev_end_dt.isoformat()),
+            self.storage.get_account_totals_async({
+                "current": (start_dt.isoformat(), end_dt.isoformat()),
+                "previous": (prev_start_dt.isoformat(), prev_end_dt.isoformat()),
+            }),
+            self.storage.get_insight_breakdown_async(),
+            self.storage.get_top_posts_async(limit=10),
         )
-        prev_snapshots = await self.storage.get_account_snapshots_async(
-            prev_start_dt.isoformat(), prev_end_dt.isoformat()
-        )
-
-        def _sum_metric(snapshots, key):
-            return sum(s.get(key, 0) for s in snapshots)
-
-        def _avg_metric(snapshots, key):
-            vals = [s.get(key, 0) for s in snapshots if s.get(key, 0) > 0]
-            return round(sum(vals) / len(vals), 1) if vals else 0
 
         def _delta(current, previous):
             if previous == 0:
                 return 100 if current > 0 else 0
             return round((current - previous) / previous * 100, 1)
 
-        # Aggregate current period
-        c_impressions = _sum_metric(current_snapshots, "impressions")
-        c_reach = _sum_metric(current_snapshots, "reach")
-        c_profile_views = _sum_metric(current_snapshots, "profile_views")
-        c_website_clicks = _sum_metric(current_snapshots, "website_clicks")
-        c_followers = current_snapshots[-1].get("follower_count", 0) if current_snapshots else 0
-        c_follows = _sum_metric(current_snapshots, "follows")
-        c_likes = _sum_metric(current_snapshots, "total_likes")
-        c_comments = _sum_metric(current_snapshots, "total_comments")
-        c_saves = _sum_metric(current_snapshots, "total_saves")
-        c_shares = _sum_metric(current_snapshots, "total_shares")
+        cur, prev = totals["current"], totals["previous"]
+        c_impressions = cur["impressions"]
+        c_reach = cur["reach"]
+        c_profile_views = cur["profile_views"]
+        c_website_clicks = cur["website_clicks"]
+        c_followers = cur["follower_count"]
+        c_follows = cur["follows"]
+        c_likes = cur["total_likes"]
+        c_comments = cur["total_comments"]
+        c_saves = cur["total_saves"]
+        c_shares = cur["total_shares"]
         c_engagement = c_likes + c_comments + c_saves + c_shares
-        c_posts = _sum_metric(current_snapshots, "posts_published")
-        c_stories = _sum_metric(current_snapshots, "stories_published")
-        c_reels = _sum_metric(current_snapshots, "reels_published")
-
-        # Aggregate previous period
-        p_impressions = _sum_metric(prev_snapshots, "impressions")
-        p_reach = _sum_metric(prev_snapshots, "reach")
-        p_profile_views = _sum_metric(prev_snapshots, "profile_views")
-        p_website_clicks = _sum_metric(prev_snapshots, "website_clicks")
-        p_followers = prev_snapshots[-1].get("follower_count", 0) if prev_snapshots else 0
-        p_engagement = (
-            _sum_metric(prev_snapshots, "total_likes") +
-            _sum_metric(prev_snapshots, "total_comments") +
-            _sum_metric(prev_snapshots, "total_saves") +
-            _sum_metric(prev_snapshots, "total_shares")
-        )
+        c_posts = cur["posts_published"]
+        c_stories = cur["stories_published"]
+        c_reels = cur["reels_published"]
+
+        p_impressions = prev["impressions"]
+        p_reach = prev["reach"]
+        p_profile_views = prev["profile_views"]
+        p_website_clicks = prev["website_clicks"]
+        p_followers = prev["follower_count"]
+        p_engagement = prev["total_likes"] + prev["total_comments"] + prev["total_saves"] + prev["total_shares"]
 
         # Engagement rate
         c_eng_rate = round(c_engagement / c_reach * 100, 2) if c_reach else 0
         p_eng_rate = round(p_engagement / p_reach * 100, 2) if p_reach else 0
 
-        # Get post-level insights for top posts in current period
-        insights = await self.storage.get_insights_async()
-        published_posts = await self.storage.get_all_posts_async(status="published")
-
-        # Build top posts list with metrics
-        insight_map = {i.post_id: i for i in insights}
-        top_posts = []
-        for post in published_posts:
-            if post.id in insight_map:
-                ins = insight_map[post.id]
-                top_posts.append({
-                    "id": post.id,
-                    "post_type": post.post_type,
-                    "caption": (post.caption or "")[:100],
-                    "media_thumbnail": post.media_thumbnail,
-                    "published_at": post.published_at,
-                    "impressions": ins.impressions,
-                    "reach": ins.reach,
-                    "likes": ins.likes,
-                    "comments": ins.comments,
-                    "saves": ins.saves,
-                    "shares": ins.shares,
-                    "engagement": ins.engagement,
-                })
-        top_posts.sort(key=lambda x: x.get("engagement", 0), reverse=True)
-
-        # Post type breakdown from our published posts
+        # Post type breakdown from our published posts (grouped in SQL)
         type_breakdown = {}
-        for post in published_posts:
-            pt = post.post_type or "photo"
-            if pt not in type_breakdown:
-                type_breakdown[pt] = {"count": 0, "impressions": 0, "reach": 0, "engagement": 0}
-            type_breakdown[pt]["count"] += 1
-            if post.id in insight_map:
-                ins = insight_map[post.id]
-                type_breakdown[pt]["impressions"] += ins.impressions
-                type_breakdown[pt]["reach"] += ins.reach
-                type_breakdown[pt]["engagement"] += ins.engagement
+        for row in breakdown:
+            pt = row["post_type"] or "photo"
+            data = type_breakdown.setdefault(pt, {"count": 0, "impressions": 0, "reach": 0, "engagement": 0})
+            data["count"] += row["posts"]
+            data["impressions"] += row["impressions"]
+            data["reach"] += row["reach"]
+            data["engagement"] += row["engagement"]
 
         # Add avg per post for each type
         for pt, data in type_breakdown.items():
@@ -3311,7 +3655,7 @@ Return JSON:
             },
             "daily": current_snapshots,
             "previous_daily": prev_snapshots,
-            "top_posts": top_posts[:10],
+            "top_posts": top_posts,
             "type_breakdown": type_breakdown,
             "live_profile": {
                 "username": live_profile.get("username", ""),
@@ -7,6 +7,7 @@ from typing import Optional
 from sqlalchemy import select, update
 from database.connection import get_db
 from database.models import SyncStatus, Store
+from utils.log import get_logger
 
 
 class BaseSyncJob:
@@ -18,6 +19,7 @@ class BaseSyncJob:
         self.store_id = store_id
         self.records_synced = 0
         self.error_message = None
+        self.log = get_logger(f"sync.{self.sync_type}")
 
     async def get_store(self, store_key: str) -> Optional[Store]:
         """Get store by key, create if doesn't exist"""
@@ -83,18 +85,18 @@ class BaseSyncJob:
 
     async def execute(self):
         """Execute the sync with status tracking"""
-        print(f"🔄 Starting {self.sync_type} sync...")
+        self.log.info("🔄 Starting %s sync...", self.sync_type)
         start_time = datetime.utcnow()
 
         try:
             await self.run()
             await self.update_sync_status("success")
             duration = (datetime.utcnow() - start_time).total_seconds()
-            print(f"✅ {self.sync_type} sync complete: {self.records_synced} records in {duration:.1f}s")
+            self.log.info("✅ %s sync complete: %d records in %.1fs", self.sync_type, self.records_synced, duration)
         except Exception as e:
             self.error_message = str(e)
             await self.update_sync_status("failed")
-            print(f"❌ {self.sync_type} sync failed: {e}")
+            self.log.error("%s sync failed: %s", self.sync_type, e)
             raise
 
 
@@ -12,6 +12,9 @@ from sqlalchemy import select
 from database.connection import get_db, init_db
 from database.models import AdSpend, Store
 from sync_jobs.base_sync import BaseSyncJob, run_sync
+from utils.log import get_logger
+
+log = get_logger("sync.google_ads")
 
 
 def create_google_ads_yaml_from_env():
@@ -26,13 +29,13 @@ def create_google_ads_yaml_from_env():
     customer_id = os.getenv("GOOGLE_ADS_CUSTOMER_ID", "").strip()
     login_customer_id = os.getenv("GOOGLE_ADS_LOGIN_CUSTOMER_ID", "").strip()
 
-    # Debug: Print what we found
-    print(f"🔍 [DEBUG] GOOGLE_ADS_DEVELOPER_TOKEN: {developer_token[:10]}..." if developer_token else "🔍 [DEBUG] GOOGLE_ADS_DEVELOPER_TOKEN: NOT SET")
-    print(f"🔍 [DEBUG] GOOGLE_ADS_LOGIN_CUSTOMER_ID: {login_customer_id}" if login_customer_id else "🔍 [DEBUG] GOOGLE_ADS_LOGIN_CUSTOMER_ID: NOT SET")
-    print(f"🔍 [DEBUG] GOOGLE_ADS_CUSTOMER_ID: {customer_id}" if customer_id else "🔍 [DEBUG] GOOGLE_ADS_CUSTOMER_ID: NOT SET")
+    log.debug("🔍 Google Ads env",
+              GOOGLE_ADS_DEVELOPER_TOKEN=f"{developer_token[:10]}..." if developer_token else "NOT SET",
+              GOOGLE_ADS_LOGIN_CUSTOMER_ID=login_customer_id or "NOT SET",
+              GOOGLE_ADS_CUSTOMER_ID=customer_id or "NOT SET")
 
     if not all([developer_token, client_id, client_secret, refresh_token]):
-        print("⚠️ Missing Google Ads env vars (need GOOGLE_ADS_DEVELOPER_TOKEN, CLIENT_ID, CLIENT_SECRET, REFRESH_TOKEN)")
+        log.warning("Missing Google Ads env vars (need GOOGLE_ADS_DEVELOPER_TOKEN, CLIENT_ID, CLIENT_SECRET, REFRESH_TOKEN)")
         return None
 
     # Create the yaml content (standard google-ads.yaml format)
@@ -48,10 +51,7 @@ use_proto_plus: true
     with open(config_path, 'w') as f:
         f.write(yaml_content)
 
-    print(f"✅ Created {config_path} from environment variables (login_customer_id={login_customer_id})")
-
-    # Also print the file contents for verification
-    print(f"📄 Config file contents:\n{yaml_content}")
+    log.info("✅ Created %s from environment variables (login_customer_id=%s)", config_path, login_customer_id)
 
     return config_path
 
@@ -85,13 +85,13 @@ class SyncGoogleAds(BaseSyncJob):
                         config_path = path
                         break
                 else:
-                    print("⚠️ google-ads.yaml not found and couldn't create from env, skipping Google Ads sync")
+                    self.log.warning("google-ads.yaml not found and couldn't create from env, skipping Google Ads sync")
                     return
 
         try:
             from google_ads_spend import daily_spend_usd_aligned
         except ImportError as e:
-            print(f"⚠️ Could not import google_ads_spend: {e}")
+            self.log.warning("Could not import google_ads_spend: %s", e)
             return
 
         # Get store
@@ -106,7 +106,7 @@ class SyncGoogleAds(BaseSyncJob):
         end_date = datetime.utcnow().date()
         start_date = end_date - timedelta(days=self.days_back)
 
-        print(f"📊 Syncing Google Ads spend from {start_date} to {end_date}")
+        self.log.info("📊 Syncing Google Ads spend from %s to %s", start_date, end_date)
 
         current = start_date
         synced_count = 0
@@ -146,17 +146,17 @@ class SyncGoogleAds(BaseSyncJob):
                         db.add(ad_spend)
 
                     synced_count += 1
-                    print(f"  ✅ {day_iso}: ${spend_usd:.2f}")
+                    self.log.debug("✅ %s: $%.2f", day_iso, spend_usd)
 
                 except Exception as e:
-                    print(f"  ⚠️ Error syncing {current}: {e}")
+                    self.log.warning("Error syncing %s: %s", current, e, per_minute=10)
 
                 current += timedelta(days=1)
 
             await db.commit()
 
         self.records_synced = synced_count
-        print(f"✅ Synced {synced_count} days of Google Ads spend")
+        self.log.info("✅ Synced %d days of Google Ads spend", synced_count)
 
 
 if __name__ == "__main__":
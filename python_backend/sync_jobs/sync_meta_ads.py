@@ -33,13 +33,13 @@ class SyncMetaAds(BaseSyncJob):
         account_id = os.getenv("META_AD_ACCOUNT_ID", "").strip()
 
         if not token or not account_id:
-            print("⚠️ META_ACCESS_TOKEN or META_AD_ACCOUNT_ID not set, skipping Meta Ads sync")
+            self.log.warning("META_ACCESS_TOKEN or META_AD_ACCOUNT_ID not set, skipping Meta Ads sync")
             return
 
         try:
             from meta_client import fetch_meta_insights_day
         except ImportError as e:
-            print(f"⚠️ Could not import meta_client: {e}")
+            self.log.warning("Could not import meta_client: %s", e)
             return
 
         # Get store
@@ -53,7 +53,7 @@ class SyncMetaAds(BaseSyncJob):
         end_date = datetime.utcnow().date()
         start_date = end_date - timedelta(days=self.days_back)
 
-        print(f"📊 Syncing Meta Ads spend from {start_date} to {end_date}")
+        self.log.info("📊 Syncing Meta Ads spend from %s to %s", start_date, end_date)
 
         current = start_date
         synced_count = 0
@@ -95,17 +95,17 @@ class SyncMetaAds(BaseSyncJob):
                         db.add(ad_spend)
 
                     synced_count += 1
-                    print(f"  ✅ {day_iso}: ${spend_usd:.2f} {currency}")
+                    self.log.debug("✅ %s: $%.2f %s", day_iso, spend_usd, currency)
 
                 except Exception as e:
-                    print(f"  ⚠️ Error syncing {current}: {e}")
+                    self.log.warning("Error syncing %s: %s", current, e, per_minute=10)
 
                 current += timedelta(days=1)
 
             await db.commit()
 
         self.records_synced = synced_count
-        print(f"✅ Synced {synced_count} days of Meta Ads spend")
+        self.log.info("✅ Synced %d days of Meta Ads spend", synced_count)
 
 
 if __name__ == "__main__":
@@ -16,6 +16,7 @@ from database.models import Order, OrderLineItem, Customer, Variant, Store
 from sync_jobs.base_sync import BaseSyncJob, run_sync
 from config import SHOPIFY_STORES
 from shopify_client import fetch_orders_created_between_for_store
+from channel_attribution import attribute_order, journey_visit
 
 
 class SyncOrders(BaseSyncJob):
@@ -29,55 +30,8 @@ class SyncOrders(BaseSyncJob):
         self.store_key = store_key
 
     def _normalize_channel(self, order: dict) -> str:
-        """Normalize order source to channel"""
-        source_name = (order.get("sourceName") or "").lower()
-        utm_source = ""
-        utm_medium = ""
-        referrer = ""
-
-        # Extract UTM params
-        customer_journey = order.get("customerJourney") or {}
-        first_visit = customer_journey.get("firstVisit") or {}
-        utm_params = first_visit.get("utmParameters") or {}
-        utm_source = (utm_params.get("source") or "").lower()
-        utm_medium = (utm_params.get("medium") or "").lower()
-        referrer = (first_visit.get("referrerUrl") or "").lower()
-
-        # Check for gclid
-        landing_page = first_visit.get("landingPage") or ""
-        has_gclid = "gclid=" in landing_page.lower()
-
-        # Klaviyo
-        if source_name == "klaviyo" or utm_source == "klaviyo" or utm_medium == "email":
-            return "klaviyo"
-
-        # Google Paid
-        if has_gclid:
-            return "google"
-        if utm_source == "google" or utm_medium in ("cpc", "product_sync"):
-            return "google"
-        if source_name == "google":
-            return "google"
-        if any(x in referrer for x in ["google.", "youtube.", "gmail."]):
-            return "google"
-
-        # Meta
-        if utm_source in ("facebook", "fb", "instagram", "ig", "meta"):
-            return "meta"
-        if any(x in referrer for x in ["facebook.com", "instagram.com", "fb.com"]):
-            return "meta"
-
-        # ChatGPT
-        if utm_source in ("chatgpt.com", "openai", "chatgpt"):
-            return "chatgpt"
-        if "chatgpt.com" in referrer:
-            return "chatgpt"
-
-        # Direct
-        if not utm_source and not utm_medium and not referrer:
-            return "direct"
-
-        return "organic"
+        """Normalize order source to channel (google/meta/klaviyo/chatgpt/direct/organic)"""
+        return attribute_order(order)
 
     def _extract_variant_id(self, gid: str) -> str:
         """Extract numeric ID from Shopify GID"""
@@ -97,7 +51,7 @@ class SyncOrders(BaseSyncJob):
             domain = store_config["domain"]
             token = store_config["access_token"]
 
-            print(f"📦 Syncing orders for store: {store_key}")
+            self.log.info("📦 Syncing orders for store: %s", store_key)
 
             # Get or create store
             store = await self.get_or_create_store(
@@ -119,7 +73,7 @@ class SyncOrders(BaseSyncJob):
                 exclude_cancelled=False
             )
 
-            print(f"  Found {len(orders)} orders")
+            self.log.info("Found %d orders", len(orders), store=store_key)
 
             async with get_db() as db:
                 for order_data in orders:
@@ -199,8 +153,7 @@ class SyncOrders(BaseSyncJob):
                         net = gross - discounts - refunds
 
                         # UTM params
-                        customer_journey = order_data.get("customerJourney") or {}
-                        first_visit = customer_journey.get("firstVisit") or {}
+                        first_visit = journey_visit(order_data, "firstVisit")
                         utm_params = first_visit.get("utmParameters") or {}
 
                         # Calculate shipping cost from matrix lookup
@@ -290,12 +243,12 @@ class SyncOrders(BaseSyncJob):
                         self.records_synced += 1
 
                     except Exception as e:
-                        print(f"  ⚠️ Error processing order: {e}")
+                        self.log.warning("Error processing order: %s", e, per_minute=10)
                         continue
 
                 await db.commit()
 
-            print(f"  ✅ Synced {self.records_synced} orders for {store_key}")
+            self.log.info("✅ Synced %d orders for %s", self.records_synced, store_key)
 
         # Also sync PSP fees for the same date range
         await self._sync_psp_fees()
@@ -315,15 +268,15 @@ class SyncOrders(BaseSyncJob):
             end_date = date.today()
             start_date = end_date - timedelta(days=self.days_back)
 
-            print(f"💳 Syncing PSP fees: {start_date} to {end_date}")
+            self.log.info("💳 Syncing PSP fees: %s to %s", start_date, end_date)
 
             psp_fees = get_psp_fees_daily(start_date, end_date)
 
             if not psp_fees:
-                print("  ⚠️ No PSP fees found")
+                self.log.warning("No PSP fees found")
                 return
 
-            print(f"  Found {len(psp_fees)} days with PSP fees")
+            self.log.info("Found %d days with PSP fees", len(psp_fees))
 
             async with get_db() as db:
                 for fee_date, fee_amount in psp_fees.items():
@@ -349,15 +302,15 @@ class SyncOrders(BaseSyncJob):
                             )
                             db.add(psp_record)
                     except Exception as e:
-                        print(f"  ⚠️ Error processing PSP fee {fee_date}: {e}")
+                        self.log.warning("Error processing PSP fee %s: %s", fee_date, e, per_minute=10)
                         continue
 
                 await db.commit()
 
-            print(f"  ✅ Synced {len(psp_fees)} PSP fee records")
+            self.log.info("✅ Synced %d PSP fee records", len(psp_fees))
 
         except Exception as e:
-            print(f"  ⚠️ PSP fee sync failed: {e}")
+            self.log.warning("PSP fee sync failed: %s", e)
             import traceback
             traceback.print_exc()
 
@@ -109,7 +109,7 @@ class SyncProducts(BaseSyncJob):
             domain = store_config["domain"]
             token = store_config["access_token"]
 
-            print(f"📦 Syncing products for store: {store_key}")
+            self.log.info("📦 Syncing products for store: %s", store_key)
 
             # Get or create store
             store = await self.get_or_create_store(
@@ -134,14 +134,14 @@ class SyncProducts(BaseSyncJob):
 
                 # Debug: Check for errors
                 if result.get("errors"):
-                    print(f"  ⚠️ GraphQL errors: {result['errors']}")
+                    self.log.warning("GraphQL errors: %s", result['errors'], per_minute=5)
 
                 # _gql_for returns data["data"] directly, so products is at top level
                 products_data = result.get("products", {})
                 edges = products_data.get("edges", [])
 
                 if cursor is None:  # First page
-                    print(f"  Found {len(edges)} products on first page")
+                    self.log.debug("Found %d products on first page", len(edges))
 
                 async with get_db() as db:
                     for edge in edges:
@@ -220,7 +220,7 @@ class SyncProducts(BaseSyncJob):
                                 variants_synced += 1
 
                         except Exception as e:
-                            print(f"  ⚠️ Error processing product {product_gid}: {e}")
+                            self.log.warning("Error processing product %s: %s", product_gid, e, per_minute=10)
                             continue
 
                     await db.commit()
@@ -233,7 +233,7 @@ class SyncProducts(BaseSyncJob):
                     break
 
             self.records_synced = variants_synced
-            print(f"  ✅ Synced {products_synced} products, {variants_synced} variants for {store_key}")
+            self.log.info("✅ Synced %d products, %d variants for %s", products_synced, variants_synced, store_key)
 
 
 if __name__ == "__main__":
@@ -41,22 +41,22 @@ class SyncPspFees(BaseSyncJob):
             )
         self.store_id = store.id
 
-        print(f"💳 Syncing PSP fees for store: {self.store_key}")
+        self.log.info("💳 Syncing PSP fees for store: %s", self.store_key)
 
         # Calculate date range
         end_date = date.today()
         start_date = end_date - timedelta(days=self.days_back)
 
-        print(f"  Date range: {start_date} to {end_date}")
+        self.log.info("Date range: %s to %s", start_date, end_date)
 
         # Fetch PSP fees from Shopify
         psp_fees = get_psp_fees_daily(start_date, end_date)
 
         if not psp_fees:
-            print("  ⚠️ No PSP fees found")
+            self.log.warning("No PSP fees found")
             return
 
-        print(f"  Found {len(psp_fees)} days with PSP fees")
+        self.log.info("Found %d days with PSP fees", len(psp_fees))
 
         async with get_db() as db:
             for fee_date, fee_amount in psp_fees.items():
@@ -85,12 +85,12 @@ class SyncPspFees(BaseSyncJob):
                     self.records_synced += 1
 
                 except Exception as e:
-                    print(f"  ⚠️ Error processing {fee_date}: {e}")
+                    self.log.warning("Error processing %s: %s", fee_date, e, per_minute=10)
                     continue
 
             await db.commit()
 
-        print(f"  ✅ Synced {self.records_synced} PSP fee records")
+        self.log.info("✅ Synced %d PSP fee records", self.records_synced)
 
 
 if __name__ == "__main__":
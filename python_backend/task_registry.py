@@ -0,0 +1,294 @@
+"""
+Background task registry - bounded worker pool with task state in SQLite
+
+Replaces the per-process `_BACKGROUND_TASKS` dict in simple_server:
+- tasks run on a bounded ThreadPoolExecutor (BACKGROUND_TASK_WORKERS) instead
+  of one raw thread each
+- task state lives in a SQLite (WAL) file on the data disk, so every uvicorn
+  worker process can answer status polls for any task and state survives
+  restarts (tasks interrupted by a restart are marked failed: each row records
+  the boot token of the server that ran it, and rows from another boot are
+  orphans - OS pids repeat across container restarts)
+- finished tasks are evicted after BACKGROUND_TASK_TTL_HOURS
+- cancellation is a flag in shared storage; workers poll it between items
+
+Worker functions receive a TaskHandle - a dict that persists itself (at most
+every FLUSH_INTERVAL seconds while running, and once more when the function
+returns) - and call task.check_cancelled() between items.
+
+Env:
+  BACKGROUND_TASK_WORKERS    pool size (default 4)
+  BACKGROUND_TASK_TTL_HOURS  keep finished tasks this long (default 24)
+  BACKGROUND_TASK_DB         SQLite path (default $RENDER_DISK_PATH/background_tasks.db)
+  BACKGROUND_TASK_BOOT_ID    token shared by all worker processes of one server boot
+                             (default: a random token per process - set it, e.g. in
+                             start.sh, when running uvicorn with several workers)
+"""
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+MAX_WORKERS = int(os.getenv("BACKGROUND_TASK_WORKERS", "4"))
+TASK_TTL_SECONDS = float(os.getenv("BACKGROUND_TASK_TTL_HOURS", "24")) * 3600
+DB_PATH = os.getenv("BACKGROUND_TASK_DB") or os.path.join(
+    os.getenv("RENDER_DISK_PATH", os.path.dirname(__file__)), "background_tasks.db")
+BOOT_ID = os.getenv("BACKGROUND_TASK_BOOT_ID") or uuid.uuid4().hex
+FLUSH_INTERVAL = 1.0
+EVICT_INTERVAL = 60.0
+
+TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+
+
+class TaskCancelled(BaseException):
+    """Raised by TaskHandle.check_cancelled() once cancellation was requested.
+
+    BaseException (like asyncio.CancelledError) so the workers' broad
+    `except Exception` blocks don't turn a cancellation into a failure."""
+
+
+def _now_iso() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+class TaskHandle(dict):
+    """Live task state for a worker function; writes are persisted by the registry."""
+
+    def __init__(self, registry: "TaskRegistry", data: Dict[str, Any]):
+        super().__init__(data)
+        self._registry = registry
+        self._last_flush = 0.0
+        self._cancel_requested = False
+
+    @property
+    def task_id(self) -> str:
+        return self["task_id"]
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        # Terminal state is written once, by the registry, after the worker returns -
+        # so pollers never see "completed" before results/message are filled in
+        if self.get("status") in TERMINAL_STATUSES:
+            return
+        if key == "status" or time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        self._cancel_requested = self._registry._save(self)
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_requested
+
+    def check_cancelled(self) -> None:
+        if time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            self.flush()
+        if self._cancel_requested:
+            raise TaskCancelled()
+
+
+class TaskRegistry:
+    def __init__(self, db_path: str = DB_PATH, max_workers: int = MAX_WORKERS):
+        self.db_path = db_path
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bg-task")
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._last_evict = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS background_tasks (
+                    task_id TEXT PRIMARY KEY,
+                    type TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    owner_boot TEXT,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    finished_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_background_tasks_finished "
+                         "ON background_tasks (finished_at)")
+        self._fail_orphans()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Short-lived autocommit connections: safe from any thread or process
+        conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # ---------- persistence ----------
+
+    def _save(self, task: Dict[str, Any], finished: bool = False) -> bool:
+        """Write task state; returns whether cancellation has been requested."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE background_tasks SET status = ?, data = ?, updated_at = ?, "
+                "finished_at = COALESCE(finished_at, ?) WHERE task_id = ?",
+                (task["status"], json.dumps(task, default=str), now, now if finished else None, task["task_id"]))
+            row = conn.execute("SELECT cancel_requested FROM background_tasks WHERE task_id = ?",
+                               (task["task_id"],)).fetchone()
+        return bool(row and row[0])
+
+    def _fail_orphans(self) -> None:
+        """Mark unfinished tasks started by an earlier boot (restart/crash) as failed."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT task_id, data FROM background_tasks "
+                                "WHERE status IN ('pending', 'running') "
+                                "AND owner_boot IS NOT ?", (BOOT_ID,)).fetchall()
+            for task_id, data in rows:
+                task = json.loads(data)
+                task.update(status="failed", error="Interrupted by server restart", completed_at=_now_iso())
+                conn.execute("UPDATE background_tasks SET status = 'failed', data = ?, updated_at = ?, "
+                             "finished_at = ? WHERE task_id = ?",
+                             (json.dumps(task, default=str), time.time(), time.time(), task_id))
+                print(f"⚠️ Background task {task_id} ({task.get('type')}) was interrupted by a restart")
+
+    def evict_expired(self, force: bool = False) -> int:
+        if not force and time.monotonic() - self._last_evict < EVICT_INTERVAL:
+            return 0
+        self._last_evict = time.monotonic()
+        with self._connect() as conn:
+            cur = conn.execute("DELETE FROM background_tasks WHERE finished_at IS NOT NULL AND finished_at < ?",
+                               (time.time() - TASK_TTL_SECONDS,))
+        return cur.rowcount
+
+    # ---------- public API ----------
+
+    def submit(self, task_type: str, fn: Callable[..., None], *args, total: int = 0,
+               **fields) -> str:
+        """Register a task and queue fn(task_handle, *args) on the pool. Returns task_id."""
+        self.evict_expired()
+        task_id = str(uuid.uuid4())
+        task = {
+            "task_id": task_id,
+            "type": task_type,
+            "status": "pending",
+            "total": total,
+            "progress": 0,
+            "current_item": "",
+            "created_at": _now_iso(),
+            "results": [],
+            "message": "",
+            **fields,
+        }
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT INTO background_tasks (task_id, type, status, data, owner_boot, "
+                         "created_at, updated_at) VALUES (?, ?, 'pending', ?, ?, ?, ?)",
+                         (task_id, task_type, json.dumps(task, default=str), BOOT_ID, now, now))
+        with self._lock:
+            self._futures[task_id] = self._pool.submit(self._run, TaskHandle(self, task), fn, args)
+        return task_id
+
+    def _run(self, task: TaskHandle, fn: Callable[..., None], args: tuple) -> None:
+        try:
+            task.check_cancelled()
+            fn(task, *args)
+            if task.get("status") not in TERMINAL_STATUSES:
+                dict.__setitem__(task, "status", "completed")
+        except TaskCancelled:
+            dict.__setitem__(task, "status", "cancelled")
+            dict.__setitem__(task, "message", f"Cancelled after {task.get('progress', 0)} of {task.get('total', 0)}")
+        except Exception as e:
+            dict.__setitem__(task, "status", "failed")
+            dict.__setitem__(task, "error", str(e))
+        finally:
+            task.setdefault("completed_at", _now_iso())
+            try:
+                self._save(task, finished=True)
+            except Exception as e:
+                print(f"⚠️ Could not persist final state of task {task.task_id}: {e}")
+            with self._lock:
+                self._futures.pop(task.task_id, None)
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Task state from shared storage (any worker process), or None."""
+        self.evict_expired()
+        with self._connect() as conn:
+            row = conn.execute("SELECT data, cancel_requested FROM background_tasks WHERE task_id = ?",
+                               (task_id,)).fetchone()
+        if not row:
+            return None
+        task = json.loads(row[0])
+        task["cancel_requested"] = bool(row[1])
+        return task
+
+    def list(self, task_type: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Recent tasks (newest first), without their result lists."""
+        self.evict_expired()
+        sql = "SELECT data, cancel_requested FROM background_tasks"
+        params: list = []
+        if task_type:
+            sql += " WHERE type = ?"
+            params.append(task_type)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        tasks = []
+        for data, cancel in rows:
+            task = json.loads(data)
+            task.pop("results", None)
+            task["cancel_requested"] = bool(cancel)
+            tasks.append(task)
+        return tasks
+
+    def cancel(self, task_id: str) -> Optional[str]:
+        """Request cancellation. Returns the task status after the request, or None if unknown."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT status, data FROM background_tasks WHERE task_id = ?",
+                               (task_id,)).fetchone()
+            if not row:
+                return None
+            status = row[0]
+            if status in TERMINAL_STATUSES:
+                return status
+            conn.execute("UPDATE background_tasks SET cancel_requested = 1 WHERE task_id = ?", (task_id,))
+
+        # Still queued in this process: drop it before it starts
+        with self._lock:
+            future = self._futures.get(task_id)
+        if future is not None and future.cancel():
+            task = json.loads(row[1])
+            task.update(status="cancelled", message="Cancelled before start", completed_at=_now_iso())
+            self._save(task, finished=True)
+            with self._lock:
+                self._futures.pop(task_id, None)
+            return "cancelled"
+        return "cancelling"
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM background_tasks GROUP BY status").fetchall())
+        with self._lock:
+            local = len(self._futures)
+        return {"by_status": counts, "in_this_process": local, "max_workers": self._pool._max_workers,
+                "db_path": self.db_path}
+
+
+_registry: Optional[TaskRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_task_registry() -> TaskRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = TaskRegistry()
+    return _registry
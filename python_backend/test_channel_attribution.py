@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Parity checks for channel_attribution, the shared order → channel engine.
+
+Before the engine, four pipelines attributed orders with their own rules:
+  normalize     channel_normalizer.normalize_channel (UTMs + referrer, no Meta)
+  sync          SyncOrders._normalize_channel (read `customerJourney`, which
+                the orders query never returns - only sourceName counted)
+  master        master_report_mirai._shopify_channel (regex over a text blob;
+                its `for k in ("referrerUrl")` loop iterated characters, so
+                visit referrers were never looked at)
+  order_report  order_report_logic._shopify_channel (`customAttributes`, which
+                the orders query never returns - always "organic")
+
+Their code is kept below verbatim. Running this file prints, per case, what each
+old implementation returned next to the unified channel, marks the cases where
+the old implementations disagreed, and checks:
+  - the unified channel of every case
+  - single-order, batch and column APIs agree
+  - normalize_channel / normalize_channel_columns agree with the engine
+
+Usage:
+    python test_channel_attribution.py      (or: pytest test_channel_attribution.py)
+"""
+import os
+import re
+import sys
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from channel_attribution import (  # noqa: E402
+    attribute_order, attribute_orders, classify, classify_columns, get_attribution_stats,
+)
+from channel_normalizer import normalize_channel, normalize_channel_columns  # noqa: E402
+
+
+# ================== previous implementations ==================
+
+def _legacy_host(s):
+    if not s:
+        return ""
+    try:
+        if "://" not in s:
+            s = "http://" + s
+        return (urlparse(s).netloc or "").lower()
+    except Exception:
+        return ""
+
+
+def legacy_normalize(*, source_name="", utm_source="", utm_medium="", referrer_url="", landing_page_url=""):
+    hints = ("google.", "youtube.", "gmail.", "googleadservices.", "doubleclick.", "googlesyndication.")
+    sname = (source_name or "").strip().lower()
+    usrc = (utm_source or "").strip().lower()
+    umed = (utm_medium or "").strip().lower()
+    ref_h = _legacy_host(referrer_url)
+    has_gclid = any(url and "gclid=" in url.lower() for url in (referrer_url, landing_page_url))
+    if sname == "klaviyo" or usrc == "klaviyo" or umed == "email":
+        return "Klaviyo"
+    if has_gclid:
+        return "Google Paid"
+    if usrc == "google" or umed in ("cpc", "product_sync") or sname == "google":
+        return "Google Paid"
+    if ref_h and any(tok in ref_h for tok in hints):
+        return "Google Paid"
+    if usrc in ("chatgpt.com", "openai", "chatgpt") or ref_h == "chatgpt.com":
+        return "ChatGPT"
+    if not usrc and not umed and not has_gclid and (not ref_h or "mirai-skin.com" in ref_h):
+        return "Direct"
+    return "Other / Organic"
+
+
+def legacy_sync(order: dict) -> str:
+    source_name = (order.get("sourceName") or "").lower()
+    customer_journey = order.get("customerJourney") or {}
+    first_visit = customer_journey.get("firstVisit") or {}
+    utm_params = first_visit.get("utmParameters") or {}
+    utm_source = (utm_params.get("source") or "").lower()
+    utm_medium = (utm_params.get("medium") or "").lower()
+    referrer = (first_visit.get("referrerUrl") or "").lower()
+    landing_page = first_visit.get("landingPage") or ""
+    has_gclid = "gclid=" in landing_page.lower()
+    if source_name == "klaviyo" or utm_source == "klaviyo" or utm_medium == "email":
+        return "klaviyo"
+    if has_gclid:
+        return "google"
+    if utm_source == "google" or utm_medium in ("cpc", "product_sync"):
+        return "google"
+    if source_name == "google":
+        return "google"
+    if any(x in referrer for x in ["google.", "youtube.", "gmail."]):
+        return "google"
+    if utm_source in ("facebook", "fb", "instagram", "ig", "meta"):
+        return "meta"
+    if any(x in referrer for x in ["facebook.com", "instagram.com", "fb.com"]):
+        return "meta"
+    if utm_source in ("chatgpt.com", "openai", "chatgpt"):
+        return "chatgpt"
+    if "chatgpt.com" in referrer:
+        return "chatgpt"
+    if not utm_source and not utm_medium and not referrer:
+        return "direct"
+    return "organic"
+
+
+_LEGACY_GOOGLE_PAT = re.compile(
+    r"""(?ix)
+        \bgoogle\b
+        | gclid=
+        | utm_source=(google|google[-_ ]?search|google[-_ ]?shopping)
+        | (google\.[a-z.]{2,11})
+        | \bgoogle\s*search\b
+    """
+)
+_LEGACY_META_PAT = re.compile(
+    r"""(?ix)
+        \b(facebook|instagram|meta)\b
+        | utm_source=(facebook|fb|instagram|ig)
+        | (facebook\.com|instagram\.com|fb\.com)
+    """
+)
+
+
+def _legacy_blob(order: dict) -> str:
+    def collect(x):
+        if isinstance(x, str):
+            return [x]
+        if isinstance(x, dict):
+            return [v for v in x.values() if isinstance(v, str) and v]
+        return []
+
+    bits: List[str] = []
+    for k in ("referrerUrl", "sourceName", "referrer", "customerUrl"):
+        bits.extend(collect(order.get(k)))
+    cjs = order.get("customerJourneySummary") or {}
+    for edge in ("firstVisit", "lastVisit"):
+        visit = cjs.get(edge) or {}
+        if not isinstance(visit, dict):
+            continue
+        for k in ("referrerUrl"):
+            u = visit.get(k)
+            if isinstance(u, str) and u:
+                bits.append(u)
+                try:
+                    q = parse_qs(urlparse(u).query)
+                    for kk in ("utm_source", "utm_medium", "utm_campaign", "gclid", "utm_content", "utm_term"):
+                        if q.get(kk):
+                            bits.extend(q[kk])
+                except Exception:
+                    pass
+        utm = visit.get("utmParameters") or {}
+        if isinstance(utm, dict):
+            for kk in ("source", "medium", "campaign", "content", "term"):
+                vv = utm.get(kk)
+                if isinstance(vv, str) and vv:
+                    bits.append(f"utm_{kk}={vv}")
+    return " | ".join(bits)
+
+
+def legacy_master(order: dict) -> Optional[str]:
+    blob = _legacy_blob(order)
+    if not blob:
+        return None
+    if _LEGACY_GOOGLE_PAT.search(blob):
+        return "google"
+    if _LEGACY_META_PAT.search(blob):
+        return "meta"
+    return None
+
+
+def legacy_order_report(order: dict) -> str:
+    for attr in order.get("customAttributes") or []:
+        if attr.get("key") == "_attribution_source":
+            val = (attr.get("value") or "").lower()
+            if "google" in val:
+                return "google"
+            if "meta" in val or "facebook" in val or "instagram" in val:
+                return "meta"
+    return "organic"
+
+
+# ================== cases ==================
+
+def _order(source_name="web", last=None, first=None, key="customerJourneySummary", **extra) -> Dict[str, Any]:
+    def visit(v):
+        if v is None:
+            return None
+        src, med, ref, *rest = v
+        out = {"utmParameters": {"source": src, "medium": med, "campaign": rest[0] if rest else None},
+               "referrerUrl": ref}
+        return out
+    o = {"id": "gid://shopify/Order/1", "sourceName": source_name, **extra}
+    if last is not None or first is not None:
+        o[key] = {"lastVisit": visit(last), "firstVisit": visit(first)}
+    return o
+
+
+# (name, order, unified channel)
+CASES = [
+    ("no journey", _order(), "direct"),
+    ("google cpc utm", _order(last=("google", "cpc", None)), "google"),
+    ("utm on first visit only", _order(first=("google", "cpc", None)), "google"),
+    ("gclid in referrer", _order(last=(None, None, "https://mirai-skin.com/?gclid=abc")), "google"),
+    ("google referrer, no utm (PMax)", _order(last=(None, None, "https://www.google.com/")), "google"),
+    ("youtube referrer", _order(last=(None, None, "https://m.youtube.com/watch?v=1")), "google"),
+    ("utm_source google_shopping", _order(last=("google_shopping", "organic", None)), "google"),
+    ("padded mixed-case utm", _order(last=(" Google ", "CPC", None)), "google"),
+    ("sourceName google", _order(source_name="google"), "google"),
+    ("facebook utm", _order(last=("facebook", "paid", None)), "meta"),
+    ("ig utm", _order(last=("ig", "social", None)), "meta"),
+    ("instagram referrer", _order(last=(None, None, "https://l.instagram.com/?u=x")), "meta"),
+    ("facebook utm, google campaign name", _order(last=("facebook", "paid", None, "Google Search Lookalike")), "meta"),
+    ("legacy customerJourney key", _order(first=("facebook", "paid", None), key="customerJourney"), "meta"),
+    ("klaviyo email", _order(last=("klaviyo", "email", None)), "klaviyo"),
+    ("email medium", _order(last=("newsletter", "Email", None)), "klaviyo"),
+    ("sourceName klaviyo", _order(source_name="Klaviyo"), "klaviyo"),
+    ("chatgpt referrer", _order(last=(None, None, "https://chatgpt.com/")), "chatgpt"),
+    ("openai utm", _order(last=("openai", "referral", None)), "chatgpt"),
+    ("self referral", _order(last=(None, None, "https://mirai-skin.com/products/x")), "direct"),
+    ("bing referrer", _order(last=(None, None, "https://www.bing.com/search?q=cosrx")), "organic"),
+    ("tiktok utm", _order(last=("tiktok", "paid", None)), "organic"),
+    ("last visit wins", _order(last=("facebook", "paid", None), first=("google", "cpc", None)), "meta"),
+    ("explicit _attribution_source",
+     _order(customAttributes=[{"key": "_attribution_source", "value": "Meta Ads"}]), "meta"),
+]
+
+
+def _normalize_fields(order: dict) -> Dict[str, str]:
+    """Fields orders_to_df hands normalize_channel (lastVisit, firstVisit fallback)"""
+    cjs = order.get("customerJourneySummary") or {}
+
+    def get(which, key):
+        v = cjs.get(which) or {}
+        if key == "referrerUrl":
+            return v.get("referrerUrl") or ""
+        return (v.get("utmParameters") or {}).get(key) or ""
+
+    return {
+        "source_name": order.get("sourceName") or "",
+        "utm_source": get("lastVisit", "source") or get("firstVisit", "source"),
+        "utm_medium": get("lastVisit", "medium") or get("firstVisit", "medium"),
+        "referrer_url": get("lastVisit", "referrerUrl") or get("firstVisit", "referrerUrl"),
+    }
+
+
+_LABEL_TO_CHANNEL = {"Google Paid": "google", "Klaviyo": "klaviyo", "ChatGPT": "chatgpt",
+                     "Direct": "direct", "Other / Organic": "organic"}
+
+
+def legacy_results(order: dict) -> Dict[str, str]:
+    return {
+        "normalize": _LABEL_TO_CHANNEL[legacy_normalize(**_normalize_fields(order))],
+        "sync": legacy_sync(order),
+        "master": legacy_master(order) or "-",
+        "order_report": legacy_order_report(order),
+    }
+
+
+def _disagree(legacy: Dict[str, str]) -> bool:
+    # Compare on the google / meta / other split every implementation can express
+    coarse = {v if v in ("google", "meta") else "other" for k, v in legacy.items() if k != "normalize"}
+    coarse.add(legacy["normalize"] if legacy["normalize"] == "google" else "other")
+    return len(coarse) > 1
+
+
+# ================== tests ==================
+
+def test_unified_channels():
+    failures = [(name, attribute_order(o), want) for name, o, want in CASES if attribute_order(o) != want]
+    assert not failures, failures
+
+
+def test_batch_matches_single():
+    orders = [o for _, o, _ in CASES] * 3
+    assert attribute_orders(orders) == [attribute_order(o) for o in orders]
+
+
+def test_columns_match_scalar():
+    import pandas as pd
+    rows = [_normalize_fields(o) for _, o, _ in CASES]
+    df = pd.DataFrame({"sourceName": [r["source_name"] for r in rows],
+                       "utm_source": [r["utm_source"] for r in rows],
+                       "utm_medium": [r["utm_medium"] for r in rows],
+                       "referrer_url": [r["referrer_url"] for r in rows]})
+    channels = classify_columns(df["sourceName"], df["utm_source"], df["utm_medium"], df["referrer_url"])
+    assert list(channels) == [classify(**r) for r in rows]
+    assert normalize_channel_columns(df).tolist() == [normalize_channel(**r) for r in rows]
+
+
+def test_old_implementations_disagreed():
+    # The reason for the engine: the same order got different channels per report
+    assert sum(_disagree(legacy_results(o)) for _, o, _ in CASES) >= 10
+
+
+def report() -> None:
+    cols = ("normalize", "sync", "master", "order_report")
+    print(f"{'case':38} " + " ".join(f"{c:>12}" for c in cols) + f" {'unified':>9}  disagree")
+    for name, order, _ in CASES:
+        legacy = legacy_results(order)
+        print(f"{name:38} " + " ".join(f"{legacy[c]:>12}" for c in cols)
+              + f" {attribute_order(order):>9}  {'*' if _disagree(legacy) else ''}")
+
+
+if __name__ == "__main__":
+    report()
+    ok = True
+    for test in (test_unified_channels, test_batch_matches_single, test_columns_match_scalar,
+                 test_old_implementations_disagreed):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {test.__name__}: {e}")
+    print(f"cache: {get_attribution_stats()}")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Checks for competitor_scan against the local SerpAPI stub (serpapi_stub.py).
+
+  - variants that build the same search query share one SerpAPI call
+  - unique queries run with bounded concurrency
+  - progress callbacks are ordered and reach the variant count
+  - a re-scan within the TTL is served from the disk cache, with identical results
+  - a failing query marks only its own variants failed
+
+Shopify is not called: variant details are passed in directly.
+
+Usage:
+    pytest test_competitor_scan.py
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import competitor_scan  # noqa: E402
+from serpapi_stub import serve  # noqa: E402
+
+# 24 variants, 3 per product/variant title -> 8 unique queries
+DETAILS = {str(1000 + i): {"product_title": f"Stub Serum {i // 3}", "variant_title": "50ml", "sku": "",
+                           "current_price": 25.0, "compare_at": 0.0, "cogs": 6.0}
+           for i in range(24)}
+IDS = list(DETAILS)
+
+
+@pytest.fixture
+def stub(tmp_path, monkeypatch):
+    """SerpAPI stub on a free port, competitor_scan pointed at it with an empty cache dir."""
+    server, state = serve(0, latency=0.1, background=True)
+    monkeypatch.setenv("SERPAPI_KEY", "stub")
+    monkeypatch.setattr(competitor_scan, "SERPAPI_URL", f"http://127.0.0.1:{server.server_address[1]}/search.json")
+    monkeypatch.setattr(competitor_scan, "_CACHE_DIR", str(tmp_path / "serp_cache"))
+    monkeypatch.setattr(competitor_scan, "CACHE_TTL_SECONDS", 3600.0)
+    try:
+        yield state
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _scan(**kwargs):
+    return competitor_scan.scan_variant_details(DETAILS, IDS, persist=False, concurrency=4, **kwargs)
+
+
+def _calls(state):
+    return sum(state.hits.values())
+
+
+def test_identical_queries_deduped(stub):
+    results = _scan()
+    assert [r["variant_id"] for r in results] == IDS
+    assert all(r["status"] == "success" for r in results)
+    assert _calls(stub) == 8
+    assert all(n == 1 for n in stub.hits.values())
+
+
+def test_concurrency_bounded(stub):
+    _scan()
+    assert 1 < stub.max_in_flight <= 4
+
+
+def test_progress_ordered_to_total(stub):
+    progress = []
+    _scan(on_progress=lambda done, _: progress.append(done))
+    assert progress == list(range(1, len(IDS) + 1))
+
+
+def test_rescan_served_from_disk_cache(stub):
+    first = _scan()
+    second = _scan()
+    assert _calls(stub) == 8
+    assert [r["analysis"] for r in first] == [r["analysis"] for r in second]
+
+
+def test_failed_query_marks_only_its_variants(stub):
+    failing = competitor_scan.build_search_query(DETAILS["1006"])  # Stub Serum 2
+    stub.fail_queries.add(failing)
+    results = {r["variant_id"]: r for r in _scan()}
+
+    failed = {vid for vid, r in results.items() if r["status"] == "failed"}
+    assert failed == {"1006", "1007", "1008"}
+    assert all("500" in results[vid]["error"] for vid in failed)
+    assert all(r["status"] == "success" for vid, r in results.items() if vid not in failed)
+
+    # failures aren't cached: the next scan retries that query only
+    stub.fail_queries.clear()
+    assert all(r["status"] == "success" for r in _scan())
+    assert _calls(stub) == 9
+    assert stub.hits[(failing, "us")] == 2
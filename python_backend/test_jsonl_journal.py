@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Crash-recovery checks for utils/jsonl_journal and the pricing_logic stores built on it.
+
+  - load() drops a torn last line (process killed mid-append) and truncates it away
+  - appends after recovery land on a clean line boundary
+  - rewrite() replaces the file atomically (no temp file left, old content gone)
+  - pricing_logic rebuilds competitor data / scan history from the journals,
+    and imports the pre-journal .json files once when no journal exists
+
+Usage:
+    pytest test_jsonl_journal.py
+"""
+import json
+import os
+import sys
+from collections import deque
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pricing_logic  # noqa: E402
+from utils.jsonl_journal import JsonlJournal  # noqa: E402
+
+
+def _lines(path):
+    with open(path, "rb") as f:
+        return f.read().split(b"\n")
+
+
+# ================== JsonlJournal ==================
+
+def test_torn_tail_truncated_on_load(tmp_path):
+    path = tmp_path / "j.jsonl"
+    path.write_bytes(b'{"n":1}\n{"n":2}\n{"n":3,"par')
+
+    journal = JsonlJournal(str(path))
+    assert journal.load() == [{"n": 1}, {"n": 2}]
+    assert path.read_bytes() == b'{"n":1}\n{"n":2}\n'
+    assert journal.appended_since_compact == 2
+
+
+def test_corrupt_line_drops_rest(tmp_path):
+    path = tmp_path / "j.jsonl"
+    path.write_bytes(b'{"n":1}\nnot json\n{"n":3}\n')
+
+    assert JsonlJournal(str(path)).load() == [{"n": 1}]
+    assert path.read_bytes() == b'{"n":1}\n'
+
+
+def test_append_after_recovery(tmp_path):
+    path = tmp_path / "j.jsonl"
+    path.write_bytes(b'{"n":1}\n{"n":2')
+
+    journal = JsonlJournal(str(path))
+    journal.load()
+    journal.append({"n": 3})
+    journal.close()
+
+    assert JsonlJournal(str(path)).load() == [{"n": 1}, {"n": 3}]
+    assert _lines(path) == [b'{"n":1}', b'{"n":3}', b""]
+
+
+def test_rewrite_replaces_atomically(tmp_path, monkeypatch):
+    path = tmp_path / "j.jsonl"
+    journal = JsonlJournal(str(path))
+    for n in range(5):
+        journal.append({"n": n})
+
+    replaced = []
+    real_replace = os.replace
+    monkeypatch.setattr(os, "replace", lambda src, dst: (replaced.append((src, dst)), real_replace(src, dst)))
+    assert journal.rewrite([{"n": 4}]) == 1
+
+    assert replaced == [(f"{path}.tmp", str(path))]
+    assert not os.path.exists(f"{path}.tmp")
+    assert journal.appended_since_compact == 0
+    journal.append({"n": 5})
+    journal.close()
+    assert JsonlJournal(str(path)).load() == [{"n": 4}, {"n": 5}]
+
+
+# ================== pricing_logic stores ==================
+
+@pytest.fixture
+def restart(tmp_path, monkeypatch):
+    """Returns pricing_logic as a fresh process would see it: stores pointed at
+    tmp_path and not loaded yet. Call again to simulate a restart on the same disk."""
+    def restart():
+        for journal in (pricing_logic._COMPETITOR_JOURNAL, pricing_logic._SCAN_JOURNAL):
+            journal.close()
+        for name, filename in (("_COMPETITOR_DATA_FILE", "competitor_data.jsonl"),
+                               ("_LEGACY_COMPETITOR_DATA_FILE", "competitor_data.json"),
+                               ("_SCAN_HISTORY_FILE", "scan_history.jsonl"),
+                               ("_LEGACY_SCAN_HISTORY_FILE", "scan_history.json"),
+                               ("_UPDATE_LOG_FILE", "update_log.json")):
+            monkeypatch.setattr(pricing_logic, name, str(tmp_path / filename))
+        monkeypatch.setattr(pricing_logic, "_DATA_DIR", str(tmp_path))
+        monkeypatch.setattr(pricing_logic, "_COMPETITOR_JOURNAL", JsonlJournal(str(tmp_path / "competitor_data.jsonl")))
+        monkeypatch.setattr(pricing_logic, "_SCAN_JOURNAL", JsonlJournal(str(tmp_path / "scan_history.jsonl")))
+        monkeypatch.setattr(pricing_logic, "_COMPETITOR_DATA", {})
+        monkeypatch.setattr(pricing_logic, "_SCAN_HISTORY", deque(maxlen=pricing_logic._SCAN_HISTORY_MAX))
+        monkeypatch.setattr(pricing_logic, "_UPDATE_LOG", [])
+        monkeypatch.setattr(pricing_logic, "_LOADED", False)
+        return pricing_logic
+
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    yield restart
+    for journal in (pricing_logic._COMPETITOR_JOURNAL, pricing_logic._SCAN_JOURNAL):
+        journal.close()
+
+
+def _scanned(pricing):
+    return sorted(r["variant_id"] for r in pricing.get_scan_history())
+
+
+def test_pricing_rebuilds_from_journal(restart, tmp_path):
+    pricing = restart()
+    pricing.update_competitor_data("1", {"comp_avg": 10.0})
+    pricing.update_competitor_data("2", {"comp_avg": 20.0})
+    pricing.update_competitor_data("1", {"comp_avg": 11.0})
+    pricing.log_competitor_scan("1", "Serum", {"comp_avg": 11.0})
+    pricing.log_competitor_scan("2", "Toner", {"comp_avg": 20.0})
+    pricing._COMPETITOR_JOURNAL.close()
+    pricing._SCAN_JOURNAL.close()
+    # killed mid-append: torn tail on both journals
+    with open(tmp_path / "competitor_data.jsonl", "ab") as f:
+        f.write(b'{"v":"3","d":{"comp_')
+    with open(tmp_path / "scan_history.jsonl", "ab") as f:
+        f.write(b'{"variant_id":"3"')
+
+    pricing = restart()
+    assert pricing.get_all_competitor_data() == {"1": {"comp_avg": 11.0}, "2": {"comp_avg": 20.0}}
+    assert _scanned(pricing) == ["1", "2"]
+
+
+def test_pricing_imports_legacy_json_once(restart, tmp_path):
+    (tmp_path / "competitor_data.json").write_text(json.dumps({"7": {"comp_avg": 7.0}}))
+    (tmp_path / "scan_history.json").write_text(json.dumps([
+        {"timestamp": "2026-01-01T00:00:00Z", "variant_id": "7", "item": "Cream"}]))
+
+    pricing = restart()
+    assert pricing.get_all_competitor_data() == {"7": {"comp_avg": 7.0}}
+    assert _scanned(pricing) == ["7"]
+    # the import was compacted into the journals, which take precedence from now on
+    assert (tmp_path / "competitor_data.jsonl").exists() and (tmp_path / "scan_history.jsonl").exists()
+    pricing.update_competitor_data("8", {"comp_avg": 8.0})
+    (tmp_path / "competitor_data.json").write_text(json.dumps({"9": {"comp_avg": 9.0}}))
+
+    pricing = restart()
+    assert pricing.get_all_competitor_data() == {"7": {"comp_avg": 7.0}, "8": {"comp_avg": 8.0}}
+    assert _scanned(pricing) == ["7"]
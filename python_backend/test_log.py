@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Checks for utils/log, the structured logging facade used on hot paths.
+
+  - every=N lets the 1st, N+1st ... call through and reports how many were dropped
+  - per_minute=N caps a call site per 60 s window, the next window reports the drops
+  - debug lines are skipped (args never formatted) while DEBUG is off
+
+Usage:
+    pytest test_log.py
+"""
+import logging
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils import log as log_module  # noqa: E402
+from utils.log import ROOT, get_logger, set_level  # noqa: E402
+
+
+@pytest.fixture
+def logs(caplog):
+    """caplog sees "mirai.*" records (the tree doesn't propagate to the root logger)."""
+    get_logger("test")
+    root = logging.getLogger(ROOT)
+    root.addHandler(caplog.handler)
+    caplog.set_level(logging.DEBUG, logger=ROOT)
+    root.setLevel(logging.INFO)
+    try:
+        yield caplog
+    finally:
+        root.removeHandler(caplog.handler)
+
+
+def _suppressed(record):
+    return record.fields.get("suppressed")
+
+
+def test_every_n_sampling(logs):
+    log = get_logger("test.every")
+    for i in range(7):
+        log.info("cached value %d", i, every=3)
+    assert [r.getMessage() for r in logs.records] == ["cached value 0", "cached value 3", "cached value 6"]
+    assert [_suppressed(r) for r in logs.records] == [None, 2, 2]
+
+
+def test_per_minute_rate_limit(logs, monkeypatch):
+    log = get_logger("test.per_minute")
+    now = [1000.0]
+    monkeypatch.setattr(log_module.time, "monotonic", lambda: now[0])
+    for i in range(5):
+        log.warning("fetch failed %d", i, per_minute=2)
+    assert [r.getMessage() for r in logs.records] == ["fetch failed 0", "fetch failed 1"]
+    assert [r.levelno for r in logs.records] == [logging.WARNING] * 2
+
+    now[0] += 61
+    log.warning("fetch failed %d", 5, per_minute=2)
+    assert logs.records[-1].getMessage() == "fetch failed 5"
+    assert _suppressed(logs.records[-1]) == 3
+
+
+def test_debug_skipped_when_disabled(logs):
+    class Expensive:
+        formatted = 0
+
+        def __str__(self):
+            Expensive.formatted += 1
+            return "expensive"
+
+    log = get_logger("test.debug")
+    set_level("test.debug", "INFO")
+    log.debug("payload %s", Expensive(), shop="x")
+    assert not logs.records
+    assert Expensive.formatted == 0
+
+    set_level("test.debug", "DEBUG")
+    log.debug("payload %s", Expensive(), shop="x")
+    assert [r.getMessage() for r in logs.records] == ["payload expensive"]
+    assert logs.records[0].fields == {"shop": "x"}
@@ -1,9 +1,10 @@
 # transform.py — DataFrames + aggregates + channel normalization (no REST needed)
 from __future__ import annotations
 from typing import List, Dict, Any
+import numpy as np
 import pandas as pd
 
-from channel_normalizer import attach_normalized_channel
+from channel_normalizer import normalize_channel_columns
 
 def _money(node: Dict[str, Any], path: List[str]) -> float:
     cur = node
@@ -14,36 +15,60 @@ def _money(node: Dict[str, Any], path: List[str]) -> float:
     except Exception:
         return 0.0
 
-def _utm(o: Dict[str, Any], which: str, key: str) -> str:
-    try:
-        return (
-            ((o.get("customerJourneySummary") or {})
-              .get(which) or {})
-              .get("utmParameters") or {}
-        ).get(key) or ""
-    except Exception:
-        return ""
+def _visit(o: Dict[str, Any], which: str) -> Dict[str, Any]:
+    v = (o.get("customerJourneySummary") or {})
+    v = v.get(which) if isinstance(v, dict) else None
+    return v if isinstance(v, dict) else {}
 
-def _ref_url(o: Dict[str, Any], which: str) -> str:
-    try:
-        return (
-            ((o.get("customerJourneySummary") or {})
-              .get(which) or {})
-        ).get("referrerUrl") or ""
-    except Exception:
-        return ""
+def _visit_fields(visit: Dict[str, Any]) -> tuple:
+    """(utm source, utm medium, referrerUrl) of one customerJourney visit"""
+    utm = visit.get("utmParameters") or {}
+    if not isinstance(utm, dict):
+        utm = {}
+    return utm.get("source") or "", utm.get("medium") or "", visit.get("referrerUrl") or ""
 
-def orders_to_df(orders: List[Dict[str, Any]]) -> pd.DataFrame:
-    rows: List[Dict[str, Any]] = []
-    for o in orders or []:
-        name = o.get("name") or ""
-        created = o.get("createdAt")
-        source_name = (o.get("sourceName") or "")
+# Column order of the orders frame
+ORDER_COLUMNS = (
+    "created_at", "name", "sourceName", "utm_source", "utm_medium", "referrer_url",
+    "gross", "discounts", "refunds", "net", "cogs", "shipping_charged", "orders", "rcr",
+)
 
-        # UTMs and referrerUrl (GraphQL only)
-        utm_source = _utm(o, "lastVisit", "source") or _utm(o, "firstVisit", "source")
-        utm_medium = _utm(o, "lastVisit", "medium") or _utm(o, "firstVisit", "medium")
-        referrer_url = _ref_url(o, "lastVisit") or _ref_url(o, "firstVisit")
+def orders_to_df(orders: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    One row per order. Fields are extracted in a single pass straight into
+    per-column arrays (no per-order dicts), then channel_norm is added with
+    the vectorized channel normalizer.
+    """
+    orders = orders or []
+    n = len(orders)
+    if n == 0:
+        return pd.DataFrame()
+
+    created_at: List[Any] = [None] * n
+    names: List[str] = [""] * n
+    source_names: List[str] = [""] * n
+    utm_sources: List[str] = [""] * n
+    utm_mediums: List[str] = [""] * n
+    referrers: List[str] = [""] * n   # <— key for Google detection without UTMs
+    gross_a = np.zeros(n)
+    discounts_a = np.zeros(n)
+    refunds_a = np.zeros(n)
+    net_a = np.zeros(n)
+    cogs_a = np.zeros(n)
+    shipping_a = np.zeros(n)
+    rcr_a = np.zeros(n, dtype=np.int64)
+
+    for i, o in enumerate(orders):
+        created_at[i] = o.get("createdAt")
+        names[i] = o.get("name") or ""
+        source_names[i] = o.get("sourceName") or ""
+
+        # UTMs and referrerUrl (GraphQL only): lastVisit wins, firstVisit fills gaps
+        last_src, last_med, last_ref = _visit_fields(_visit(o, "lastVisit"))
+        if not (last_src and last_med and last_ref):
+            first_src, first_med, first_ref = _visit_fields(_visit(o, "firstVisit"))
+            last_src, last_med, last_ref = last_src or first_src, last_med or first_med, last_ref or first_ref
+        utm_sources[i], utm_mediums[i], referrers[i] = last_src, last_med, last_ref
 
         # Line items → gross + COGS
         gross = 0.0
@@ -65,38 +90,29 @@ def orders_to_df(orders: List[Dict[str, Any]]) -> pd.DataFrame:
         discounts = _money(o, ["currentTotalDiscountsSet", "shopMoney"])
         refunds   = _money(o, ["totalRefundedSet", "shopMoney"])
         shipping_charged = _money(o, ["currentShippingPriceSet", "shopMoney"])
-        net = max(gross - discounts - refunds, 0.0)
+
+        # Python round() per value keeps amounts bit-identical to the row builder
+        gross_a[i] = round(gross, 2)
+        discounts_a[i] = round(discounts, 2)
+        refunds_a[i] = round(refunds, 2)
+        net_a[i] = round(max(gross - discounts - refunds, 0.0), 2)
+        cogs_a[i] = round(cogs, 2)
+        shipping_a[i] = round(shipping_charged, 2)
 
         # Returning customer
         try:
-            rcr = int(((o.get("customer") or {}).get("numberOfOrders") or 0) > 1)
+            rcr_a[i] = int(((o.get("customer") or {}).get("numberOfOrders") or 0) > 1)
         except Exception:
-            rcr = 0
-
-        rows.append({
-            "created_at": created,
-            "name": name,
-            "sourceName": source_name,
-            "utm_source": utm_source,
-            "utm_medium": utm_medium,
-            "referrer_url": referrer_url,  # <— key for Google detection without UTMs
-
-            "gross": round(gross, 2),
-            "discounts": round(discounts, 2),
-            "refunds": round(refunds, 2),
-            "net": round(net, 2),
-            "cogs": round(cogs, 2),
-            "shipping_charged": round(shipping_charged, 2),
-            "orders": 1,
-            "rcr": rcr,
-        })
-
-    df = pd.DataFrame(rows)
-    if df.empty:
-        return df
+            pass
+
+    df = pd.DataFrame(dict(zip(ORDER_COLUMNS, (
+        created_at, names, source_names, utm_sources, utm_mediums, referrers,
+        gross_a, discounts_a, refunds_a, net_a, cogs_a, shipping_a,
+        np.ones(n, dtype=np.int64), rcr_a,
+    ))))
 
     # Normalize using Shopify-like rules (UTMs + referrerUrl + sourceName)
-    df = attach_normalized_channel(df)
+    df["channel_norm"] = normalize_channel_columns(df)
     return df
 
 def aggregate_shopify(df: pd.DataFrame) -> Dict[str, Any]:
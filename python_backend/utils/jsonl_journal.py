@@ -0,0 +1,104 @@
+# utils/jsonl_journal.py
+"""
+Append-only JSONL journal with atomic compaction.
+
+Each append writes one JSON line and flushes, so persisting a change costs
+O(1) regardless of how much history the file holds. Callers replay the
+entries on startup to rebuild their in-memory state and periodically call
+rewrite() with a compacted entry list.
+
+Crash safety:
+  - appends only ever add whole lines; a torn last line (process killed
+    mid-write) is dropped and truncated away by load()
+  - rewrite() writes a temp file, fsyncs it and os.replace()s it over the
+    journal, so readers see either the old or the new file, never a mix
+"""
+from __future__ import annotations
+import os
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class JsonlJournal:
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = path
+        self.fsync = fsync
+        self.appended_since_compact = 0
+        self._fh = None
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Read all entries, dropping (and truncating) a torn or corrupt tail."""
+        entries: List[Dict[str, Any]] = []
+        if not os.path.exists(self.path):
+            return entries
+        with self._lock:
+            good_bytes = 0
+            with open(self.path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        break
+                    good_bytes += len(line)
+            if good_bytes < os.path.getsize(self.path):
+                print(f"⚠️ Truncating damaged tail of {self.path} at byte {good_bytes}")
+                self._close()
+                with open(self.path, "r+b") as f:
+                    f.truncate(good_bytes)
+            self.appended_since_compact = len(entries)
+        return entries
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            if self._fh is None:
+                self._fh = open(self.path, "a", encoding="utf-8")
+            self._fh.write(line)
+            self._fh.flush()
+            if self.fsync:
+                os.fsync(self._fh.fileno())
+            self.appended_since_compact += 1
+
+    def rewrite(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """Atomically replace the journal with `entries` (compaction). Returns the entry count."""
+        tmp = f"{self.path}.tmp"
+        count = 0
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, separators=(",", ":"), default=str) + "\n")
+                    count += 1
+                f.flush()
+                os.fsync(f.fileno())
+            self._close()
+            os.replace(tmp, self.path)
+            self.appended_since_compact = 0
+        return count
+
+    def _close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+
+def load_legacy_json(path: str) -> Optional[Any]:
+    """Contents of a pre-journal JSON file, or None if absent/unreadable."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ Could not read legacy file {path}: {e}")
+        return None
@@ -0,0 +1,56 @@
+# utils/lazy_import.py
+"""
+Deferred import of a heavy module attribute.
+
+    db_service = LazyImport("database.service", "db_service")
+
+    if db_service and db_service.is_available():   # first use imports the module
+        await db_service.get_items()
+
+The proxy is falsy when the import fails (missing optional dependency), which
+replaces the try/except-ImportError + *_AVAILABLE flag pattern without paying
+the import cost at server start. Attribute access forwards to the real object.
+"""
+from __future__ import annotations
+import importlib
+import threading
+from typing import Any, Optional
+
+
+class LazyImport:
+    def __init__(self, module: str, attr: Optional[str] = None):
+        self._module = module
+        self._attr = attr
+        self._target: Any = None
+        self._error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Any:
+        if self._target is None and self._error is None:
+            with self._lock:
+                if self._target is None and self._error is None:
+                    try:
+                        mod = importlib.import_module(self._module)
+                        self._target = getattr(mod, self._attr) if self._attr else mod
+                    except ImportError as e:
+                        self._error = e
+                        print(f"⚠️ {self._module} import failed: {e}")
+        return self._target
+
+    @property
+    def loaded(self) -> bool:
+        """True once the import has happened (does not trigger it)."""
+        return self._target is not None
+
+    def __bool__(self) -> bool:
+        return self._load() is not None
+
+    def __getattr__(self, name: str) -> Any:
+        target = self._load()
+        if target is None:
+            raise AttributeError(f"{self._module} unavailable: {self._error}")
+        return getattr(target, name)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._target is not None else ("failed" if self._error else "deferred")
+        return f"<LazyImport {self._module}{'.' + self._attr if self._attr else ''} ({state})>"
@@ -0,0 +1,179 @@
+# utils/log.py
+"""
+Structured logging facade for hot paths (reports, ad spend, pricing, sync jobs).
+
+    from utils.log import get_logger
+    log = get_logger("gads")
+
+    log.debug("Fetching spend for %s", day_iso, tz=shop_tz)   # skipped before any formatting when DEBUG is off
+    log.info("Using cached value $%.2f", value, every=50)      # sampled: 1st, 51st, 101st ... call
+    log.warning("Spend fetch failed: %s", err, per_minute=5)   # rate-limited per call site
+    log.exception("Sync failed")                               # adds the traceback
+
+- messages use %-style args and keyword fields; nothing is formatted unless the
+  level is enabled and the sampler lets the line through
+- sampled / rate-limited lines carry "suppressed=N" for what was dropped since
+  the last emitted line of the same call site
+- loggers live under the "mirai." stdlib namespace (handlers, pytest caplog and
+  logging.config keep working); output goes to stdout like the print() calls
+  it replaces
+
+Env:
+  LOG_LEVEL     default level (default INFO)
+  LOG_LEVELS    per-logger overrides, e.g. "gads=DEBUG,pricing=WARNING"
+  LOG_FORMAT    text (default) or json (one object per line)
+"""
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+ROOT = "mirai"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+
+_PREFIX = {logging.WARNING: "⚠️ ", logging.ERROR: "❌ ", logging.CRITICAL: "❌ "}
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None) or {}
+        name = record.name[len(ROOT) + 1:] if record.name.startswith(ROOT + ".") else record.name
+        line = f"{_PREFIX.get(record.levelno, '')}[{name}] {record.getMessage()}"
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {"ts": round(record.created, 3), "level": record.levelname.lower(),
+               "logger": record.name, "msg": record.getMessage()}
+        out.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, default=str)
+
+
+_configured = False
+_config_lock = threading.Lock()
+
+
+def _parse_level(value: str) -> int:
+    level = logging.getLevelName(value.strip().upper())
+    return level if isinstance(level, int) else logging.INFO
+
+
+def configure(level: Optional[str] = None, levels: Optional[str] = None, fmt: Optional[str] = None) -> None:
+    """(Re)configure the "mirai" logger tree; called implicitly by get_logger()."""
+    global _configured
+    with _config_lock:
+        root = logging.getLogger(ROOT)
+        root.setLevel(_parse_level(level or LOG_LEVEL))
+        root.propagate = False
+        for h in list(root.handlers):
+            if getattr(h, "_mirai", False):
+                root.removeHandler(h)
+        handler = logging.StreamHandler(sys.stdout)
+        handler._mirai = True
+        handler.setFormatter(_JsonFormatter() if (fmt or LOG_FORMAT) == "json" else _TextFormatter())
+        root.addHandler(handler)
+        for item in (levels if levels is not None else LOG_LEVELS).split(","):
+            if "=" in item:
+                name, lvl = item.split("=", 1)
+                logging.getLogger(f"{ROOT}.{name.strip()}").setLevel(_parse_level(lvl))
+        _configured = True
+
+
+def set_level(name: str, level: str) -> None:
+    """Runtime override for one logger, e.g. set_level("gads", "DEBUG")."""
+    logging.getLogger(f"{ROOT}.{name}").setLevel(_parse_level(level))
+
+
+class _Sampler:
+    """Per call-site counters for every=N sampling and per_minute=N rate limits."""
+    __slots__ = ("calls", "window_start", "window_count", "suppressed")
+
+    def __init__(self):
+        self.calls = 0
+        self.window_start = 0.0
+        self.window_count = 0
+        self.suppressed = 0
+
+    def allow(self, every: Optional[int], per_minute: Optional[int]) -> bool:
+        self.calls += 1
+        if every and (self.calls - 1) % every:
+            self.suppressed += 1
+            return False
+        if per_minute:
+            now = time.monotonic()
+            if now - self.window_start >= 60:
+                self.window_start, self.window_count = now, 0
+            if self.window_count >= per_minute:
+                self.suppressed += 1
+                return False
+            self.window_count += 1
+        return True
+
+
+class Logger:
+    __slots__ = ("_logger", "_samplers", "_lock")
+
+    def __init__(self, logger: logging.Logger):
+        self._logger = logger
+        self._samplers: Dict[Tuple[int, str], _Sampler] = {}
+        self._lock = threading.Lock()
+
+    def is_enabled(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
+
+    def _log(self, level: int, msg: str, args: tuple, fields: Dict[str, Any],
+             every: Optional[int] = None, per_minute: Optional[int] = None, exc_info: Any = None) -> None:
+        if not self._logger.isEnabledFor(level):
+            return
+        if every or per_minute:
+            with self._lock:
+                sampler = self._samplers.get((level, msg))
+                if sampler is None:
+                    sampler = self._samplers[(level, msg)] = _Sampler()
+                if not sampler.allow(every, per_minute):
+                    return
+                if sampler.suppressed:
+                    fields = {**fields, "suppressed": sampler.suppressed}
+                    sampler.suppressed = 0
+        self._logger.log(level, msg, *args, exc_info=exc_info, extra={"fields": fields}, stacklevel=3)
+
+    def debug(self, msg: str, *args, every: Optional[int] = None, per_minute: Optional[int] = None, **fields):
+        self._log(logging.DEBUG, msg, args, fields, every, per_minute)
+
+    def info(self, msg: str, *args, every: Optional[int] = None, per_minute: Optional[int] = None, **fields):
+        self._log(logging.INFO, msg, args, fields, every, per_minute)
+
+    def warning(self, msg: str, *args, every: Optional[int] = None, per_minute: Optional[int] = None, **fields):
+        self._log(logging.WARNING, msg, args, fields, every, per_minute)
+
+    def error(self, msg: str, *args, every: Optional[int] = None, per_minute: Optional[int] = None, **fields):
+        self._log(logging.ERROR, msg, args, fields, every, per_minute)
+
+    def exception(self, msg: str, *args, **fields):
+        self._log(logging.ERROR, msg, args, fields, exc_info=True)
+
+
+_loggers: Dict[str, Logger] = {}
+
+
+def get_logger(name: str) -> Logger:
+    """Facade for logger "mirai.<name>" (configured from LOG_* env on first use)."""
+    if not _configured:
+        configure()
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = _loggers.setdefault(name, Logger(logging.getLogger(f"{ROOT}.{name}")))
+    return logger
@@ -16,6 +16,8 @@ cd python_backend
 # Ensure all required packages are installed
 pip install --quiet sqlalchemy[asyncio] asyncpg psycopg2-binary PyJWT httpx openai 2>/dev/null || true
 
+# One token per boot: background tasks left "running" by an earlier boot are failed
+export BACKGROUND_TASK_BOOT_ID="$(date +%s)-$$"
 uvicorn simple_server:app --host 127.0.0.1 --port 8080 2>&1 | sed 's/^/[PYTHON] /' &
 PYTHON_PID=$!
 echo "Python backend PID: $PYTHON_PID"